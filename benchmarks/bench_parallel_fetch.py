@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""並列ページ取得のベンチマーク（mock freee API に対して pages/sec を計測）"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# パスを追加
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from freee_client import AsyncFreeeAPIClient
+from http_pool import ConnectionPool
+from mock_freee import COMPANY_ID, MockFreeeServer
+from rate_limit import RateLimiter
+
+
+async def run_once(
+    server: MockFreeeServer, resource: str, concurrency: int, rate: float, burst: int
+) -> tuple[int, int, float]:
+    """1回分の fetch_all を実行して (件数, ページ数, 秒) を返す"""
+    client = AsyncFreeeAPIClient(
+        access_token="bench",
+        company_id=COMPANY_ID,
+        base_url=server.base_url,
+        pool=ConnectionPool(pool_size=max(concurrency, 1)),
+        rate_limiter=RateLimiter(rate=rate, burst=burst),
+    )
+    server.reset_stats()
+    try:
+        start = time.perf_counter()
+        records = await client.fetch_all(resource, concurrency=concurrency)
+        elapsed = time.perf_counter() - start
+    finally:
+        await client.aclose()
+    return len(records), server.request_count, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--resource", default="wallet_txns", choices=["deals", "wallet_txns"])
+    parser.add_argument("--records", type=int, default=5000)
+    parser.add_argument("--latency", type=float, default=0.05, help="mockの応答遅延（秒）")
+    parser.add_argument("--concurrency", default="1,2,4,8,16")
+    parser.add_argument("--rate", type=float, default=1000.0, help="レート制限（req/sec）")
+    parser.add_argument("--burst", type=int, default=100)
+    args = parser.parse_args()
+
+    levels = [int(c) for c in args.concurrency.split(",")]
+    with MockFreeeServer(latency=args.latency, records={args.resource: args.records}) as server:
+        print(
+            f"resource={args.resource} records={args.records} latency={args.latency}s "
+            f"rate={args.rate}/s burst={args.burst}"
+        )
+        print(f"{'concurrency':>11} {'records':>8} {'pages':>6} {'seconds':>8} {'pages/sec':>10}")
+        for concurrency in levels:
+            count, pages, elapsed = asyncio.run(
+                run_once(server, args.resource, concurrency, args.rate, args.burst)
+            )
+            print(
+                f"{concurrency:>11} {count:>8} {pages:>6} {elapsed:>8.2f} {pages / elapsed:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
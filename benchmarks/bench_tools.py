@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+MCPツールとAPIクライアントのベンチマーク（mock freee API に対して計測）
+
+シナリオごとに スループット（calls/sec）・p50/p99レイテンシ・メモリピーク・出力バイト数・
+HTTPリクエスト数・リトライ数を計測する。--output で結果をJSONに保存し、
+--baseline で以前の結果と比較して悪化していれば終了コード1を返す（回帰検出用）。
+ツール呼び出しがエラーになったシナリオは無効として比較せず、終了コード1を返す
+（障害を注入しているときは全件がエラーの場合だけ）。
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+# パスを追加
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from mcp.server import Server
+from mcp.types import CallToolRequest, CallToolRequestParams
+
+import tools
+from freee_client import AsyncFreeeAPIClient, FreeeAPIClient
+from http_pool import ConnectionPool
+from metrics import METRICS
+from mirror import MirrorStore
+from mock_freee import COMPANY_ID, MockFreeeServer
+from rate_limit import RateLimiter
+
+# MCPツール経由のシナリオ: (シナリオ名, ツール名, 引数)
+TOOL_SCENARIOS = [
+    ("list_accounts", "list_accounts", {}),
+    ("list_deals", "list_deals", {"max_records": 500}),
+    (
+        "list_deals_csv",
+        "list_deals",
+        {"max_records": 500, "format": "csv", "fields": ["id", "issue_date", "amount"]},
+    ),
+    ("list_wallet_txns", "list_wallet_txns", {"max_records": 1000, "format": "json_compact"}),
+    ("list_invoices", "list_invoices", {"max_records": 300}),
+    ("summarize_deals", "summarize_deals", {"group_by": "account_item"}),
+    ("summarize_wallet_txns", "summarize_wallet_txns", {}),
+    ("get_trial_balance_pl", "get_trial_balance_pl", {"fiscal_year": 2024}),
+    ("get_trial_balance_bs", "get_trial_balance_bs", {"fiscal_year": 2024, "end_month": 9}),
+]
+
+# FreeeAPIClient（同期）を直接呼ぶシナリオ: (シナリオ名, 呼び出し)
+CLIENT_SCENARIOS: List[tuple[str, Callable[[FreeeAPIClient], Any]]] = [
+    ("client.fetch_all.deals", lambda client: client.fetch_all("deals")),
+    ("client.fetch_all.wallet_txns", lambda client: client.fetch_all("wallet_txns")),
+    ("client.list_deals", lambda client: client.list_deals(limit=100)),
+    ("client.list_accounts", lambda client: client.list_accounts()),
+    ("client.trial_pl", lambda client: client.get_trial_balance_pl(2024)),
+]
+
+# --baseline 比較で悪化とみなす指標（高いほど悪いもの / 低いほど悪いもの）
+HIGHER_IS_WORSE = ("p50_ms", "p99_ms", "peak_kb", "bytes_per_call", "requests_per_call")
+LOWER_IS_WORSE = ("calls_per_sec",)
+
+
+def percentile(values: List[float], q: float) -> float:
+    """最近傍順位法の分位点"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(q * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def summarize_run(
+    name: str, latencies: List[float], elapsed: float, peak: int, sizes: List[int], requests: int
+) -> Dict:
+    """1シナリオ分の計測値をまとめる"""
+    calls = len(latencies)
+    return {
+        "scenario": name,
+        "calls": calls,
+        "calls_per_sec": round(calls / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.5) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "peak_kb": round(peak / 1024, 1),
+        "bytes_per_call": round(sum(sizes) / len(sizes)) if sizes else 0,
+        "requests_per_call": round(requests / calls, 2) if calls else 0.0,
+        "retries": int(METRICS.counter_total("freee_http_retries_total")),
+        "errors": int(METRICS.counter_total("freee_tool_calls_total", status="error")),
+    }
+
+
+def measure_peak(run: Callable[[], Any]) -> tuple[Any, int]:
+    """1回分を tracemalloc 付きで実行して (戻り値, メモリピーク) を返す"""
+    tracemalloc.start()
+    try:
+        result = run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, peak
+
+
+# ========== MCPツール ==========
+
+
+def tool_server(base_url: str, args: argparse.Namespace, mirror_dir: str) -> tuple:
+    """ツールを登録したMCPサーバーとクライアントを作る（シナリオごとにキャッシュは空から）"""
+    client = AsyncFreeeAPIClient(
+        access_token="bench",
+        company_id=COMPANY_ID,
+        base_url=base_url,
+        pool=ConnectionPool(pool_size=args.concurrency * 2),
+        rate_limiter=RateLimiter(rate=args.rate, burst=args.burst),
+        fetch_concurrency=args.fetch_concurrency,
+    )
+    server = Server("freee-bench")
+    mirror = MirrorStore(str(Path(mirror_dir) / "mirror.db"))
+    tools.register_tools(server, lambda company_id=None, identity=None: client, lambda: mirror)
+    return server, client, mirror
+
+
+async def call_tool(server: Server, name: str, arguments: Dict) -> int:
+    """call_tool をMCPのリクエストハンドラ経由で実行し、出力バイト数を返す"""
+    request = CallToolRequest(
+        method="tools/call", params=CallToolRequestParams(name=name, arguments=arguments)
+    )
+    result = await server.request_handlers[CallToolRequest](request)
+    return sum(len(content.text.encode()) for content in result.root.content)
+
+
+async def bench_tool(
+    server: Server, scenario: str, name: str, arguments: Dict, mock: MockFreeeServer, args
+) -> Dict:
+    """ツールを iterations 回（concurrency 並列）呼び出して計測"""
+    # 初回だけのコスト（スキーマ検証の準備など）を除くため、1回呼んでからメモリピークを取る
+    await call_tool(server, name, arguments)
+    tracemalloc.start()
+    try:
+        await call_tool(server, name, arguments)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    METRICS.reset()
+    mock.reset_stats()
+    latencies: List[float] = []
+    sizes: List[int] = []
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def one() -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            sizes.append(await call_tool(server, name, arguments))
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(args.iterations)))
+    elapsed = time.perf_counter() - started
+    return summarize_run(scenario, latencies, elapsed, peak, sizes, mock.request_count)
+
+
+async def run_tool_scenarios(mock: MockFreeeServer, args, selected: List[str]) -> List[Dict]:
+    results = []
+    with tempfile.TemporaryDirectory() as mirror_dir:
+        for scenario, name, arguments in TOOL_SCENARIOS:
+            if selected and scenario not in selected:
+                continue
+            server, client, mirror = tool_server(mock.base_url, args, mirror_dir)
+            try:
+                results.append(await bench_tool(server, scenario, name, arguments, mock, args))
+            finally:
+                await client.aclose()
+                mirror.close()
+    return results
+
+
+# ========== FreeeAPIClient（同期） ==========
+
+
+def bench_client(
+    scenario: str, call: Callable[[FreeeAPIClient], Any], mock: MockFreeeServer, args
+) -> Dict:
+    """同期クライアントを iterations 回（concurrency スレッド）呼び出して計測"""
+    client = FreeeAPIClient(
+        access_token="bench",
+        company_id=COMPANY_ID,
+        base_url=mock.base_url,
+        pool=ConnectionPool(pool_size=args.concurrency * args.fetch_concurrency),
+        rate_limiter=RateLimiter(rate=args.rate, burst=args.burst),
+        fetch_concurrency=args.fetch_concurrency,
+    )
+    try:
+        call(client)
+        _, peak = measure_peak(lambda: call(client))
+
+        METRICS.reset()
+        mock.reset_stats()
+
+        def one() -> tuple[float, int]:
+            started = time.perf_counter()
+            result = call(client)
+            seconds = time.perf_counter() - started
+            return seconds, len(json.dumps(result, ensure_ascii=False).encode())
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            runs = list(executor.map(lambda _: one(), range(args.iterations)))
+        elapsed = time.perf_counter() - started
+    finally:
+        client.pool.close()
+    latencies = [seconds for seconds, _ in runs]
+    sizes = [size for _, size in runs]
+    return summarize_run(scenario, latencies, elapsed, peak, sizes, mock.request_count)
+
+
+def run_client_scenarios(mock: MockFreeeServer, args, selected: List[str]) -> List[Dict]:
+    return [
+        bench_client(scenario, call, mock, args)
+        for scenario, call in CLIENT_SCENARIOS
+        if not selected or scenario in selected
+    ]
+
+
+# ========== 出力・比較 ==========
+
+
+def print_table(results: List[Dict]) -> None:
+    columns = [
+        ("scenario", 30), ("calls_per_sec", 10), ("p50_ms", 9), ("p99_ms", 9),
+        ("peak_kb", 9), ("bytes_per_call", 14), ("requests_per_call", 17),
+        ("retries", 7), ("errors", 6),
+    ]
+    print(" ".join(f"{name:>{width}}" for name, width in columns))
+    for result in results:
+        print(" ".join(f"{result[name]:>{width}}" for name, width in columns))
+
+
+def mark_invalid(results: List[Dict], injecting: bool) -> List[str]:
+    """
+    エラーになった呼び出しがあるシナリオを無効（valid: False）にしてシナリオ名を返す
+
+    エラーの経路だけを計った値は速く見えるので、比較にも使わない。
+    障害を注入している（--rate-429 / --rate-5xx）ときは、全件がエラーの場合だけ無効にする。
+    """
+    invalid = []
+    for result in results:
+        errors = result["errors"]
+        result["valid"] = not errors or (injecting and errors < result["calls"])
+        if not result["valid"]:
+            invalid.append(result["scenario"])
+    return invalid
+
+
+def compare(results: List[Dict], baseline: List[Dict], tolerance: float) -> List[str]:
+    """
+    baseline より tolerance（割合）以上悪化した指標を返す（無効なシナリオは比較しない）
+
+    Returns:
+        ["list_deals: p99_ms 120.0 → 180.0 (+50%)", ...]
+    """
+    previous = {result["scenario"]: result for result in baseline}
+    regressions = []
+    for result in results:
+        before = previous.get(result["scenario"])
+        if not before or not result.get("valid", True) or not before.get("valid", True):
+            continue
+        for metric in HIGHER_IS_WORSE + LOWER_IS_WORSE:
+            old, new = before.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            worse = change > tolerance if metric in HIGHER_IS_WORSE else change < -tolerance
+            if worse:
+                regressions.append(
+                    f"{result['scenario']}: {metric} {old} → {new} ({change:+.0%})"
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--suite", choices=["all", "tools", "client"], default="all")
+    parser.add_argument("--scenario", action="append", default=[], help="実行するシナリオ名（複数可）")
+    parser.add_argument("--iterations", type=int, default=20, help="シナリオごとの呼び出し回数")
+    parser.add_argument("--concurrency", type=int, default=4, help="同時に実行する呼び出し数")
+    parser.add_argument("--fetch-concurrency", type=int, default=4, help="並列ページ取得数")
+    parser.add_argument("--latency", type=float, default=0.01, help="mockの応答遅延（秒）")
+    parser.add_argument("--latency-jitter", type=float, default=0.0)
+    parser.add_argument("--rate-429", type=float, default=0.0, help="429を返す割合（0〜1）")
+    parser.add_argument("--rate-5xx", type=float, default=0.0, help="503を返す割合（0〜1）")
+    parser.add_argument("--rate", type=float, default=1000.0, help="レート制限（req/sec）")
+    parser.add_argument("--burst", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="結果をJSONで保存するパス")
+    parser.add_argument("--baseline", help="比較する以前の結果（JSON）")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="悪化とみなす変化率")
+    parser.add_argument("--verbose", action="store_true", help="リトライ等のログを表示")
+    args = parser.parse_args()
+    # リトライは表の retries 列で数えるので、既定ではログを出さない
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.ERROR,
+        format="[freee] %(levelname)s %(name)s: %(message)s",
+    )
+
+    mock = MockFreeeServer(
+        latency=args.latency,
+        seed=args.seed,
+        latency_jitter=args.latency_jitter,
+        rate_429=args.rate_429,
+        rate_5xx=args.rate_5xx,
+    )
+    with mock:
+        print(
+            f"latency={args.latency}s jitter={args.latency_jitter}s 429={args.rate_429} "
+            f"5xx={args.rate_5xx} iterations={args.iterations} concurrency={args.concurrency}"
+        )
+        results: List[Dict] = []
+        if args.suite in ("all", "tools"):
+            results += asyncio.run(run_tool_scenarios(mock, args, args.scenario))
+        if args.suite in ("all", "client"):
+            results += run_client_scenarios(mock, args, args.scenario)
+    print_table(results)
+    invalid = mark_invalid(results, args.rate_429 > 0 or args.rate_5xx > 0)
+    for scenario in invalid:
+        print(f"❌ {scenario}: ツール呼び出しがエラーになったため計測値は無効")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, ensure_ascii=False, indent=2))
+    regressions = []
+    if args.baseline:
+        regressions = compare(
+            results, json.loads(Path(args.baseline).read_text()), args.tolerance
+        )
+        for regression in regressions:
+            print(f"⚠️  {regression}")
+    sys.exit(1 if regressions or invalid else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,528 @@
+"""ベンチマーク用のローカル mock freee API サーバー"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+COMPANY_ID = 1
+
+# mock事業所の期首月（4月始まり）
+FISCAL_START_MONTH = 4
+
+# 試算表に載せる勘定科目（account_item_id → 区分）
+BS_CATEGORIES = {1: "現金・預金", 2: "現金・預金", 3: "売上債権", 4: "仕入債務", 5: "その他流動負債"}
+PL_CATEGORIES = {6: "売上高"}
+
+# 事業所で使える税区分（一部）
+TAX_CODES = [
+    {"code": 2, "name": "non_taxable", "name_ja": "対象外"},
+    {"code": 21, "name": "sales_with_tax_10", "name_ja": "課税売上10%"},
+    {"code": 136, "name": "purchase_with_tax_10", "name_ja": "課対仕入10%"},
+    {"code": 163, "name": "purchase_with_tax_reduced_8", "name_ja": "課対仕入8%（軽）"},
+    {"code": 34, "name": "non_taxable_purchase", "name_ja": "非課仕入"},
+]
+
+DEFAULT_RECORDS = {
+    "deals": 2000,
+    "wallet_txns": 5000,
+    "invoices": 300,
+}
+
+
+def generate_data(records: Dict[str, int], seed: int = 0) -> Dict[str, List[Dict]]:
+    """決定的なダミーデータを生成"""
+    rng = random.Random(seed)
+    start = date(2024, 4, 1)
+    descriptions = ["ANTHROPIC_カード13", "AWS", "GITHUB", "SLACK", "NOTION", "振込 カ）ウンソン"]
+
+    deals = []
+    for i in range(records.get("deals", 0)):
+        amount = rng.randrange(100, 500000)
+        deals.append(
+            {
+                "id": 100000 + i,
+                "company_id": COMPANY_ID,
+                "issue_date": (start + timedelta(days=rng.randrange(365))).isoformat(),
+                "type": "expense",
+                "amount": amount,
+                "partner_id": rng.randrange(1, 50),
+                "details": [
+                    {
+                        "account_item_id": rng.randrange(1, 15),
+                        "tax_code": 136,
+                        "amount": amount,
+                        "description": rng.choice(descriptions),
+                    }
+                ],
+                "payments": [{"from_walletable_type": "credit_card",
+                              "from_walletable_id": rng.randrange(3, 5), "amount": amount}],
+            }
+        )
+    wallet_txns = [
+        {
+            "id": 200000 + i,
+            "company_id": COMPANY_ID,
+            "date": (start + timedelta(days=rng.randrange(365))).isoformat(),
+            "amount": rng.randrange(100, 500000),
+            "due_amount": 0,
+            "balance": 0,
+            "entry_side": rng.choice(["income", "expense"]),
+            "walletable_type": "credit_card",
+            "walletable_id": rng.randrange(1, 5),
+            "description": rng.choice(descriptions),
+            "status": 1,
+        }
+        for i in range(records.get("wallet_txns", 0))
+    ]
+    invoices = [
+        {
+            "id": 300000 + i,
+            "company_id": COMPANY_ID,
+            "issue_date": (start + timedelta(days=rng.randrange(365))).isoformat(),
+            "invoice_number": f"INV-{i:05d}",
+            "partner_id": rng.randrange(1, 50),
+            "total_amount": rng.randrange(1000, 1000000),
+        }
+        for i in range(records.get("invoices", 0))
+    ]
+    return {"deals": deals, "wallet_txns": wallet_txns, "invoices": invoices}
+
+
+def generate_masters(seed: int = 0) -> Dict[str, List[Dict]]:
+    """マスタデータ（勘定科目・口座・取引先）を生成"""
+    rng = random.Random(seed)
+    account_items = [
+        {"id": i, "name": name, "default_tax_code": 136}
+        for i, name in enumerate(
+            ["現金", "普通預金", "売掛金", "買掛金", "未払金", "売上高", "外注費", "通信費",
+             "支払手数料", "地代家賃", "旅費交通費", "消耗品費", "広告宣伝費", "会議費"],
+            start=1,
+        )
+    ]
+    walletables = [
+        {"id": 1, "name": "現金", "type": "wallet", "walletable_balance": rng.randrange(10**6)},
+        {"id": 2, "name": "三井住友銀行", "type": "bank_account",
+         "walletable_balance": rng.randrange(10**8)},
+        {"id": 3, "name": "アメックス", "type": "credit_card",
+         "walletable_balance": -rng.randrange(10**6)},
+        {"id": 4, "name": "楽天カード", "type": "credit_card",
+         "walletable_balance": -rng.randrange(10**6)},
+    ]
+    partners = [
+        {"id": i, "name": f"株式会社サンプル{i:02d}", "shortcut1": f"SAMPLE{i:02d}"}
+        for i in range(1, 50)
+    ]
+    return {"account_items": account_items, "walletables": walletables, "partners": partners}
+
+
+def fiscal_months(
+    fiscal_year: int, start_month: Optional[int] = None, end_month: Optional[int] = None
+) -> List[str]:
+    """会計年度の start_month〜end_month（暦月、期首から数える）を "YYYY-MM" のリストで返す"""
+    months = []
+    for i in range(12):
+        month = (FISCAL_START_MONTH - 1 + i) % 12 + 1
+        year = fiscal_year + (FISCAL_START_MONTH - 1 + i) // 12
+        months.append(f"{year}-{month:02d}")
+    labels = [int(m[-2:]) for m in months]
+    first = labels.index(start_month) if start_month else 0
+    last = labels.index(end_month) if end_month else 11
+    return months[first : last + 1]
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # 並列度の高いベンチマークで接続がバックログ溢れしないように
+    request_queue_size = 128
+
+
+class MockFreeeServer:
+    """
+    freee API のmockサーバー（スレッドで起動）
+
+    一覧APIは limit/offset によるページングに対応する。
+    deals / invoices は meta.total_count を返し、wallet_txns は返さない（実APIと同様）。
+    試算表（trial_bs / trial_pl）は取引の明細を勘定科目ごとに集計して返す。
+    rate_429 / rate_5xx を指定すると、その割合でリクエストを 429 / 503 で失敗させる。
+    quota を指定すると窓あたりのリクエスト数を超えた分を429にし、X-RateLimit-* ヘッダーを返す。
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.05,
+        records: Optional[Dict[str, int]] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        seed: int = 0,
+        latency_jitter: float = 0.0,
+        rate_429: float = 0.0,
+        rate_5xx: float = 0.0,
+        retry_after: int = 1,
+        quota: Optional[int] = None,
+        quota_window: float = 1.0,
+    ):
+        """
+        Args:
+            latency: 1リクエストあたりの応答遅延（秒）
+            records: リソースごとのレコード数
+            host: bindするホスト
+            port: bindするポート（0なら空きポート）
+            seed: ダミーデータ生成・障害注入の乱数シード
+            latency_jitter: 応答遅延に加えるランダムな揺らぎ（0〜この秒数）
+            rate_429: 429（レート制限）を返す割合（0〜1）
+            rate_5xx: 503を返す割合（0〜1）
+            retry_after: 429で返す Retry-After（秒）
+            quota: quota_window 秒あたりに受け付けるリクエスト数（超えたら429、省略時は無制限）
+            quota_window: クォータの窓（秒）
+        """
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.rate_429 = rate_429
+        self.rate_5xx = rate_5xx
+        self.retry_after = retry_after
+        self._rng = random.Random(seed)
+        self.quota = quota
+        self.quota_window = quota_window
+        self._window_start = time.monotonic()
+        self._window_count = 0
+        self.quota_exceeded = 0
+        self.data = generate_data(records or DEFAULT_RECORDS, seed)
+        self.masters = generate_masters(seed)
+        self.receipts: List[Dict] = []
+        # 設定すると {token: expires_at} にない・期限切れのtokenには401を返す（リフレッシュの検証用）
+        self.valid_tokens: Optional[Dict[str, float]] = None
+        self.unauthorized_count = 0
+        self.injected_429 = 0
+        self.injected_5xx = 0
+        self.request_count = 0
+        self.max_in_flight = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._httpd = _HTTPServer((host, port), self._make_handler())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockFreeeServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "MockFreeeServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.request_count = 0
+            self.max_in_flight = 0
+            self.unauthorized_count = 0
+            self.injected_429 = 0
+            self.injected_5xx = 0
+            self.quota_exceeded = 0
+
+    def handle(
+        self, method: str, path: str, query: Dict[str, str], body: Optional[Any] = None
+    ) -> tuple[int, Dict]:
+        """リクエストを処理して (status, body) を返す（body はJSONならdict、それ以外はbytes）"""
+        resource = path.rsplit("/", 1)[-1]
+        if method == "POST" and resource == "deals":
+            return self._create_deal(body or {})
+
+        if method == "POST" and resource == "receipts":
+            return self._create_receipt(body or b"")
+
+        if method == "GET" and path == f"/api/1/companies/{COMPANY_ID}":
+            return 200, {"company": self._company()}
+
+        if method == "GET" and path == f"/api/1/taxes/companies/{COMPANY_ID}":
+            return 200, {"taxes": TAX_CODES}
+
+        if method == "GET" and resource == "companies":
+            return 200, {"companies": [{"id": COMPANY_ID, "display_name": "mock事業所"}]}
+
+        if method == "GET" and resource in ("trial_bs", "trial_pl"):
+            return self._trial_balance(resource, query)
+
+        if method == "GET" and resource in self.masters:
+            return 200, {resource: self.masters[resource]}
+
+        if method == "GET" and resource in self.data:
+            rows = self._filter(resource, self.data[resource], query)
+            offset = int(query.get("offset", 0))
+            limit = min(int(query.get("limit", 20)), 100)
+            body = {resource: rows[offset : offset + limit]}
+            if resource != "wallet_txns":
+                body["meta"] = {"total_count": len(rows)}
+            return 200, body
+
+        return 404, {"message": f"not found: {path}"}
+
+    @staticmethod
+    def _filter(resource: str, rows: List[Dict], query: Dict[str, str]) -> List[Dict]:
+        """取引の絞り込み（partner_id / start_issue_date / end_issue_date）"""
+        if resource != "deals":
+            return rows
+        if "partner_id" in query:
+            rows = [r for r in rows if str(r.get("partner_id")) == query["partner_id"]]
+        if "start_issue_date" in query:
+            rows = [r for r in rows if r["issue_date"] >= query["start_issue_date"]]
+        if "end_issue_date" in query:
+            rows = [r for r in rows if r["issue_date"] <= query["end_issue_date"]]
+        return rows
+
+    @staticmethod
+    def _company() -> Dict:
+        """事業所の詳細（会計年度は期首月 FISCAL_START_MONTH の12ヶ月）"""
+        fiscal_years = []
+        for year in range(2022, 2027):
+            end_year = year + (FISCAL_START_MONTH - 1 + 11) // 12
+            end_month = (FISCAL_START_MONTH - 1 + 11) % 12 + 1
+            end_day = 31 if end_month in (1, 3, 5, 7, 8, 10, 12) else 30
+            fiscal_years.append(
+                {
+                    "start_date": f"{year}-{FISCAL_START_MONTH:02d}-01",
+                    "end_date": f"{end_year}-{end_month:02d}-{end_day}",
+                }
+            )
+        return {"id": COMPANY_ID, "display_name": "mock事業所", "fiscal_years": fiscal_years}
+
+    def _trial_balance(self, report: str, query: Dict[str, str]) -> tuple[int, Dict]:
+        """試算表（取引の明細を勘定科目ごとに月範囲で集計）"""
+        if "fiscal_year" not in query:
+            return 400, {"errors": [{"messages": ["fiscal_year は必須です"]}]}
+        fiscal_year = int(query["fiscal_year"])
+        start_month = int(query["start_month"]) if "start_month" in query else None
+        end_month = int(query["end_month"]) if "end_month" in query else None
+        months = fiscal_months(fiscal_year, start_month, end_month)
+        first, last = months[0], months[-1]
+
+        opening: Dict[int, int] = {}
+        period: Dict[int, int] = {}
+        for deal in self.data.get("deals", []):
+            month = deal["issue_date"][:7]
+            if month > last:
+                continue
+            target = period if month >= first else opening
+            for detail in deal.get("details", []):
+                account_item_id = detail.get("account_item_id")
+                amount = detail.get("amount") or 0
+                target[account_item_id] = target.get(account_item_id, 0) + amount
+
+        names = {item["id"]: item["name"] for item in self.masters["account_items"]}
+        if report == "trial_pl":
+            categories = {
+                account_item_id: PL_CATEGORIES.get(account_item_id, "販売費及び一般管理費")
+                for account_item_id in names
+                if account_item_id not in BS_CATEGORIES
+            }
+        else:
+            categories = BS_CATEGORIES
+        balances = []
+        for account_item_id, category in categories.items():
+            # PLは期首から、BSは前期からの繰越を含めた残高
+            opening_balance = 0 if report == "trial_pl" else opening.get(account_item_id, 0)
+            debit = period.get(account_item_id, 0)
+            balances.append(
+                {
+                    "account_item_id": account_item_id,
+                    "account_item_name": names[account_item_id],
+                    "account_category_name": category,
+                    "opening_balance": opening_balance,
+                    "debit_amount": debit,
+                    "credit_amount": 0,
+                    "closing_balance": opening_balance + debit,
+                }
+            )
+        return 200, {
+            report: {
+                "company_id": COMPANY_ID,
+                "fiscal_year": fiscal_year,
+                "start_month": int(first[-2:]),
+                "end_month": int(last[-2:]),
+                "created_at": f"{date.today().isoformat()} 00:00:00",
+                "balances": balances,
+            }
+        }
+
+    def _inject_failure(self) -> Optional[int]:
+        """障害注入（rate_429 / rate_5xx の割合で 429 / 503 を返す）"""
+        with self._lock:
+            roll = self._rng.random()
+            if roll < self.rate_429:
+                self.injected_429 += 1
+                return 429
+            if roll < self.rate_429 + self.rate_5xx:
+                self.injected_5xx += 1
+                return 503
+        return None
+
+    def _check_quota(self) -> tuple[bool, Dict[str, str]]:
+        """
+        固定窓のクォータを消費し、(受け付けたか, クォータヘッダー) を返す
+
+        quota 未設定なら常に受け付けてヘッダーも返さない。
+        """
+        if self.quota is None:
+            return True, {}
+        with self._lock:
+            now = time.monotonic()
+            if now - self._window_start >= self.quota_window:
+                self._window_start = now
+                self._window_count = 0
+            self._window_count += 1
+            accepted = self._window_count <= self.quota
+            if not accepted:
+                self.quota_exceeded += 1
+            remaining = max(self.quota - self._window_count, 0)
+            reset = self._window_start + self.quota_window - now
+        headers = {
+            "X-RateLimit-Limit": str(self.quota),
+            "X-RateLimit-Remaining": str(remaining),
+            "X-RateLimit-Reset": f"{reset:.3f}",
+        }
+        if not accepted:
+            headers["Retry-After"] = f"{reset:.3f}"
+        return accepted, headers
+
+    def _create_deal(self, payload: Dict) -> tuple[int, Dict]:
+        """取引を作成（details必須）"""
+        if not payload.get("issue_date") or not payload.get("details"):
+            return 400, {"errors": [{"messages": ["issue_date と details は必須です"]}]}
+        with self._lock:
+            deals = self.data.setdefault("deals", [])
+            deal = {
+                **payload,
+                "id": 100000 + len(deals),
+                "amount": sum(d.get("amount") or 0 for d in payload["details"]),
+            }
+            deals.append(deal)
+        return 201, {"deal": deal}
+
+    def _create_receipt(self, raw: bytes) -> tuple[int, Dict]:
+        """証憑を作成（multipart本文からファイルパートのContent-Typeを読む）"""
+        match = re.search(rb'name="receipt"[^\r\n]*\r\nContent-Type: ([^\r\n]+)', raw)
+        if not match:
+            return 400, {"errors": [{"messages": ["receipt は必須です"]}]}
+        with self._lock:
+            self.receipts.append({"mime_type": match.group(1).decode(), "size": len(raw)})
+            receipt = {"id": 400000 + len(self.receipts) - 1, **self.receipts[-1]}
+        return 201, {"receipt": receipt}
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _dispatch(self, method: str) -> None:
+                with server._lock:
+                    server.request_count += 1
+                    server._in_flight += 1
+                    server.max_in_flight = max(server.max_in_flight, server._in_flight)
+                extra_headers: Dict[str, str] = {}
+                try:
+                    length = int(self.headers.get("Content-Length") or 0)
+                    raw = self.rfile.read(length) if length else b""
+                    is_json = "json" in (self.headers.get("Content-Type") or "")
+                    request_body = json.loads(raw) if raw and is_json else raw or None
+                    jitter = server.latency_jitter
+                    time.sleep(server.latency + (random.uniform(0, jitter) if jitter else 0))
+                    parsed = urlparse(self.path)
+                    query = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+                    token = (self.headers.get("Authorization") or "").removeprefix("Bearer ")
+                    accepted, extra_headers = server._check_quota()
+                    injected = server._inject_failure()
+                    if not accepted:
+                        status, body = 429, {"message": "Too Many Requests"}
+                    elif injected == 429:
+                        status, body = 429, {"message": "Too Many Requests"}
+                    elif injected:
+                        status, body = injected, {"message": "Service Unavailable"}
+                    elif server.valid_tokens is not None and (
+                        server.valid_tokens.get(token, 0) < time.time()
+                    ):
+                        with server._lock:
+                            server.unauthorized_count += 1
+                        status, body = 401, {"message": "invalid access token"}
+                    else:
+                        status, body = server.handle(method, parsed.path, query, request_body)
+                finally:
+                    with server._lock:
+                        server._in_flight -= 1
+
+                payload = json.dumps(body, ensure_ascii=False).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                if status == 429 and "Retry-After" not in extra_headers:
+                    self.send_header("Retry-After", str(server.retry_after))
+                for name, value in extra_headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                self._dispatch("GET")
+
+            def do_POST(self):
+                self._dispatch("POST")
+
+            def log_message(self, format, *args):
+                """ログを抑制"""
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="mock freee API サーバー")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--latency-jitter", type=float, default=0.0)
+    parser.add_argument("--rate-429", type=float, default=0.0, help="429を返す割合（0〜1）")
+    parser.add_argument("--rate-5xx", type=float, default=0.0, help="503を返す割合（0〜1）")
+    parser.add_argument("--retry-after", type=int, default=1, help="429のRetry-After（秒）")
+    parser.add_argument("--quota", type=int, help="窓あたりのリクエスト数（超えたら429）")
+    parser.add_argument("--quota-window", type=float, default=1.0, help="クォータの窓（秒）")
+    args = parser.parse_args()
+
+    server = MockFreeeServer(
+        latency=args.latency,
+        port=args.port,
+        latency_jitter=args.latency_jitter,
+        rate_429=args.rate_429,
+        rate_5xx=args.rate_5xx,
+        retry_after=args.retry_after,
+        quota=args.quota,
+        quota_window=args.quota_window,
+    )
+    print(f"mock freee API: {server.base_url}")
+    server.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
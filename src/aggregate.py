@@ -0,0 +1,144 @@
+"""取引・口座明細のサーバー側集計（月別・勘定科目別・取引先別・口座別）"""
+
+from __future__ import annotations
+
+import heapq
+import re
+from typing import Dict, Iterable, List, Optional
+
+# リソースごとに使える group_by
+GROUP_BY_OPTIONS = {
+    "deals": ("month", "account_item", "partner", "walletable"),
+    "wallet_txns": ("month", "walletable", "entry_side"),
+}
+
+
+def _deal_rows(deal: Dict) -> List[tuple]:
+    """取引を (account_item_id, amount, description) の明細行に展開"""
+    details = deal.get("details") or []
+    if not details:
+        return [(None, deal.get("amount") or 0, "")]
+    return [
+        (d.get("account_item_id"), d.get("amount") or 0, d.get("description") or "")
+        for d in details
+    ]
+
+
+def summarize(
+    records: Iterable[Dict],
+    resource: str,
+    group_by: str = "month",
+    top_n: int = 10,
+    description_contains: Optional[str] = None,
+    description_regex: Optional[str] = None,
+) -> Dict:
+    """
+    レコードを1パスで集計する（保持するのはグループ別の合計と上位N件のみ）
+
+    Args:
+        records: freee APIの取引（deals）または口座明細（wallet_txns）
+        resource: "deals" or "wallet_txns"
+        group_by: 集計キー（GROUP_BY_OPTIONS参照）
+        top_n: 金額上位として返す件数
+        description_contains: 摘要の部分一致フィルタ（大文字小文字を区別しない）
+        description_regex: 摘要の正規表現フィルタ
+
+    Raises:
+        ValueError: 非対応の group_by・不正な正規表現
+
+    Returns:
+        {
+            "count": 120,
+            "total": 1234567,
+            "groups": [{"key": "2025-01", "count": 10, "total": 98000}, ...],
+            "top": [{"id": 1, "date": "2025-01-05", "amount": 50000, "description": "..."}, ...]
+        }
+    """
+    if group_by not in GROUP_BY_OPTIONS.get(resource, ()):
+        raise ValueError(
+            f"{resource} の group_by は {', '.join(GROUP_BY_OPTIONS.get(resource, ()))} のいずれか"
+        )
+
+    needle = description_contains.lower() if description_contains else None
+    try:
+        pattern = re.compile(description_regex) if description_regex else None
+    except re.error as e:
+        raise ValueError(f"description_regex の正規表現が不正です（{description_regex}）: {e}")
+
+    def matches(description: str) -> bool:
+        if needle is not None and needle not in description.lower():
+            return False
+        if pattern is not None and not pattern.search(description):
+            return False
+        return True
+
+    groups: Dict = {}
+    top: List[tuple] = []
+    count = 0
+    total = 0
+
+    def add(key, amount: int) -> None:
+        group = groups.setdefault(key, [0, 0])
+        group[0] += 1
+        group[1] += amount
+
+    for record in records:
+        if resource == "deals":
+            rows = [row for row in _deal_rows(record) if matches(row[2])]
+            if not rows:
+                continue
+            amount = sum(row[1] for row in rows)
+            record_date = record.get("issue_date") or ""
+            description = " / ".join(row[2] for row in rows if row[2])
+            if group_by == "account_item":
+                for account_item_id, row_amount, _ in rows:
+                    add(account_item_id, row_amount)
+            elif group_by == "partner":
+                add(record.get("partner_id"), amount)
+            elif group_by == "walletable":
+                payment = (record.get("payments") or [{}])[0]
+                add(payment.get("from_walletable_id"), amount)
+            else:
+                add(record_date[:7], amount)
+        else:
+            description = record.get("description") or ""
+            if not matches(description):
+                continue
+            amount = record.get("amount") or 0
+            record_date = record.get("date") or ""
+            if group_by == "walletable":
+                add(record.get("walletable_id"), amount)
+            elif group_by == "entry_side":
+                add(record.get("entry_side"), amount)
+            else:
+                add(record_date[:7], amount)
+
+        count += 1
+        total += amount
+        item = (amount, record.get("id"), record_date, description)
+        if len(top) < top_n:
+            heapq.heappush(top, item)
+        elif top_n and item > top[0]:
+            heapq.heapreplace(top, item)
+
+    ordered = sorted(
+        groups.items(),
+        key=(lambda kv: str(kv[0])) if group_by == "month" else (lambda kv: -kv[1][1]),
+    )
+    return {
+        "count": count,
+        "total": total,
+        "groups": [{"key": key, "count": c, "total": t} for key, (c, t) in ordered],
+        "top": [
+            {"id": record_id, "date": record_date, "amount": amount, "description": description}
+            for amount, record_id, record_date, description in sorted(top, reverse=True)
+        ],
+    }
+
+
+def attach_names(summary: Dict, names: Dict) -> Dict:
+    """グループのキー（ID）にマスタデータの名前を付与"""
+    for group in summary["groups"]:
+        if group["key"] in names:
+            group["name"] = names[group["key"]]
+    return summary
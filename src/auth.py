@@ -19,7 +19,7 @@ from dotenv import load_dotenv
 import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
-from token_store import TokenStore
+from token_store import DEFAULT_IDENTITY, TokenStore, identity_token_path
 
 # .envファイルを明示的に読み込み
 env_path = Path(__file__).parent.parent / ".env"
@@ -35,6 +35,7 @@ class FreeeOAuth:
         client_secret: str,
         redirect_uri: str = "http://localhost:8080/callback",
         base_url: str = "https://accounts.secure.freee.co.jp",
+        session: Optional[requests.Session] = None,
     ):
         self.client_id = client_id
         self.client_secret = client_secret
@@ -42,6 +43,8 @@ class FreeeOAuth:
         self.base_url = base_url
         self.code_verifier: Optional[str] = None
         self.authorization_code: Optional[str] = None
+        # APIクライアントとコネクションプールを共有する場合はSessionを渡す
+        self.session = session or requests.Session()
 
     def generate_pkce_pair(self) -> tuple[str, str]:
         """
@@ -155,7 +158,7 @@ class FreeeOAuth:
             "code_verifier": self.code_verifier,
         }
 
-        resp = requests.post(token_url, data=data)
+        resp = self.session.post(token_url, data=data, timeout=30)
         if resp.status_code != 200:
             raise RuntimeError(f"Token交換エラー: {resp.status_code} {resp.text}")
 
@@ -183,7 +186,7 @@ class FreeeOAuth:
             "refresh_token": refresh_token,
         }
 
-        resp = requests.post(token_url, data=data)
+        resp = self.session.post(token_url, data=data, timeout=30)
         if resp.status_code != 200:
             raise RuntimeError(f"Token更新エラー: {resp.status_code} {resp.text}")
 
@@ -192,10 +195,14 @@ class FreeeOAuth:
         return token_data
 
 
-def authenticate() -> Dict[str, str]:
+def authenticate(identity: str = DEFAULT_IDENTITY) -> Dict[str, str]:
     """
     初回認証フロー（CLIから実行）
 
+    Args:
+        identity: OAuth identity（複数のfreeeアカウントを使い分ける場合の名前）。
+            default 以外は ~/.freee-mcp/tokens/{identity}.enc に保存する
+
     Returns:
         token_data
     """
@@ -210,7 +217,7 @@ def authenticate() -> Dict[str, str]:
         )
 
     oauth = FreeeOAuth(client_id, client_secret, redirect_uri)
-    token_store = TokenStore(encryption_key)
+    token_store = TokenStore(encryption_key, identity_token_path(identity))
 
     # 既存tokenがあるかチェック
     if token_store.has_token():
@@ -256,9 +263,9 @@ def authenticate() -> Dict[str, str]:
 
 
 if __name__ == "__main__":
-    # CLI実行: 初回認証
+    # CLI実行: 初回認証（python src/auth.py [identity]）
     try:
-        token = authenticate()
+        token = authenticate(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_IDENTITY)
         print("\n🎉 認証完了！")
         print(f"Access Token: {token['access_token'][:20]}...")
     except Exception as e:
@@ -0,0 +1,131 @@
+"""マスタデータ用のインメモリTTLキャッシュ（LRU）"""
+
+from __future__ import annotations
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+# 変更頻度の低いマスタデータのTTL（秒）
+MASTER_TTLS: Dict[str, float] = {
+    "/api/1/companies": 3600,
+    "/api/1/account_items": 3600,
+    "/api/1/walletables": 3600,
+    "/api/1/partners": 600,
+    # 事業所の詳細（会計年度）。末尾のIDは {id} として引く
+    "/api/1/companies/{id}": 3600,
+    # 事業所で使える税区分
+    "/api/1/taxes/companies/{id}": 3600,
+}
+
+# 書き込みendpoint → 破棄するマスタデータ（取引作成時に取引先が自動登録されうる）
+WRITE_INVALIDATIONS: Dict[str, Tuple[str, ...]] = {
+    "/api/1/deals": ("/api/1/partners",),
+}
+
+# キャッシュミスを表す番兵
+MISSING = object()
+
+
+def master_ttl(endpoint: str) -> Optional[float]:
+    """マスタデータのendpointならTTL（秒）、キャッシュ対象外ならNone"""
+    ttl = MASTER_TTLS.get(endpoint)
+    if ttl is None:
+        ttl = MASTER_TTLS.get(re.sub(r"/\d+$", "/{id}", endpoint))
+    return ttl
+
+
+class TTLCache:
+    """
+    エントリごとに有効期限を持つLRUキャッシュ
+
+    キーは (endpoint, company_id)。上限件数を超えると最も古く使われたエントリから削除する。
+    """
+
+    def __init__(self, max_entries: int = 256, default_ttl: float = 300):
+        """
+        Args:
+            max_entries: 最大エントリ数
+            default_ttl: TTL未指定時の有効期限（秒）
+        """
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._entries: OrderedDict[Hashable, Tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Any:
+        """
+        キャッシュから取得
+
+        Returns:
+            値（期限切れ・未登録なら MISSING）
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """キャッシュに保存（上限を超えたらLRUで削除）"""
+        expires_at = time.monotonic() + (self.default_ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, endpoint: Optional[str] = None, company_id: Optional[int] = None) -> int:
+        """
+        条件に一致するエントリを削除
+
+        Args:
+            endpoint: 対象endpoint（省略時は全endpoint）
+            company_id: 対象事業所ID（省略時は全事業所）
+
+        Returns:
+            削除したエントリ数
+        """
+        with self._lock:
+            keys = [
+                key
+                for key in self._entries
+                if (endpoint is None or key[0] == endpoint)
+                and (company_id is None or key[1] == company_id)
+            ]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def clear(self) -> None:
+        """全エントリを削除"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        """
+        ヒット率などの統計
+
+        Returns:
+            {"entries": 4, "hits": 10, "misses": 4, "hit_rate": 0.714, "evictions": 0}
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,318 @@
+"""口座明細の自動仕訳（明細テキストのルール → 勘定科目・税区分・取引先）"""
+
+from __future__ import annotations
+
+import json
+import re
+import threading
+import unicodedata
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+# ルールで指定できる項目
+RULE_FIELDS = (
+    "pattern",
+    "match",
+    "entry_side",
+    "account_item_id",
+    "tax_code",
+    "partner_id",
+    "description",
+)
+MATCH_TYPES = ("contains", "regex")
+
+# 未分類のまとまりごとに返す明細IDの最大数
+MAX_GROUP_IDS = 20
+
+# 未消込（freeeの口座明細 status。2: 消込済み, 3: 無視, 4: 消込中）
+UNSETTLED_STATUS = 1
+
+
+def normalize_text(text: Optional[str]) -> str:
+    """照合用に正規化（全角半角・大文字小文字の違いを吸収）"""
+    return unicodedata.normalize("NFKC", text or "").upper()
+
+
+def wallet_txn_idempotency_key(company_id: int, txn: Dict) -> str:
+    """口座明細から作る取引の冪等キー（同じ明細から二重に取引を作らない）"""
+    return f"wallet_txn:{company_id}:{txn['id']}"
+
+
+class CategoryRules:
+    """
+    明細テキストのパターン → 勘定科目・税区分・取引先 のルール（事業所ごと、登録順）
+
+    file_path を指定するとJSONファイルに永続化する。
+    """
+
+    def __init__(self, file_path: Optional[str] = None):
+        """
+        Args:
+            file_path: 保存先JSONファイル（省略時はメモリのみ）
+        """
+        self.file_path = Path(file_path).expanduser() if file_path else None
+        self._lock = threading.Lock()
+        self._rules: Dict[str, List[Dict]] = {}
+        if self.file_path and self.file_path.exists():
+            try:
+                self._rules = json.loads(self.file_path.read_text())
+            except ValueError:
+                self._rules = {}
+
+    def _save(self) -> None:
+        if self.file_path:
+            self.file_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.file_path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(self._rules, ensure_ascii=False, indent=2))
+            tmp_path.replace(self.file_path)
+
+    def get(self, company_id: int) -> List[Dict]:
+        """事業所のルール（登録順）"""
+        with self._lock:
+            return [dict(rule) for rule in self._rules.get(str(company_id), [])]
+
+    def upsert(self, company_id: int, rules: Iterable[Dict]) -> Dict:
+        """
+        ルールを追加・更新（pattern・entry_side が同じルールは置き換え、"delete": true なら削除）
+
+        Raises:
+            ValueError: 必須項目の欠け・不正な正規表現（1件でもあれば何も保存しない）
+
+        Returns:
+            {"added": 2, "updated": 1, "deleted": 0, "total": 12}
+        """
+        current = self.get(company_id)
+        counts = {"added": 0, "updated": 0, "deleted": 0}
+        for rule in rules:
+            rule = {field: rule[field] for field in (*RULE_FIELDS, "delete") if field in rule}
+            if not rule.get("pattern"):
+                raise ValueError(f"pattern がないルール: {rule}")
+            if rule.get("match", "contains") not in MATCH_TYPES:
+                raise ValueError(f"match は {', '.join(MATCH_TYPES)} のいずれか: {rule}")
+            index = next(
+                (
+                    i
+                    for i, existing in enumerate(current)
+                    if existing["pattern"] == rule["pattern"]
+                    and existing.get("entry_side") == rule.get("entry_side")
+                ),
+                None,
+            )
+            if rule.pop("delete", False):
+                if index is not None:
+                    del current[index]
+                    counts["deleted"] += 1
+                continue
+            if not rule.get("account_item_id"):
+                raise ValueError(f"account_item_id がないルール: {rule}")
+            if index is None:
+                current.append(rule)
+                counts["added"] += 1
+            else:
+                current[index] = rule
+                counts["updated"] += 1
+        # 保存前に全ルールをまとめてコンパイルできるか確かめる
+        RuleMatcher(current)
+        with self._lock:
+            self._rules[str(company_id)] = current
+            self._save()
+        return {**counts, "total": len(current)}
+
+
+def _trie_pattern(node: Dict) -> str:
+    """文字のtrie（{文字: 子ノード, "": 終端}）を正規表現にする（同じ位置では長い方に一致）"""
+    alternatives = [
+        re.escape(char) + _trie_pattern(child) for char, child in sorted(node.items()) if char
+    ]
+    if not alternatives:
+        return ""
+    body = alternatives[0] if len(alternatives) == 1 else f"(?:{'|'.join(alternatives)})"
+    return f"(?:{body})?" if "" in node else body
+
+
+def literal_pattern(words: Iterable[str]) -> str:
+    """
+    文字列のいずれかに一致する正規表現（trie形式）
+
+    単純な選択（A|B|C...）だと位置ごとに全候補を試すが、trie形式なら1文字ずつ候補を絞れるので
+    ルール数が増えても照合が遅くならない。
+    """
+    root: Dict = {}
+    for word in words:
+        node = root
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+    return _trie_pattern(root)
+
+
+class RuleMatcher:
+    """
+    ルールを入出金区分ごとにまとめた照合器
+
+    部分一致ルールは正規化したパターンのtrie（1つの正規表現）にまとめ、正規表現ルールはルールごとに
+    コンパイルする（番号付き後方参照やインラインフラグをそのまま使えるように）。明細ごとにそれぞれ
+    search し、最も左で一致したルールを返す。同じ位置で複数一致する場合は、
+    部分一致ルールの長いもの、正規表現ルール（登録順）の順に優先する。
+    """
+
+    def __init__(self, rules: List[Dict]):
+        """
+        Args:
+            rules: CategoryRules.get() のルール
+
+        Raises:
+            ValueError: 正規表現として不正なルールがある
+        """
+        self.rules = rules
+        self._literal_patterns: Dict[str, Optional[re.Pattern]] = {}
+        # 入出金区分 → 正規化した部分一致パターン → ルール番号（同じパターンは先のルール）
+        self._literals: Dict[str, Dict[str, int]] = {}
+        # 入出金区分 → [(ルール番号, 正規表現)]（登録順）
+        self._regexes: Dict[str, List[tuple]] = {}
+        compiled: Dict[int, re.Pattern] = {}
+        for index, rule in enumerate(rules):
+            if rule.get("match", "contains") == "regex":
+                try:
+                    compiled[index] = re.compile(rule["pattern"], re.IGNORECASE)
+                except re.error as e:
+                    raise ValueError(f"ルールの正規表現が不正です（{rule['pattern']}）: {e}") from e
+        for side in ("income", "expense"):
+            literals: Dict[str, int] = {}
+            regexes = []
+            for index, rule in enumerate(rules):
+                if rule.get("entry_side") not in (None, side):
+                    continue
+                if index in compiled:
+                    regexes.append((index, compiled[index]))
+                else:
+                    literals.setdefault(normalize_text(rule["pattern"]), index)
+            self._literals[side] = literals
+            self._literal_patterns[side] = (
+                re.compile(literal_pattern(literals)) if literals else None
+            )
+            self._regexes[side] = regexes
+
+    def match(self, description: Optional[str], entry_side: str) -> Optional[int]:
+        """一致したルールの番号（rules のインデックス）。なければ None"""
+        text = normalize_text(description)
+        # (一致した位置, 同じ位置での優先順, ルール番号)
+        best: Optional[tuple] = None
+        pattern = self._literal_patterns.get(entry_side)
+        found = pattern.search(text) if pattern is not None else None
+        if found is not None:
+            best = (found.start(), -1, self._literals[entry_side][found.group()])
+        for index, regex in self._regexes.get(entry_side, ()):
+            found = regex.search(text)
+            if found is not None and (best is None or (found.start(), index) < best[:2]):
+                best = (found.start(), index, index)
+        return best[2] if best is not None else None
+
+
+def deal_payload(
+    txn: Dict, rule: Dict, company_id: int, default_tax_codes: Dict[int, int]
+) -> Dict:
+    """
+    口座明細とルールから create_deals_bulk にそのまま渡せる取引を作る（口座からの支払い済み）
+    """
+    account_item_id = rule["account_item_id"]
+    detail = {
+        "account_item_id": account_item_id,
+        "tax_code": rule.get("tax_code") or default_tax_codes.get(account_item_id),
+        "amount": txn["amount"],
+        "description": rule.get("description") or txn.get("description"),
+    }
+    deal = {
+        "issue_date": txn["date"],
+        "deal_type": txn["entry_side"],
+        "details": [detail],
+        "payments": [
+            {
+                "date": txn["date"],
+                "from_walletable_type": txn.get("walletable_type"),
+                "from_walletable_id": txn.get("walletable_id"),
+                "amount": txn["amount"],
+            }
+        ],
+        "idempotency_key": wallet_txn_idempotency_key(company_id, txn),
+    }
+    if rule.get("partner_id"):
+        deal["partner_id"] = rule["partner_id"]
+    return deal
+
+
+def categorize(
+    wallet_txns: Iterable[Dict],
+    rules: List[Dict],
+    company_id: int,
+    default_tax_codes: Optional[Dict[int, int]] = None,
+    include_settled: bool = False,
+    limit: int = 100,
+) -> Dict:
+    """
+    口座明細をルールで仕訳し、取引（create_deals_bulk の deals）を作る
+
+    Args:
+        wallet_txns: freee APIの口座明細
+        rules: CategoryRules.get() のルール
+        company_id: 事業所ID（冪等キーに使う）
+        default_tax_codes: 勘定科目ID → 既定の税区分（ルールに tax_code がないとき使う）
+        include_settled: 消込済み・無視した明細も対象にする
+        limit: 返す取引・未分類の最大件数
+
+    Returns:
+        {
+            "counts": {"wallet_txns": 500, "categorized": 460, "uncategorized": 30, "skipped": 10},
+            "by_rule": [{"pattern": "ANTHROPIC", "count": 12, "total": 39600}, ...],
+            "deals": [{"issue_date": "2025-01-05", "deal_type": "expense", "details": [...],
+                       "payments": [...], "idempotency_key": "wallet_txn:1:200001"}, ...],
+            "uncategorized": [{"description": "ｶ)ｳﾝｿﾝ", "count": 3, "total": 15000,
+                               "entry_side": "income", "wallet_txn_ids": [...]}, ...]
+        }
+    """
+    matcher = RuleMatcher(rules)
+    # 同じ明細テキストは繰り返し現れるので、照合結果を使い回す
+    matched: Dict[tuple, Optional[int]] = {}
+    by_rule = [{"pattern": rule["pattern"], "count": 0, "total": 0} for rule in rules]
+    deals: List[Dict] = []
+    uncategorized: Dict[tuple, Dict] = {}
+    counts = {"wallet_txns": 0, "categorized": 0, "uncategorized": 0, "skipped": 0}
+
+    for txn in wallet_txns:
+        counts["wallet_txns"] += 1
+        if not include_settled and txn.get("status", UNSETTLED_STATUS) != UNSETTLED_STATUS:
+            counts["skipped"] += 1
+            continue
+        key = (txn.get("description"), txn.get("entry_side"))
+        index = matched[key] if key in matched else matched.setdefault(key, matcher.match(*key))
+        if index is None:
+            counts["uncategorized"] += 1
+            # 同じ明細テキストはまとめて返す（ルール追加の候補）
+            group = uncategorized.setdefault(
+                (normalize_text(txn.get("description")), txn.get("entry_side")),
+                {
+                    "description": txn.get("description"),
+                    "entry_side": txn.get("entry_side"),
+                    "count": 0,
+                    "total": 0,
+                    "wallet_txn_ids": [],
+                },
+            )
+            group["count"] += 1
+            group["total"] += txn.get("amount") or 0
+            if len(group["wallet_txn_ids"]) < MAX_GROUP_IDS:
+                group["wallet_txn_ids"].append(txn.get("id"))
+            continue
+        counts["categorized"] += 1
+        by_rule[index]["count"] += 1
+        by_rule[index]["total"] += txn.get("amount") or 0
+        if len(deals) < limit:
+            deals.append(deal_payload(txn, rules[index], company_id, default_tax_codes or {}))
+
+    groups = sorted(uncategorized.values(), key=lambda group: -group["total"])
+    return {
+        "counts": counts,
+        "by_rule": [stats for stats in by_rule if stats["count"]],
+        "deals": deals,
+        "uncategorized": groups[:limit],
+    }
@@ -0,0 +1,299 @@
+"""取引・口座明細の変更フィード（前回から新規・更新・削除されたものだけを返す）"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import sys
+import threading
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# 絶対importに変更（スタンドアロン実行対応）
+sys.path.insert(0, str(Path(__file__).parent))
+from mirror import DATE_COLUMNS, DATE_FILTERS, DEFAULT_OVERLAP_DAYS
+
+CHANGE_FEED_RESOURCES = ("deals", "wallet_txns")
+
+# リソースごとに使える絞り込み条件（フィードの一部としてカーソルに紐づく）
+FEED_FILTERS = {
+    "deals": ("account_item_id", "partner_id"),
+    "wallet_txns": ("walletable_type", "walletable_id", "entry_side"),
+}
+
+# 開始日を省略したときに遡る日数
+DEFAULT_FEED_DAYS = 31
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS change_feeds (
+    feed_id TEXT PRIMARY KEY,
+    resource TEXT NOT NULL,
+    company_id INTEGER NOT NULL,
+    filters TEXT NOT NULL,
+    start_date TEXT NOT NULL,
+    seq INTEGER NOT NULL DEFAULT 0,
+    high_water TEXT,
+    polled_at REAL
+);
+
+CREATE TABLE IF NOT EXISTS change_records (
+    feed_id TEXT NOT NULL,
+    record_id INTEGER NOT NULL,
+    record_date TEXT,
+    fingerprint TEXT NOT NULL,
+    first_seq INTEGER NOT NULL,
+    changed_seq INTEGER NOT NULL,
+    deleted INTEGER NOT NULL DEFAULT 0,
+    raw TEXT NOT NULL,
+    PRIMARY KEY (feed_id, record_id)
+);
+CREATE INDEX IF NOT EXISTS idx_change_records_seq ON change_records (feed_id, changed_seq);
+CREATE INDEX IF NOT EXISTS idx_change_records_date ON change_records (feed_id, record_date);
+"""
+
+
+def fingerprint(record: Dict) -> str:
+    """変更の検出に使う値（updated_at があればそれ、なければ内容のハッシュ）"""
+    if record.get("updated_at"):
+        return str(record["updated_at"])
+    canonical = json.dumps(record, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(canonical.encode()).hexdigest()
+
+
+class ChangeFeed:
+    """
+    変更フィードの既読索引（フィードごとに 記録ID → 指紋・最後に変わった世代）
+
+    フィード（リソース・事業所・絞り込み条件・開始日）ごとに世代番号を持ち、
+    カーソル "フィードID:世代" 以降に変わった記録だけを返す。古いカーソルで呼び直しても
+    その世代以降の変更を同じように返すので、取りこぼしがない。
+    db_path を指定するとSQLiteファイルに永続化する（省略時はメモリのみ）。
+    """
+
+    def __init__(self, db_path: Optional[str] = None, overlap_days: int = DEFAULT_OVERLAP_DAYS):
+        """
+        Args:
+            db_path: SQLiteファイルのパス（省略時はメモリのみ）
+            overlap_days: 2回目以降、前回の最終日付から遡って取得し直す日数（過去日付の修正・削除用）
+        """
+        if db_path:
+            path = Path(db_path).expanduser()
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        else:
+            self._conn = sqlite3.connect(":memory:", check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self.overlap_days = overlap_days
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def open(
+        self,
+        resource: str,
+        company_id: int,
+        cursor: Optional[str] = None,
+        start_date: Optional[str] = None,
+        filters: Optional[Dict] = None,
+    ) -> Dict:
+        """
+        フィードを開く（カーソルがあればそのフィード、なければ条件からフィードを作る）
+
+        Raises:
+            ValueError: 非対応のリソース・不明なカーソル
+
+        Returns:
+            {"feed_id": "...", "resource": "wallet_txns", "company_id": 1, "filters": {...},
+             "since": 3, "seq": 5, "window_start": "2025-01-01", "initial": False}
+        """
+        if cursor:
+            feed_id, _, since = cursor.partition(":")
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT * FROM change_feeds WHERE feed_id = ?", (feed_id,)
+                ).fetchone()
+            if row is None or not since.isdigit():
+                raise ValueError(f"不明なカーソル: {cursor}")
+            feed = dict(row)
+            feed["filters"] = json.loads(feed["filters"])
+            feed["since"] = int(since)
+        else:
+            if resource not in CHANGE_FEED_RESOURCES:
+                raise ValueError(f"変更フィード非対応のリソース: {resource}")
+            filters = {
+                key: value
+                for key, value in (filters or {}).items()
+                if key in FEED_FILTERS[resource] and value is not None
+            }
+            start_date = start_date or (
+                date.today() - timedelta(days=DEFAULT_FEED_DAYS)
+            ).isoformat()
+            source = json.dumps([resource, company_id, filters, start_date], sort_keys=True)
+            feed_id = hashlib.sha1(source.encode()).hexdigest()[:16]
+            with self._lock, self._conn:
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO change_feeds"
+                    " (feed_id, resource, company_id, filters, start_date)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (feed_id, resource, company_id, json.dumps(filters), start_date),
+                )
+                feed = dict(
+                    self._conn.execute(
+                        "SELECT * FROM change_feeds WHERE feed_id = ?", (feed_id,)
+                    ).fetchone()
+                )
+            feed["filters"] = filters
+            feed["since"] = 0
+
+        # 2回目以降は最終日付から overlap_days 遡った日以降だけ取得する
+        feed["initial"] = not feed["high_water"]
+        window_start = feed["start_date"]
+        if feed["high_water"]:
+            overlap = date.fromisoformat(feed["high_water"]) - timedelta(days=self.overlap_days)
+            window_start = max(window_start, overlap.isoformat())
+        feed["window_start"] = window_start
+        return feed
+
+    @staticmethod
+    def fetch_params(feed: Dict) -> Dict:
+        """fetch_all に渡す条件"""
+        start_key, _ = DATE_FILTERS[feed["resource"]]
+        return {
+            "company_id": feed["company_id"],
+            start_key: feed["window_start"],
+            **feed["filters"],
+        }
+
+    def apply(self, feed: Dict, records: List[Dict], baseline: bool = False) -> Dict:
+        """
+        取得した記録を既読索引と比べ、カーソル以降の変更を返す
+
+        取得期間（window_start 以降）にあったのに今回なかった記録は削除とみなす。
+        変更があれば世代を1つ進める。
+
+        Args:
+            feed: open() の結果
+            records: fetch_params(feed) で取得した記録
+            baseline: Trueなら今回までの記録は既読にするだけで返さない（以降の変更だけ追う）
+
+        Returns:
+            {
+                "cursor": "3f2a...:6",
+                "records": [{..., "change": "new"}, {..., "change": "updated"}],
+                "deleted": [200123],
+                "counts": {"fetched": 120, "new": 2, "updated": 1, "deleted": 1},
+                "window_start": "2025-01-01"
+            }
+        """
+        feed_id = feed["feed_id"]
+        date_column = DATE_COLUMNS[feed["resource"]]
+        with self._lock, self._conn:
+            # 同じフィードを並行して読んだ場合も世代が重ならないよう、ロック内で読み直す
+            state = self._conn.execute(
+                "SELECT seq, high_water FROM change_feeds WHERE feed_id = ?", (feed_id,)
+            ).fetchone()
+            now_seq = state["seq"] + 1
+            seen = {
+                row["record_id"]: (row["fingerprint"], row["deleted"])
+                for row in self._conn.execute(
+                    "SELECT record_id, fingerprint, deleted FROM change_records"
+                    " WHERE feed_id = ? AND record_date >= ?",
+                    (feed_id, feed["window_start"]),
+                )
+            }
+            upserts = []
+            fetched_ids = set()
+            for record in records:
+                record_id = record.get("id")
+                if record_id is None:
+                    continue
+                fetched_ids.add(record_id)
+                current = fingerprint(record)
+                previous = seen.get(record_id)
+                if previous is None:
+                    # 取得期間の外（前回の期間より前の日付へ移った記録など）も含めて既読か確かめる
+                    row = self._conn.execute(
+                        "SELECT fingerprint, deleted FROM change_records"
+                        " WHERE feed_id = ? AND record_id = ?",
+                        (feed_id, record_id),
+                    ).fetchone()
+                    previous = (row["fingerprint"], row["deleted"]) if row else None
+                if previous is not None and previous == (current, 0):
+                    continue
+                upserts.append(
+                    (
+                        feed_id,
+                        record_id,
+                        record.get(date_column),
+                        current,
+                        now_seq,
+                        now_seq,
+                        json.dumps(record, ensure_ascii=False),
+                    )
+                )
+            removed = [
+                record_id
+                for record_id, (_, deleted) in seen.items()
+                if not deleted and record_id not in fetched_ids
+            ]
+
+            if upserts or removed:
+                self._conn.executemany(
+                    "INSERT INTO change_records"
+                    " (feed_id, record_id, record_date, fingerprint, first_seq, changed_seq, raw)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)"
+                    " ON CONFLICT (feed_id, record_id) DO UPDATE SET"
+                    " record_date = excluded.record_date, fingerprint = excluded.fingerprint,"
+                    " changed_seq = excluded.changed_seq, deleted = 0, raw = excluded.raw",
+                    upserts,
+                )
+                self._conn.executemany(
+                    "UPDATE change_records SET deleted = 1, changed_seq = ?"
+                    " WHERE feed_id = ? AND record_id = ?",
+                    [(now_seq, feed_id, record_id) for record_id in removed],
+                )
+                seq = now_seq
+            else:
+                seq = state["seq"]
+            since = seq if baseline else feed["since"]
+
+            dates = [r[date_column] for r in records if r.get(date_column)]
+            if state["high_water"]:
+                dates.append(state["high_water"])
+            high_water = max(dates, default=None)
+            self._conn.execute(
+                "UPDATE change_feeds SET seq = ?, high_water = ?, polled_at = ? WHERE feed_id = ?",
+                (seq, high_water, time.time(), feed_id),
+            )
+            changed = self._conn.execute(
+                "SELECT record_id, first_seq, deleted, raw FROM change_records"
+                " WHERE feed_id = ? AND changed_seq > ? ORDER BY record_date, record_id",
+                (feed_id, since),
+            ).fetchall()
+
+        result_records = []
+        deleted = []
+        counts = {"fetched": len(records), "new": 0, "updated": 0, "deleted": 0}
+        for row in changed:
+            if row["deleted"]:
+                # カーソルより後に現れて消えた記録は、呼び出し元にとって無かったのと同じ
+                if row["first_seq"] <= since:
+                    deleted.append(row["record_id"])
+                    counts["deleted"] += 1
+                continue
+            change = "new" if row["first_seq"] > since else "updated"
+            counts[change] += 1
+            result_records.append({**json.loads(row["raw"]), "change": change})
+        return {
+            "cursor": f"{feed_id}:{seq}",
+            "records": result_records,
+            "deleted": deleted,
+            "counts": counts,
+            "window_start": feed["window_start"],
+        }
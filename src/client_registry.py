@@ -0,0 +1,99 @@
+"""事業所ごとのAPIクライアント管理（1プロセスで複数事業所を扱う）"""
+
+from __future__ import annotations
+
+import sys
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Hashable, Optional
+
+# 絶対importに変更（スタンドアロン実行対応）
+sys.path.insert(0, str(Path(__file__).parent))
+from token_store import DEFAULT_IDENTITY
+
+
+class ClientRegistry:
+    """
+    (OAuth identity, 事業所ID) → APIクライアント のLRU
+
+    クライアントは factory で生成し、コネクションプール・レート制限・tokenは factory 側で共有する。
+    マスタデータキャッシュはクライアントごと（＝事業所ごと）に持つので、
+    max_clients を超えたら最も長く使われていない事業所のクライアントごと破棄してメモリを抑える。
+    """
+
+    def __init__(self, factory: Callable[[str, int], object], max_clients: int = 32):
+        """
+        Args:
+            factory: (identity, company_id) からクライアントを生成する関数
+            max_clients: 保持するクライアントの上限
+        """
+        self.factory = factory
+        self.max_clients = max_clients
+        self._clients: OrderedDict[Hashable, object] = OrderedDict()
+        self._lock = threading.Lock()
+        self.created = 0
+        self.evictions = 0
+
+    def get(self, company_id: int, identity: str = DEFAULT_IDENTITY):
+        """
+        事業所のクライアントを取得（なければ生成）
+
+        Args:
+            company_id: 事業所ID
+            identity: OAuth identity（どのtokenで呼び出すか）
+        """
+        key = (identity, company_id)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = self.factory(identity, company_id)
+                self._clients[key] = client
+                self.created += 1
+                while len(self._clients) > self.max_clients:
+                    self._clients.popitem(last=False)
+                    self.evictions += 1
+            else:
+                self._clients.move_to_end(key)
+            return client
+
+    def evict(self, company_id: Optional[int] = None, identity: Optional[str] = None) -> int:
+        """
+        条件に一致するクライアントを破棄（次回の get で作り直す）
+
+        Returns:
+            破棄した件数
+        """
+        with self._lock:
+            keys = [
+                key
+                for key in self._clients
+                if (identity is None or key[0] == identity)
+                and (company_id is None or key[1] == company_id)
+            ]
+            for key in keys:
+                del self._clients[key]
+            return len(keys)
+
+    def clients(self) -> list:
+        """保持しているクライアント（古く使われた順）"""
+        with self._lock:
+            return list(self._clients.values())
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def stats(self) -> Dict:
+        """
+        Returns:
+            {"clients": 3, "max_clients": 32, "created": 5, "evictions": 2,
+             "companies": [["default", 123], ...]}
+        """
+        with self._lock:
+            return {
+                "clients": len(self._clients),
+                "max_clients": self.max_clients,
+                "created": self.created,
+                "evictions": self.evictions,
+                "companies": [list(key) for key in self._clients],
+            }
@@ -0,0 +1,102 @@
+"""GETレスポンスの暗号化ディスクキャッシュ（ETag / Last-Modified 付き）"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from cryptography.fernet import Fernet, InvalidToken
+
+
+class DiskCache:
+    """
+    サーバー再起動をまたいでGETレスポンスを保持するディスクキャッシュ
+
+    TokenStore と同じFernetキーで暗号化し、~/.freee-mcp/cache/ に1エントリ1ファイルで保存する。
+    各エントリは本文と検証子（ETag / Last-Modified）、保存時刻を持ち、
+    条件付きリクエストでの再検証に使う。
+    """
+
+    def __init__(self, encryption_key: str, cache_dir: Optional[str] = None):
+        """
+        Args:
+            encryption_key: TokenStoreと同じbase64エンコードされた暗号化キー
+            cache_dir: キャッシュ保存先（デフォルト: ~/.freee-mcp/cache）
+        """
+        self.encryption_key = encryption_key
+        self.cipher = Fernet(encryption_key.encode())
+        self.cache_dir = Path(cache_dir or os.path.expanduser("~/.freee-mcp/cache"))
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def namespace(self, name: str) -> DiskCache:
+        """同じキーで暗号化する、サブディレクトリ {name}/ のディスクキャッシュ（invalidate の対象も別）"""
+        return DiskCache(self.encryption_key, str(self.cache_dir / name))
+
+    def _path(self, key: tuple) -> Path:
+        """(endpoint, company_id) からファイルパスを組み立てる"""
+        endpoint, company_id = key
+        name = endpoint.strip("/").replace("/", "_")
+        return self.cache_dir / f"{name}-{company_id or 'all'}.enc"
+
+    def load(self, key: tuple) -> Optional[Dict[str, Any]]:
+        """
+        エントリを復号化してロード
+
+        Returns:
+            {"data": {...}, "etag": "...", "last_modified": "...", "stored_at": 1700000000.0}
+            or None（未保存・復号化できない場合）
+        """
+        path = self._path(key)
+        if not path.exists():
+            return None
+        try:
+            return json.loads(self.cipher.decrypt(path.read_bytes()).decode())
+        except (InvalidToken, ValueError, OSError):
+            return None
+
+    def save(
+        self,
+        key: tuple,
+        data: Any,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> None:
+        """レスポンスを検証子とともに暗号化して保存"""
+        entry = {
+            "data": data,
+            "etag": etag,
+            "last_modified": last_modified,
+            "stored_at": time.time(),
+        }
+        encrypted = self.cipher.encrypt(json.dumps(entry, ensure_ascii=False).encode())
+        # 書き込み途中のファイルを読まないよう、一時ファイルから置き換える
+        path = self._path(key)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_bytes(encrypted)
+        tmp_path.replace(path)
+
+    def touch(self, key: tuple, entry: Dict[str, Any]) -> None:
+        """304 Not Modified で再検証できたエントリの保存時刻を更新"""
+        self.save(key, entry["data"], entry.get("etag"), entry.get("last_modified"))
+
+    def invalidate(self, endpoint: Optional[str] = None, company_id: Optional[int] = None) -> int:
+        """
+        条件に一致するエントリを削除
+
+        Returns:
+            削除したファイル数
+        """
+        name = endpoint.strip("/").replace("/", "_") if endpoint else "*"
+        suffix = company_id if company_id is not None else "*"
+        removed = 0
+        for path in self.cache_dir.glob(f"{name}-{suffix}.enc"):
+            path.unlink(missing_ok=True)
+            removed += 1
+        return removed
+
+    def clear(self) -> None:
+        """全エントリを削除"""
+        self.invalidate()
@@ -0,0 +1,111 @@
+"""一覧系ツールの出力フォーマット（フィールド射影・compact JSON / NDJSON / CSV / TSV）"""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+OUTPUT_FORMATS = ("json", "json_compact", "ndjson", "csv", "tsv")
+
+_MISSING = object()
+
+
+def _lookup(record: Dict, path: str) -> Any:
+    """ドット区切りのパス（例: details.account_item_id）で値を取り出す（リストは要素ごとに展開）"""
+    value: Any = record
+    for part in path.split("."):
+        if isinstance(value, list):
+            value = [item.get(part) if isinstance(item, dict) else None for item in value]
+        elif isinstance(value, dict):
+            value = value.get(part, _MISSING)
+            if value is _MISSING:
+                return None
+        else:
+            return None
+    return value
+
+
+def project(record: Dict, fields: Optional[List[str]]) -> Dict:
+    """
+    レコードから指定フィールドだけを取り出す
+
+    Args:
+        record: freee APIのレコード
+        fields: ["id", "date", "amount", "details.account_item_id"] など（省略時はそのまま）
+    """
+    if not fields:
+        return record
+    return {field: _lookup(record, field) for field in fields}
+
+
+def _cell(value: Any) -> Any:
+    """CSV/TSVのセル値（ネストした値はcompact JSON）"""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+    return "" if value is None else value
+
+
+def iter_formatted(
+    records: Iterable[Dict], fmt: str = "json", fields: Optional[List[str]] = None
+) -> Iterator[str]:
+    """
+    レコードを1件ずつ整形して文字列の断片を返す（json と fields 未指定のcsv/tsv以外は全件分の中間データを作らない）
+
+    Args:
+        records: レコード（リストまたはイテレータ）
+        fmt: OUTPUT_FORMATS のいずれか
+        fields: 出力するフィールド（省略時は全フィールド。csv/tsvは全レコードのキーの和集合）
+    """
+    if fmt not in OUTPUT_FORMATS:
+        raise ValueError(f"format は {', '.join(OUTPUT_FORMATS)} のいずれか: {fmt}")
+
+    rows = (project(record, fields) for record in records)
+
+    if fmt == "json":
+        # 従来どおりの整形済みJSON
+        yield json.dumps(list(rows), ensure_ascii=False, indent=2)
+        return
+
+    if fmt in ("json_compact", "ndjson"):
+        separator = "," if fmt == "json_compact" else "\n"
+        if fmt == "json_compact":
+            yield "["
+        for i, row in enumerate(rows):
+            if i:
+                yield separator
+            yield json.dumps(row, ensure_ascii=False, separators=(",", ":"))
+        if fmt == "json_compact":
+            yield "]"
+        return
+
+    # csv / tsv: ヘッダーは fields、未指定なら全レコードのキーを出現順に合わせたもの
+    # （キーの違うレコードがあっても列がずれないよう、fields 未指定時は先に全件を見る）
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter="\t" if fmt == "tsv" else ",", lineterminator="\n")
+    if fields:
+        header = list(fields)
+    else:
+        rows = list(rows)
+        header = list(dict.fromkeys(key for row in rows for key in row))
+    # レコードが0件でも fields 指定時はヘッダーを返す
+    if header:
+        writer.writerow(header)
+    for row in rows:
+        writer.writerow([_cell(row.get(column)) for column in header])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def format_records(
+    records: Iterable[Dict], fmt: str = "json", fields: Optional[List[str]] = None
+) -> str:
+    """レコードを指定フォーマットの文字列にする"""
+    out = io.StringIO()
+    for chunk in iter_formatted(records, fmt, fields):
+        out.write(chunk)
+    return out.getvalue()
@@ -2,12 +2,47 @@
 
 from __future__ import annotations
 
+import asyncio
+import logging
+import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import AsyncIterator, Dict, Iterator, List, Optional
 
+import httpx
 import requests
 
+# 絶対importに変更（スタンドアロン実行対応）
+sys.path.insert(0, str(Path(__file__).parent))
+from cache import MISSING, WRITE_INVALIDATIONS, TTLCache, master_ttl
+from change_feed import ChangeFeed
+from disk_cache import DiskCache
+from http_pool import ConnectionPool
+from idempotency import IdempotencyStore, deal_idempotency_key
+from metrics import METRICS, SIZE_BUCKETS
+from rate_limit import RateLimiter
+from single_flight import SingleFlight
+from snapshot import SNAPSHOT_PARTS, build_snapshot, current_fiscal_month
+from token_manager import TokenManager
+from trends import build_trend, fiscal_year_months, month_has_started
+from report_cache import ReportCache, report_period
+from resolver import RESOLVERS, NameIndex
+from receipts import (
+    SUPPORTED_MIME_TYPES,
+    ReceiptIndex,
+    collect_files,
+    detect_mime_type,
+    file_sha256,
+)
+
+# 一覧APIの1ページあたり最大件数（freee APIの上限）
+PAGE_SIZE = 100
+
+logger = logging.getLogger(__name__)
+
 
 class FreeeAPIClient:
     """freee API クライアント（自動リトライ・リフレッシュ対応）"""
@@ -18,6 +53,17 @@ class FreeeAPIClient:
         company_id: int,
         base_url: str = "https://api.freee.co.jp",
         on_token_refresh: Optional[callable] = None,
+        pool: Optional[ConnectionPool] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        fetch_concurrency: int = 4,
+        cache: Optional[TTLCache] = None,
+        disk_cache: Optional[DiskCache] = None,
+        stale_ttl: float = 86400,
+        idempotency_store: Optional[IdempotencyStore] = None,
+        receipt_index: Optional[ReceiptIndex] = None,
+        token_manager: Optional[TokenManager] = None,
+        report_cache: Optional[ReportCache] = None,
+        change_feed: Optional[ChangeFeed] = None,
     ):
         """
         Args:
@@ -25,18 +71,75 @@ class FreeeAPIClient:
             company_id: 事業所ID
             base_url: freee API ベースURL
             on_token_refresh: token更新時のコールバック（新しいtokenを保存する）
+            pool: 共有コネクションプール（省略時はクライアント専用に生成）
+            rate_limiter: 共有レート制限（省略時はクライアント専用に生成）
+            fetch_concurrency: fetch_all の既定の並列ページ取得数
+            cache: マスタデータ用キャッシュ（省略時はクライアント専用に生成）
+            disk_cache: マスタデータの永続キャッシュ（省略時は使わない）
+            stale_ttl: TTL切れ後もディスクキャッシュを返しつつ裏で再検証する猶予（秒）
+            idempotency_store: 取引一括作成の冪等キー記録（省略時はメモリのみ）
+            receipt_index: アップロード済み証憑の索引（省略時はメモリのみ）
+            token_manager: 期限前にtokenを更新するTokenManager（指定時は on_token_refresh より優先）
+            report_cache: 試算表のキャッシュ（省略時はクライアント専用に生成）
+            change_feed: 変更フィードの既読索引（省略時はメモリのみ）
         """
         self.access_token = access_token
         self.company_id = company_id
         self.base_url = base_url
         self.on_token_refresh = on_token_refresh
-
-    def _get_headers(self) -> Dict[str, str]:
-        """共通リクエストヘッダー"""
-        return {
-            "Authorization": f"Bearer {self.access_token}",
-            "Content-Type": "application/json",
-        }
+        self.pool = pool or ConnectionPool()
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.fetch_concurrency = fetch_concurrency
+        self.cache = cache or TTLCache()
+        self.disk_cache = disk_cache
+        self.stale_ttl = stale_ttl
+        self.idempotency_store = idempotency_store or IdempotencyStore()
+        self.receipt_index = receipt_index or ReceiptIndex()
+        self.token_manager = token_manager
+        self.report_cache = report_cache or ReportCache()
+        self.change_feed = change_feed or ChangeFeed()
+        self._revalidating: set = set()
+        # 実行中の同一GETをまとめる（並列のツール呼び出しが同じマスタ・レポートを取りに来たとき）
+        self._flights = SingleFlight("freee_http_coalesced_total")
+        # 名前 → ID の索引: (種類, 事業所ID) → (索引を作ったマスタデータ, NameIndex)
+        self._name_indexes: Dict[tuple, tuple] = {}
+        # アップロード中の (事業所ID, SHA-256)（同じ内容のファイルを同時に送らない）
+        self._uploading: set = set()
+        self._uploading_lock = threading.Lock()
+
+    def _get_headers(self, multipart: bool = False) -> Dict[str, str]:
+        """共通リクエストヘッダー（multipartのContent-TypeはHTTPライブラリが付ける）"""
+        headers = {"Authorization": f"Bearer {self.access_token}"}
+        if not multipart:
+            headers["Content-Type"] = "application/json"
+        return headers
+
+    @staticmethod
+    def _record_response(method: str, endpoint: str, resp, seconds: float) -> None:
+        """1回のHTTPリクエストのレイテンシ・ステータス・レスポンスサイズを記録"""
+        METRICS.observe(
+            "freee_http_request_duration_seconds", seconds, method=method, endpoint=endpoint
+        )
+        METRICS.inc(
+            "freee_http_requests_total", method=method, endpoint=endpoint, status=resp.status_code
+        )
+        METRICS.observe(
+            "freee_http_response_bytes", len(resp.content), SIZE_BUCKETS, endpoint=endpoint
+        )
+
+    @staticmethod
+    def _rewind_files(request_kwargs: Dict) -> None:
+        """リトライ時にアップロードファイルを先頭から送り直す"""
+        for value in (request_kwargs.get("files") or {}).values():
+            value[1].seek(0)
+
+    def _company_of(self, request_kwargs: Dict) -> int:
+        """リクエストの対象事業所ID（レート制限のキー）"""
+        for field in ("params", "json", "data"):
+            value = request_kwargs.get(field)
+            if isinstance(value, dict) and value.get("company_id"):
+                return int(value["company_id"])
+        return self.company_id
 
     def _request_with_retry(
         self,
@@ -51,83 +154,409 @@ class FreeeAPIClient:
         Args:
             method: HTTP method (GET, POST, etc.)
             endpoint: API endpoint (e.g., "/api/1/companies")
-            max_retries: 最大リトライ回数
-            **kwargs: requests.request() に渡す追加パラメータ
+            max_retries: 最大リトライ回数（429による待ち直しは数えない）
+            **kwargs: requests.Session.request() に渡す追加パラメータ
 
         Returns:
             Response object
         """
         url = f"{self.base_url}{endpoint}"
         headers = kwargs.pop("headers", {})
-        headers.update(self._get_headers())
-
-        for attempt in range(max_retries):
-            resp = requests.request(method, url, headers=headers, **kwargs)
-
-            # 成功
-            if resp.status_code in (200, 201):
-                return resp
-
-            # 401: token期限切れ → リフレッシュ（コールバックがあれば）
-            if resp.status_code == 401:
-                if self.on_token_refresh:
-                    print("🔄 tokenをリフレッシュします...")
-                    new_token = self.on_token_refresh()
-                    self.access_token = new_token["access_token"]
-                    headers.update(self._get_headers())
-                    continue
-                else:
-                    raise RuntimeError(f"401 Unauthorized: token期限切れ {resp.text}")
-
-            # 429: レート制限 → 指数バックオフ
-            if resp.status_code == 429:
-                wait_time = 2**attempt
-                print(f"⏳ レート制限（429）: {wait_time}秒待機...")
-                time.sleep(wait_time)
-                continue
-
-            # 500系エラー → リトライ
-            if 500 <= resp.status_code < 600:
-                if attempt < max_retries - 1:
-                    wait_time = 2**attempt
-                    print(f"⚠️ サーバーエラー（{resp.status_code}）: {wait_time}秒後にリトライ...")
-                    time.sleep(wait_time)
+        multipart = "files" in kwargs
+        cid = self._company_of(kwargs)
+
+        attempts = 0
+        throttles = 0
+        with METRICS.span("freee_api", method=method, endpoint=endpoint):
+            while attempts < max_retries:
+                waited = time.perf_counter()
+                self.rate_limiter.acquire(cid)
+                METRICS.observe("freee_rate_limit_wait_seconds", time.perf_counter() - waited)
+                if self.token_manager:
+                    self.access_token = self.token_manager.get_token()
+                headers.update(self._get_headers(multipart))
+                self._rewind_files(kwargs)
+                started = time.perf_counter()
+                resp = self.pool.request(method, url, headers=headers, **kwargs)
+                self._record_response(method, endpoint, resp, time.perf_counter() - started)
+                throttled = resp.status_code == 429
+                pause = self.rate_limiter.observe(
+                    cid, resp.status_code, resp.headers, throttles + throttled
+                )
+
+                # 成功（304は条件付きリクエストでキャッシュが有効な場合）
+                if resp.status_code in (200, 201, 304):
+                    return resp
+
+                # 429: レート制限 → 事業所の送信を Retry-After の間止めて減速し、列に並び直す
+                # （リトライ回数には数えず、max_throttles 回までは失敗にしない）
+                if throttled:
+                    throttles += 1
+                    METRICS.inc("freee_http_retries_total", endpoint=endpoint, reason="429")
+                    if throttles > self.rate_limiter.max_throttles:
+                        raise RuntimeError(
+                            f"レート制限（429）が{throttles}回続いたため中止しました: {endpoint}"
+                        )
+                    logger.warning("レート制限（429）: %.1f秒待機 %s", pause, endpoint)
                     continue
 
-            # その他エラー
-            raise RuntimeError(
-                f"freee API エラー: {resp.status_code} {resp.text}"
+                attempts += 1
+
+                # 401: token期限切れ → リフレッシュ（TokenManagerまたはコールバックがあれば）
+                if resp.status_code == 401:
+                    METRICS.inc("freee_http_retries_total", endpoint=endpoint, reason="401")
+                    if self.token_manager:
+                        self.token_manager.refresh(self.access_token)
+                        continue
+                    if self.on_token_refresh:
+                        logger.info("tokenをリフレッシュします")
+                        new_token = self.on_token_refresh()
+                        self.access_token = new_token["access_token"]
+                        continue
+                    else:
+                        raise RuntimeError(f"401 Unauthorized: token期限切れ {resp.text}")
+
+                # 500系エラー → リトライ
+                if 500 <= resp.status_code < 600:
+                    if attempts < max_retries:
+                        wait_time = 2 ** (attempts - 1)
+                        METRICS.inc("freee_http_retries_total", endpoint=endpoint, reason="5xx")
+                        logger.warning(
+                            "サーバーエラー（%s）: %s秒後にリトライ %s",
+                            resp.status_code, wait_time, endpoint,
+                        )
+                        time.sleep(wait_time)
+                        continue
+
+                # その他エラー
+                raise RuntimeError(
+                    f"freee API エラー: {resp.status_code} {resp.text}"
+                )
+
+            raise RuntimeError(f"最大リトライ回数（{max_retries}）を超えました")
+
+    def _get(
+        self,
+        endpoint: str,
+        params: Optional[Dict] = None,
+        key: Optional[str] = None,
+        refresh: bool = False,
+    ):
+        """
+        GETリクエストを送信してJSONを返す（マスタデータはキャッシュ経由）
+
+        Args:
+            endpoint: API endpoint
+            params: クエリパラメータ
+            key: 指定時はレスポンスJSONの該当キーのみ返す（一覧系API用）
+            refresh: Trueならキャッシュを使わずに取得し直す
+        """
+        cache_key = self._cache_key(endpoint, params)
+        if cache_key is None:
+            resp = self._send_get(endpoint, params)
+            data = resp.json()
+        else:
+            data, entry, stale = self._lookup_cached(cache_key, refresh)
+            if stale:
+                threading.Thread(
+                    target=self._revalidate, args=(params, cache_key, entry), daemon=True
+                ).start()
+            elif data is MISSING:
+                data = self._fetch_cached(params, cache_key, entry)
+        return data.get(key, []) if key else data
+
+    @staticmethod
+    def _flight_key(
+        endpoint: str, params: Optional[Dict], headers: Optional[Dict] = None
+    ) -> tuple:
+        """同一のGETとみなすキー（パラメータの順序・値の型の違い、Noneの値は無視）"""
+
+        def normalize(values: Optional[Dict]) -> tuple:
+            return tuple(sorted((k, str(v)) for k, v in (values or {}).items() if v is not None))
+
+        return ("GET", endpoint, normalize(params), normalize(headers))
+
+    def _send_get(self, endpoint: str, params: Optional[Dict], headers: Optional[Dict] = None):
+        """
+        GETを送信（同じGETが別スレッドで実行中なら、そのレスポンスを共有する）
+
+        レスポンスは呼び出し元ごとに .json() するので、返るdictは共有されない。
+        """
+        return self._flights.do(
+            self._flight_key(endpoint, params, headers),
+            lambda: self._request_with_retry(
+                "GET", endpoint, params=params, headers=dict(headers or {})
+            ),
+            endpoint=endpoint,
+        )
+
+    def _post(self, endpoint: str, payload: Dict) -> Dict:
+        """POSTリクエストを送信してJSONを返す"""
+        resp = self._request_with_retry("POST", endpoint, json=payload)
+        self._invalidate_after_write(endpoint, payload)
+        return resp.json()
+
+    def _post_file(self, endpoint: str, field: str, file_path: Path, data: Dict) -> Dict:
+        """
+        ファイルをmultipartでPOSTしてJSONを返す
+
+        MIMEタイプはファイル内容から判定する。
+        （同期版はrequestsがmultipart本文を組み立ててから送信する。非同期版はディスクから逐次送信）
+        """
+        mime_type = detect_mime_type(file_path)
+        with open(file_path, "rb") as f:
+            resp = self._request_with_retry(
+                "POST", endpoint, files={field: (file_path.name, f, mime_type)}, data=data
             )
+        return resp.json()
+
+    # ========== キャッシュ ==========
 
-        raise RuntimeError(f"最大リトライ回数（{max_retries}）を超えました")
+    @staticmethod
+    def _cache_key(endpoint: str, params: Optional[Dict]) -> Optional[tuple]:
+        """キャッシュ対象のGETなら (endpoint, company_id) を返す"""
+        params = params or {}
+        if master_ttl(endpoint) is None or set(params) - {"company_id"}:
+            return None
+        return (endpoint, params.get("company_id"))
+
+    def _lookup_cached(self, cache_key: tuple, refresh: bool) -> tuple:
+        """
+        メモリ → ディスクの順にキャッシュを探す
+
+        Returns:
+            (data, entry, stale)
+            data: キャッシュの値（ネットワーク取得が必要なら MISSING）
+            entry: 条件付きリクエストに使うディスクキャッシュのエントリ（なければ None）
+            stale: Trueなら data はTTL切れで、裏で再検証すべき
+        """
+        if not refresh:
+            data = self.cache.get(cache_key)
+            if data is not MISSING:
+                return data, None, False
+
+        entry = self.disk_cache.load(cache_key) if self.disk_cache else None
+        if entry is None or refresh:
+            return MISSING, entry, False
+
+        ttl = master_ttl(cache_key[0])
+        age = time.time() - entry["stored_at"]
+        if age < ttl:
+            self.cache.set(cache_key, entry["data"], ttl - age)
+            return entry["data"], None, False
+        if age < ttl + self.stale_ttl and cache_key not in self._revalidating:
+            self._revalidating.add(cache_key)
+            return entry["data"], entry, True
+        return MISSING, entry, False
+
+    @staticmethod
+    def _conditional_headers(entry: Optional[Dict]) -> Dict[str, str]:
+        """ディスクキャッシュの検証子から条件付きリクエストのヘッダーを作る"""
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def _store_response(self, cache_key: tuple, resp, entry: Optional[Dict]):
+        """レスポンス（304ならディスクの値）をメモリ・ディスクに保存して本文を返す"""
+        if resp.status_code == 304 and entry is not None:
+            data = entry["data"]
+            if self.disk_cache:
+                self.disk_cache.touch(cache_key, entry)
+        else:
+            data = resp.json()
+            if self.disk_cache:
+                self.disk_cache.save(
+                    cache_key,
+                    data,
+                    etag=resp.headers.get("ETag"),
+                    last_modified=resp.headers.get("Last-Modified"),
+                )
+        self.cache.set(cache_key, data, master_ttl(cache_key[0]))
+        return data
+
+    def _fetch_cached(self, params: Optional[Dict], cache_key: tuple, entry: Optional[Dict]):
+        """キャッシュ対象のGETを（検証子があれば条件付きで）送信して保存"""
+        resp = self._send_get(cache_key[0], params, self._conditional_headers(entry))
+        return self._store_response(cache_key, resp, entry)
+
+    def _revalidate(self, params: Optional[Dict], cache_key: tuple, entry: Dict) -> None:
+        """TTL切れのディスクキャッシュを裏で再検証（stale-while-revalidate）"""
+        try:
+            self._fetch_cached(params, cache_key, entry)
+        except Exception as e:
+            logger.warning("キャッシュ再検証エラー: %s", e)
+        finally:
+            self._revalidating.discard(cache_key)
+
+    def _invalidate_after_write(self, endpoint: str, payload: Dict) -> None:
+        """書き込みで変わりうるマスタデータのキャッシュを破棄"""
+        for target in WRITE_INVALIDATIONS.get(endpoint, ()):
+            self.cache.invalidate(target, payload.get("company_id"))
+            if self.disk_cache:
+                self.disk_cache.invalidate(target, payload.get("company_id"))
+        # 取引の発生日以降に終わる期間の試算表は変わる
+        if endpoint == "/api/1/deals" and payload.get("issue_date"):
+            self.report_cache.invalidate(
+                payload.get("company_id"), date.fromisoformat(payload["issue_date"])
+            )
+
+    def invalidate_cache(
+        self, resource: Optional[str] = None, company_id: Optional[int] = None
+    ) -> int:
+        """
+        マスタデータのキャッシュを破棄
+
+        Args:
+            resource: "account_items", "walletables", "partners", "companies"（省略時は全て）
+            company_id: 事業所ID（省略時は全事業所）
+
+        Returns:
+            破棄したエントリ数
+        """
+        endpoint = f"/api/1/{resource}" if resource else None
+        if self.disk_cache:
+            self.disk_cache.invalidate(endpoint, company_id)
+        return self.cache.invalidate(endpoint, company_id)
 
     # ========== 事業所 ==========
 
-    def list_companies(self) -> List[Dict]:
+    def list_companies(self, refresh: bool = False) -> List[Dict]:
         """
         事業所一覧を取得
 
+        Args:
+            refresh: Trueならキャッシュを使わずに取得し直す
+
         Returns:
             [{"id": 123, "name": "合同会社雲孫", ...}, ...]
         """
-        resp = self._request_with_retry("GET", "/api/1/companies")
-        return resp.json().get("companies", [])
+        return self._get("/api/1/companies", key="companies", refresh=refresh)
+
+    def get_company(self, company_id: Optional[int] = None) -> Dict:
+        """
+        事業所の詳細を取得
+
+        Returns:
+            {"id": 123, "name": "合同会社雲孫",
+             "fiscal_years": [{"start_date": "2024-04-01", "end_date": "2025-03-31", ...}], ...}
+        """
+        cid = company_id or self.company_id
+        return self._get(f"/api/1/companies/{cid}", key="company")
 
     # ========== 勘定科目 ==========
 
-    def list_accounts(self, company_id: Optional[int] = None) -> List[Dict]:
+    def list_accounts(
+        self, company_id: Optional[int] = None, refresh: bool = False
+    ) -> List[Dict]:
         """
         勘定科目一覧を取得
 
         Args:
             company_id: 事業所ID（省略時はデフォルト）
+            refresh: Trueならキャッシュを使わずに取得し直す
 
         Returns:
             [{"id": 1, "name": "現金", ...}, ...]
         """
         cid = company_id or self.company_id
-        resp = self._request_with_retry("GET", f"/api/1/account_items?company_id={cid}")
-        return resp.json().get("account_items", [])
+        return self._get(
+            "/api/1/account_items", {"company_id": cid}, key="account_items", refresh=refresh
+        )
+
+    # ========== 税区分 ==========
+
+    def list_tax_codes(
+        self, company_id: Optional[int] = None, refresh: bool = False
+    ) -> List[Dict]:
+        """
+        事業所で使える税区分一覧を取得
+
+        Args:
+            company_id: 事業所ID（省略時はデフォルト）
+            refresh: Trueならキャッシュを使わずに取得し直す
+
+        Returns:
+            [{"code": 136, "name": "purchase_with_tax_10", "name_ja": "課対仕入10%", ...}, ...]
+        """
+        cid = company_id or self.company_id
+        return self._get(f"/api/1/taxes/companies/{cid}", key="taxes", refresh=refresh)
+
+    # ========== 名前 → ID ==========
+
+    def resolve_account(
+        self, query: str, company_id: Optional[int] = None, limit: int = 5
+    ) -> List[Dict]:
+        """
+        勘定科目名（略称・ショートカット可、表記ゆれ・あいまい一致）からIDの候補を引く
+
+        Returns:
+            [{"id": 8, "name": "通信費", "score": 1.0, "match": "exact",
+              "account_category": "販売管理費", "default_tax_code": 136}, ...]
+        """
+        return self._resolve("account_items", query, company_id, limit)
+
+    def resolve_partner(
+        self, query: str, company_id: Optional[int] = None, limit: int = 5
+    ) -> List[Dict]:
+        """
+        取引先名（正式名称・カナ・ショートカット・コード可）からIDの候補を引く
+
+        Returns:
+            [{"id": 3, "name": "アンソロピック", "score": 0.95, "match": "normalized"}, ...]
+        """
+        return self._resolve("partners", query, company_id, limit)
+
+    def resolve_walletable(
+        self, query: str, company_id: Optional[int] = None, limit: int = 5
+    ) -> List[Dict]:
+        """
+        口座名からIDの候補を引く
+
+        Returns:
+            [{"id": 4, "name": "楽天カード", "score": 1.0, "match": "exact", "type": "credit_card"}]
+        """
+        return self._resolve("walletables", query, company_id, limit)
+
+    def resolve_tax_code(
+        self, query: str, company_id: Optional[int] = None, limit: int = 5
+    ) -> List[Dict]:
+        """
+        税区分名（"課対仕入10%" など）から税区分コードの候補を引く
+
+        Returns:
+            [{"id": 136, "name": "課対仕入10%", "score": 1.0, "match": "exact"}, ...]
+        """
+        return self._resolve("taxes", query, company_id, limit)
+
+    def _master_loader(self, kind: str):
+        """索引の種類 → マスタデータの取得メソッド"""
+        return {
+            "account_items": self.list_accounts,
+            "partners": self.get_partners,
+            "walletables": self.list_walletables,
+            "taxes": self.list_tax_codes,
+        }[kind]
+
+    def _resolve(
+        self, kind: str, query: str, company_id: Optional[int], limit: int
+    ) -> List[Dict]:
+        cid = company_id or self.company_id
+        records = self._master_loader(kind)(cid)
+        return self._name_index(kind, cid, records).search(query, limit)
+
+    def _name_index(self, kind: str, cid: int, records: List[Dict]) -> NameIndex:
+        """
+        マスタデータの名前索引（キャッシュから同じマスタデータが返る間は作り直さない）
+        """
+        cached = self._name_indexes.get((kind, cid))
+        if cached is not None and cached[0] is records:
+            return cached[1]
+        index = NameIndex(records, **RESOLVERS[kind])
+        self._name_indexes[(kind, cid)] = (records, index)
+        return index
 
     # ========== 取引 ==========
 
@@ -160,24 +589,146 @@ class FreeeAPIClient:
             "details": details,
             **kwargs,
         }
-        resp = self._request_with_retry("POST", "/api/1/deals", json=payload)
-        return resp.json()
+        return self._post("/api/1/deals", payload)
+
+    def create_deals_bulk(
+        self,
+        deals: List[Dict],
+        company_id: Optional[int] = None,
+        concurrency: Optional[int] = None,
+    ) -> Dict:
+        """
+        取引をまとめて作成（並列送信・冪等キーで二重作成を防止）
+
+        Args:
+            deals: [{"issue_date": "2025-01-01", "deal_type": "expense", "details": [...],
+                     "partner_id": 1, "ref_number": "...", "idempotency_key": "任意"}, ...]
+            company_id: 事業所ID（省略時はデフォルト）
+            concurrency: 同時送信数（省略時は fetch_concurrency）
+
+        Returns:
+            {
+                "results": [{"index": 0, "idempotency_key": "...", "status": "created",
+                             "deal_id": 123}, ...],
+                "summary": {"created": 10, "skipped": 1, "error": 0}
+            }
+        """
+        results, todo = self._plan_bulk_deals(deals, company_id)
+        if todo:
+            workers = min(concurrency or self.fetch_concurrency, len(todo))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(self._create_bulk_deal, *item) for item in todo]
+                for item, future in zip(todo, futures):
+                    results[item[0]] = future.result()
+        return self._bulk_summary(results)
+
+    def _plan_bulk_deals(self, deals: List[Dict], company_id: Optional[int]) -> tuple:
+        """
+        一括作成の入力を送信対象 (index, key, payload, entry) に変換
+
+        作成済みのキー・バッチ内の重複・必須項目の欠けは送信せず、結果を先に埋める。
+        """
+        cid = company_id or self.company_id
+        results: List[Optional[Dict]] = [None] * len(deals)
+        todo = []
+        first_index: Dict[str, int] = {}
+        for index, deal in enumerate(deals):
+            payload = {"company_id": cid, **deal}
+            payload["type"] = payload.pop("deal_type", payload.get("type"))
+            key = payload.pop("idempotency_key", None) or deal_idempotency_key(cid, payload)
+            result = {"index": index, "idempotency_key": key}
+            missing = [f for f in ("issue_date", "type", "details") if not payload.get(f)]
+            entry = self.idempotency_store.get(key)
+
+            if missing:
+                results[index] = {**result, "status": "error", "error": f"必須項目なし: {missing}"}
+            elif key in first_index:
+                results[index] = {**result, "status": "skipped", "duplicate_of": first_index[key]}
+            elif entry and entry["status"] == "created":
+                results[index] = {**result, "status": "skipped", "deal_id": entry["deal_id"]}
+            else:
+                todo.append((index, key, payload, entry))
+            first_index.setdefault(key, index)
+        return results, todo
+
+    @staticmethod
+    def _existing_deal_filters(payload: Dict) -> Dict:
+        """前回の送信結果が不明な取引をfreee上で探すための絞り込み条件"""
+        return {
+            "company_id": payload["company_id"],
+            "partner_id": payload.get("partner_id"),
+            "start_issue_date": payload["issue_date"],
+            "end_issue_date": payload["issue_date"],
+        }
+
+    @staticmethod
+    def _matching_deal(deals: List[Dict], payload: Dict) -> Optional[Dict]:
+        """収支・金額・管理番号が一致する取引を返す"""
+        amount = sum(detail.get("amount") or 0 for detail in payload["details"])
+        for deal in deals:
+            if (
+                deal.get("type") == payload["type"]
+                and deal.get("amount") == amount
+                and (deal.get("ref_number") or None) == (payload.get("ref_number") or None)
+            ):
+                return deal
+        return None
+
+    def _create_bulk_deal(self, index: int, key: str, payload: Dict, entry: Optional[Dict]) -> Dict:
+        """
+        一括作成の1件を送信
+
+        前回の送信結果が不明（pending）なら、先にfreee上の同じ取引を探して二重作成を避ける。
+        エラー時は pending のまま残し、次回の再実行で同じ確認を行う。
+        """
+        result = {"index": index, "idempotency_key": key}
+        try:
+            if entry and entry["status"] == "pending":
+                existing = self._matching_deal(
+                    self.list_deals(**self._existing_deal_filters(payload)), payload
+                )
+                if existing:
+                    self.idempotency_store.mark_created(key, existing["id"])
+                    return {**result, "status": "skipped", "deal_id": existing["id"]}
+            self.idempotency_store.mark_pending(key)
+            deal_id = self._post("/api/1/deals", payload)["deal"]["id"]
+        except Exception as e:
+            return {**result, "status": "error", "error": str(e)}
+        self.idempotency_store.mark_created(key, deal_id)
+        return {**result, "status": "created", "deal_id": deal_id}
+
+    @staticmethod
+    def _bulk_summary(results: List[Dict]) -> Dict:
+        """一括作成の結果に件数の集計を付ける"""
+        summary = {"created": 0, "skipped": 0, "error": 0}
+        for result in results:
+            summary[result["status"]] += 1
+        return {"results": results, "summary": summary}
 
     # ========== 口座 ==========
 
-    def list_walletables(self, company_id: Optional[int] = None) -> List[Dict]:
+    def list_walletables(
+        self,
+        company_id: Optional[int] = None,
+        refresh: bool = False,
+        with_balance: bool = False,
+    ) -> List[Dict]:
         """
         口座一覧を取得
 
         Args:
             company_id: 事業所ID（省略時はデフォルト）
+            refresh: Trueならキャッシュを使わずに取得し直す
+            with_balance: Trueなら残高（walletable_balance / last_balance）も取得する
 
         Returns:
             [{"id": 1, "name": "現金", "type": "bank_account", ...}, ...]
         """
         cid = company_id or self.company_id
-        resp = self._request_with_retry("GET", f"/api/1/walletables?company_id={cid}")
-        return resp.json().get("walletables", [])
+        params = {"company_id": cid}
+        if with_balance:
+            params["with_balance"] = "true"
+        return self._get("/api/1/walletables", params, key="walletables", refresh=refresh)
 
     # ========== 証憑（レシート・請求書） ==========
 
@@ -199,40 +750,156 @@ class FreeeAPIClient:
             {"receipt": {"id": 123, ...}}
         """
         cid = company_id or self.company_id
-        url = f"{self.base_url}/api/1/receipts"
-        headers = {"Authorization": f"Bearer {self.access_token}"}
+        data = {"company_id": str(cid)}
+        if description:
+            data["description"] = description
+        return self._post_file("/api/1/receipts", "receipt", Path(file_path), data)
 
-        with open(file_path, "rb") as f:
-            files = {"receipt": (file_path.name, f, "application/pdf")}
-            data = {"company_id": cid}
-            if description:
-                data["description"] = description
+    def upload_receipts(
+        self,
+        path: str,
+        company_id: Optional[int] = None,
+        description: Optional[str] = None,
+        recursive: bool = False,
+        concurrency: Optional[int] = None,
+    ) -> Dict:
+        """
+        ディレクトリまたはglobに一致する証憑をまとめてアップロード
 
-            resp = requests.post(url, headers=headers, files=files, data=data)
+        内容が同じファイルをアップロード済みなら送信せずにスキップする。
 
-        if resp.status_code not in (200, 201):
-            raise RuntimeError(f"証憑アップロードエラー: {resp.status_code} {resp.text}")
+        Args:
+            path: ディレクトリまたはglobパターン
+            company_id: 事業所ID（省略時はデフォルト）
+            description: 全ファイル共通の説明（オプション）
+            recursive: サブディレクトリも含めるか
+            concurrency: 同時アップロード数（省略時は fetch_concurrency）
 
-        return resp.json()
+        Returns:
+            {
+                "results": [{"file": "...", "status": "uploaded", "receipt_id": 123,
+                             "mime_type": "image/jpeg", "bytes": 204800}, ...],
+                "summary": {"uploaded": 10, "skipped": 2, "error": 0, "bytes": 2048000,
+                            "seconds": 3.2, "files_per_sec": 3.1, "mb_per_sec": 0.61}
+            }
+        """
+        cid = company_id or self.company_id
+        files = collect_files(path, recursive)
+        started = time.monotonic()
+        results: List[Dict] = []
+        if files:
+            workers = min(concurrency or self.fetch_concurrency, len(files))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(self._upload_one, p, cid, description) for p in files]
+                results = [future.result() for future in futures]
+        return self._upload_summary(results, time.monotonic() - started)
+
+    def _check_receipt(self, file_path: Path, company_id: int, sha256: str) -> tuple:
+        """
+        アップロード前の判定
+
+        Returns:
+            (result, skip): skip が True なら result をそのまま返す
+        """
+        mime_type = detect_mime_type(file_path)
+        result = {"file": str(file_path), "mime_type": mime_type, "bytes": file_path.stat().st_size}
+        if mime_type not in SUPPORTED_MIME_TYPES:
+            return {**result, "status": "skipped", "reason": "unsupported_type"}, True
+        # 索引の確認もロック内で行う（同じ内容のアップロードが直前に終わった場合も二重に送らない）
+        with self._uploading_lock:
+            if (company_id, sha256) in self._uploading:
+                return {**result, "status": "skipped", "reason": "duplicate_in_batch"}, True
+            uploaded = self.receipt_index.get(company_id, sha256)
+            if uploaded:
+                skipped = {
+                    **result,
+                    "status": "skipped",
+                    "reason": "already_uploaded",
+                    "receipt_id": uploaded["receipt_id"],
+                }
+                return skipped, True
+            self._uploading.add((company_id, sha256))
+        return result, False
+
+    def _finish_upload(self, company_id: int, sha256: str) -> None:
+        """アップロード中の記録を外す（_check_receipt の確認と追加の間に割り込まないようロック内で）"""
+        with self._uploading_lock:
+            self._uploading.discard((company_id, sha256))
+
+    def _upload_one(self, file_path: Path, company_id: int, description: Optional[str]) -> Dict:
+        """upload_receipts の1ファイル分"""
+        result = {"file": str(file_path)}
+        try:
+            sha256 = file_sha256(file_path)
+            result, skip = self._check_receipt(file_path, company_id, sha256)
+            if skip:
+                return result
+            try:
+                receipt = self.upload_receipt(file_path, company_id, description)
+                self.receipt_index.add(company_id, sha256, receipt["receipt"]["id"], file_path)
+            finally:
+                self._finish_upload(company_id, sha256)
+        except Exception as e:
+            return {**result, "status": "error", "error": str(e)}
+        return {**result, "status": "uploaded", "receipt_id": receipt["receipt"]["id"]}
+
+    @staticmethod
+    def _upload_summary(results: List[Dict], seconds: float) -> Dict:
+        """アップロード結果に件数・スループットの集計を付ける"""
+        summary = {"uploaded": 0, "skipped": 0, "error": 0}
+        for result in results:
+            summary[result["status"]] += 1
+        uploaded_bytes = sum(r["bytes"] for r in results if r["status"] == "uploaded")
+        summary.update(
+            bytes=uploaded_bytes,
+            seconds=round(seconds, 2),
+            files_per_sec=round(summary["uploaded"] / seconds, 2) if seconds else 0.0,
+            mb_per_sec=round(uploaded_bytes / 1024**2 / seconds, 2) if seconds else 0.0,
+        )
+        return {"results": results, "summary": summary}
 
     # ========== その他 ==========
 
-    def get_partners(self, company_id: Optional[int] = None) -> List[Dict]:
+    def get_partners(
+        self, company_id: Optional[int] = None, refresh: bool = False
+    ) -> List[Dict]:
         """
         取引先一覧を取得
 
         Args:
             company_id: 事業所ID（省略時はデフォルト）
+            refresh: Trueならキャッシュを使わずに取得し直す
 
         Returns:
             [{"id": 1, "name": "株式会社〇〇", ...}, ...]
         """
         cid = company_id or self.company_id
-        resp = self._request_with_retry("GET", f"/api/1/partners?company_id={cid}")
-        return resp.json().get("partners", [])
+        return self._get(
+            "/api/1/partners", {"company_id": cid}, key="partners", refresh=refresh
+        )
 
     # ========== 取引 ==========
 
+    def _deal_params(
+        self,
+        company_id: Optional[int] = None,
+        account_item_id: Optional[int] = None,
+        partner_id: Optional[int] = None,
+        start_issue_date: Optional[str] = None,
+        end_issue_date: Optional[str] = None,
+    ) -> Dict:
+        """取引一覧の絞り込みパラメータ"""
+        params = {"company_id": company_id or self.company_id}
+        if account_item_id:
+            params["account_item_id"] = account_item_id
+        if partner_id:
+            params["partner_id"] = partner_id
+        if start_issue_date:
+            params["start_issue_date"] = start_issue_date
+        if end_issue_date:
+            params["end_issue_date"] = end_issue_date
+        return params
+
     def list_deals(
         self,
         company_id: Optional[int] = None,
@@ -241,6 +908,7 @@ class FreeeAPIClient:
         start_issue_date: Optional[str] = None,
         end_issue_date: Optional[str] = None,
         limit: int = 100,
+        offset: int = 0,
     ) -> List[Dict]:
         """
         取引一覧を取得
@@ -252,30 +920,71 @@ class FreeeAPIClient:
             start_issue_date: 開始日（YYYY-MM-DD）
             end_issue_date: 終了日（YYYY-MM-DD）
             limit: 取得件数（最大100）
+            offset: 取得開始位置
 
         Returns:
             [{"id": 123, "issue_date": "2025-01-01", "details": [...], ...}, ...]
         """
-        cid = company_id or self.company_id
-        params = {
-            "company_id": cid,
-            "limit": limit,
-        }
-        if account_item_id:
-            params["account_item_id"] = account_item_id
-        if partner_id:
-            params["partner_id"] = partner_id
-        if start_issue_date:
-            params["start_issue_date"] = start_issue_date
-        if end_issue_date:
-            params["end_issue_date"] = end_issue_date
+        params = self._deal_params(
+            company_id, account_item_id, partner_id, start_issue_date, end_issue_date
+        )
+        params["limit"] = limit
+        if offset:
+            params["offset"] = offset
+
+        return self._get("/api/1/deals", params, key="deals")
+
+    def iter_deals(
+        self,
+        company_id: Optional[int] = None,
+        account_item_id: Optional[int] = None,
+        partner_id: Optional[int] = None,
+        start_issue_date: Optional[str] = None,
+        end_issue_date: Optional[str] = None,
+        max_records: Optional[int] = None,
+        prefetch: bool = False,
+    ) -> Iterator[Dict]:
+        """
+        取引を全ページにわたって1件ずつ取得（offsetで自動ページング）
 
-        query_string = "&".join(f"{k}={v}" for k, v in params.items())
-        resp = self._request_with_retry("GET", f"/api/1/deals?{query_string}")
-        return resp.json().get("deals", [])
+        Args:
+            company_id〜end_issue_date: list_deals と同じ
+            max_records: 最大取得件数（省略時は全件）
+            prefetch: 現ページを返している間に次ページを先読みする
+
+        Yields:
+            {"id": 123, "issue_date": "2025-01-01", ...}
+        """
+        params = self._deal_params(
+            company_id, account_item_id, partner_id, start_issue_date, end_issue_date
+        )
+        return self._iter_records("/api/1/deals", params, "deals", max_records, prefetch)
 
     # ========== ウォレット取引（明細） ==========
 
+    def _wallet_txn_params(
+        self,
+        company_id: Optional[int] = None,
+        walletable_type: Optional[str] = None,
+        walletable_id: Optional[int] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        entry_side: Optional[str] = None,
+    ) -> Dict:
+        """ウォレット取引一覧の絞り込みパラメータ"""
+        params = {"company_id": company_id or self.company_id}
+        if walletable_type:
+            params["walletable_type"] = walletable_type
+        if walletable_id:
+            params["walletable_id"] = walletable_id
+        if start_date:
+            params["start_date"] = start_date
+        if end_date:
+            params["end_date"] = end_date
+        if entry_side:
+            params["entry_side"] = entry_side
+        return params
+
     def list_wallet_txns(
         self,
         company_id: Optional[int] = None,
@@ -285,6 +994,7 @@ class FreeeAPIClient:
         end_date: Optional[str] = None,
         entry_side: Optional[str] = None,
         limit: int = 100,
+        offset: int = 0,
     ) -> List[Dict]:
         """
         ウォレット取引（明細）一覧を取得
@@ -297,33 +1007,69 @@ class FreeeAPIClient:
             end_date: 終了日（YYYY-MM-DD）
             entry_side: 入出金区分（"income" or "expense"）
             limit: 取得件数（最大100）
+            offset: 取得開始位置
 
         Returns:
             [{"id": 123, "date": "2025-01-01", "amount": 10000,
               "description": "ANTHROPIC_カード13", ...}, ...]
         """
-        cid = company_id or self.company_id
-        params = {
-            "company_id": cid,
-            "limit": limit,
-        }
-        if walletable_type:
-            params["walletable_type"] = walletable_type
-        if walletable_id:
-            params["walletable_id"] = walletable_id
-        if start_date:
-            params["start_date"] = start_date
-        if end_date:
-            params["end_date"] = end_date
-        if entry_side:
-            params["entry_side"] = entry_side
+        params = self._wallet_txn_params(
+            company_id, walletable_type, walletable_id, start_date, end_date, entry_side
+        )
+        params["limit"] = limit
+        if offset:
+            params["offset"] = offset
 
-        query_string = "&".join(f"{k}={v}" for k, v in params.items())
-        resp = self._request_with_retry("GET", f"/api/1/wallet_txns?{query_string}")
-        return resp.json().get("wallet_txns", [])
+        return self._get("/api/1/wallet_txns", params, key="wallet_txns")
+
+    def iter_wallet_txns(
+        self,
+        company_id: Optional[int] = None,
+        walletable_type: Optional[str] = None,
+        walletable_id: Optional[int] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        entry_side: Optional[str] = None,
+        max_records: Optional[int] = None,
+        prefetch: bool = False,
+    ) -> Iterator[Dict]:
+        """
+        ウォレット取引を全ページにわたって1件ずつ取得（offsetで自動ページング）
+
+        Args:
+            company_id〜entry_side: list_wallet_txns と同じ
+            max_records: 最大取得件数（省略時は全件）
+            prefetch: 現ページを返している間に次ページを先読みする
+
+        Yields:
+            {"id": 123, "date": "2025-01-01", "amount": 10000, ...}
+        """
+        params = self._wallet_txn_params(
+            company_id, walletable_type, walletable_id, start_date, end_date, entry_side
+        )
+        return self._iter_records(
+            "/api/1/wallet_txns", params, "wallet_txns", max_records, prefetch
+        )
 
     # ========== 請求書 ==========
 
+    def _invoice_params(
+        self,
+        company_id: Optional[int] = None,
+        partner_id: Optional[int] = None,
+        issue_date_min: Optional[str] = None,
+        issue_date_max: Optional[str] = None,
+    ) -> Dict:
+        """請求書一覧の絞り込みパラメータ"""
+        params = {"company_id": company_id or self.company_id}
+        if partner_id:
+            params["partner_id"] = partner_id
+        if issue_date_min:
+            params["issue_date_min"] = issue_date_min
+        if issue_date_max:
+            params["issue_date_max"] = issue_date_max
+        return params
+
     def list_invoices(
         self,
         company_id: Optional[int] = None,
@@ -331,6 +1077,7 @@ class FreeeAPIClient:
         issue_date_min: Optional[str] = None,
         issue_date_max: Optional[str] = None,
         limit: int = 100,
+        offset: int = 0,
     ) -> List[Dict]:
         """
         請求書一覧を取得
@@ -341,25 +1088,219 @@ class FreeeAPIClient:
             issue_date_min: 発行日の開始日（YYYY-MM-DD）
             issue_date_max: 発行日の終了日（YYYY-MM-DD）
             limit: 取得件数（最大100）
+            offset: 取得開始位置
 
         Returns:
             [{"id": 123, "invoice_number": "INV-001", "partner_name": "株式会社〇〇", "total_amount": 10000, ...}, ...]
         """
-        cid = company_id or self.company_id
-        params = {
-            "company_id": cid,
-            "limit": limit,
+        params = self._invoice_params(company_id, partner_id, issue_date_min, issue_date_max)
+        params["limit"] = limit
+        if offset:
+            params["offset"] = offset
+
+        return self._get("/api/1/invoices", params, key="invoices")
+
+    def iter_invoices(
+        self,
+        company_id: Optional[int] = None,
+        partner_id: Optional[int] = None,
+        issue_date_min: Optional[str] = None,
+        issue_date_max: Optional[str] = None,
+        max_records: Optional[int] = None,
+        prefetch: bool = False,
+    ) -> Iterator[Dict]:
+        """
+        請求書を全ページにわたって1件ずつ取得（offsetで自動ページング）
+
+        Args:
+            company_id〜issue_date_max: list_invoices と同じ
+            max_records: 最大取得件数（省略時は全件）
+            prefetch: 現ページを返している間に次ページを先読みする
+
+        Yields:
+            {"id": 123, "invoice_number": "INV-001", ...}
+        """
+        params = self._invoice_params(company_id, partner_id, issue_date_min, issue_date_max)
+        return self._iter_records("/api/1/invoices", params, "invoices", max_records, prefetch)
+
+    # ========== ページング ==========
+
+    def _page_params(self, params: Dict, offset: int, max_records: Optional[int]) -> Dict:
+        """offset・limitを付与したページ単位のパラメータ"""
+        limit = PAGE_SIZE if max_records is None else min(PAGE_SIZE, max_records - offset)
+        return {**params, "limit": limit, "offset": offset}
+
+    def _iter_records(
+        self,
+        endpoint: str,
+        params: Dict,
+        key: str,
+        max_records: Optional[int] = None,
+        prefetch: bool = False,
+    ) -> Iterator[Dict]:
+        """
+        一覧APIをoffsetでページングしながら1件ずつ返すジェネレータ
+
+        メモリに保持するのは現ページ（prefetch時は次ページも）のみ。
+        """
+        offset = 0
+        executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+        try:
+            pending = None
+            while max_records is None or offset < max_records:
+                page_params = self._page_params(params, offset, max_records)
+                if pending is not None:
+                    page = pending.result()
+                else:
+                    page = self._get(endpoint, page_params, key=key)
+
+                offset += len(page)
+                has_next = len(page) == page_params["limit"] and (
+                    max_records is None or offset < max_records
+                )
+                pending = None
+                if has_next and executor is not None:
+                    next_params = self._page_params(params, offset, max_records)
+                    pending = executor.submit(self._get, endpoint, next_params, key)
+
+                yield from page
+                if not has_next:
+                    break
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+    def get_changes(
+        self,
+        resource: str,
+        cursor: Optional[str] = None,
+        company_id: Optional[int] = None,
+        start_date: Optional[str] = None,
+        baseline: bool = False,
+        **filters,
+    ) -> Dict:
+        """
+        前回の呼び出し（cursor）から新規・更新・削除された取引・口座明細だけを取得
+
+        初回は start_date 以降の全件を新規として返し、以降は返ってきた cursor を渡す。
+        cursor には絞り込み条件が紐づくので、2回目以降は cursor だけでよい。
+
+        Args:
+            resource: "deals" または "wallet_txns"
+            cursor: 前回の結果の cursor（省略時は条件からフィードを作る）
+            company_id: 事業所ID（省略時はデフォルト）
+            start_date: 対象の開始日（省略時は31日前）
+            baseline: Trueなら初回の記録は返さず、以降の変更だけを追う
+            **filters: 絞り込み条件（取引: account_item_id, partner_id /
+                口座明細: walletable_type, walletable_id, entry_side）
+
+        Returns:
+            {"cursor": "3f2a...:6", "records": [{..., "change": "new"}, ...], "deleted": [...],
+             "counts": {"fetched": 120, "new": 2, "updated": 1, "deleted": 0},
+             "window_start": "2025-01-01"}
+        """
+        feed = self.change_feed.open(
+            resource, company_id or self.company_id, cursor, start_date, filters
+        )
+        records = self.fetch_all(feed["resource"], **self.change_feed.fetch_params(feed))
+        return self.change_feed.apply(feed, records, baseline)
+
+    def fetch_all(
+        self,
+        resource: str,
+        max_records: Optional[int] = None,
+        concurrency: Optional[int] = None,
+        **filters,
+    ) -> List[Dict]:
+        """
+        一覧APIを全ページ取得してリストで返す
+
+        concurrency が2以上なら複数ページを並列取得し、1なら次ページを先読みしながら
+        逐次取得する。いずれもレート制限（rate_limiter）の範囲内でリクエストする。
+
+        Args:
+            resource: "deals", "wallet_txns", "invoices" のいずれか
+            max_records: 最大取得件数（省略時は全件）
+            concurrency: 並列ページ取得数（省略時は fetch_concurrency）
+            **filters: iter_deals / iter_wallet_txns / iter_invoices の絞り込み条件
+
+        Returns:
+            レコードのリスト（offset順）
+        """
+        concurrency = concurrency or self.fetch_concurrency
+        if concurrency <= 1:
+            return list(
+                self._iter_resource(resource, max_records=max_records, prefetch=True, **filters)
+            )
+
+        endpoint, params = self._resource_request(resource, **filters)
+        first_params = self._page_params(params, 0, max_records)
+        data = self._get(endpoint, first_params)
+        records = data.get(resource, [])
+        if len(records) < first_params["limit"]:
+            return records
+
+        def fetch_page(offset: int) -> List[Dict]:
+            return self._get(endpoint, self._page_params(params, offset, max_records), key=resource)
+
+        total = self._total_count(data, max_records)
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            # 総件数がわかる場合: 残りページをまとめて並列取得
+            if total is not None:
+                for page in executor.map(fetch_page, range(len(records), total, PAGE_SIZE)):
+                    records.extend(page)
+                return records
+
+            # 総件数が不明な場合: concurrencyページずつ取得し、端数ページが出たら終了
+            offset = len(records)
+            while True:
+                offsets = self._wave_offsets(offset, concurrency, max_records)
+                if not offsets:
+                    return records
+                pages = list(executor.map(fetch_page, offsets))
+                for page in pages:
+                    records.extend(page)
+                if any(len(page) < PAGE_SIZE for page in pages):
+                    return records
+                offset = offsets[-1] + PAGE_SIZE
+
+    def _resource_request(self, resource: str, **filters) -> tuple[str, Dict]:
+        """resource名から一覧APIのendpointと絞り込みパラメータを組み立てる"""
+        builders = {
+            "deals": self._deal_params,
+            "wallet_txns": self._wallet_txn_params,
+            "invoices": self._invoice_params,
         }
-        if partner_id:
-            params["partner_id"] = partner_id
-        if issue_date_min:
-            params["issue_date_min"] = issue_date_min
-        if issue_date_max:
-            params["issue_date_max"] = issue_date_max
+        if resource not in builders:
+            raise ValueError(f"ページング非対応のリソース: {resource}")
+        return f"/api/1/{resource}", builders[resource](**filters)
 
-        query_string = "&".join(f"{k}={v}" for k, v in params.items())
-        resp = self._request_with_retry("GET", f"/api/1/invoices?{query_string}")
-        return resp.json().get("invoices", [])
+    def _iter_resource(
+        self,
+        resource: str,
+        max_records: Optional[int] = None,
+        prefetch: bool = False,
+        **filters,
+    ):
+        """resource名から _iter_records を呼び出す"""
+        endpoint, params = self._resource_request(resource, **filters)
+        return self._iter_records(endpoint, params, resource, max_records, prefetch)
+
+    @staticmethod
+    def _total_count(data: Dict, max_records: Optional[int]) -> Optional[int]:
+        """レスポンスの meta.total_count（max_records で頭打ち）。なければ None"""
+        total = (data.get("meta") or {}).get("total_count")
+        if total is None:
+            return max_records
+        return total if max_records is None else min(total, max_records)
+
+    @staticmethod
+    def _wave_offsets(offset: int, concurrency: int, max_records: Optional[int]) -> List[int]:
+        """総件数不明時に次にまとめて取得するページのoffset一覧"""
+        offsets = [offset + i * PAGE_SIZE for i in range(concurrency)]
+        if max_records is not None:
+            offsets = [o for o in offsets if o < max_records]
+        return offsets
 
     # ========== レポート（財務諸表） ==========
 
@@ -391,19 +1332,7 @@ class FreeeAPIClient:
                 }
             }
         """
-        cid = company_id or self.company_id
-        params = {
-            "company_id": cid,
-            "fiscal_year": fiscal_year,
-        }
-        if start_month is not None:
-            params["start_month"] = start_month
-        if end_month is not None:
-            params["end_month"] = end_month
-
-        query_string = "&".join(f"{k}={v}" for k, v in params.items())
-        resp = self._request_with_retry("GET", f"/api/1/reports/trial_bs?{query_string}")
-        return resp.json()
+        return self._report("trial_bs", fiscal_year, company_id, start_month, end_month)
 
     def get_trial_balance_pl(
         self,
@@ -433,16 +1362,633 @@ class FreeeAPIClient:
                 }
             }
         """
+        return self._report("trial_pl", fiscal_year, company_id, start_month, end_month)
+
+    # ========== 月次推移 ==========
+
+    def get_pl_trend(
+        self,
+        fiscal_years: List[int],
+        company_id: Optional[int] = None,
+        concurrency: Optional[int] = None,
+    ) -> Dict:
+        """
+        損益計算書（PL）の月次推移を取得
+
+        会計年度の各月の試算表を並列に取得し、月×勘定科目の表にまとめる。
+        終わった月の試算表はキャッシュし、次回からは取得しない。
+
+        Args:
+            fiscal_years: 会計年度のリスト（例: [2023, 2024]）
+            company_id: 事業所ID（省略時はデフォルト）
+            concurrency: 並列取得数（省略時は fetch_concurrency）
+
+        Returns:
+            {
+                "report": "trial_pl",
+                "company_id": 1,
+                "months": ["2024-04", ...],
+                "rows": [{"account_item_id": 7, "account_item_name": "外注費", "values": [...]}],
+                "fetched_months": 2,
+                "cached_months": 10
+            }
+        """
+        return self._report_trend("trial_pl", fiscal_years, company_id, concurrency)
+
+    def get_bs_trend(
+        self,
+        fiscal_years: List[int],
+        company_id: Optional[int] = None,
+        concurrency: Optional[int] = None,
+    ) -> Dict:
+        """
+        貸借対照表（BS）の月末残高の推移を取得
+
+        Args/Returns は get_pl_trend と同じ（report は "trial_bs"）
+        """
+        return self._report_trend("trial_bs", fiscal_years, company_id, concurrency)
+
+    def _report(
+        self,
+        report: str,
+        fiscal_year: int,
+        company_id: Optional[int],
+        start_month: Optional[int],
+        end_month: Optional[int],
+    ) -> Dict:
+        """試算表を取得（report_cache 経由）"""
+        return self._report_lookup(report, fiscal_year, company_id, start_month, end_month)[0]
+
+    def _report_lookup(
+        self,
+        report: str,
+        fiscal_year: int,
+        company_id: Optional[int],
+        start_month: Optional[int],
+        end_month: Optional[int],
+    ) -> tuple:
+        """
+        試算表をキャッシュから、なければfreeeから取得
+
+        Returns:
+            (レスポンス, キャッシュから返したか)
+        """
         cid = company_id or self.company_id
+        company = self.get_company(cid)
+        key, params, period_end = self._report_request(
+            report, fiscal_year, cid, start_month, end_month, company
+        )
+        data = self.report_cache.get(key)
+        if data is not MISSING:
+            return data, True
+        data = self._get(f"/api/1/reports/{report}", params)
+        self.report_cache.set(key, data, period_end)
+        return data, False
+
+    @staticmethod
+    def _report_request(
+        report: str,
+        fiscal_year: int,
+        cid: int,
+        start_month: Optional[int],
+        end_month: Optional[int],
+        company: Dict,
+    ) -> tuple:
+        """
+        キャッシュキー・クエリパラメータ・期間の末日
+
+        開始月・終了月を省略した場合も期首月・期末月に確定させてからキーにする
+        （省略時と明示した場合で同じエントリを使う）。
+        """
+        start, end, period_end = report_period(
+            fiscal_year, start_month, end_month, company.get("fiscal_years") or []
+        )
+        key = (cid, report, fiscal_year, start, end)
         params = {
             "company_id": cid,
             "fiscal_year": fiscal_year,
+            "start_month": start,
+            "end_month": end,
+        }
+        return key, params, period_end
+
+    def _report_trend(
+        self, report: str, fiscal_years: List[int], company_id: Optional[int], concurrency
+    ) -> Dict:
+        cid = company_id or self.company_id
+        periods = self._trend_periods(self.get_company(cid), fiscal_years)
+
+        def fetch(period: tuple) -> tuple:
+            fiscal_year, _, month = period
+            return self._report_lookup(report, fiscal_year, cid, month, month)
+
+        with ThreadPoolExecutor(max_workers=concurrency or self.fetch_concurrency) as executor:
+            reports = list(executor.map(fetch, periods))
+        return self._trend_result(report, cid, periods, reports)
+
+    @staticmethod
+    def _trend_periods(company: Dict, fiscal_years: List[int]) -> List[tuple]:
+        """(会計年度, 暦年, 暦月) のリスト（まだ始まっていない月は除く）"""
+        return [
+            (fiscal_year, year, month)
+            for fiscal_year in fiscal_years
+            for year, month in fiscal_year_months(fiscal_year, company.get("fiscal_years") or [])
+            if month_has_started(year, month)
+        ]
+
+    @staticmethod
+    def _trend_result(report: str, cid: int, periods: List[tuple], reports: List[tuple]) -> Dict:
+        """月ごとの (レスポンス, キャッシュから返したか) を表にまとめる"""
+        months = [f"{year}-{month:02d}" for _, year, month in periods]
+        balances = [data.get(report, {}).get("balances", []) for data, _ in reports]
+        cached = sum(1 for _, hit in reports if hit)
+        return {
+            **build_trend(report, months, balances),
+            "company_id": cid,
+            "fetched_months": len(periods) - cached,
+            "cached_months": cached,
         }
-        if start_month is not None:
-            params["start_month"] = start_month
-        if end_month is not None:
-            params["end_month"] = end_month
 
-        query_string = "&".join(f"{k}={v}" for k, v in params.items())
-        resp = self._request_with_retry("GET", f"/api/1/reports/trial_pl?{query_string}")
+    # ========== スナップショット ==========
+
+    def get_company_snapshot(
+        self, company_id: Optional[int] = None, refresh: bool = False
+    ) -> Dict:
+        """
+        事業所の概要（口座残高・今月のPL・マスタ件数）を1回で取得
+
+        事業所一覧・勘定科目・口座（残高付き）・取引先・今月の試算表（PL）を並列に取得してまとめる。
+        一部の取得に失敗しても、残りは返す（失敗は errors）。
+
+        Args:
+            company_id: 事業所ID（省略時はデフォルト）
+            refresh: Trueならマスタデータのキャッシュを使わずに取得し直す
+
+        Returns:
+            snapshot.build_snapshot の結果
+        """
+        cid = company_id or self.company_id
+        calls = self._snapshot_calls(cid, refresh)
+        parts = {}
+        with ThreadPoolExecutor(max_workers=len(SNAPSHOT_PARTS)) as executor:
+            futures = {part: executor.submit(calls[part]) for part in SNAPSHOT_PARTS}
+            for part, future in futures.items():
+                try:
+                    parts[part] = future.result()
+                except Exception as e:
+                    parts[part] = e
+        return build_snapshot(cid, parts)
+
+    def _snapshot_calls(self, cid: int, refresh: bool) -> Dict:
+        """SNAPSHOT_PARTS → 取得する関数（非同期版ではコルーチン関数）"""
+        return {
+            "companies": lambda: self.list_companies(refresh=refresh),
+            "account_items": lambda: self.list_accounts(cid, refresh=refresh),
+            "walletables": lambda: self.list_walletables(cid, refresh=refresh, with_balance=True),
+            "partners": lambda: self.get_partners(cid, refresh=refresh),
+            "pl": lambda: self._snapshot_pl(cid),
+        }
+
+    def _snapshot_pl(self, cid: int) -> tuple:
+        """今月の試算表（PL）。(事業所情報, 会計年度, 暦年, 暦月, 試算表, キャッシュから返したか)"""
+        company = self.get_company(cid)
+        fiscal_year, year, month = current_fiscal_month(company.get("fiscal_years") or [])
+        report, hit = self._report_lookup("trial_pl", fiscal_year, cid, month, month)
+        return company, fiscal_year, year, month, report, hit
+
+
+class AsyncFreeeAPIClient(FreeeAPIClient):
+    """
+    freee API 非同期クライアント（httpx + asyncio）
+
+    公開メソッドは FreeeAPIClient と同じシグネチャで、awaitable を返す。
+    リトライ時の待機は asyncio.sleep なので、MCPのイベントループをブロックしない。
+    """
+
+    def __init__(self, *args, **kwargs):
+        """
+        引数は FreeeAPIClient と同じ。
+        on_token_refresh は同期関数のままでよく、スレッドで実行される。
+        """
+        super().__init__(*args, **kwargs)
+        self._background_tasks: set = set()
+
+    async def aclose(self) -> None:
+        """コネクションプールをクローズ"""
+        await self.pool.aclose()
+
+    async def _request_with_retry(
+        self,
+        method: str,
+        endpoint: str,
+        max_retries: int = 3,
+        **kwargs,
+    ) -> httpx.Response:
+        """
+        リトライ・レート制限対応付きリクエスト（非同期版）
+
+        Args:
+            method: HTTP method (GET, POST, etc.)
+            endpoint: API endpoint (e.g., "/api/1/companies")
+            max_retries: 最大リトライ回数（429による待ち直しは数えない）
+            **kwargs: httpx.AsyncClient.request() に渡す追加パラメータ
+
+        Returns:
+            Response object
+        """
+        url = f"{self.base_url}{endpoint}"
+        headers = kwargs.pop("headers", {})
+        multipart = "files" in kwargs
+        cid = self._company_of(kwargs)
+
+        attempts = 0
+        throttles = 0
+        with METRICS.span("freee_api", method=method, endpoint=endpoint):
+            while attempts < max_retries:
+                waited = time.perf_counter()
+                await self.rate_limiter.acquire_async(cid)
+                METRICS.observe("freee_rate_limit_wait_seconds", time.perf_counter() - waited)
+                if self.token_manager:
+                    self.access_token = await self.token_manager.aget_token()
+                headers.update(self._get_headers(multipart))
+                self._rewind_files(kwargs)
+                started = time.perf_counter()
+                resp = await self.pool.arequest(method, url, headers=headers, **kwargs)
+                self._record_response(method, endpoint, resp, time.perf_counter() - started)
+                throttled = resp.status_code == 429
+                pause = self.rate_limiter.observe(
+                    cid, resp.status_code, resp.headers, throttles + throttled
+                )
+
+                # 成功（304は条件付きリクエストでキャッシュが有効な場合）
+                if resp.status_code in (200, 201, 304):
+                    return resp
+
+                # 429: レート制限 → 事業所の送信を Retry-After の間止めて減速し、列に並び直す
+                # （リトライ回数には数えず、max_throttles 回までは失敗にしない）
+                if throttled:
+                    throttles += 1
+                    METRICS.inc("freee_http_retries_total", endpoint=endpoint, reason="429")
+                    if throttles > self.rate_limiter.max_throttles:
+                        raise RuntimeError(
+                            f"レート制限（429）が{throttles}回続いたため中止しました: {endpoint}"
+                        )
+                    logger.warning("レート制限（429）: %.1f秒待機 %s", pause, endpoint)
+                    continue
+
+                attempts += 1
+
+                # 401: token期限切れ → リフレッシュ（TokenManagerまたはコールバックがあれば）
+                if resp.status_code == 401:
+                    METRICS.inc("freee_http_retries_total", endpoint=endpoint, reason="401")
+                    if self.token_manager:
+                        await self.token_manager.arefresh(self.access_token)
+                        continue
+                    if self.on_token_refresh:
+                        logger.info("tokenをリフレッシュします")
+                        new_token = await asyncio.to_thread(self.on_token_refresh)
+                        self.access_token = new_token["access_token"]
+                        continue
+                    else:
+                        raise RuntimeError(f"401 Unauthorized: token期限切れ {resp.text}")
+
+                # 500系エラー → リトライ
+                if 500 <= resp.status_code < 600:
+                    if attempts < max_retries:
+                        wait_time = 2 ** (attempts - 1)
+                        METRICS.inc("freee_http_retries_total", endpoint=endpoint, reason="5xx")
+                        logger.warning(
+                            "サーバーエラー（%s）: %s秒後にリトライ %s",
+                            resp.status_code, wait_time, endpoint,
+                        )
+                        await asyncio.sleep(wait_time)
+                        continue
+
+                # その他エラー
+                raise RuntimeError(
+                    f"freee API エラー: {resp.status_code} {resp.text}"
+                )
+
+            raise RuntimeError(f"最大リトライ回数（{max_retries}）を超えました")
+
+    async def _get(
+        self,
+        endpoint: str,
+        params: Optional[Dict] = None,
+        key: Optional[str] = None,
+        refresh: bool = False,
+    ):
+        """GETリクエストを送信してJSONを返す（非同期版、マスタデータはキャッシュ経由）"""
+        cache_key = self._cache_key(endpoint, params)
+        if cache_key is None:
+            resp = await self._send_get(endpoint, params)
+            data = resp.json()
+        else:
+            data, entry, stale = self._lookup_cached(cache_key, refresh)
+            if stale:
+                task = asyncio.create_task(self._revalidate(params, cache_key, entry))
+                self._background_tasks.add(task)
+                task.add_done_callback(self._background_tasks.discard)
+            elif data is MISSING:
+                data = await self._fetch_cached(params, cache_key, entry)
+        return data.get(key, []) if key else data
+
+    async def _fetch_cached(
+        self, params: Optional[Dict], cache_key: tuple, entry: Optional[Dict]
+    ):
+        """キャッシュ対象のGETを（検証子があれば条件付きで）送信して保存（非同期版）"""
+        resp = await self._send_get(cache_key[0], params, self._conditional_headers(entry))
+        return self._store_response(cache_key, resp, entry)
+
+    async def _send_get(
+        self, endpoint: str, params: Optional[Dict], headers: Optional[Dict] = None
+    ):
+        """GETを送信（同じGETが実行中なら、そのレスポンスを共有する。非同期版）"""
+        return await self._flights.ado(
+            self._flight_key(endpoint, params, headers),
+            lambda: self._request_with_retry(
+                "GET", endpoint, params=params, headers=dict(headers or {})
+            ),
+            endpoint=endpoint,
+        )
+
+    async def _revalidate(self, params: Optional[Dict], cache_key: tuple, entry: Dict) -> None:
+        """TTL切れのディスクキャッシュを裏で再検証（非同期版）"""
+        try:
+            await self._fetch_cached(params, cache_key, entry)
+        except Exception as e:
+            logger.warning("キャッシュ再検証エラー: %s", e)
+        finally:
+            self._revalidating.discard(cache_key)
+
+    async def _post(self, endpoint: str, payload: Dict) -> Dict:
+        """POSTリクエストを送信してJSONを返す（非同期版）"""
+        resp = await self._request_with_retry("POST", endpoint, json=payload)
+        self._invalidate_after_write(endpoint, payload)
+        return resp.json()
+
+    async def _post_file(self, endpoint: str, field: str, file_path: Path, data: Dict) -> Dict:
+        """ファイルをmultipartでPOSTしてJSONを返す（非同期版、ディスクから逐次送信）"""
+        mime_type = detect_mime_type(file_path)
+        with open(file_path, "rb") as f:
+            resp = await self._request_with_retry(
+                "POST", endpoint, files={field: (file_path.name, f, mime_type)}, data=data
+            )
         return resp.json()
+
+    async def create_deals_bulk(
+        self,
+        deals: List[Dict],
+        company_id: Optional[int] = None,
+        concurrency: Optional[int] = None,
+    ) -> Dict:
+        """取引をまとめて作成（非同期版、並列送信・冪等キーで二重作成を防止）"""
+        results, todo = self._plan_bulk_deals(deals, company_id)
+        semaphore = asyncio.Semaphore(concurrency or self.fetch_concurrency)
+
+        async def create(item: tuple) -> None:
+            async with semaphore:
+                results[item[0]] = await self._create_bulk_deal(*item)
+
+        await asyncio.gather(*(create(item) for item in todo))
+        return self._bulk_summary(results)
+
+    async def _create_bulk_deal(
+        self, index: int, key: str, payload: Dict, entry: Optional[Dict]
+    ) -> Dict:
+        """一括作成の1件を送信（非同期版、冪等キーの記録はファイルに書くのでスレッドで行う）"""
+        result = {"index": index, "idempotency_key": key}
+        store = self.idempotency_store
+        try:
+            if entry and entry["status"] == "pending":
+                existing = self._matching_deal(
+                    await self.list_deals(**self._existing_deal_filters(payload)), payload
+                )
+                if existing:
+                    await asyncio.to_thread(store.mark_created, key, existing["id"])
+                    return {**result, "status": "skipped", "deal_id": existing["id"]}
+            await asyncio.to_thread(store.mark_pending, key)
+            deal_id = (await self._post("/api/1/deals", payload))["deal"]["id"]
+        except Exception as e:
+            return {**result, "status": "error", "error": str(e)}
+        await asyncio.to_thread(store.mark_created, key, deal_id)
+        return {**result, "status": "created", "deal_id": deal_id}
+
+    async def _iter_records(
+        self,
+        endpoint: str,
+        params: Dict,
+        key: str,
+        max_records: Optional[int] = None,
+        prefetch: bool = False,
+    ) -> AsyncIterator[Dict]:
+        """一覧APIをoffsetでページングしながら1件ずつ返す（非同期ジェネレータ）"""
+        offset = 0
+        pending: Optional[asyncio.Task] = None
+        try:
+            while max_records is None or offset < max_records:
+                page_params = self._page_params(params, offset, max_records)
+                if pending is not None:
+                    page = await pending
+                else:
+                    page = await self._get(endpoint, page_params, key=key)
+
+                offset += len(page)
+                has_next = len(page) == page_params["limit"] and (
+                    max_records is None or offset < max_records
+                )
+                pending = None
+                if has_next and prefetch:
+                    next_params = self._page_params(params, offset, max_records)
+                    pending = asyncio.create_task(self._get(endpoint, next_params, key=key))
+
+                for record in page:
+                    yield record
+                if not has_next:
+                    break
+        finally:
+            if pending is not None and not pending.done():
+                pending.cancel()
+
+    async def get_changes(
+        self,
+        resource: str,
+        cursor: Optional[str] = None,
+        company_id: Optional[int] = None,
+        start_date: Optional[str] = None,
+        baseline: bool = False,
+        **filters,
+    ) -> Dict:
+        """前回の呼び出し（cursor）から変わった取引・口座明細だけを取得（非同期版）"""
+        feed = self.change_feed.open(
+            resource, company_id or self.company_id, cursor, start_date, filters
+        )
+        records = await self.fetch_all(feed["resource"], **self.change_feed.fetch_params(feed))
+        return await asyncio.to_thread(self.change_feed.apply, feed, records, baseline)
+
+    async def fetch_all(
+        self,
+        resource: str,
+        max_records: Optional[int] = None,
+        concurrency: Optional[int] = None,
+        **filters,
+    ) -> List[Dict]:
+        """一覧APIを全ページ取得してリストで返す（非同期版、並列ページ取得）"""
+        concurrency = concurrency or self.fetch_concurrency
+        if concurrency <= 1:
+            records = []
+            async for record in self._iter_resource(
+                resource, max_records=max_records, prefetch=True, **filters
+            ):
+                records.append(record)
+            return records
+
+        endpoint, params = self._resource_request(resource, **filters)
+        first_params = self._page_params(params, 0, max_records)
+        data = await self._get(endpoint, first_params)
+        records = data.get(resource, [])
+        if len(records) < first_params["limit"]:
+            return records
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch_page(offset: int) -> List[Dict]:
+            async with semaphore:
+                return await self._get(
+                    endpoint, self._page_params(params, offset, max_records), key=resource
+                )
+
+        # 総件数がわかる場合: 残りページをまとめて並列取得
+        total = self._total_count(data, max_records)
+        if total is not None:
+            pages = await asyncio.gather(
+                *(fetch_page(offset) for offset in range(len(records), total, PAGE_SIZE))
+            )
+            for page in pages:
+                records.extend(page)
+            return records
+
+        # 総件数が不明な場合: concurrencyページずつ取得し、端数ページが出たら終了
+        offset = len(records)
+        while True:
+            offsets = self._wave_offsets(offset, concurrency, max_records)
+            if not offsets:
+                return records
+            pages = await asyncio.gather(*(fetch_page(o) for o in offsets))
+            for page in pages:
+                records.extend(page)
+            if any(len(page) < PAGE_SIZE for page in pages):
+                return records
+            offset = offsets[-1] + PAGE_SIZE
+
+    async def _resolve(
+        self, kind: str, query: str, company_id: Optional[int], limit: int
+    ) -> List[Dict]:
+        cid = company_id or self.company_id
+        records = await self._master_loader(kind)(cid)
+        return self._name_index(kind, cid, records).search(query, limit)
+
+    async def _report_lookup(
+        self,
+        report: str,
+        fiscal_year: int,
+        company_id: Optional[int],
+        start_month: Optional[int],
+        end_month: Optional[int],
+    ) -> tuple:
+        """試算表をキャッシュから、なければfreeeから取得（非同期版）"""
+        cid = company_id or self.company_id
+        company = await self.get_company(cid)
+        key, params, period_end = self._report_request(
+            report, fiscal_year, cid, start_month, end_month, company
+        )
+        data = self.report_cache.get(key)
+        if data is not MISSING:
+            return data, True
+        data = await self._get(f"/api/1/reports/{report}", params)
+        self.report_cache.set(key, data, period_end)
+        return data, False
+
+    async def _report(
+        self,
+        report: str,
+        fiscal_year: int,
+        company_id: Optional[int],
+        start_month: Optional[int],
+        end_month: Optional[int],
+    ) -> Dict:
+        """試算表を取得（非同期版）"""
+        data, _ = await self._report_lookup(report, fiscal_year, company_id, start_month, end_month)
+        return data
+
+    async def _report_trend(
+        self, report: str, fiscal_years: List[int], company_id: Optional[int], concurrency
+    ) -> Dict:
+        cid = company_id or self.company_id
+        periods = self._trend_periods(await self.get_company(cid), fiscal_years)
+        semaphore = asyncio.Semaphore(concurrency or self.fetch_concurrency)
+
+        async def fetch(period: tuple) -> tuple:
+            fiscal_year, _, month = period
+            async with semaphore:
+                return await self._report_lookup(report, fiscal_year, cid, month, month)
+
+        reports = await asyncio.gather(*(fetch(period) for period in periods))
+        return self._trend_result(report, cid, periods, list(reports))
+
+    async def get_company_snapshot(
+        self, company_id: Optional[int] = None, refresh: bool = False
+    ) -> Dict:
+        """事業所の概要を1回で取得（非同期版）"""
+        cid = company_id or self.company_id
+        calls = self._snapshot_calls(cid, refresh)
+        results = await asyncio.gather(
+            *(calls[part]() for part in SNAPSHOT_PARTS), return_exceptions=True
+        )
+        return build_snapshot(cid, dict(zip(SNAPSHOT_PARTS, results)))
+
+    async def _snapshot_pl(self, cid: int) -> tuple:
+        company = await self.get_company(cid)
+        fiscal_year, year, month = current_fiscal_month(company.get("fiscal_years") or [])
+        report, hit = await self._report_lookup("trial_pl", fiscal_year, cid, month, month)
+        return company, fiscal_year, year, month, report, hit
+
+    async def upload_receipts(
+        self,
+        path: str,
+        company_id: Optional[int] = None,
+        description: Optional[str] = None,
+        recursive: bool = False,
+        concurrency: Optional[int] = None,
+    ) -> Dict:
+        """ディレクトリまたはglobに一致する証憑をまとめてアップロード（非同期版）"""
+        cid = company_id or self.company_id
+        files = await asyncio.to_thread(collect_files, path, recursive)
+        semaphore = asyncio.Semaphore(concurrency or self.fetch_concurrency)
+        started = time.monotonic()
+
+        async def upload(file_path: Path) -> Dict:
+            async with semaphore:
+                return await self._upload_one(file_path, cid, description)
+
+        results = await asyncio.gather(*(upload(p) for p in files))
+        return self._upload_summary(list(results), time.monotonic() - started)
+
+    async def _upload_one(
+        self, file_path: Path, company_id: int, description: Optional[str]
+    ) -> Dict:
+        """upload_receipts の1ファイル分（非同期版、ハッシュ計算はスレッドで実行）"""
+        result = {"file": str(file_path)}
+        try:
+            sha256 = await asyncio.to_thread(file_sha256, file_path)
+            result, skip = self._check_receipt(file_path, company_id, sha256)
+            if skip:
+                return result
+            try:
+                receipt = await self.upload_receipt(file_path, company_id, description)
+                self.receipt_index.add(company_id, sha256, receipt["receipt"]["id"], file_path)
+            finally:
+                self._finish_upload(company_id, sha256)
+        except Exception as e:
+            return {**result, "status": "error", "error": str(e)}
+        return {**result, "status": "uploaded", "receipt_id": receipt["receipt"]["id"]}
@@ -0,0 +1,139 @@
+"""freee API 共有HTTPコネクションプール（keep-alive / HTTP/2対応）"""
+
+from __future__ import annotations
+
+import importlib.util
+import threading
+from typing import Dict, Optional
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class ConnectionPool:
+    """
+    freee API 呼び出し用の長寿命コネクションプール
+
+    同期（requests.Session）と非同期（httpx.AsyncClient）の両方を保持し、
+    FreeeAPIClient / AsyncFreeeAPIClient / FreeeOAuth から共有される。
+    ツール呼び出しごとのTCP/TLSハンドシェイクを避けるのが目的。
+    """
+
+    def __init__(
+        self,
+        pool_size: int = 10,
+        keepalive_expiry: float = 60.0,
+        timeout: float = 30.0,
+        http2: Optional[bool] = None,
+    ):
+        """
+        Args:
+            pool_size: ホストごとの最大コネクション数
+            keepalive_expiry: アイドル状態のコネクションを保持する秒数（非同期側）
+            timeout: リクエストタイムアウト（秒）
+            http2: HTTP/2を使うか（None: h2 がインストールされていれば有効）
+        """
+        self.pool_size = pool_size
+        self.keepalive_expiry = keepalive_expiry
+        self.timeout = timeout
+        if http2 is None:
+            http2 = importlib.util.find_spec("h2") is not None
+        self.http2 = http2
+
+        # 同期側: requests.Session + HTTPAdapter（urllib3のコネクションプール）
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._adapter = adapter
+
+        # 非同期側: 初回利用時に生成
+        self._async_client: Optional[httpx.AsyncClient] = None
+
+        # 非同期側のコネクション再利用カウンタ
+        self._lock = threading.Lock()
+        self._async_requests = 0
+        self._async_new_connections = 0
+
+    # ========== 同期 ==========
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """プール済みSessionでリクエストを送信"""
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.request(method, url, **kwargs)
+
+    # ========== 非同期 ==========
+
+    @property
+    def async_client(self) -> httpx.AsyncClient:
+        """共有 httpx.AsyncClient（遅延初期化）"""
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(
+                http2=self.http2,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.pool_size,
+                    max_keepalive_connections=self.pool_size,
+                    keepalive_expiry=self.keepalive_expiry,
+                ),
+            )
+        return self._async_client
+
+    async def _trace(self, event_name: str, info: Dict) -> None:
+        """httpcoreのtraceイベントから新規コネクション確立を数える"""
+        if event_name == "connection.connect_tcp.complete":
+            with self._lock:
+                self._async_new_connections += 1
+
+    async def arequest(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """プール済みAsyncClientでリクエストを送信"""
+        with self._lock:
+            self._async_requests += 1
+        extensions = kwargs.pop("extensions", {})
+        extensions["trace"] = self._trace
+        return await self.async_client.request(method, url, extensions=extensions, **kwargs)
+
+    # ========== 統計・クローズ ==========
+
+    def stats(self) -> Dict:
+        """
+        コネクション再利用の統計
+
+        Returns:
+            {"requests": 120, "new_connections": 2, "reused_connections": 118,
+             "reuse_ratio": 0.98, "http2": False}
+        """
+        sync_requests = 0
+        sync_connections = 0
+        pools = self._adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            sync_requests += pool.num_requests
+            sync_connections += pool.num_connections
+
+        with self._lock:
+            total_requests = sync_requests + self._async_requests
+            new_connections = sync_connections + self._async_new_connections
+
+        reused = max(total_requests - new_connections, 0)
+        return {
+            "requests": total_requests,
+            "new_connections": new_connections,
+            "reused_connections": reused,
+            "reuse_ratio": round(reused / total_requests, 3) if total_requests else 0.0,
+            "http2": self.http2,
+        }
+
+    def close(self) -> None:
+        """同期Sessionをクローズ"""
+        self.session.close()
+
+    async def aclose(self) -> None:
+        """同期・非同期の両方をクローズ"""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+        self.close()
@@ -0,0 +1,133 @@
+"""取引一括作成の冪等キー管理（タイムアウト後の再実行で二重計上しないため）"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+# この日数より古い記録はジャーナルの書き直し時に削除
+RETENTION_DAYS = 90
+
+
+def deal_idempotency_key(company_id: int, payload: Dict) -> str:
+    """
+    取引の冪等キーを計算（事業所・発生日・収支・金額・取引先・管理番号のハッシュ）
+
+    Args:
+        company_id: 事業所ID
+        payload: create_deal に渡す内容（issue_date, type, details, partner_id, ref_number 等）
+
+    Returns:
+        32文字の16進文字列
+    """
+    amount = sum(detail.get("amount") or 0 for detail in payload.get("details") or [])
+    material = [
+        company_id,
+        payload.get("issue_date"),
+        payload.get("type"),
+        amount,
+        payload.get("partner_id") or payload.get("partner_name"),
+        payload.get("ref_number"),
+    ]
+    digest = hashlib.sha256(json.dumps(material, ensure_ascii=False).encode()).hexdigest()
+    return digest[:32]
+
+
+class IdempotencyStore:
+    """
+    冪等キー → 取引作成状況の記録
+
+    status は "pending"（送信したが結果不明）または "created"（deal_id確定）。
+    pending のキーを再実行するときは、freee上に同じ取引がないか確認してから送信する。
+    file_path を指定すると追記専用のジャーナル（1行1記録のJSON）に永続化し、
+    サーバー再起動後の再実行でも二重作成を防ぐ。記録のたびにファイル全体を書き直さず1行追記し、
+    行数が最新の記録数の2倍を超えたら古い記録を削除して書き直す。
+    """
+
+    def __init__(self, file_path: Optional[str] = None):
+        """
+        Args:
+            file_path: 保存先ファイル（省略時はメモリのみ）
+        """
+        self.file_path = Path(file_path).expanduser() if file_path else None
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict] = {}
+        # ジャーナルの行数（書き直すかどうかの判定用）
+        self._journal_lines = 0
+        if self.file_path:
+            self.file_path.parent.mkdir(parents=True, exist_ok=True)
+            if self.file_path.exists() and not self._load():
+                with self._lock:
+                    self._compact()
+
+    def _load(self) -> bool:
+        """
+        ジャーナルを読み込む（旧形式の キー → 記録 のJSONも読める）
+
+        Returns:
+            Falseなら書き直しが必要（途中で切れた行・期限切れの記録・旧形式がある）
+        """
+        clean = True
+        for line in self.file_path.read_text().splitlines():
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # 追記の途中で止まった行（その記録は pending のまま確認される）
+                clean = False
+                continue
+            self._journal_lines += 1
+            if "key" in record:
+                self._entries[record.pop("key")] = record
+            else:
+                self._entries.update(record)
+                clean = False
+        cutoff = time.time() - RETENTION_DAYS * 86400
+        live = {k: v for k, v in self._entries.items() if v.get("updated_at", 0) >= cutoff}
+        clean = clean and len(live) == len(self._entries)
+        self._entries = live
+        return clean and self._journal_lines <= 2 * len(self._entries)
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Returns:
+            {"status": "created", "deal_id": 123, "updated_at": 1700000000.0} or None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            return dict(entry) if entry else None
+
+    def mark_pending(self, key: str) -> None:
+        """送信直前に記録（結果が返らなかった場合の再実行時に既存取引を確認する）"""
+        self._put(key, {"status": "pending", "deal_id": None})
+
+    def mark_created(self, key: str, deal_id: int) -> None:
+        """作成済みとして記録"""
+        self._put(key, {"status": "created", "deal_id": deal_id})
+
+    def _put(self, key: str, entry: Dict) -> None:
+        with self._lock:
+            self._entries[key] = {**entry, "updated_at": time.time()}
+            if not self.file_path:
+                return
+            if self._journal_lines >= 2 * len(self._entries):
+                self._compact()
+            else:
+                with self.file_path.open("a") as f:
+                    f.write(json.dumps({"key": key, **self._entries[key]}) + "\n")
+                self._journal_lines += 1
+
+    def _compact(self) -> None:
+        """古い記録を削除し、最新の記録だけでジャーナルを書き直す（ロック保持中に呼ぶ）"""
+        cutoff = time.time() - RETENTION_DAYS * 86400
+        self._entries = {k: v for k, v in self._entries.items() if v["updated_at"] >= cutoff}
+        lines = [json.dumps({"key": key, **entry}) + "\n" for key, entry in self._entries.items()]
+        tmp_path = self.file_path.with_suffix(".tmp")
+        tmp_path.write_text("".join(lines))
+        tmp_path.replace(self.file_path)
+        self._journal_lines = len(lines)
@@ -0,0 +1,264 @@
+"""計測（ツール・HTTPのレイテンシヒストグラム、カウンタ、トレーシングスパン）"""
+
+from __future__ import annotations
+
+import contextvars
+import importlib.util
+import itertools
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+# レイテンシ（秒）とペイロードサイズ（バイト）のバケット境界
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+# OpenTelemetry がインストールされていればスパンをそちらにも送る
+if importlib.util.find_spec("opentelemetry") is not None:
+    from opentelemetry import trace as _otel_trace
+
+    _TRACER = _otel_trace.get_tracer("freee-mcp")
+else:
+    _TRACER = None
+
+_current_span: contextvars.ContextVar[Optional[Dict]] = contextvars.ContextVar(
+    "freee_current_span", default=None
+)
+_span_ids = itertools.count(1)
+
+
+class Histogram:
+    """累積しないバケットカウントを持つヒストグラム（分位点はバケット内の線形補間）"""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """分位点の推定値（観測値の最小・最大の範囲に収める）"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = self.buckets[i - 1] if i else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.max
+                estimate = lower + (upper - lower) * (rank - seen) / bucket_count
+                return min(max(estimate, self.min), self.max)
+            seen += bucket_count
+        return self.max
+
+    def summary(self) -> Dict:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "avg": round(self.sum / self.count, 6) if self.count else None,
+            "max": _round(self.max),
+            "p50": _round(self.quantile(0.5)),
+            "p99": _round(self.quantile(0.99)),
+        }
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 6) if value is not None else None
+
+
+def _labels_key(labels: Dict[str, object]) -> Tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(labels: Tuple, extra: str = "") -> str:
+    parts = [f'{k}="{v}"' for k, v in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Metrics:
+    """
+    プロセス全体の計測値
+
+    - observe: ヒストグラム（ツール・endpointごとのレイテンシ、ペイロードサイズ）
+    - inc: カウンタ（リクエスト数、リトライ、429、tokenリフレッシュ）
+    - register_collector: 取得時に値を集めるゲージ（キャッシュヒット率、コネクション再利用など）
+    - span: call_tool から _request_with_retry までのトレーシングスパン
+    """
+
+    def __init__(self, max_spans: int = 256):
+        """
+        Args:
+            max_spans: 保持する直近のスパン数
+        """
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, Tuple], Histogram] = {}
+        self._counters: Dict[Tuple[str, Tuple], float] = {}
+        self._collectors: Dict[str, Callable[[], Dict[str, float]]] = {}
+        self.spans: deque = deque(maxlen=max_spans)
+
+    # ========== 記録 ==========
+
+    def observe(
+        self, name: str, value: float, buckets: Tuple[float, ...] = LATENCY_BUCKETS, **labels
+    ) -> None:
+        """ヒストグラムに値を記録"""
+        key = (name, _labels_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def inc(self, name: str, amount: float = 1, **labels) -> None:
+        """カウンタを加算"""
+        key = (name, _labels_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def register_collector(self, name: str, collect: Callable[[], Dict[str, float]]) -> None:
+        """取得時に呼ばれるゲージの収集関数を登録（同名は上書き）"""
+        with self._lock:
+            self._collectors[name] = collect
+
+    def counter_total(self, name: str, **labels) -> float:
+        """カウンタの合計（指定したラベルが一致するものだけ）"""
+        wanted = set(_labels_key(labels))
+        with self._lock:
+            return sum(
+                value
+                for (counter, key), value in self._counters.items()
+                if counter == name and wanted <= set(key)
+            )
+
+    def reset(self) -> None:
+        """全ての計測値を消去（ベンチマーク用）"""
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self.spans.clear()
+
+    # ========== トレーシング ==========
+
+    @contextmanager
+    def span(self, name: str, **attrs) -> Iterator[Dict]:
+        """
+        トレーシングスパン（contextvarsで親子関係を引き継ぐ）
+
+        終了したスパンは self.spans に残り、OpenTelemetryがあればそちらにも送る。
+        """
+        parent = _current_span.get()
+        record = {
+            "trace_id": parent["trace_id"] if parent else next(_span_ids),
+            "span_id": next(_span_ids),
+            "parent_id": parent["span_id"] if parent else None,
+            "name": name,
+            "attrs": attrs,
+        }
+        token = _current_span.set(record)
+        started = time.perf_counter()
+        otel = _TRACER.start_as_current_span(name, attributes=attrs) if _TRACER else None
+        try:
+            if otel is not None:
+                with otel:
+                    yield record
+            else:
+                yield record
+        finally:
+            record["duration_ms"] = round((time.perf_counter() - started) * 1000, 3)
+            _current_span.reset(token)
+            self.spans.append(record)
+
+    def recent_spans(self, limit: int = 50) -> List[Dict]:
+        """直近に終了したスパン（新しい順）"""
+        return list(itertools.islice(reversed(self.spans), limit))
+
+    # ========== 出力 ==========
+
+    def _gauges(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            collectors = list(self._collectors.items())
+        gauges = {}
+        for name, collect in collectors:
+            try:
+                gauges[name] = collect()
+            except Exception as e:
+                gauges[name] = {"error": str(e)}
+        return gauges
+
+    def snapshot(self) -> Dict:
+        """
+        計測値のスナップショット
+
+        Returns:
+            {
+                "counters": {"freee_http_requests_total": [{"endpoint": "...", "value": 12}]},
+                "histograms": {"freee_tool_duration_seconds": [{"tool": "...", "p50": 0.1, ...}]},
+                "gauges": {"cache": {"hits": 10, "misses": 2, "hit_ratio": 0.83}}
+            }
+        """
+        with self._lock:
+            counters = list(self._counters.items())
+            histograms = [(key, h.summary()) for key, h in self._histograms.items()]
+        result: Dict = {"counters": {}, "histograms": {}, "gauges": self._gauges()}
+        for (name, labels), value in sorted(counters):
+            result["counters"].setdefault(name, []).append({**dict(labels), "value": value})
+        for (name, labels), summary in sorted(histograms, key=lambda item: item[0]):
+            result["histograms"].setdefault(name, []).append({**dict(labels), **summary})
+        return result
+
+    def prometheus(self) -> str:
+        """Prometheus テキスト形式"""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(
+                (
+                    (key, h.buckets, list(h.counts), h.count, h.sum)
+                    for key, h in self._histograms.items()
+                ),
+                key=lambda item: item[0],
+            )
+        lines: List[str] = []
+        typed = set()
+        for (name, labels), value in counters:
+            if name not in typed:
+                lines.append(f"# TYPE {name} counter")
+                typed.add(name)
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+        for (name, labels), buckets, counts, count, total in histograms:
+            if name not in typed:
+                lines.append(f"# TYPE {name} histogram")
+                typed.add(name)
+            cumulative = 0
+            for bound, bucket_count in zip(buckets, counts):
+                cumulative += bucket_count
+                le = f'le="{bound}"'
+                lines.append(f"{name}_bucket{_format_labels(labels, le)} {cumulative}")
+            le = 'le="+Inf"'
+            lines.append(f"{name}_bucket{_format_labels(labels, le)} {count}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {total}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+        for group, values in self._gauges().items():
+            for key, value in values.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    name = f"freee_{group}_{key}"
+                    lines.append(f"# TYPE {name} gauge")
+                    lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+# プロセス全体で共有する計測値
+METRICS = Metrics()
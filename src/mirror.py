@@ -0,0 +1,516 @@
+"""取引・口座明細・請求書・取引先のローカルSQLiteミラー（差分同期）"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+MIRROR_RESOURCES = ("deals", "wallet_txns", "invoices", "partners")
+
+# 同期時に再取得する重なり期間（日）。過去日付の修正・削除を取り込むため
+DEFAULT_OVERLAP_DAYS = 31
+
+# 初回同期で取得する期間（日）
+DEFAULT_INITIAL_DAYS = 365
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS deals (
+    id INTEGER PRIMARY KEY,
+    company_id INTEGER NOT NULL,
+    issue_date TEXT,
+    type TEXT,
+    amount INTEGER,
+    partner_id INTEGER,
+    ref_number TEXT,
+    walletable_id INTEGER,
+    raw TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_deals_date ON deals (company_id, issue_date);
+CREATE INDEX IF NOT EXISTS idx_deals_partner ON deals (company_id, partner_id);
+CREATE INDEX IF NOT EXISTS idx_deals_walletable ON deals (company_id, walletable_id);
+
+CREATE TABLE IF NOT EXISTS deal_details (
+    deal_id INTEGER NOT NULL,
+    company_id INTEGER NOT NULL,
+    issue_date TEXT,
+    account_item_id INTEGER,
+    tax_code INTEGER,
+    amount INTEGER,
+    description TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_deal_details_deal ON deal_details (deal_id);
+CREATE INDEX IF NOT EXISTS idx_deal_details_account
+    ON deal_details (company_id, account_item_id, issue_date);
+
+CREATE TABLE IF NOT EXISTS wallet_txns (
+    id INTEGER PRIMARY KEY,
+    company_id INTEGER NOT NULL,
+    date TEXT,
+    amount INTEGER,
+    entry_side TEXT,
+    walletable_type TEXT,
+    walletable_id INTEGER,
+    description TEXT,
+    raw TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_wallet_txns_date ON wallet_txns (company_id, date);
+CREATE INDEX IF NOT EXISTS idx_wallet_txns_walletable
+    ON wallet_txns (company_id, walletable_id, date);
+
+CREATE TABLE IF NOT EXISTS invoices (
+    id INTEGER PRIMARY KEY,
+    company_id INTEGER NOT NULL,
+    issue_date TEXT,
+    partner_id INTEGER,
+    total_amount INTEGER,
+    raw TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_invoices_date ON invoices (company_id, issue_date);
+CREATE INDEX IF NOT EXISTS idx_invoices_partner ON invoices (company_id, partner_id);
+
+CREATE TABLE IF NOT EXISTS partners (
+    id INTEGER PRIMARY KEY,
+    company_id INTEGER NOT NULL,
+    name TEXT,
+    raw TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_partners_company ON partners (company_id);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    company_id INTEGER NOT NULL,
+    resource TEXT NOT NULL,
+    high_water TEXT,
+    synced_at REAL,
+    PRIMARY KEY (company_id, resource)
+);
+"""
+
+# リソースごとの日付カラム（同期ウィンドウ・クエリの期間指定に使う）
+DATE_COLUMNS = {"deals": "issue_date", "wallet_txns": "date", "invoices": "issue_date"}
+
+# リソースごとの金額カラム
+AMOUNT_COLUMNS = {"deals": "amount", "wallet_txns": "amount", "invoices": "total_amount"}
+
+# fetch_all に渡す期間フィルタの引数名
+DATE_FILTERS = {
+    "deals": ("start_issue_date", "end_issue_date"),
+    "wallet_txns": ("start_date", "end_date"),
+    "invoices": ("issue_date_min", "issue_date_max"),
+}
+
+# query() の group_by → 集計キーのフィールド（month は日付から算出）
+GROUP_BY = {
+    "month": None,
+    "partner": "partner_id",
+    "walletable": "walletable_id",
+    "account_item": "account_item_id",
+    "entry_side": "entry_side",
+}
+
+
+class MirrorStore:
+    """
+    freeeデータのSQLiteミラー
+
+    日付・取引先・勘定科目・口座にインデックスを張り、集計クエリをローカルで完結させる。
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        """
+        Args:
+            db_path: SQLiteファイルのパス（デフォルト: ~/.freee-mcp/mirror.db）
+        """
+        self.db_path = Path(db_path or os.path.expanduser("~/.freee-mcp/mirror.db"))
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    # ========== 同期状態 ==========
+
+    def get_state(self, company_id: int, resource: str) -> Optional[Dict]:
+        """
+        リソースの同期状態
+
+        Returns:
+            {"high_water": "2025-01-31", "synced_at": 1700000000.0} or None（未同期）
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT high_water, synced_at FROM sync_state"
+                " WHERE company_id = ? AND resource = ?",
+                (company_id, resource),
+            ).fetchone()
+        return dict(row) if row else None
+
+    def set_state(self, company_id: int, resource: str, high_water: Optional[str]) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sync_state (company_id, resource, high_water, synced_at)"
+                " VALUES (?, ?, ?, ?)",
+                (company_id, resource, high_water, time.time()),
+            )
+
+    # ========== 書き込み ==========
+
+    def replace_window(
+        self,
+        resource: str,
+        company_id: int,
+        records: List[Dict],
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+    ) -> int:
+        """
+        同期ウィンドウ内のレコードを置き換える（ウィンドウ内で削除されたレコードも反映）
+
+        Args:
+            resource: "deals", "wallet_txns", "invoices", "partners"
+            company_id: 事業所ID
+            records: freee APIから取得したレコード
+            start_date: ウィンドウの開始日（partnersでは無視、全件置き換え）
+            end_date: ウィンドウの終了日
+
+        Returns:
+            書き込んだレコード数
+        """
+        with self._lock, self._conn:
+            self._delete_window(resource, company_id, start_date, end_date)
+            if resource == "deals":
+                self._insert_deals(company_id, records)
+            elif resource == "wallet_txns":
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO wallet_txns (id, company_id, date, amount, entry_side,"
+                    " walletable_type, walletable_id, description, raw)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (
+                            r["id"],
+                            company_id,
+                            r.get("date"),
+                            r.get("amount"),
+                            r.get("entry_side"),
+                            r.get("walletable_type"),
+                            r.get("walletable_id"),
+                            r.get("description"),
+                            json.dumps(r, ensure_ascii=False),
+                        )
+                        for r in records
+                    ],
+                )
+            elif resource == "invoices":
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO invoices"
+                    " (id, company_id, issue_date, partner_id, total_amount, raw)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    [
+                        (
+                            r["id"],
+                            company_id,
+                            r.get("issue_date"),
+                            r.get("partner_id"),
+                            r.get("total_amount"),
+                            json.dumps(r, ensure_ascii=False),
+                        )
+                        for r in records
+                    ],
+                )
+            elif resource == "partners":
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO partners (id, company_id, name, raw)"
+                    " VALUES (?, ?, ?, ?)",
+                    [
+                        (r["id"], company_id, r.get("name"), json.dumps(r, ensure_ascii=False))
+                        for r in records
+                    ],
+                )
+            else:
+                raise ValueError(f"ミラー非対応のリソース: {resource}")
+        return len(records)
+
+    def _delete_window(
+        self,
+        resource: str,
+        company_id: int,
+        start_date: Optional[str],
+        end_date: Optional[str],
+    ) -> None:
+        """置き換え対象のウィンドウ内のレコードを削除"""
+        if resource == "partners":
+            self._conn.execute("DELETE FROM partners WHERE company_id = ?", (company_id,))
+            return
+        if resource not in DATE_COLUMNS:
+            raise ValueError(f"ミラー非対応のリソース: {resource}")
+
+        column = DATE_COLUMNS[resource]
+        where = ["company_id = ?"]
+        args: List = [company_id]
+        if start_date:
+            where.append(f"{column} >= ?")
+            args.append(start_date)
+        if end_date:
+            where.append(f"{column} <= ?")
+            args.append(end_date)
+        condition = " AND ".join(where)
+        if resource == "deals":
+            self._conn.execute(
+                "DELETE FROM deal_details WHERE deal_id IN"
+                f" (SELECT id FROM deals WHERE {condition})",
+                args,
+            )
+        self._conn.execute(f"DELETE FROM {resource} WHERE {condition}", args)
+
+    def _insert_deals(self, company_id: int, deals: List[Dict]) -> None:
+        """取引と明細を書き込む"""
+        ids = [(d["id"],) for d in deals]
+        self._conn.executemany("DELETE FROM deal_details WHERE deal_id = ?", ids)
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO deals (id, company_id, issue_date, type, amount, partner_id,"
+            " ref_number, walletable_id, raw) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    d["id"],
+                    company_id,
+                    d.get("issue_date"),
+                    d.get("type"),
+                    d.get("amount"),
+                    d.get("partner_id"),
+                    d.get("ref_number"),
+                    (d.get("payments") or [{}])[0].get("from_walletable_id"),
+                    json.dumps(d, ensure_ascii=False),
+                )
+                for d in deals
+            ],
+        )
+        self._conn.executemany(
+            "INSERT INTO deal_details (deal_id, company_id, issue_date, account_item_id,"
+            " tax_code, amount, description) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    d["id"],
+                    company_id,
+                    d.get("issue_date"),
+                    detail.get("account_item_id"),
+                    detail.get("tax_code"),
+                    detail.get("amount"),
+                    detail.get("description"),
+                )
+                for d in deals
+                for detail in d.get("details") or []
+            ],
+        )
+
+    # ========== 読み出し ==========
+
+    def query(
+        self,
+        resource: str,
+        company_id: int,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        partner_id: Optional[int] = None,
+        account_item_id: Optional[int] = None,
+        walletable_id: Optional[int] = None,
+        entry_side: Optional[str] = None,
+        description_contains: Optional[str] = None,
+        group_by: Optional[str] = None,
+        limit: int = 100,
+    ) -> List[Dict]:
+        """
+        ミラーから絞り込み・集計
+
+        Args:
+            resource: "deals", "wallet_txns", "invoices"
+            company_id: 事業所ID
+            start_date / end_date: 期間（YYYY-MM-DD）
+            partner_id / account_item_id / walletable_id / entry_side: 絞り込み条件
+            description_contains: 摘要（明細テキスト）の部分一致
+            group_by: "month", "partner", "walletable", "account_item", "entry_side"
+                      （省略時は集計せずレコードを返す）
+            limit: 最大行数
+
+        Returns:
+            group_by指定時: [{"key": "2025-01", "count": 12, "total": 345000}, ...]
+            未指定時: freee APIのレコード（raw）のリスト
+        """
+        if resource not in DATE_COLUMNS:
+            raise ValueError(f"ミラー非対応のリソース: {resource}")
+        if group_by is not None and group_by not in GROUP_BY:
+            raise ValueError(f"group_by は {', '.join(GROUP_BY)} のいずれか: {group_by}")
+
+        # 勘定科目での絞り込み・集計、摘要検索は取引明細テーブル（親の取引をJOIN）で行う
+        use_details = resource == "deals" and bool(
+            account_item_id is not None or group_by == "account_item" or description_contains
+        )
+        if use_details:
+            source = "deal_details t JOIN deals p ON p.id = t.deal_id"
+            columns = {
+                "partner_id": "p.partner_id",
+                "walletable_id": "p.walletable_id",
+                "account_item_id": "t.account_item_id",
+                "description": "t.description",
+            }
+            date_column, amount_column = "t.issue_date", "t.amount"
+        else:
+            source = f"{resource} t"
+            columns = {
+                "deals": {"partner_id": "t.partner_id", "walletable_id": "t.walletable_id"},
+                "wallet_txns": {
+                    "walletable_id": "t.walletable_id",
+                    "entry_side": "t.entry_side",
+                    "description": "t.description",
+                },
+                "invoices": {"partner_id": "t.partner_id"},
+            }[resource]
+            date_column = f"t.{DATE_COLUMNS[resource]}"
+            amount_column = f"t.{AMOUNT_COLUMNS[resource]}"
+
+        where = ["t.company_id = ?"]
+        args: List = [company_id]
+        if start_date:
+            where.append(f"{date_column} >= ?")
+            args.append(start_date)
+        if end_date:
+            where.append(f"{date_column} <= ?")
+            args.append(end_date)
+        filters = {
+            "partner_id": partner_id,
+            "account_item_id": account_item_id,
+            "walletable_id": walletable_id,
+            "entry_side": entry_side,
+            "description": f"%{description_contains}%" if description_contains else None,
+        }
+        for field, value in filters.items():
+            if value is None:
+                continue
+            if field not in columns:
+                raise ValueError(f"{resource} は {field} で絞り込めません")
+            operator = "LIKE" if field == "description" else "="
+            where.append(f"{columns[field]} {operator} ?")
+            args.append(value)
+        condition = " AND ".join(where)
+
+        with self._lock:
+            if group_by is None:
+                if use_details:
+                    sql = (
+                        "SELECT raw FROM deals WHERE id IN"
+                        f" (SELECT t.deal_id FROM {source} WHERE {condition})"
+                        " ORDER BY issue_date LIMIT ?"
+                    )
+                else:
+                    sql = (
+                        f"SELECT t.raw FROM {source} WHERE {condition}"
+                        f" ORDER BY {date_column} LIMIT ?"
+                    )
+                rows = self._conn.execute(sql, [*args, limit]).fetchall()
+                return [json.loads(row["raw"]) for row in rows]
+
+            if group_by == "month":
+                key_expr = f"substr({date_column}, 1, 7)"
+            else:
+                field = GROUP_BY[group_by]
+                if field not in columns:
+                    raise ValueError(f"{resource} は {group_by} で集計できません")
+                key_expr = columns[field]
+            order = "key" if group_by == "month" else "total DESC"
+            rows = self._conn.execute(
+                f"SELECT {key_expr} AS key, COUNT(*) AS count, SUM({amount_column}) AS total"
+                f" FROM {source} WHERE {condition} GROUP BY key ORDER BY {order} LIMIT ?",
+                [*args, limit],
+            ).fetchall()
+            return [dict(row) for row in rows]
+
+    def counts(self, company_id: int) -> Dict[str, int]:
+        """リソースごとのミラー済みレコード数"""
+        with self._lock:
+            return {
+                resource: self._conn.execute(
+                    f"SELECT COUNT(*) FROM {resource} WHERE company_id = ?", (company_id,)
+                ).fetchone()[0]
+                for resource in MIRROR_RESOURCES
+            }
+
+
+async def sync_mirror(
+    client,
+    store: MirrorStore,
+    company_id: Optional[int] = None,
+    resources: Iterable[str] = MIRROR_RESOURCES,
+    full: bool = False,
+    start_date: Optional[str] = None,
+    overlap_days: int = DEFAULT_OVERLAP_DAYS,
+) -> Dict[str, Dict]:
+    """
+    freeeからミラーへ差分同期
+
+    前回の最終日付（high_water）から overlap_days 遡った日以降だけを取得し、
+    そのウィンドウをミラー上で置き換える。取引先は件数が少ないので毎回全件置き換え。
+
+    Args:
+        client: AsyncFreeeAPIClient
+        store: MirrorStore
+        company_id: 事業所ID（省略時はクライアントのデフォルト）
+        resources: 同期するリソース
+        full: Trueなら high_water を無視して start_date から取得し直す
+        start_date: 初回（full）同期の開始日（省略時は DEFAULT_INITIAL_DAYS 日前）
+        overlap_days: 差分同期で遡る日数
+
+    Returns:
+        {"wallet_txns": {"fetched": 120, "start_date": "2025-01-01",
+                         "high_water": "2025-02-10"}, ...}
+    """
+    cid = company_id or client.company_id
+    today = date.today().isoformat()
+    initial_start = start_date or (date.today() - timedelta(days=DEFAULT_INITIAL_DAYS)).isoformat()
+    results = {}
+
+    for resource in resources:
+        if resource not in MIRROR_RESOURCES:
+            raise ValueError(f"ミラー非対応のリソース: {resource}")
+
+        if resource == "partners":
+            partners = await client.get_partners(cid, refresh=True)
+            await asyncio.to_thread(store.replace_window, "partners", cid, partners)
+            store.set_state(cid, resource, None)
+            results[resource] = {"fetched": len(partners)}
+            continue
+
+        state = store.get_state(cid, resource)
+        if full or not state or not state.get("high_water"):
+            window_start = initial_start
+        else:
+            high_water = date.fromisoformat(state["high_water"])
+            window_start = (high_water - timedelta(days=overlap_days)).isoformat()
+
+        start_key, end_key = DATE_FILTERS[resource]
+        records = await client.fetch_all(
+            resource, company_id=cid, **{start_key: window_start, end_key: today}
+        )
+        await asyncio.to_thread(
+            store.replace_window, resource, cid, records, window_start, today
+        )
+
+        date_column = DATE_COLUMNS[resource]
+        dates = [r[date_column] for r in records if r.get(date_column)]
+        high_water = max(dates, default=(state or {}).get("high_water") or window_start)
+        store.set_state(cid, resource, high_water)
+        results[resource] = {
+            "fetched": len(records),
+            "start_date": window_start,
+            "high_water": high_water,
+        }
+
+    return results
@@ -0,0 +1,296 @@
+"""freee API レート制限（事業所ごとの適応型トークンバケット）"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Mapping, Optional
+
+# freee APIのクォータは事業所単位。既定値は環境変数で上書きする想定
+DEFAULT_RATE_PER_SEC = 5.0
+DEFAULT_BURST = 10
+
+# 429を受けたときの減速率と、成功ごとの加速幅（上限レートに対する割合）（AIMD）
+DECREASE_FACTOR = 0.5
+INCREASE_RATIO = 0.05
+MIN_RATE_PER_SEC = 0.2
+
+# クォータヘッダーで送信ペースを配分する最短のリセット時間（秒）。
+# これより短い窓は使い切ったときにリセットまで待つだけにする（窓の終わりで極端に減速しないように）
+MIN_BUDGET_WINDOW = 5.0
+
+# Retry-After がない429の待ち時間の上限（秒、指数バックオフ）
+MAX_BACKOFF = 60
+
+# 残りクォータ・リセットまでの時間を示すレスポンスヘッダー（大文字小文字は区別しない）
+REMAINING_HEADERS = ("X-RateLimit-Remaining", "RateLimit-Remaining")
+RESET_HEADERS = ("X-RateLimit-Reset", "RateLimit-Reset")
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After（秒数またはHTTP-date）を待ち秒数に変換"""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_quota(headers: Mapping[str, str]) -> tuple[Optional[int], Optional[float]]:
+    """
+    レスポンスヘッダーから残りクォータを読む
+
+    Returns:
+        (残りリクエスト数, リセットまでの秒数)。ヘッダーがなければ None
+    """
+    remaining = reset = None
+    for name in REMAINING_HEADERS:
+        if headers.get(name) is not None:
+            try:
+                remaining = int(float(headers[name]))
+            except ValueError:
+                pass
+            break
+    for name in RESET_HEADERS:
+        if headers.get(name) is not None:
+            try:
+                reset = float(headers[name])
+            except ValueError:
+                break
+            # UNIX時刻で返すAPIと、残り秒数で返すAPIがある
+            if reset > 10**9:
+                reset = reset - time.time()
+            reset = max(reset, 0.0)
+            break
+    return remaining, reset
+
+
+class TokenBucket:
+    """
+    トークンバケット（予約方式・AIMDで補充レートを調整）
+
+    acquire() は即座にトークンを1つ予約し、不足分の待ち時間だけ待機する。
+    予約順に待ち時間が決まるので、並行する呼び出し元の間でも公平に配分される。
+
+    429を受けたら補充レートを半減して Retry-After の間すべての送信を止め（multiplicative decrease）、
+    成功するたびに少しずつ max_rate まで戻す（additive increase）。
+    停止前に予約して待機中だった呼び出し元は、待機明けに列の後ろへ並び直す。
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float,
+        min_rate: float = MIN_RATE_PER_SEC,
+        increase: Optional[float] = None,
+        decrease: float = DECREASE_FACTOR,
+    ):
+        """
+        Args:
+            rate: 1秒あたりの補充トークン数（上限。429を受けるまではこの速さで送る）
+            capacity: バケット容量（バースト許容数）
+            min_rate: 減速したときの下限
+            increase: 成功1回ごとに戻す補充レート（省略時は rate の5%）
+            decrease: 429を受けたときに補充レートに掛ける係数
+        """
+        self.max_rate = rate
+        self.rate = rate
+        self.capacity = capacity
+        self.min_rate = min(min_rate, rate)
+        self.increase = increase if increase is not None else rate * INCREASE_RATIO
+        self.decrease = decrease
+        self._tokens = float(capacity)
+        # 補充を再開する時刻（停止中は未来の時刻）
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        # 停止するたびに進める（停止前の予約を無効にする）
+        self._epoch = 0
+        # レスポンスヘッダーから読んだ残りクォータ（リセットまでに使ってよい速さ）
+        self.remaining: Optional[int] = None
+        self._budget_rate: Optional[float] = None
+        self._budget_until = 0.0
+        self.throttles = 0
+        self._lock = threading.Lock()
+
+    def _current_rate(self, now: float) -> float:
+        """実際に使う補充レート（クォータヘッダーの残りがあればリセットまでその範囲に抑える）"""
+        if self._budget_rate is not None and now < self._budget_until:
+            return max(min(self.rate, self._budget_rate), self.min_rate)
+        return self.rate
+
+    def _reserve(self) -> tuple[float, int]:
+        """トークンを1つ予約し、(利用可能になるまでの待ち時間（秒）, 予約時のepoch) を返す"""
+        with self._lock:
+            now = time.monotonic()
+            rate = self._current_rate(now)
+            if now > self._updated:
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * rate)
+                self._updated = now
+            self._tokens -= 1
+            wait = self._updated - now
+            if self._tokens < 0:
+                wait += -self._tokens / rate
+            return wait, self._epoch
+
+    def acquire(self) -> None:
+        """トークンを取得（同期、必要なら待機）"""
+        while True:
+            wait, epoch = self._reserve()
+            if wait > 0:
+                time.sleep(wait)
+            if epoch == self._epoch:
+                return
+
+    async def acquire_async(self) -> None:
+        """トークンを取得（非同期、必要なら待機）"""
+        while True:
+            wait, epoch = self._reserve()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            if epoch == self._epoch:
+                return
+
+    def on_success(self) -> None:
+        """成功したら補充レートを少し戻す（additive increase）"""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttle(self, retry_after: float, slow_down: bool = True) -> None:
+        """
+        429を受けたら retry_after 秒すべての送信を止め、補充レートを下げる
+
+        同じ停止期間中に届いた429（停止前に送っていたリクエスト）では、重ねて減速しない。
+
+        Args:
+            retry_after: 送信を止める秒数
+            slow_down: Falseなら止めるだけで減速しない（クォータを使い切っただけの場合）
+        """
+        with self._lock:
+            now = time.monotonic()
+            until = now + retry_after
+            if slow_down and now >= self._paused_until:
+                self.rate = max(self.min_rate, self.rate * self.decrease)
+                self.throttles += 1
+            if until <= self._paused_until:
+                return
+            self._paused_until = until
+            self._updated = max(self._updated, until)
+            self._tokens = min(self._tokens, 1.0)
+            self._epoch += 1
+
+    def on_quota(self, remaining: int, reset: float) -> None:
+        """残りクォータに合わせて、リセットまで使い切らない速さに抑える（使い切ったらリセットまで待つ）"""
+        with self._lock:
+            self.remaining = remaining
+            self._budget_rate = remaining / reset if reset >= MIN_BUDGET_WINDOW else None
+            self._budget_until = time.monotonic() + reset
+        if remaining <= 0:
+            self.on_throttle(reset, slow_down=False)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            now = time.monotonic()
+            return {
+                "rate": round(self.rate, 3),
+                "max_rate": self.max_rate,
+                "throttles": self.throttles,
+                "paused": max(round(self._paused_until - now, 3), 0.0),
+                "remaining": self.remaining if now < self._budget_until else None,
+            }
+
+
+class RateLimiter:
+    """
+    事業所ごとのトークンバケットを管理するレート制限
+
+    1つのインスタンスを複数のクライアントで共有すると、
+    並行リクエスト全体で事業所ごとのクォータを守れる。
+    レスポンスを observe() に渡すと、Retry-After・クォータヘッダーに合わせて送信ペースを調整する。
+    """
+
+    def __init__(
+        self,
+        rate: float = DEFAULT_RATE_PER_SEC,
+        burst: int = DEFAULT_BURST,
+        max_throttles: int = 20,
+    ):
+        """
+        Args:
+            rate: 事業所あたり1秒間のリクエスト数（上限）
+            burst: 事業所あたりのバースト許容数
+            max_throttles: 1リクエストが429で待ち直す回数の上限（超えたらエラー）
+        """
+        self.rate = rate
+        self.burst = burst
+        self.max_throttles = max_throttles
+        self._buckets: Dict[Optional[int], TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, company_id: Optional[int]) -> TokenBucket:
+        """事業所のトークンバケットを取得（なければ作成）"""
+        with self._lock:
+            bucket = self._buckets.get(company_id)
+            if bucket is None:
+                bucket = TokenBucket(self.rate, self.burst)
+                self._buckets[company_id] = bucket
+            return bucket
+
+    def acquire(self, company_id: Optional[int]) -> None:
+        """事業所のトークンを取得（同期）"""
+        self.bucket(company_id).acquire()
+
+    async def acquire_async(self, company_id: Optional[int]) -> None:
+        """事業所のトークンを取得（非同期）"""
+        await self.bucket(company_id).acquire_async()
+
+    def observe(
+        self, company_id: Optional[int], status: int, headers: Mapping[str, str], throttles: int = 1
+    ) -> Optional[float]:
+        """
+        レスポンスを反映して送信ペースを調整
+
+        Args:
+            company_id: 事業所ID
+            status: HTTPステータス
+            headers: レスポンスヘッダー
+            throttles: このリクエストが429を受けた回数（Retry-Afterがないときのバックオフ用）
+
+        Returns:
+            429なら送信を止めた秒数、それ以外は None
+        """
+        bucket = self.bucket(company_id)
+        remaining, reset = parse_quota(headers)
+        if status == 429:
+            wait = parse_retry_after(headers.get("Retry-After"))
+            if wait is None:
+                wait = reset if reset is not None else min(2 ** (throttles - 1), MAX_BACKOFF)
+            bucket.on_throttle(wait)
+            return wait
+        if remaining is not None and reset is not None:
+            bucket.on_quota(remaining, reset)
+        if status < 400:
+            bucket.on_success()
+        return None
+
+    def stats(self) -> Dict:
+        """
+        Returns:
+            {"companies": 2, "throttles": 1, "paused": 0,
+             "by_company": {"123": {"rate": 2.5, "max_rate": 5.0, "throttles": 1, ...}}}
+        """
+        with self._lock:
+            buckets = list(self._buckets.items())
+        by_company = {str(cid): bucket.stats() for cid, bucket in buckets}
+        return {
+            "companies": len(by_company),
+            "throttles": sum(stats["throttles"] for stats in by_company.values()),
+            "paused": sum(1 for stats in by_company.values() if stats["paused"]),
+            "by_company": by_company,
+        }
@@ -0,0 +1,136 @@
+"""証憑アップロードの補助（MIME判定・ファイル収集・アップロード済みインデックス）"""
+
+from __future__ import annotations
+
+import glob
+import hashlib
+import json
+import mimetypes
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# ファイル先頭のマジックバイト → MIMEタイプ
+_SIGNATURES = (
+    (b"%PDF-", "application/pdf"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"II*\x00", "image/tiff"),
+    (b"MM\x00*", "image/tiff"),
+)
+
+# freeeが証憑として受け付けるMIMEタイプ
+SUPPORTED_MIME_TYPES = {
+    "application/pdf",
+    "image/jpeg",
+    "image/png",
+    "image/gif",
+    "image/tiff",
+    "image/heic",
+    "image/webp",
+}
+
+# ハッシュ計算時の読み込み単位
+_CHUNK_SIZE = 1024 * 1024
+
+
+def detect_mime_type(file_path: Path) -> str:
+    """
+    ファイル内容の先頭バイトからMIMEタイプを判定（判定できなければ拡張子から推測）
+
+    Returns:
+        "application/pdf", "image/jpeg" など
+    """
+    with open(file_path, "rb") as f:
+        head = f.read(16)
+    for signature, mime_type in _SIGNATURES:
+        if head.startswith(signature):
+            return mime_type
+    if head[4:8] == b"ftyp" and head[8:12] in (b"heic", b"heix", b"mif1", b"msf1"):
+        return "image/heic"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return mimetypes.guess_type(file_path.name)[0] or "application/octet-stream"
+
+
+def file_sha256(file_path: Path) -> str:
+    """ファイル内容のSHA-256（全体をメモリに載せずに計算）"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def collect_files(path: str, recursive: bool = False) -> List[Path]:
+    """
+    ディレクトリまたはglobパターンからアップロード対象のファイルを集める
+
+    Args:
+        path: ディレクトリ（例: ~/receipts）またはglob（例: ~/receipts/2025-*.pdf）
+        recursive: ディレクトリ指定時にサブディレクトリも含めるか
+
+    Returns:
+        パス順に並んだファイルのリスト（隠しファイルは除く）
+    """
+    expanded = os.path.expanduser(path)
+    if os.path.isdir(expanded):
+        root = Path(expanded)
+        candidates = root.rglob("*") if recursive else root.iterdir()
+    else:
+        candidates = (Path(p) for p in glob.glob(expanded, recursive=True))
+    return sorted(p for p in candidates if p.is_file() and not p.name.startswith("."))
+
+
+class ReceiptIndex:
+    """
+    アップロード済み証憑の索引（(事業所ID, ファイル内容のSHA-256) → receipt_id）
+
+    ファイル名が変わっても内容が同じなら再アップロードしない。
+    file_path を指定するとJSONファイルに永続化する。
+    """
+
+    def __init__(self, file_path: Optional[str] = None):
+        """
+        Args:
+            file_path: 保存先JSONファイル（省略時はメモリのみ）
+        """
+        self.file_path = Path(file_path).expanduser() if file_path else None
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict] = {}
+        if self.file_path and self.file_path.exists():
+            try:
+                self._entries = json.loads(self.file_path.read_text())
+            except ValueError:
+                self._entries = {}
+
+    @staticmethod
+    def _key(company_id: int, sha256: str) -> str:
+        return f"{company_id}:{sha256}"
+
+    def get(self, company_id: int, sha256: str) -> Optional[Dict]:
+        """
+        Returns:
+            {"receipt_id": 123, "file": "...", "uploaded_at": 1700000000.0} or None
+        """
+        with self._lock:
+            entry = self._entries.get(self._key(company_id, sha256))
+            return dict(entry) if entry else None
+
+    def add(self, company_id: int, sha256: str, receipt_id: int, file_path: Path) -> None:
+        """アップロード済みとして記録"""
+        with self._lock:
+            self._entries[self._key(company_id, sha256)] = {
+                "receipt_id": receipt_id,
+                "file": str(file_path),
+                "uploaded_at": time.time(),
+            }
+            if self.file_path:
+                self.file_path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = self.file_path.with_suffix(".tmp")
+                tmp_path.write_text(json.dumps(self._entries, ensure_ascii=False))
+                tmp_path.replace(self.file_path)
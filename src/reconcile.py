@@ -0,0 +1,305 @@
+"""口座明細（wallet_txns）と取引（deals）の突き合わせ"""
+
+from __future__ import annotations
+
+import bisect
+import re
+import unicodedata
+from datetime import date, timedelta
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+# 取引先名・明細テキストから除く法人格（NFKC・大文字化した後の表記）
+LEGAL_FORMS = re.compile(
+    r"株式会社|有限会社|合同会社|一般社団法人|\(株\)|\(有\)|\(同\)|カ\)|\(カ|ユ\)|\(ユ"
+    r"|INC\.?|LLC|CO\.,?\s*LTD\.?"
+)
+# 類似度キーに残す文字（英字・かな・漢字。数字や記号は明細ごとに揺れるので除く）
+NON_LETTERS = re.compile(r"[^A-Zぁ-んァ-ヶー一-龠々]+")
+
+# 候補が複数あるとき、これ以上の類似度差があれば上位の取引に決める
+SIMILARITY_MARGIN = 0.15
+
+
+def text_key(text: Optional[str]) -> str:
+    """
+    明細テキスト・取引先名を比較用に正規化（全角半角・大文字小文字・法人格・数字記号の違いを吸収）
+
+    例: "ANTHROPIC_カード13" → "ANTHROPICカード", "ｶ)ｳﾝｿﾝ" → "ウンソン"
+    """
+    if not text:
+        return ""
+    normalized = unicodedata.normalize("NFKC", text).upper()
+    return NON_LETTERS.sub("", LEGAL_FORMS.sub("", normalized))
+
+
+def bigrams(key: str) -> FrozenSet[str]:
+    """類似度計算用の文字bigram（1文字のキーはその文字）"""
+    if len(key) < 2:
+        return frozenset([key]) if key else frozenset()
+    return frozenset(key[i : i + 2] for i in range(len(key) - 1))
+
+
+def similarity(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    """bigram集合のDice係数（0〜1）"""
+    if not a or not b:
+        return 0.0
+    return 2 * len(a & b) / (len(a) + len(b))
+
+
+def deal_window(start_date: str, end_date: str, date_tolerance: int) -> Tuple[str, str]:
+    """明細の期間に対して取得する取引の期間（前後に date_tolerance 日広げる）"""
+    start = date.fromisoformat(start_date) - timedelta(days=date_tolerance)
+    end = date.fromisoformat(end_date) + timedelta(days=date_tolerance)
+    return start.isoformat(), end.isoformat()
+
+
+def _deal_entries(deal: Dict, partner_names: Dict[int, str]) -> List[Tuple[tuple, int, Dict]]:
+    """
+    取引を支払い（payments）ごとの索引エントリに展開
+
+    Returns:
+        [((口座種別, 口座ID, 入出金区分, 金額), 日付の序数, 候補), ...]
+        支払いのない取引（未決済）は口座を None として1件
+    """
+    entry_side = "income" if deal.get("type") == "income" else "expense"
+    texts = [detail.get("description") for detail in deal.get("details") or []]
+    texts.append(partner_names.get(deal.get("partner_id")))
+    texts.append(deal.get("ref_number"))
+    keys = bigrams("".join(text_key(text) for text in texts if text))
+
+    payments = deal.get("payments") or [{}]
+    entries = []
+    for index, payment in enumerate(payments):
+        amount = payment.get("amount", deal.get("amount"))
+        day = payment.get("date") or deal.get("issue_date")
+        if amount is None or not day:
+            continue
+        candidate = {
+            "deal": deal,
+            "payment": index,
+            "amount": amount,
+            "date": day,
+            "walletable_type": payment.get("from_walletable_type"),
+            "walletable_id": payment.get("from_walletable_id"),
+            "keys": keys,
+        }
+        key = (candidate["walletable_type"], candidate["walletable_id"], entry_side, amount)
+        entries.append((key, date.fromisoformat(day[:10]).toordinal(), candidate))
+    return entries
+
+
+class DealIndex:
+    """
+    取引の支払いを (口座, 入出金区分, 金額) → 日付順のリスト で引ける索引
+
+    明細1件あたり、辞書引き1回と日付範囲の二分探索で候補を絞る（全取引との総当たりをしない）。
+    """
+
+    def __init__(self, deals: Iterable[Dict], partner_names: Optional[Dict[int, str]] = None):
+        """
+        Args:
+            deals: freee APIの取引
+            partner_names: 取引先ID → 名前（明細テキストとの類似度に使う）
+        """
+        self._buckets: Dict[tuple, Tuple[List[int], List[Dict]]] = {}
+        entries = []
+        for deal in deals:
+            entries.extend(_deal_entries(deal, partner_names or {}))
+        entries.sort(key=lambda entry: entry[1])
+        for key, ordinal, candidate in entries:
+            days, candidates = self._buckets.setdefault(key, ([], []))
+            days.append(ordinal)
+            candidates.append(candidate)
+
+    def candidates(self, txn: Dict, tolerance: int) -> List[Tuple[int, Dict]]:
+        """
+        明細と口座・入出金区分・金額が一致し、日付が ±tolerance 日以内の支払い
+
+        支払いのない取引（口座が未定）も候補に含める。
+
+        Returns:
+            [(日付の差, 候補), ...]
+        """
+        ordinal = date.fromisoformat(txn["date"][:10]).toordinal()
+        side, amount = txn.get("entry_side"), txn.get("amount")
+        found = []
+        for key in (
+            (txn.get("walletable_type"), txn.get("walletable_id"), side, amount),
+            (None, None, side, amount),
+        ):
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                continue
+            days, candidates = bucket
+            lo = bisect.bisect_left(days, ordinal - tolerance)
+            hi = bisect.bisect_right(days, ordinal + tolerance)
+            found.extend(
+                (abs(days[i] - ordinal), candidates[i])
+                for i in range(lo, hi)
+                if not candidates[i].get("matched")
+            )
+        return found
+
+    def unmatched(
+        self, walletables: set, start_date: Optional[str], end_date: Optional[str]
+    ) -> List[Dict]:
+        """どの明細とも対応しなかった、walletables の口座からの支払い（期間内、日付順）"""
+        return sorted(
+            (
+                candidate
+                for _, candidates in self._buckets.values()
+                for candidate in candidates
+                if not candidate.get("matched")
+                and (candidate["walletable_type"], candidate["walletable_id"]) in walletables
+                and (not start_date or candidate["date"] >= start_date)
+                and (not end_date or candidate["date"] <= end_date)
+            ),
+            key=lambda candidate: candidate["date"],
+        )
+
+
+def _txn_summary(txn: Dict) -> Dict:
+    return {
+        "id": txn.get("id"),
+        "date": txn.get("date"),
+        "amount": txn.get("amount"),
+        "entry_side": txn.get("entry_side"),
+        "walletable_type": txn.get("walletable_type"),
+        "walletable_id": txn.get("walletable_id"),
+        "description": txn.get("description"),
+        "status": txn.get("status"),
+    }
+
+
+def _deal_summary(candidate: Dict) -> Dict:
+    deal = candidate["deal"]
+    details = deal.get("details") or []
+    return {
+        "id": deal.get("id"),
+        "issue_date": deal.get("issue_date"),
+        "payment_date": candidate["date"],
+        "amount": candidate["amount"],
+        "type": deal.get("type"),
+        "partner_id": deal.get("partner_id"),
+        "walletable_type": candidate["walletable_type"],
+        "walletable_id": candidate["walletable_id"],
+        "description": details[0].get("description") if details else None,
+    }
+
+
+def _pick(scored: List[Tuple[float, int, Dict]]) -> Optional[Dict]:
+    """
+    候補から1件に決める（決められなければ None）
+
+    類似度が SIMILARITY_MARGIN 以上高い候補、類似度が同程度なら日付が近い候補を選ぶ。
+    """
+    if len(scored) == 1:
+        return scored[0][2]
+    scored.sort(key=lambda item: (-item[0], item[1]))
+    best_sim, _, best = scored[0]
+    if best_sim - scored[1][0] >= SIMILARITY_MARGIN:
+        return best
+    close = [item for item in scored if best_sim - item[0] < SIMILARITY_MARGIN]
+    nearest = min(item[1] for item in close)
+    winners = [item for item in close if item[1] == nearest]
+    return winners[0][2] if len(winners) == 1 else None
+
+
+def reconcile(
+    wallet_txns: Iterable[Dict],
+    deals: Iterable[Dict],
+    date_tolerance: int = 3,
+    partner_names: Optional[Dict[int, str]] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    limit: int = 100,
+) -> Dict:
+    """
+    口座明細と取引を突き合わせ、対応する取引のない明細と、決めきれない明細だけを返す
+
+    口座・入出金区分・金額が一致し、日付が ±date_tolerance 日以内の支払いを候補とする。
+    候補が1件ならそれに決め、複数なら明細テキストと取引（摘要・取引先名）の類似度、日付の近さで選ぶ。
+    候補が1件の明細を先に確定させてから、複数候補の明細を処理する（取り合いを減らす）。
+
+    Args:
+        wallet_txns: freee APIの口座明細
+        deals: freee APIの取引（明細の期間を ±date_tolerance 日広げて取得したもの）
+        date_tolerance: 日付のずれの許容日数
+        partner_names: 取引先ID → 名前
+        start_date: 明細の期間の開始日（対応のない取引はこの期間の支払いだけ返す）
+        end_date: 明細の期間の終了日
+        limit: 各一覧の最大件数（件数は counts に全件分を返す）
+
+    Returns:
+        {
+            "counts": {"wallet_txns": 420, "deals": 400, "matched": 395,
+                       "unmatched_txns": 20, "ambiguous": 5, "unmatched_deals": 3},
+            "unmatched_txns": [{"id": 1, "date": "2025-01-05", "amount": 3300,
+                                "description": "ANTHROPIC_カード13", ...}],
+            "ambiguous": [{"wallet_txn": {...},
+                           "candidates": [{"id": 10, "similarity": 0.4, "days_apart": 1, ...}]}],
+            "unmatched_deals": [{"id": 12, "payment_date": "2025-01-07", ...}]
+        }
+    """
+    deals = list(deals)
+    index = DealIndex(deals, partner_names)
+    txns = sorted(wallet_txns, key=lambda txn: txn.get("date") or "")
+
+    matched = 0
+    unmatched: List[Dict] = []
+    pending: List[Tuple[Dict, FrozenSet[str]]] = []
+    for txn in txns:
+        found = index.candidates(txn, date_tolerance)
+        if not found:
+            unmatched.append(txn)
+        elif len(found) == 1:
+            found[0][1]["matched"] = True
+            matched += 1
+        else:
+            pending.append((txn, bigrams(text_key(txn.get("description")))))
+
+    ambiguous = []
+    for txn, keys in pending:
+        found = index.candidates(txn, date_tolerance)
+        if not found:
+            unmatched.append(txn)
+            continue
+        scored = [(similarity(keys, c["keys"]), days, c) for days, c in found]
+        choice = _pick(scored)
+        if choice is not None:
+            choice["matched"] = True
+            matched += 1
+            continue
+        ambiguous.append(
+            {
+                "wallet_txn": _txn_summary(txn),
+                "candidates": [
+                    {**_deal_summary(c), "similarity": round(sim, 2), "days_apart": days}
+                    for sim, days, c in scored
+                ],
+            }
+        )
+
+    # 明細を取得した口座からの支払いなのに、どの明細とも対応しなかった取引（曖昧な候補は除く）
+    walletables = {(txn.get("walletable_type"), txn.get("walletable_id")) for txn in txns}
+    ambiguous_ids = {c["id"] for item in ambiguous for c in item["candidates"]}
+    unmatched_deals = [
+        candidate
+        for candidate in index.unmatched(walletables, start_date, end_date)
+        if candidate["deal"].get("id") not in ambiguous_ids
+    ]
+    unmatched.sort(key=lambda txn: txn.get("date") or "")
+
+    return {
+        "counts": {
+            "wallet_txns": len(txns),
+            "deals": len(deals),
+            "matched": matched,
+            "unmatched_txns": len(unmatched),
+            "ambiguous": len(ambiguous),
+            "unmatched_deals": len(unmatched_deals),
+        },
+        "unmatched_txns": [_txn_summary(txn) for txn in unmatched[:limit]],
+        "ambiguous": ambiguous[:limit],
+        "unmatched_deals": [_deal_summary(candidate) for candidate in unmatched_deals[:limit]],
+    }
@@ -0,0 +1,190 @@
+"""試算表のキャッシュ（締めた期間は期限なし、進行中の期間は短いTTL）"""
+
+from __future__ import annotations
+
+import calendar
+import math
+import sys
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+# 絶対importに変更（スタンドアロン実行対応）
+sys.path.insert(0, str(Path(__file__).parent))
+from cache import MISSING
+from disk_cache import DiskCache
+from trends import fiscal_year_months
+
+
+def report_period(
+    fiscal_year: int,
+    start_month: Optional[int],
+    end_month: Optional[int],
+    fiscal_years: List[Dict],
+) -> Tuple[int, int, date]:
+    """
+    試算表の期間を確定する
+
+    Args:
+        fiscal_year: 会計年度
+        start_month: 開始月（省略時は期首月）
+        end_month: 終了月（省略時は期末月）
+        fiscal_years: 事業所情報の fiscal_years
+
+    Returns:
+        (開始月, 終了月, 期間の末日)
+    """
+    months = fiscal_year_months(fiscal_year, fiscal_years)
+    labels = [month for _, month in months]
+    start = start_month or labels[0]
+    end = end_month or labels[-1]
+    year, month = months[labels.index(end)] if end in labels else months[-1]
+    return start, end, date(year, month, calendar.monthrange(year, month)[1])
+
+
+class ReportCache:
+    """
+    試算表（trial_bs / trial_pl）のレスポンスを (事業所ID, レポート, 会計年度, 開始月, 終了月) ごとに保持する
+
+    期間の末日が締め日（closed_through）以前なら確定済みとして期限なしで保持し、
+    disk_cache があれば再起動後もそこから返す。進行中の期間は open_ttl 秒だけ保持する。
+    締め日を指定しない場合は前月末までを確定済みとみなす。
+    """
+
+    def __init__(
+        self,
+        closed_through: Optional[date] = None,
+        open_ttl: float = 300,
+        max_entries: int = 1024,
+        disk_cache: Optional[DiskCache] = None,
+    ):
+        """
+        Args:
+            closed_through: 締め日（この日までの期間は変わらない）。省略時は前月末
+            open_ttl: 進行中の期間の有効期限（秒）
+            max_entries: メモリに保持する最大エントリ数（LRU）
+            disk_cache: 確定済みの期間を永続化するディスクキャッシュ（省略時はメモリのみ）。
+                その reports/ サブディレクトリに保存し、マスタデータのキャッシュを
+                まとめて破棄しても確定済みの試算表は消えないようにする
+        """
+        self.closed_through = closed_through
+        self.open_ttl = open_ttl
+        self.max_entries = max_entries
+        self.disk_cache = disk_cache.namespace("reports") if disk_cache else None
+        # key → (有効期限, 期間の末日, レスポンス)
+        self._entries: OrderedDict[tuple, Tuple[float, date, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def closing_date(self) -> date:
+        """確定済みとみなす期間の末日"""
+        if self.closed_through is not None:
+            return self.closed_through
+        return date.today().replace(day=1) - timedelta(days=1)
+
+    def is_closed(self, period_end: date) -> bool:
+        return period_end <= self.closing_date()
+
+    @staticmethod
+    def _disk_key(key: tuple) -> tuple:
+        """ディスクキャッシュのキー（DiskCache は (endpoint, company_id) で1ファイル）"""
+        company_id, report, fiscal_year, start_month, end_month = key
+        return (f"/api/1/reports/{report}/{fiscal_year}_{start_month}_{end_month}", company_id)
+
+    def _put(self, key: tuple, expires_at: float, period_end: date, data: Any) -> None:
+        with self._lock:
+            self._entries[key] = (expires_at, period_end, data)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, key: tuple) -> Any:
+        """
+        キャッシュから取得（メモリ → ディスク）
+
+        Args:
+            key: (事業所ID, レポート, 会計年度, 開始月, 終了月)
+
+        Returns:
+            レスポンス（なければ MISSING）
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+            if entry is not None:
+                del self._entries[key]
+
+        stored = self.disk_cache.load(self._disk_key(key)) if self.disk_cache else None
+        if stored is not None:
+            period_end = date.fromisoformat(stored["data"]["period_end"])
+            # 締め日を後から前倒しした場合は確定済みでなくなるので使わない
+            if self.is_closed(period_end):
+                self._put(key, math.inf, period_end, stored["data"]["report"])
+                with self._lock:
+                    self.hits += 1
+                return stored["data"]["report"]
+
+        with self._lock:
+            self.misses += 1
+        return MISSING
+
+    def set(self, key: tuple, data: Any, period_end: date) -> None:
+        """保存（確定済みの期間は期限なし・ディスクにも保存）"""
+        if self.is_closed(period_end):
+            self._put(key, math.inf, period_end, data)
+            if self.disk_cache:
+                self.disk_cache.save(
+                    self._disk_key(key), {"period_end": period_end.isoformat(), "report": data}
+                )
+        else:
+            self._put(key, time.monotonic() + self.open_ttl, period_end, data)
+
+    def invalidate(self, company_id: Optional[int] = None, since: Optional[date] = None) -> int:
+        """
+        取引の登録などで変わりうるエントリを破棄
+
+        Args:
+            company_id: 対象事業所ID（省略時は全事業所）
+            since: この日以降に期間が終わるエントリだけ破棄（BSは累計なので以降の期間すべてが変わる）
+
+        Returns:
+            破棄したエントリ数
+        """
+        with self._lock:
+            keys = [
+                key
+                for key, (_, period_end, _) in self._entries.items()
+                if (company_id is None or key[0] == company_id)
+                and (since is None or period_end >= since)
+            ]
+            for key in keys:
+                del self._entries[key]
+        # ディスクにあるのは確定済みの期間だけ。締め日以前の取引が変わったときは、
+        # メモリに載っていないものも含めてその事業所の分をまとめて捨てる
+        if self.disk_cache and (since is None or since <= self.closing_date()):
+            self.disk_cache.invalidate("/api/1/reports/*", company_id)
+        return len(keys)
+
+    def stats(self) -> Dict:
+        """
+        Returns:
+            {"entries": 24, "closed": 22, "hits": 40, "misses": 24, "hit_rate": 0.625,
+             "closed_through": "2025-09-30"}
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "closed": sum(1 for entry in self._entries.values() if entry[0] == math.inf),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "closed_through": self.closing_date().isoformat(),
+            }
@@ -0,0 +1,176 @@
+"""名前 → ID の解決（勘定科目・取引先・口座・税区分のマスタデータ索引）"""
+
+from __future__ import annotations
+
+import re
+import sys
+import unicodedata
+from collections import Counter
+from pathlib import Path
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+# 絶対importに変更（スタンドアロン実行対応）
+sys.path.insert(0, str(Path(__file__).parent))
+from reconcile import LEGAL_FORMS
+
+# 索引の種類 → IDの項目・名前として引く項目・候補に付けて返す項目
+RESOLVERS: Dict[str, Dict] = {
+    "account_items": {
+        "id_field": "id",
+        "name_fields": ("name", "shortcut", "shortcut_num"),
+        "summary_fields": ("account_category", "default_tax_code"),
+    },
+    "partners": {
+        "id_field": "id",
+        "name_fields": ("name", "long_name", "name_kana", "shortcut1", "shortcut2", "code"),
+        "summary_fields": ("code",),
+    },
+    "walletables": {
+        "id_field": "id",
+        "name_fields": ("name",),
+        "summary_fields": ("type",),
+    },
+    "taxes": {
+        "id_field": "code",
+        "name_fields": ("name_ja", "name"),
+        "summary_fields": (),
+    },
+}
+
+# 比較用のキーに残す文字（英数字・かな・漢字）
+NON_NAME_CHARS = re.compile(r"[^0-9A-Zぁ-んァ-ヶー一-龠々]+")
+# カタカナ → ひらがな（「アマゾン」と「あまぞん」を同じキーにする）
+KATAKANA_TO_HIRAGANA = {code: code - 0x60 for code in range(0x30A1, 0x30F7)}
+
+# 候補として返す最低スコア
+MIN_SCORE = 0.3
+# trigramの一致数で絞ってから類似度を計算する候補数
+MAX_FUZZY_CANDIDATES = 64
+
+
+def normalize_name(text: Optional[str]) -> str:
+    """
+    名前を比較用に正規化（全角半角・大文字小文字・カタカナひらがな・法人格・空白記号の違いを吸収）
+
+    例: "株式会社 ｱﾏｿﾞﾝ・ジャパン" → "あまぞんじゃぱん"
+    """
+    if not text:
+        return ""
+    normalized = LEGAL_FORMS.sub("", unicodedata.normalize("NFKC", str(text)).upper())
+    return NON_NAME_CHARS.sub("", normalized).translate(KATAKANA_TO_HIRAGANA)
+
+
+def trigrams(key: str) -> FrozenSet[str]:
+    """前後に境界記号を付けた文字trigram（短い名前でも2つ以上のgramになる）"""
+    padded = f"^{key}$"
+    return frozenset(padded[i : i + 3] for i in range(len(padded) - 2))
+
+
+class NameIndex:
+    """
+    マスタデータの名前索引（完全一致 → 正規化一致 → trigramの類似度 の順に引く）
+
+    マスタデータの取得ごとに1回だけ作り、問い合わせのたびに全件を走査しない。
+    """
+
+    def __init__(
+        self,
+        records: List[Dict],
+        id_field: str = "id",
+        name_fields: Tuple[str, ...] = ("name",),
+        summary_fields: Tuple[str, ...] = (),
+    ):
+        """
+        Args:
+            records: マスタデータ（list_accounts などの結果）
+            id_field: IDの項目（税区分は "code"）
+            name_fields: 名前として引く項目（略称・カナ・ショートカットも含める）
+            summary_fields: 候補に付けて返す項目
+        """
+        self.records = records
+        self.id_field = id_field
+        self.name_field = name_fields[0]
+        self.summary_fields = summary_fields
+        self._exact: Dict[str, List[int]] = {}
+        self._normalized: Dict[str, List[int]] = {}
+        self._grams: Dict[str, List[int]] = {}
+        # レコードごとの (正規化したキー, trigram) のリスト
+        self._keys: List[List[Tuple[str, FrozenSet[str]]]] = []
+        for index, record in enumerate(records):
+            keys = []
+            for field in name_fields:
+                value = record.get(field)
+                if value in (None, ""):
+                    continue
+                self._exact.setdefault(str(value), []).append(index)
+                key = normalize_name(value)
+                if not key:
+                    continue
+                self._normalized.setdefault(key, []).append(index)
+                keys.append((key, trigrams(key)))
+            self._keys.append(keys)
+            for gram in {gram for _, grams in keys for gram in grams}:
+                self._grams.setdefault(gram, []).append(index)
+
+    def _fuzzy_score(self, index: int, query: str, query_grams: FrozenSet[str]) -> float:
+        """trigramのDice係数と、部分一致（短い方が長い方に含まれる）の高い方"""
+        best = 0.0
+        for key, grams in self._keys[index]:
+            score = 2 * len(query_grams & grams) / (len(query_grams) + len(grams))
+            short, long = sorted((query, key), key=len)
+            if short in long:
+                score = max(score, 0.6 + 0.3 * len(short) / len(long))
+            best = max(best, score)
+        return best
+
+    def search(self, query: str, limit: int = 5) -> List[Dict]:
+        """
+        名前からIDの候補を引く
+
+        Returns:
+            [{"id": 8, "name": "通信費", "score": 1.0, "match": "exact", ...}, ...]（スコア順）
+        """
+        scores: Dict[int, Tuple[float, str]] = {}
+        for index in self._exact.get(query.strip(), ()):
+            scores[index] = (1.0, "exact")
+        key = normalize_name(query)
+        for index in self._normalized.get(key, ()):
+            scores.setdefault(index, (0.95, "normalized"))
+
+        if key and len(scores) < limit:
+            if len(key) < 3:
+                # 1〜2文字はtrigramが境界記号頼みになるので、正規化キーの部分一致で全件を見る
+                candidates = [
+                    index
+                    for index, keys in enumerate(self._keys)
+                    if any(key in name for name, _ in keys)
+                ]
+            else:
+                shared = Counter(
+                    index for gram in trigrams(key) for index in self._grams.get(gram, ())
+                )
+                candidates = [index for index, _ in shared.most_common(MAX_FUZZY_CANDIDATES)]
+            query_grams = trigrams(key)
+            for index in candidates:
+                if index not in scores:
+                    score = self._fuzzy_score(index, key, query_grams)
+                    if score >= MIN_SCORE:
+                        scores[index] = (round(score, 2), "fuzzy")
+
+        ranked = sorted(
+            scores.items(),
+            key=lambda item: (-item[1][0], len(str(self.records[item[0]].get(self.name_field)))),
+        )
+        results = []
+        for index, (score, match) in ranked[:limit]:
+            record = self.records[index]
+            results.append(
+                {
+                    "id": record.get(self.id_field),
+                    "name": record.get(self.name_field),
+                    "score": score,
+                    "match": match,
+                    **{field: record[field] for field in self.summary_fields if field in record},
+                }
+            )
+        return results
@@ -3,34 +3,59 @@
 
 from __future__ import annotations
 
+import argparse
 import asyncio
+import contextlib
+import logging
 import os
 import sys
+from datetime import date
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional
 
+import uvicorn
 from dotenv import load_dotenv
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
+from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Mount, Route
 
 # 絶対importに変更（スタンドアロン実行対応）
 sys.path.insert(0, str(Path(__file__).parent))
 from auth import FreeeOAuth, authenticate
-from freee_client import FreeeAPIClient
-from token_store import TokenStore
+from categorize import CategoryRules
+from change_feed import ChangeFeed
+from client_registry import ClientRegistry
+from disk_cache import DiskCache
+from freee_client import AsyncFreeeAPIClient
+from http_pool import ConnectionPool
+from metrics import METRICS
+from idempotency import IdempotencyStore
+from mirror import MirrorStore
+from rate_limit import RateLimiter
+from receipts import ReceiptIndex
+from report_cache import ReportCache
+from sessions import SessionLimiter
+from token_manager import TokenManager
+from token_store import DEFAULT_IDENTITY, TokenStore, identity_token_path
 from tools import register_tools
 
 load_dotenv()
 
+logger = logging.getLogger("freee_mcp")
+
 
 class FreeeMCPServer:
     """freee MCP Server"""
 
     def __init__(self):
         self.server = Server("freee-mcp")
-        self.client: Optional[FreeeAPIClient] = None
         self.token_store: Optional[TokenStore] = None
         self.oauth: Optional[FreeeOAuth] = None
+        self.token_managers: Dict[str, TokenManager] = {}
+        self.mirror: Optional[MirrorStore] = None
 
         # 環境変数を読み込み
         self.client_id = os.getenv("FREEE_CLIENT_ID")
@@ -39,57 +64,255 @@ class FreeeMCPServer:
         self.encryption_key = os.getenv("TOKEN_ENCRYPTION_KEY")
         self.base_url = os.getenv("FREEE_BASE_URL", "https://api.freee.co.jp")
         self.company_id = int(os.getenv("FREEE_COMPANY_ID", "0"))
+        # ツール呼び出しで identity を指定しない場合に使うOAuth identity
+        self.default_identity = os.getenv("FREEE_OAUTH_IDENTITY", DEFAULT_IDENTITY)
+        # X-Freee-Identity ヘッダーを信頼するか（認証済みの利用者に応じてヘッダーを付け直す
+        # リバースプロキシの後ろでだけ有効にする。無効ならヘッダーは無視する）
+        self.trust_identity_header = os.getenv(
+            "FREEE_TRUST_IDENTITY_HEADER", ""
+        ).lower() in ("1", "true", "yes")
 
         if not all([self.client_id, self.client_secret, self.encryption_key]):
             raise RuntimeError(
                 "環境変数が不足しています: FREEE_CLIENT_ID, FREEE_CLIENT_SECRET, TOKEN_ENCRYPTION_KEY"
             )
 
+        # APIクライアントとOAuthリフレッシュで共有するコネクションプール
+        self.pool = ConnectionPool(
+            pool_size=int(os.getenv("FREEE_HTTP_POOL_SIZE", "10")),
+            keepalive_expiry=float(os.getenv("FREEE_HTTP_KEEPALIVE", "60")),
+        )
+
+        # 事業所ごとのクォータを守る共有レート制限
+        self.rate_limiter = RateLimiter(
+            rate=float(os.getenv("FREEE_RATE_LIMIT_PER_SEC", "5")),
+            burst=int(os.getenv("FREEE_RATE_LIMIT_BURST", "10")),
+        )
+        self.fetch_concurrency = int(os.getenv("FREEE_FETCH_CONCURRENCY", "4"))
+
+        # MCPセッションごとのツール同時実行数（重いセッションが他を待たせないように）
+        self.session_limiter = SessionLimiter(
+            max_concurrent=int(os.getenv("FREEE_SESSION_CONCURRENCY", "4"))
+        )
+
         # TokenStoreとOAuthを初期化
         self.token_store = TokenStore(self.encryption_key)
+
+        # マスタデータのディスクキャッシュ（tokenと同じキーで暗号化）
+        self.disk_cache: Optional[DiskCache] = None
+        if os.getenv("FREEE_DISK_CACHE", "").lower() in ("1", "true", "yes"):
+            self.disk_cache = DiskCache(
+                self.encryption_key,
+                os.getenv("FREEE_DISK_CACHE_DIR"),
+            )
+        self.stale_ttl = float(os.getenv("FREEE_CACHE_STALE_TTL", "86400"))
+
+        # 試算表のキャッシュ（締め日までの期間は確定済みとして期限なし、identity ごとに全事業所で共有）
+        closed_through = os.getenv("FREEE_BOOKS_CLOSED_THROUGH")
+        self.closed_through = date.fromisoformat(closed_through) if closed_through else None
+        self.report_open_ttl = float(os.getenv("FREEE_REPORT_OPEN_TTL", "300"))
+        # OAuth identity → (ディスクキャッシュ, 試算表のキャッシュ)
+        self.identity_caches: Dict[str, tuple] = {}
+
+        # 取引一括作成の冪等キー（再起動後の再実行でも二重作成しないよう永続化）
+        self.idempotency_store = IdempotencyStore(
+            os.getenv("FREEE_IDEMPOTENCY_FILE", "~/.freee-mcp/idempotency.json")
+        )
+        # アップロード済み証憑の索引（同じ内容のファイルを二重にアップロードしない）
+        self.receipt_index = ReceiptIndex(
+            os.getenv("FREEE_RECEIPT_INDEX", "~/.freee-mcp/receipts.json")
+        )
+        # 変更フィードの既読索引（再起動後もカーソルから続きを返す）
+        self.change_feed = ChangeFeed(
+            os.getenv("FREEE_CHANGE_FEED_DB", "~/.freee-mcp/changes.db")
+        )
+        # 口座明細の仕訳ルール
+        self.category_rules = CategoryRules(
+            os.getenv("FREEE_CATEGORY_RULES", "~/.freee-mcp/category_rules.json")
+        )
         self.oauth = FreeeOAuth(
             self.client_id,
             self.client_secret,
             self.redirect_uri,
+            session=self.pool.session,
         )
 
-    def _refresh_token_callback(self) -> dict:
-        """tokenリフレッシュ時のコールバック"""
-        token_data = self.token_store.load_token()
-        if not token_data or not token_data.get("refresh_token"):
-            raise RuntimeError("リフレッシュトークンがありません。再認証してください。")
+        # 事業所ごとのクライアント（プール・レート制限・tokenは共有、キャッシュは事業所ごと）
+        self.clients = ClientRegistry(
+            self._create_client,
+            max_clients=int(os.getenv("FREEE_MAX_COMPANIES", "32")),
+        )
+
+        # get_metrics / Prometheus出力で取得時に集めるゲージ
+        METRICS.register_collector("cache", self._cache_stats)
+        METRICS.register_collector("pool", self.pool.stats)
+        METRICS.register_collector("rate_limit", self.rate_limiter.stats)
+        METRICS.register_collector("report_cache", self._report_cache_stats)
+        METRICS.register_collector("sessions", self.session_limiter.stats)
+        METRICS.register_collector("clients", self.clients.stats)
+        self.metrics_file = os.getenv("FREEE_METRICS_FILE")
+        self.metrics_interval = float(os.getenv("FREEE_METRICS_INTERVAL", "15"))
+        self._metrics_task: Optional[asyncio.Task] = None
+
+    def _cache_stats(self) -> dict:
+        """全事業所のマスタデータキャッシュのヒット率"""
+        hits = misses = evictions = 0
+        for client in self.clients.clients():
+            hits += client.cache.hits
+            misses += client.cache.misses
+            evictions += client.cache.evictions
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "evictions": evictions,
+            "hit_ratio": round(hits / total, 3) if total else 0.0,
+        }
+
+    def _report_cache_stats(self) -> dict:
+        """全 identity の試算表キャッシュのヒット率"""
+        stats = [report_cache.stats() for _, report_cache in self.identity_caches.values()]
+        hits = sum(s["hits"] for s in stats)
+        lookups = hits + sum(s["misses"] for s in stats)
+        return {
+            "entries": sum(s["entries"] for s in stats),
+            "closed": sum(s["closed"] for s in stats),
+            "hits": hits,
+            "misses": lookups - hits,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "closed_through": stats[0]["closed_through"] if stats else None,
+        }
+
+    async def _write_metrics_file(self) -> None:
+        """FREEE_METRICS_FILE にPrometheusテキストを定期的に書き出す（node_exporterのtextfile用）"""
+        path = Path(os.path.expanduser(self.metrics_file))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        while True:
+            tmp_path = path.with_suffix(".tmp")
+            tmp_path.write_text(METRICS.prometheus())
+            tmp_path.replace(path)
+            await asyncio.sleep(self.metrics_interval)
+
+    def _start_metrics_file(self) -> Optional[asyncio.Task]:
+        """メトリクスファイルの書き出しを開始（FREEE_METRICS_FILE 未設定なら何もしない）"""
+        if not self.metrics_file:
+            return None
+        return asyncio.get_running_loop().create_task(self._write_metrics_file())
+
+    def get_token_manager(self, identity: str = DEFAULT_IDENTITY) -> TokenManager:
+        """
+        OAuth identity ごとのTokenManagerを取得（遅延初期化）
+
+        default は通常のtoken（~/.freee-mcp/tokens.enc）、
+        それ以外は ~/.freee-mcp/tokens/{identity}.enc に保存されたtoken
+        （python src/auth.py {identity} で認証）を使う。
 
-        new_token = self.oauth.refresh_access_token(token_data["refresh_token"])
-        self.token_store.save_token(new_token)
-        return new_token
+        Raises:
+            ValueError: ファイル名に使えない identity
+            RuntimeError: identity のtokenがない
+        """
+        if identity in self.token_managers:
+            return self.token_managers[identity]
 
-    def get_client(self) -> FreeeAPIClient:
-        """FreeeAPIClientを取得（遅延初期化）"""
-        if self.client:
-            return self.client
+        token_store = self.token_store
+        if identity != DEFAULT_IDENTITY:
+            token_store = TokenStore(self.encryption_key, identity_token_path(identity))
 
         # tokenをロード
-        token_data = self.token_store.load_token()
+        token_data = token_store.load_token()
         if not token_data:
             # 初回認証が必要
-            print("⚠️ tokenが見つかりません。初回認証を実行してください:", file=sys.stderr)
-            print("  python src/auth.py", file=sys.stderr)
-            raise RuntimeError("tokenが見つかりません")
-
-        # クライアントを初期化
-        self.client = FreeeAPIClient(
-            access_token=token_data["access_token"],
-            company_id=self.company_id,
+            command = "python src/auth.py"
+            if identity != DEFAULT_IDENTITY:
+                command += f" {identity}"
+            logger.error("tokenが見つかりません。初回認証を実行してください: %s", command)
+            raise RuntimeError(
+                f"tokenが見つかりません（identity: {identity}）: {command} で認証してください"
+            )
+
+        # expires_at の手前でtokenを更新（401を待たない）
+        token_manager = TokenManager(
+            token_store,
+            self.oauth,
+            token_data,
+            refresh_margin=float(os.getenv("FREEE_TOKEN_REFRESH_MARGIN", "300")),
+        )
+        token_manager.start()
+        self.token_managers[identity] = token_manager
+        return token_manager
+
+    def get_identity_caches(self, identity: str) -> tuple:
+        """
+        OAuth identity ごとのディスクキャッシュ・試算表キャッシュ（遅延初期化）
+
+        別のfreeeアカウントで取得したマスタデータ・試算表を返さないよう identity ごとに分ける。
+        ディスクは default が FREEE_DISK_CACHE_DIR 直下、それ以外は identities/{identity}/
+
+        Returns:
+            (DiskCache または None, ReportCache)
+        """
+        if identity not in self.identity_caches:
+            # identity は get_token_manager（identity_token_path）でファイル名に使えるか検証済み
+            disk_cache = self.disk_cache
+            if disk_cache and identity != DEFAULT_IDENTITY:
+                disk_cache = disk_cache.namespace(f"identities/{identity}")
+            report_cache = ReportCache(
+                closed_through=self.closed_through,
+                open_ttl=self.report_open_ttl,
+                disk_cache=disk_cache,
+            )
+            self.identity_caches[identity] = (disk_cache, report_cache)
+        return self.identity_caches[identity]
+
+    def _create_client(self, identity: str, company_id: int) -> AsyncFreeeAPIClient:
+        """ClientRegistry から呼ばれる、事業所ごとのクライアント生成"""
+        token_manager = self.get_token_manager(identity)
+        disk_cache, report_cache = self.get_identity_caches(identity)
+        return AsyncFreeeAPIClient(
+            access_token=token_manager.access_token,
+            company_id=company_id,
             base_url=self.base_url,
-            on_token_refresh=self._refresh_token_callback,
+            pool=self.pool,
+            rate_limiter=self.rate_limiter,
+            fetch_concurrency=self.fetch_concurrency,
+            disk_cache=disk_cache,
+            stale_ttl=self.stale_ttl,
+            idempotency_store=self.idempotency_store,
+            receipt_index=self.receipt_index,
+            token_manager=token_manager,
+            report_cache=report_cache,
+            change_feed=self.change_feed,
         )
 
-        return self.client
+    def get_client(
+        self, company_id: Optional[int] = None, identity: Optional[str] = None
+    ) -> AsyncFreeeAPIClient:
+        """
+        事業所のAsyncFreeeAPIClientを取得（遅延初期化）
+
+        Args:
+            company_id: 事業所ID（省略時は FREEE_COMPANY_ID）
+            identity: OAuth identity（省略時は FREEE_OAUTH_IDENTITY、未設定なら default）
+        """
+        return self.clients.get(company_id or self.company_id, identity or self.default_identity)
+
+    def get_mirror(self) -> MirrorStore:
+        """MirrorStoreを取得（遅延初期化）"""
+        if self.mirror is None:
+            self.mirror = MirrorStore(os.getenv("FREEE_MIRROR_DB"))
+        return self.mirror
 
     async def run(self):
-        """MCPサーバーを起動"""
+        """MCPサーバーを起動（stdio）"""
         # ツールを登録
-        register_tools(self.server, self.get_client)
+        register_tools(
+            self.server,
+            self.get_client,
+            self.get_mirror,
+            self.session_limiter,
+            self.category_rules,
+        )
+        self._metrics_task = self._start_metrics_file()
 
         # stdio経由でサーバーを起動
         async with stdio_server() as (read_stream, write_stream):
@@ -99,20 +322,81 @@ class FreeeMCPServer:
                 self.server.create_initialization_options(),
             )
 
+    async def run_http(self, host: str = "127.0.0.1", port: int = 8000):
+        """
+        MCPサーバーを起動（Streamable HTTP）
+
+        1プロセスで複数のMCPクライアント（セッション）を受け付け、
+        コネクションプール・キャッシュ・TokenManagerを全セッションで共有する。
+        エンドポイントは http://{host}:{port}/mcp 、Prometheus形式の計測値は /metrics
+        """
+        register_tools(
+            self.server,
+            self.get_client,
+            self.get_mirror,
+            self.session_limiter,
+            self.category_rules,
+            trust_identity_header=self.trust_identity_header,
+        )
+        session_manager = StreamableHTTPSessionManager(app=self.server)
+        self._metrics_task = self._start_metrics_file()
+
+        async def handle_mcp(scope, receive, send) -> None:
+            await session_manager.handle_request(scope, receive, send)
+
+        async def metrics(request) -> PlainTextResponse:
+            return PlainTextResponse(METRICS.prometheus(), media_type="text/plain; version=0.0.4")
+
+        @contextlib.asynccontextmanager
+        async def lifespan(app):
+            async with session_manager.run():
+                yield
+            await self.pool.aclose()
+
+        app = Starlette(
+            routes=[Route("/metrics", metrics), Mount("/mcp", app=handle_mcp)],
+            lifespan=lifespan,
+        )
+        config = uvicorn.Config(app, host=host, port=port, log_level="warning")
+        logger.info("Streamable HTTP: http://%s:%s/mcp", host, port)
+        await uvicorn.Server(config).serve()
+
 
 def main():
     """メインエントリーポイント"""
+    parser = argparse.ArgumentParser(description="freee MCP Server")
+    parser.add_argument(
+        "--transport",
+        choices=["stdio", "http"],
+        default=os.getenv("FREEE_MCP_TRANSPORT", "stdio"),
+        help="stdio（既定）または http（Streamable HTTP、複数クライアントで共有）",
+    )
+    parser.add_argument("--host", default=os.getenv("FREEE_MCP_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("FREEE_MCP_PORT", "8000")))
+    args = parser.parse_args()
+
+    # ログはstderrへ（stdoutはstdioトランスポートのMCPプロトコルで使う）
+    logging.basicConfig(
+        stream=sys.stderr,
+        level=os.getenv("FREEE_LOG_LEVEL", "INFO").upper(),
+        format="[freee] %(levelname)s %(name)s: %(message)s",
+    )
+    # リクエストごとのINFOログは出さない（計測は get_metrics で見る）
+    for noisy in ("httpx", "mcp"):
+        logging.getLogger(noisy).setLevel(logging.WARNING)
+
     try:
-        print("[freee] Starting MCP Server...", file=sys.stderr)
+        logger.info("Starting MCP Server...")
         server = FreeeMCPServer()
-        print("[freee] Server initialized successfully", file=sys.stderr)
-        asyncio.run(server.run())
+        logger.info("Server initialized successfully")
+        if args.transport == "http":
+            asyncio.run(server.run_http(args.host, args.port))
+        else:
+            asyncio.run(server.run())
     except KeyboardInterrupt:
-        print("\n[freee] Server terminated by user", file=sys.stderr)
+        logger.info("Server terminated by user")
     except Exception as e:
-        print(f"[freee] Fatal error: {e}", file=sys.stderr)
-        import traceback
-        traceback.print_exc(file=sys.stderr)
+        logger.exception("Fatal error: %s", e)
         sys.exit(1)
 
 
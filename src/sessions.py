@@ -0,0 +1,57 @@
+"""MCPセッションごとのツール同時実行数の制限"""
+
+from __future__ import annotations
+
+import asyncio
+import weakref
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict
+
+
+class SessionLimiter:
+    """
+    セッション（MCPクライアントの接続）ごとにツールの同時実行数を制限する
+
+    HTTPトランスポートで複数のセッションが1プロセスを共有するとき、
+    1つのセッションが重いレポート取得を大量に並べても他のセッションの実行枠を奪わないようにする。
+    上限を超えた呼び出しはエラーにせず、そのセッションの実行枠が空くまで待つ。
+    """
+
+    def __init__(self, max_concurrent: int = 4):
+        """
+        Args:
+            max_concurrent: 1セッションあたりの同時実行ツール数
+        """
+        self.max_concurrent = max_concurrent
+        # セッションが閉じられたら自動的に消える
+        self._semaphores: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self.running = 0
+        self.waits = 0
+
+    @asynccontextmanager
+    async def slot(self, session: object) -> AsyncIterator[None]:
+        """セッションの実行枠を1つ確保する"""
+        semaphore = self._semaphores.get(session)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_concurrent)
+            self._semaphores[session] = semaphore
+        if semaphore.locked():
+            self.waits += 1
+        async with semaphore:
+            self.running += 1
+            try:
+                yield
+            finally:
+                self.running -= 1
+
+    def stats(self) -> Dict:
+        """
+        Returns:
+            {"sessions": 3, "max_concurrent": 4, "running": 5, "waits": 12}
+        """
+        return {
+            "sessions": len(self._semaphores),
+            "max_concurrent": self.max_concurrent,
+            "running": self.running,
+            "waits": self.waits,
+        }
@@ -0,0 +1,110 @@
+"""同一リクエストの同時実行をまとめる（single-flight）"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import threading
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Hashable, Optional, TypeVar
+
+# 絶対importに変更（スタンドアロン実行対応）
+sys.path.insert(0, str(Path(__file__).parent))
+from metrics import METRICS
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    同じキーの呼び出しが実行中なら、新たに実行せずその結果を待って共有する
+
+    結果をキャッシュするわけではなく、実行中の間だけまとめる（終わったら次の呼び出しは再実行）。
+    同期（スレッド）と非同期（同じイベントループ上のタスク）の両方に対応する。
+    """
+
+    def __init__(self, metric: Optional[str] = None):
+        """
+        Args:
+            metric: 結果を共有した回数を記録するカウンタ名（省略時は記録しない）
+        """
+        self.metric = metric
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+        self._tasks: Dict[Hashable, asyncio.Task] = {}
+        self.executed = 0
+        self.shared = 0
+
+    def _record_shared(self, labels: Dict) -> None:
+        self.shared += 1
+        if self.metric:
+            METRICS.inc(self.metric, **labels)
+
+    def do(self, key: Hashable, fn: Callable[[], T], **labels) -> T:
+        """
+        fn() を実行（同じキーが別スレッドで実行中ならその結果を待つ）
+
+        Args:
+            key: 同一とみなすキー
+            fn: 実行する関数
+            **labels: 共有したときにカウンタに付けるラベル
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+                self.executed += 1
+            else:
+                self._record_shared(labels)
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            with self._lock:
+                del self._calls[key]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            del self._calls[key]
+        future.set_result(result)
+        return result
+
+    async def ado(self, key: Hashable, fn: Callable[[], Awaitable[T]], **labels) -> T:
+        """
+        fn() を実行（非同期版）
+
+        実行は独立したタスクで行うので、最初の呼び出し元がキャンセルされても
+        結果を待っている他の呼び出し元には影響しない。
+        """
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._tasks[key] = task
+            self.executed += 1
+
+            def finish(done: asyncio.Task) -> None:
+                if self._tasks.get(key) is done:
+                    del self._tasks[key]
+                # 呼び出し元が全員キャンセルされていても例外を未処理のまま残さない
+                if not done.cancelled():
+                    done.exception()
+
+            task.add_done_callback(finish)
+        else:
+            self._record_shared(labels)
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict:
+        """
+        Returns:
+            {"executed": 120, "shared": 15, "in_flight": 2}
+        """
+        return {
+            "executed": self.executed,
+            "shared": self.shared,
+            "in_flight": len(self._calls) + len(self._tasks),
+        }
@@ -0,0 +1,137 @@
+"""事業所のスナップショット（事業所・口座残高・今月のPL・マスタ件数を1つにまとめる）"""
+
+from __future__ import annotations
+
+import sys
+from datetime import date
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# 絶対importに変更（スタンドアロン実行対応）
+sys.path.insert(0, str(Path(__file__).parent))
+from trends import fiscal_year_months
+
+# まとめて取得する項目（client.get_company_snapshot が並列に取得する）
+SNAPSHOT_PARTS = ("companies", "account_items", "walletables", "partners", "pl")
+
+
+def current_fiscal_month(
+    fiscal_years: List[Dict], today: Optional[date] = None
+) -> Tuple[int, int, int]:
+    """
+    今日を含む会計年度と月
+
+    Returns:
+        (会計年度, 暦年, 暦月)
+    """
+    today = today or date.today()
+    for fiscal_year in (today.year, today.year - 1):
+        if (today.year, today.month) in fiscal_year_months(fiscal_year, fiscal_years):
+            return fiscal_year, today.year, today.month
+    return today.year, today.year, today.month
+
+
+def pl_totals(balances: List[Dict]) -> Dict[str, int]:
+    """
+    試算表（PL）の区分ごとの合計
+
+    freeeの合計行（total_line。売上高・営業損益金額など）があればそれを使い、
+    なければ勘定科目の行を区分ごとに合計する。
+    """
+    total_lines = [balance for balance in balances if balance.get("total_line")]
+    if total_lines:
+        return {
+            balance.get("account_category_name"): balance.get("closing_balance") or 0
+            for balance in total_lines
+        }
+    totals: Dict[str, int] = {}
+    for balance in balances:
+        if balance.get("account_item_id") is None:
+            continue
+        category = balance.get("account_category_name") or "その他"
+        totals[category] = totals.get(category, 0) + (balance.get("closing_balance") or 0)
+    return totals
+
+
+def walletable_balances(walletables: List[Dict]) -> Dict:
+    """
+    口座ごとの残高と、口座種別ごとの合計
+
+    Returns:
+        {"accounts": [{"id": 2, "name": "三井住友銀行", "type": "bank_account",
+                       "balance": 1200000}, ...],
+         "by_type": {"bank_account": 1200000, "credit_card": -45000}}
+    """
+    accounts = []
+    by_type: Dict[str, int] = {}
+    for walletable in walletables:
+        balance = walletable.get("walletable_balance")
+        accounts.append(
+            {
+                "id": walletable.get("id"),
+                "name": walletable.get("name"),
+                "type": walletable.get("type"),
+                "balance": balance,
+            }
+        )
+        if balance is not None:
+            by_type[walletable.get("type")] = by_type.get(walletable.get("type"), 0) + balance
+    return {"accounts": accounts, "by_type": by_type}
+
+
+def build_snapshot(company_id: int, parts: Dict) -> Dict:
+    """
+    並列に取得した結果をまとめる（取得に失敗した項目は errors に入れ、他は返す）
+
+    Args:
+        company_id: 事業所ID
+        parts: SNAPSHOT_PARTS → 取得結果（失敗したものは例外）。
+               "pl" は (事業所情報, 会計年度, 暦年, 暦月, 試算表, キャッシュから返したか)
+
+    Returns:
+        {
+            "company": {"id": 1, "name": "合同会社雲孫", "role": "admin"},
+            "counts": {"companies": 2, "account_items": 120, "walletables": 4, "partners": 80},
+            "walletables": {"accounts": [...], "by_type": {...}},
+            "pl": {"fiscal_year": 2025, "month": "2025-10", "totals": {"売上高": 1200000, ...},
+                   "cached": False},
+            "errors": {"partners": "..."}
+        }
+    """
+    errors = {
+        part: str(value) for part, value in parts.items() if isinstance(value, BaseException)
+    }
+
+    def ok(part: str):
+        value = parts.get(part)
+        return None if isinstance(value, BaseException) else value
+
+    company: Dict = {"id": company_id}
+    companies = ok("companies")
+    for entry in companies or []:
+        if entry.get("id") == company_id:
+            company["name"] = entry.get("display_name") or entry.get("name")
+            if entry.get("role"):
+                company["role"] = entry["role"]
+
+    counts = {
+        part: len(ok(part))
+        for part in ("companies", "account_items", "walletables", "partners")
+        if ok(part) is not None
+    }
+
+    result: Dict = {"company": company, "counts": counts}
+    if ok("walletables") is not None:
+        result["walletables"] = walletable_balances(ok("walletables"))
+    if ok("pl") is not None:
+        detail, fiscal_year, year, month, report, hit = ok("pl")
+        company.setdefault("name", detail.get("display_name") or detail.get("name"))
+        result["pl"] = {
+            "fiscal_year": fiscal_year,
+            "month": f"{year}-{month:02d}",
+            "totals": pl_totals(report.get("trial_pl", {}).get("balances", [])),
+            "cached": hit,
+        }
+    if errors:
+        result["errors"] = errors
+    return result
@@ -0,0 +1,194 @@
+"""アクセストークンの期限前リフレッシュ（expires_at ベース・single-flight）"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+# 絶対importに変更（スタンドアロン実行対応）
+sys.path.insert(0, str(Path(__file__).parent))
+from auth import FreeeOAuth
+from metrics import METRICS
+from token_store import TokenStore
+
+logger = logging.getLogger(__name__)
+
+
+class TokenManager:
+    """
+    アクセストークンを期限切れ前に更新する
+
+    - expires_at の refresh_margin 秒前（jitter 秒のゆらぎ付き）にバックグラウンドで更新
+    - リクエスト送信前にも期限を確認し、バックグラウンド更新が遅れていれば先に更新
+    - 同時に更新が必要になっても、freeeへのリフレッシュ要求は1回だけ（single-flight）
+    """
+
+    def __init__(
+        self,
+        token_store: TokenStore,
+        oauth: FreeeOAuth,
+        token_data: Optional[Dict] = None,
+        refresh_margin: float = 300,
+        jitter: float = 60,
+    ):
+        """
+        Args:
+            token_store: 更新後のtokenの保存先
+            oauth: リフレッシュに使うFreeeOAuth
+            token_data: 現在のtoken（省略時はtoken_storeからロード）
+            refresh_margin: 期限の何秒前に更新するか
+            jitter: バックグラウンド更新のタイミングに加えるランダムな前倒し（秒）
+        """
+        self.token_store = token_store
+        self.oauth = oauth
+        self.refresh_margin = refresh_margin
+        self.jitter = jitter
+        self._token = token_data or token_store.load_token()
+        if not self._token:
+            raise RuntimeError("tokenが見つかりません")
+        self._lock = threading.Lock()
+        self._inflight: Optional[asyncio.Future] = None
+        self._task: Optional[asyncio.Task] = None
+        self.refresh_count = 0
+
+    @property
+    def access_token(self) -> str:
+        return self._token["access_token"]
+
+    @property
+    def expires_at(self) -> Optional[float]:
+        expires_at = self._token.get("expires_at")
+        return float(expires_at) if expires_at else None
+
+    def needs_refresh(self) -> bool:
+        """期限まで refresh_margin 秒を切っているか（expires_at不明なら更新しない）"""
+        expires_at = self.expires_at
+        return expires_at is not None and time.time() >= expires_at - self.refresh_margin
+
+    # ========== 更新（同期） ==========
+
+    def refresh(self, stale_token: Optional[str] = None) -> Dict:
+        """
+        tokenを更新（single-flight）
+
+        Args:
+            stale_token: 呼び出し側が使っていた（期限切れとみなした）access_token。
+                すでに別のリクエストが更新済みなら、freeeに問い合わせず現在のtokenを返す。
+
+        Returns:
+            更新後のtoken_data
+        """
+        with self._lock:
+            stale_token = stale_token or self.access_token
+            if self.access_token != stale_token:
+                return self._token
+
+            # 別プロセス（auth.py等）が保存した新しいtokenがあればそれを使う
+            stored = self.token_store.load_token()
+            if (
+                stored
+                and stored.get("access_token") != stale_token
+                and float(stored.get("expires_at") or 0) - self.refresh_margin > time.time()
+            ):
+                self._token = stored
+                return self._token
+
+            refresh_token = (stored or self._token).get("refresh_token")
+            if not refresh_token:
+                raise RuntimeError("リフレッシュトークンがありません。再認証してください。")
+            logger.info("tokenをリフレッシュします")
+            with METRICS.span("token_refresh"):
+                new_token = self.oauth.refresh_access_token(refresh_token)
+            self.token_store.save_token(new_token)
+            self._token = new_token
+            self.refresh_count += 1
+            METRICS.inc("freee_token_refreshes_total")
+            return self._token
+
+    def get_token(self) -> str:
+        """送信に使うaccess_token（期限が近ければ先に更新）"""
+        if self.needs_refresh():
+            self.refresh(self.access_token)
+        return self.access_token
+
+    # ========== 更新（非同期） ==========
+
+    async def arefresh(self, stale_token: Optional[str] = None) -> Dict:
+        """
+        tokenを更新（非同期版）
+
+        同じイベントループ上の同時呼び出しは1つのリフレッシュを待ち合わせる。
+        """
+        if self._inflight is None:
+            self._inflight = asyncio.ensure_future(
+                asyncio.to_thread(self.refresh, stale_token or self.access_token)
+            )
+
+            def clear(_future: asyncio.Future) -> None:
+                self._inflight = None
+
+            self._inflight.add_done_callback(clear)
+        return await asyncio.shield(self._inflight)
+
+    async def aget_token(self) -> str:
+        """送信に使うaccess_token（非同期版）"""
+        if self.needs_refresh():
+            await self.arefresh(self.access_token)
+        return self.access_token
+
+    # ========== バックグラウンド更新 ==========
+
+    def _next_delay(self) -> Optional[float]:
+        """次のバックグラウンド更新までの秒数（expires_at不明ならNone）"""
+        expires_at = self.expires_at
+        if expires_at is None:
+            return None
+        refresh_at = expires_at - self.refresh_margin - random.uniform(0, self.jitter)
+        return max(refresh_at - time.time(), 0)
+
+    def _retry_delay(self) -> float:
+        """更新に失敗したとき・更新後も期限が近いままのときに空ける秒数"""
+        return min(60, max(self.refresh_margin / 5, 1))
+
+    async def run(self) -> None:
+        """期限前にtokenを更新し続ける"""
+        refreshed = False
+        while True:
+            delay = self._next_delay()
+            if delay is None:
+                return
+            if refreshed and delay == 0:
+                # 更新後のtokenも期限が近い（expires_in が refresh_margin 以下、古い expires_at など）。
+                # 続けてリフレッシュ要求を送らないよう間を空ける
+                delay = self._retry_delay()
+            await asyncio.sleep(delay)
+            refreshed = False
+            try:
+                await self.arefresh(self.access_token)
+                refreshed = True
+            except Exception as e:
+                # 失敗してもリクエスト側の401処理があるので、少し待って再試行
+                logger.warning("tokenのバックグラウンド更新に失敗: %s", e)
+                METRICS.inc("freee_token_refresh_failures_total")
+                await asyncio.sleep(self._retry_delay())
+
+    def start(self) -> None:
+        """実行中のイベントループでバックグラウンド更新を開始（多重起動しない）"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self) -> None:
+        """バックグラウンド更新を停止"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -3,12 +3,38 @@
 from __future__ import annotations
 
 import json
+import logging
 import os
+import re
 from pathlib import Path
 from typing import Dict, Optional
 
 from cryptography.fernet import Fernet
 
+logger = logging.getLogger(__name__)
+
+# 既定のOAuth identity（tokenが1つの場合）
+DEFAULT_IDENTITY = "default"
+
+# identity はtokenのファイル名に使うので、英数字と "_" "-" "." だけを許す
+IDENTITY_PATTERN = re.compile(r"[A-Za-z0-9_-][A-Za-z0-9_.-]{0,63}")
+
+
+def identity_token_path(identity: str = DEFAULT_IDENTITY) -> str:
+    """
+    OAuth identity のtoken保存先
+
+    default は ~/.freee-mcp/tokens.enc、それ以外は ~/.freee-mcp/tokens/{identity}.enc
+
+    Raises:
+        ValueError: ファイル名に使えない identity
+    """
+    if identity == DEFAULT_IDENTITY:
+        return os.path.expanduser("~/.freee-mcp/tokens.enc")
+    if not IDENTITY_PATTERN.fullmatch(identity):
+        raise ValueError(f"不正なOAuth identity: {identity!r}（英数字と _ - . のみ、64文字まで）")
+    return os.path.expanduser(f"~/.freee-mcp/tokens/{identity}.enc")
+
 
 class TokenStore:
     """freee OAuth tokenの暗号化保存・ロード"""
@@ -21,7 +47,7 @@ class TokenStore:
         """
         self.cipher = Fernet(encryption_key.encode())
         self.token_file_path = Path(
-            token_file_path or os.path.expanduser("~/.freee-mcp/tokens.enc")
+            token_file_path or identity_token_path(DEFAULT_IDENTITY)
         )
         self.token_file_path.parent.mkdir(parents=True, exist_ok=True)
 
@@ -56,7 +82,7 @@ class TokenStore:
             json_bytes = self.cipher.decrypt(encrypted)
             return json.loads(json_bytes.decode())
         except Exception as e:
-            print(f"⚠️ token復号化エラー: {e}")
+            logger.warning("token復号化エラー: %s", e)
             return None
 
     def delete_token(self) -> None:
@@ -2,8 +2,10 @@
 
 from __future__ import annotations
 
+import asyncio
+import time
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 from mcp.server import Server
 from mcp.types import Tool, TextContent
@@ -12,29 +14,115 @@ from mcp.types import Tool, TextContent
 import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
-from freee_client import FreeeAPIClient
+from aggregate import attach_names, summarize
+from categorize import CategoryRules, categorize
+from formatters import OUTPUT_FORMATS, format_records
+from freee_client import AsyncFreeeAPIClient
+from metrics import METRICS, SIZE_BUCKETS
+from mirror import MIRROR_RESOURCES, sync_mirror
+from reconcile import deal_window, reconcile
+from sessions import SessionLimiter
+from trends import trend_records
 
+# OAuth identity を選ぶHTTPヘッダー（HTTPトランスポートで、信頼できるプロキシが付ける場合のみ）
+IDENTITY_HEADER = "X-Freee-Identity"
 
-def register_tools(server: Server, get_client: callable) -> None:
+# 一覧系ツール共通の出力オプション
+LIST_OUTPUT_PROPERTIES = {
+    "fields": {
+        "type": "array",
+        "items": {"type": "string"},
+        "description": (
+            "出力するフィールド（例: [\"id\", \"date\", \"amount\", \"description\"]）。"
+            "ドット区切りでネストした値も指定可（例: details.account_item_id）"
+        ),
+    },
+    "format": {
+        "type": "string",
+        "enum": list(OUTPUT_FORMATS),
+        "description": "出力形式（json: 整形済み, json_compact, ndjson, csv, tsv）。大量件数はcsv/tsvが軽い",
+    },
+}
+
+# 月次推移ツールの出力形式
+TREND_OUTPUT_PROPERTIES = {
+    "format": {
+        "type": "string",
+        "enum": ["csv", "tsv", "json_compact"],
+        "description": "出力形式（csv/tsv: 1勘定科目1行で列が月（デフォルト: csv）, json_compact: 月と値の配列）",
+    },
+}
+
+# 名前 → ID の候補を引くツール（ツール名はクライアントのメソッド名） → 説明
+RESOLVE_TOOLS = {
+    "resolve_account": "勘定科目名（略称・ショートカット可）から勘定科目IDの候補を引く",
+    "resolve_partner": "取引先名（正式名称・カナ・ショートカット・コード可）から取引先IDの候補を引く",
+    "resolve_walletable": "口座名から口座IDの候補を引く",
+    "resolve_tax_code": "税区分名（例: 課対仕入10%）から税区分コードの候補を引く",
+}
+
+
+def register_tools(
+    server: Server,
+    get_client: callable,
+    get_mirror: callable,
+    session_limiter: Optional[SessionLimiter] = None,
+    category_rules: Optional[CategoryRules] = None,
+    trust_identity_header: bool = False,
+) -> None:
     """
     MCPツールをサーバーに登録
 
     Args:
         server: MCPサーバーインスタンス
-        get_client: FreeeAPIClientを取得する関数
+        get_client: (company_id, identity) からAsyncFreeeAPIClientを取得する関数
+        get_mirror: MirrorStoreを取得する関数
+        session_limiter: セッションごとの同時実行数の制限（省略時は制限なし）
+        category_rules: 口座明細の仕訳ルール（省略時はメモリのみ）
+        trust_identity_header: Trueなら X-Freee-Identity ヘッダーで OAuth identity を選ぶ。
+            ヘッダーは呼び出し元が自由に付けられるので、認証済みの利用者に応じて
+            ヘッダーを付け直すリバースプロキシの後ろでだけ有効にする（省略時は無視）
     """
+    category_rules = category_rules or CategoryRules()
 
     # ========== list_companies ==========
 
     @server.list_tools()
     async def list_tools() -> List[Tool]:
         return [
+            Tool(
+                name="get_company_snapshot",
+                description=(
+                    "事業所の概要を1回で取得（口座ごとの残高、今月のPLの区分別合計、"
+                    "勘定科目・口座・取引先の件数）。事業所一覧・勘定科目・口座・取引先・試算表を"
+                    "並列に取得してまとめるので、最初の状況把握はこれ1つでよい"
+                ),
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "company_id": {
+                            "type": "integer",
+                            "description": "事業所ID（省略時はデフォルト）",
+                        },
+                        "refresh": {
+                            "type": "boolean",
+                            "description": "trueならマスタデータのキャッシュを使わずに取得し直す",
+                        },
+                    },
+                },
+            ),
             Tool(
                 name="list_companies",
                 description="freee事業所一覧を取得",
                 inputSchema={
                     "type": "object",
-                    "properties": {},
+                    "properties": {
+                        "refresh": {
+                            "type": "boolean",
+                            "description": "trueならキャッシュを使わずにfreeeから取得し直す",
+                        },
+                        **LIST_OUTPUT_PROPERTIES,
+                    },
                 },
             ),
             Tool(
@@ -46,7 +134,12 @@ def register_tools(server: Server, get_client: callable) -> None:
                         "company_id": {
                             "type": "integer",
                             "description": "事業所ID（省略時はデフォルト）",
-                        }
+                        },
+                        "refresh": {
+                            "type": "boolean",
+                            "description": "trueならキャッシュを使わずにfreeeから取得し直す",
+                        },
+                        **LIST_OUTPUT_PROPERTIES,
                     },
                 },
             ),
@@ -101,7 +194,12 @@ def register_tools(server: Server, get_client: callable) -> None:
                         "company_id": {
                             "type": "integer",
                             "description": "事業所ID（省略時はデフォルト）",
-                        }
+                        },
+                        "refresh": {
+                            "type": "boolean",
+                            "description": "trueならキャッシュを使わずにfreeeから取得し直す",
+                        },
+                        **LIST_OUTPUT_PROPERTIES,
                     },
                 },
             ),
@@ -136,7 +234,12 @@ def register_tools(server: Server, get_client: callable) -> None:
                         "company_id": {
                             "type": "integer",
                             "description": "事業所ID（省略時はデフォルト）",
-                        }
+                        },
+                        "refresh": {
+                            "type": "boolean",
+                            "description": "trueならキャッシュを使わずにfreeeから取得し直す",
+                        },
+                        **LIST_OUTPUT_PROPERTIES,
                     },
                 },
             ),
@@ -170,6 +273,11 @@ def register_tools(server: Server, get_client: callable) -> None:
                             "type": "integer",
                             "description": "取得件数（最大100、デフォルト100）",
                         },
+                        "max_records": {
+                            "type": "integer",
+                            "description": "指定時はoffsetで自動ページングして最大この件数まで取得（limitは無視）",
+                        },
+                        **LIST_OUTPUT_PROPERTIES,
                     },
                 },
             ),
@@ -199,9 +307,42 @@ def register_tools(server: Server, get_client: callable) -> None:
                             "type": "integer",
                             "description": "取得件数（最大100、デフォルト100）",
                         },
+                        "max_records": {
+                            "type": "integer",
+                            "description": "指定時はoffsetで自動ページングして最大この件数まで取得（limitは無視）",
+                        },
+                        **LIST_OUTPUT_PROPERTIES,
                     },
                 },
             ),
+            *[
+                Tool(
+                    name=name,
+                    description=(
+                        f"{description}。全角半角・カナかな・法人格の違いや部分一致・あいまい一致も"
+                        "スコア順に返す（一覧全体を取得せずにIDを調べられる）"
+                    ),
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "query": {
+                                "type": "string",
+                                "description": "名前（表記ゆれ・一部のみでも可）",
+                            },
+                            "company_id": {
+                                "type": "integer",
+                                "description": "事業所ID（省略時はデフォルト）",
+                            },
+                            "limit": {
+                                "type": "integer",
+                                "description": "候補の最大件数（デフォルト5）",
+                            },
+                        },
+                        "required": ["query"],
+                    },
+                )
+                for name, description in RESOLVE_TOOLS.items()
+            ],
             Tool(
                 name="get_trial_balance_bs",
                 description="試算表（貸借対照表：BS）を取得",
@@ -298,188 +439,1237 @@ def register_tools(server: Server, get_client: callable) -> None:
                             "type": "integer",
                             "description": "取得件数（最大100、デフォルト100）",
                         },
+                        "max_records": {
+                            "type": "integer",
+                            "description": "指定時はoffsetで自動ページングして最大この件数まで取得（limitは無視）",
+                        },
+                        **LIST_OUTPUT_PROPERTIES,
                     },
                 },
             ),
-        ]
-
-    @server.call_tool()
-    async def call_tool(name: str, arguments: Dict[str, Any]) -> List[TextContent]:
-        """ツール実行"""
-        client = get_client()
-
-        try:
-            if name == "list_companies":
-                companies = client.list_companies()
-                return [
-                    TextContent(
-                        type="text",
-                        text=f"事業所一覧:\n{format_json(companies)}",
-                    )
-                ]
-
-            elif name == "list_accounts":
-                company_id = arguments.get("company_id")
-                accounts = client.list_accounts(company_id)
-                return [
-                    TextContent(
-                        type="text",
-                        text=f"勘定科目一覧:\n{format_json(accounts)}",
-                    )
-                ]
-
-            elif name == "create_deal":
-                result = client.create_deal(
-                    issue_date=arguments["issue_date"],
-                    deal_type=arguments["deal_type"],
-                    details=arguments["details"],
-                    company_id=arguments.get("company_id"),
-                    description=arguments.get("description"),
-                )
-                return [
-                    TextContent(
-                        type="text",
-                        text=f"取引を作成しました:\n{format_json(result)}",
-                    )
-                ]
-
-            elif name == "list_walletables":
-                company_id = arguments.get("company_id")
-                walletables = client.list_walletables(company_id)
-                return [
-                    TextContent(
-                        type="text",
-                        text=f"口座一覧:\n{format_json(walletables)}",
-                    )
-                ]
-
-            elif name == "upload_receipt":
-                file_path = Path(arguments["file_path"])
-                if not file_path.exists():
-                    return [
-                        TextContent(
-                            type="text",
-                            text=f"❌ ファイルが見つかりません: {file_path}",
-                        )
-                    ]
-
-                result = client.upload_receipt(
-                    file_path=file_path,
-                    company_id=arguments.get("company_id"),
-                    description=arguments.get("description"),
-                )
-                return [
-                    TextContent(
-                        type="text",
-                        text=f"証憑をアップロードしました:\n{format_json(result)}",
-                    )
-                ]
-
-            elif name == "get_partners":
-                company_id = arguments.get("company_id")
-                partners = client.get_partners(company_id)
-                return [
-                    TextContent(
-                        type="text",
-                        text=f"取引先一覧:\n{format_json(partners)}",
-                    )
-                ]
-
-            elif name == "list_deals":
-                deals = client.list_deals(
-                    company_id=arguments.get("company_id"),
-                    account_item_id=arguments.get("account_item_id"),
-                    partner_id=arguments.get("partner_id"),
-                    start_issue_date=arguments.get("start_issue_date"),
-                    end_issue_date=arguments.get("end_issue_date"),
-                    limit=arguments.get("limit", 100),
-                )
-                return [
-                    TextContent(
-                        type="text",
-                        text=f"取引一覧:\n{format_json(deals)}",
-                    )
-                ]
-
-            elif name == "list_invoices":
-                invoices = client.list_invoices(
-                    company_id=arguments.get("company_id"),
-                    partner_id=arguments.get("partner_id"),
-                    issue_date_min=arguments.get("issue_date_min"),
-                    issue_date_max=arguments.get("issue_date_max"),
-                    limit=arguments.get("limit", 100),
-                )
-                return [
-                    TextContent(
-                        type="text",
-                        text=f"請求書一覧:\n{format_json(invoices)}",
-                    )
-                ]
-
-            elif name == "get_trial_balance_bs":
-                result = client.get_trial_balance_bs(
-                    fiscal_year=arguments["fiscal_year"],
-                    company_id=arguments.get("company_id"),
-                    start_month=arguments.get("start_month"),
-                    end_month=arguments.get("end_month"),
-                )
-                return [
-                    TextContent(
-                        type="text",
-                        text=f"貸借対照表（BS）:\n{format_json(result)}",
-                    )
-                ]
-
-            elif name == "get_trial_balance_pl":
-                result = client.get_trial_balance_pl(
-                    fiscal_year=arguments["fiscal_year"],
-                    company_id=arguments.get("company_id"),
-                    start_month=arguments.get("start_month"),
-                    end_month=arguments.get("end_month"),
-                )
-                return [
-                    TextContent(
-                        type="text",
-                        text=f"損益計算書（PL）:\n{format_json(result)}",
-                    )
-                ]
-
-            elif name == "list_wallet_txns":
-                wallet_txns = client.list_wallet_txns(
-                    company_id=arguments.get("company_id"),
-                    walletable_type=arguments.get("walletable_type"),
-                    walletable_id=arguments.get("walletable_id"),
-                    start_date=arguments.get("start_date"),
-                    end_date=arguments.get("end_date"),
-                    entry_side=arguments.get("entry_side"),
-                    limit=arguments.get("limit", 100),
-                )
-                return [
-                    TextContent(
-                        type="text",
-                        text=f"口座明細一覧:\n{format_json(wallet_txns)}",
-                    )
-                ]
-
-            else:
-                return [
-                    TextContent(
-                        type="text",
-                        text=f"❌ 不明なツール: {name}",
-                    )
-                ]
-
-        except Exception as e:
-            return [
-                TextContent(
-                    type="text",
-                    text=f"❌ エラー: {str(e)}",
-                )
-            ]
-
-
-def format_json(data: Any) -> str:
-    """JSONデータを見やすく整形"""
-    import json
+            Tool(
+                name="sync_mirror",
+                description=(
+                    "取引・口座明細・請求書・取引先をローカルSQLiteミラーへ差分同期"
+                    "（前回同期以降の期間のみ取得）"
+                ),
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "company_id": {
+                            "type": "integer",
+                            "description": "事業所ID（省略時はデフォルト）",
+                        },
+                        "resources": {
+                            "type": "array",
+                            "items": {
+                                "type": "string",
+                                "enum": ["deals", "wallet_txns", "invoices", "partners"],
+                            },
+                            "description": "同期するリソース（省略時は全て）",
+                        },
+                        "full": {
+                            "type": "boolean",
+                            "description": "trueなら差分ではなくstart_dateから取得し直す",
+                        },
+                        "start_date": {
+                            "type": "string",
+                            "description": "初回・full同期の開始日（YYYY-MM-DD形式、省略時は1年前）",
+                        },
+                    },
+                },
+            ),
+            Tool(
+                name="query_mirror",
+                description=(
+                    "ローカルミラーから取引・口座明細・請求書を絞り込み・集計（freeeへの通信なし）。"
+                    "事前にsync_mirrorで同期が必要"
+                ),
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "resource": {
+                            "type": "string",
+                            "enum": ["deals", "wallet_txns", "invoices"],
+                            "description": "対象リソース",
+                        },
+                        "company_id": {
+                            "type": "integer",
+                            "description": "事業所ID（省略時はデフォルト）",
+                        },
+                        "start_date": {
+                            "type": "string",
+                            "description": "開始日（YYYY-MM-DD形式）",
+                        },
+                        "end_date": {
+                            "type": "string",
+                            "description": "終了日（YYYY-MM-DD形式）",
+                        },
+                        "partner_id": {
+                            "type": "integer",
+                            "description": "取引先IDで絞り込み（deals, invoices）",
+                        },
+                        "account_item_id": {
+                            "type": "integer",
+                            "description": "勘定科目IDで絞り込み（deals）",
+                        },
+                        "walletable_id": {
+                            "type": "integer",
+                            "description": "口座IDで絞り込み（deals, wallet_txns）",
+                        },
+                        "entry_side": {
+                            "type": "string",
+                            "enum": ["income", "expense"],
+                            "description": "入出金区分で絞り込み（wallet_txns）",
+                        },
+                        "description_contains": {
+                            "type": "string",
+                            "description": "摘要・明細テキストの部分一致（deals, wallet_txns）",
+                        },
+                        "group_by": {
+                            "type": "string",
+                            "enum": [
+                                "month",
+                                "partner",
+                                "walletable",
+                                "account_item",
+                                "entry_side",
+                            ],
+                            "description": "集計キー（省略時は集計せずレコードを返す）",
+                        },
+                        "limit": {
+                            "type": "integer",
+                            "description": "最大行数（デフォルト100）",
+                        },
+                        **LIST_OUTPUT_PROPERTIES,
+                    },
+                    "required": ["resource"],
+                },
+            ),
+            Tool(
+                name="summarize_deals",
+                description=(
+                    "取引を全ページ取得してサーバー側で集計（月別・勘定科目別・取引先別・口座別の"
+                    "合計・件数と金額上位）。生データを返さないので大量の取引でも軽い"
+                ),
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "company_id": {
+                            "type": "integer",
+                            "description": "事業所ID（省略時はデフォルト）",
+                        },
+                        "start_issue_date": {
+                            "type": "string",
+                            "description": "開始日（YYYY-MM-DD形式）",
+                        },
+                        "end_issue_date": {
+                            "type": "string",
+                            "description": "終了日（YYYY-MM-DD形式）",
+                        },
+                        "account_item_id": {
+                            "type": "integer",
+                            "description": "勘定科目IDで絞り込み",
+                        },
+                        "partner_id": {
+                            "type": "integer",
+                            "description": "取引先IDで絞り込み",
+                        },
+                        "group_by": {
+                            "type": "string",
+                            "enum": ["month", "account_item", "partner", "walletable"],
+                            "description": "集計キー（デフォルト: month）",
+                        },
+                        "description_contains": {
+                            "type": "string",
+                            "description": "明細の摘要の部分一致で絞り込み",
+                        },
+                        "description_regex": {
+                            "type": "string",
+                            "description": "明細の摘要の正規表現で絞り込み",
+                        },
+                        "top_n": {
+                            "type": "integer",
+                            "description": "金額上位として返す件数（デフォルト10）",
+                        },
+                        "max_records": {
+                            "type": "integer",
+                            "description": "集計対象の最大件数（省略時は全件）",
+                        },
+                    },
+                },
+            ),
+            Tool(
+                name="summarize_wallet_txns",
+                description=(
+                    "口座明細を全ページ取得してサーバー側で集計（月別・口座別・入出金別の"
+                    "合計・件数と金額上位）。明細テキストの部分一致・正規表現で絞り込める"
+                ),
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "company_id": {
+                            "type": "integer",
+                            "description": "事業所ID（省略時はデフォルト）",
+                        },
+                        "walletable_type": {
+                            "type": "string",
+                            "enum": ["bank_account", "credit_card", "wallet"],
+                            "description": "口座種別（bank_account, credit_card, wallet）",
+                        },
+                        "walletable_id": {
+                            "type": "integer",
+                            "description": "口座ID（絞り込み用）",
+                        },
+                        "start_date": {
+                            "type": "string",
+                            "description": "開始日（YYYY-MM-DD形式）",
+                        },
+                        "end_date": {
+                            "type": "string",
+                            "description": "終了日（YYYY-MM-DD形式）",
+                        },
+                        "entry_side": {
+                            "type": "string",
+                            "enum": ["income", "expense"],
+                            "description": "入出金区分（income: 入金, expense: 出金）",
+                        },
+                        "group_by": {
+                            "type": "string",
+                            "enum": ["month", "walletable", "entry_side"],
+                            "description": "集計キー（デフォルト: month）",
+                        },
+                        "description_contains": {
+                            "type": "string",
+                            "description": "明細テキストの部分一致で絞り込み（例: ANTHROPIC）",
+                        },
+                        "description_regex": {
+                            "type": "string",
+                            "description": "明細テキストの正規表現で絞り込み",
+                        },
+                        "top_n": {
+                            "type": "integer",
+                            "description": "金額上位として返す件数（デフォルト10）",
+                        },
+                        "max_records": {
+                            "type": "integer",
+                            "description": "集計対象の最大件数（省略時は全件）",
+                        },
+                    },
+                },
+            ),
+            Tool(
+                name="get_changes",
+                description=(
+                    "前回の呼び出しから新規・更新・削除された取引・口座明細だけを返す（変更フィード）。"
+                    "初回は条件を指定して呼び、以降は返ってきた cursor だけを渡す。"
+                    "同じ期間の一覧を繰り返し取得するポーリングの代わりに使う"
+                ),
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "resource": {
+                            "type": "string",
+                            "enum": ["deals", "wallet_txns"],
+                            "description": "対象（cursor を渡すときは省略可）",
+                        },
+                        "cursor": {
+                            "type": "string",
+                            "description": "前回の結果の cursor（絞り込み条件も引き継ぐ）",
+                        },
+                        "company_id": {
+                            "type": "integer",
+                            "description": "事業所ID（省略時はデフォルト）",
+                        },
+                        "start_date": {
+                            "type": "string",
+                            "description": "対象の開始日（YYYY-MM-DD形式、省略時は31日前）",
+                        },
+                        "baseline": {
+                            "type": "boolean",
+                            "description": "trueなら初回は既存の記録を返さず、以降の変更だけを追う",
+                        },
+                        "walletable_type": {
+                            "type": "string",
+                            "enum": ["bank_account", "credit_card", "wallet"],
+                            "description": "口座種別（口座明細のみ）",
+                        },
+                        "walletable_id": {
+                            "type": "integer",
+                            "description": "口座ID（口座明細のみ）",
+                        },
+                        "entry_side": {
+                            "type": "string",
+                            "enum": ["income", "expense"],
+                            "description": "入出金区分（口座明細のみ）",
+                        },
+                        "account_item_id": {
+                            "type": "integer",
+                            "description": "勘定科目ID（取引のみ）",
+                        },
+                        "partner_id": {
+                            "type": "integer",
+                            "description": "取引先ID（取引のみ）",
+                        },
+                        **LIST_OUTPUT_PROPERTIES,
+                    },
+                },
+            ),
+            Tool(
+                name="reconcile_wallet_txns",
+                description=(
+                    "期間内の口座明細と取引をサーバー側で突き合わせ（口座・入出金・金額が一致し日付が近い"
+                    "支払いを索引で引く）、対応する取引のない明細・候補を決めきれない明細・"
+                    "明細のない取引だけを返す。一致したものは件数のみ"
+                ),
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "company_id": {
+                            "type": "integer",
+                            "description": "事業所ID（省略時はデフォルト）",
+                        },
+                        "start_date": {
+                            "type": "string",
+                            "description": "開始日（YYYY-MM-DD形式）",
+                        },
+                        "end_date": {
+                            "type": "string",
+                            "description": "終了日（YYYY-MM-DD形式）",
+                        },
+                        "walletable_type": {
+                            "type": "string",
+                            "enum": ["bank_account", "credit_card", "wallet"],
+                            "description": "口座種別（bank_account, credit_card, wallet）",
+                        },
+                        "walletable_id": {
+                            "type": "integer",
+                            "description": "口座ID（絞り込み用）",
+                        },
+                        "date_tolerance": {
+                            "type": "integer",
+                            "description": "明細と取引の日付のずれの許容日数（デフォルト3）",
+                        },
+                        "limit": {
+                            "type": "integer",
+                            "description": "各一覧の最大件数（デフォルト100）",
+                        },
+                    },
+                    "required": ["start_date", "end_date"],
+                },
+            ),
+            Tool(
+                name="save_category_rules",
+                description=(
+                    "口座明細の仕訳ルール（明細テキストのパターン → 勘定科目・税区分・取引先）を"
+                    "追加・更新・削除。categorize_wallet_txns が使う"
+                ),
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "company_id": {
+                            "type": "integer",
+                            "description": "事業所ID（省略時はデフォルト）",
+                        },
+                        "rules": {
+                            "type": "array",
+                            "description": (
+                                "ルールのリスト。pattern・entry_side が同じ既存ルールは置き換える。"
+                                "明細テキストの最も左で一致したルールを使い、同じ位置で複数一致したら"
+                                "部分一致ルール（長く一致したもの）、正規表現ルール（登録順）の順に優先"
+                            ),
+                            "items": {
+                                "type": "object",
+                                "properties": {
+                                    "pattern": {
+                                        "type": "string",
+                                        "description": "明細テキストのパターン（例: ANTHROPIC）",
+                                    },
+                                    "match": {
+                                        "type": "string",
+                                        "enum": ["contains", "regex"],
+                                        "description": (
+                                            "contains: 部分一致（既定・全角半角/大文字小文字を区別しない）, "
+                                            "regex: 正規表現（大文字小文字を区別しない）"
+                                        ),
+                                    },
+                                    "entry_side": {
+                                        "type": "string",
+                                        "enum": ["income", "expense"],
+                                        "description": "入出金区分（省略時は両方）",
+                                    },
+                                    "account_item_id": {"type": "integer"},
+                                    "tax_code": {
+                                        "type": "integer",
+                                        "description": "税区分（省略時は勘定科目の既定）",
+                                    },
+                                    "partner_id": {"type": "integer"},
+                                    "description": {
+                                        "type": "string",
+                                        "description": "取引の備考（省略時は明細テキスト）",
+                                    },
+                                    "delete": {
+                                        "type": "boolean",
+                                        "description": "trueならこのルールを削除",
+                                    },
+                                },
+                                "required": ["pattern"],
+                            },
+                        },
+                    },
+                    "required": ["rules"],
+                },
+            ),
+            Tool(
+                name="list_category_rules",
+                description="口座明細の仕訳ルール一覧（登録順）",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "company_id": {
+                            "type": "integer",
+                            "description": "事業所ID（省略時はデフォルト）",
+                        },
+                    },
+                },
+            ),
+            Tool(
+                name="categorize_wallet_txns",
+                description=(
+                    "期間内の未消込の口座明細を仕訳ルールで分類し、create_deals_bulk にそのまま渡せる"
+                    "取引（口座からの支払い・明細IDの冪等キー付き）と、ルールに当たらなかった明細テキストの"
+                    "まとまりを返す"
+                ),
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "company_id": {
+                            "type": "integer",
+                            "description": "事業所ID（省略時はデフォルト）",
+                        },
+                        "start_date": {
+                            "type": "string",
+                            "description": "開始日（YYYY-MM-DD形式）",
+                        },
+                        "end_date": {
+                            "type": "string",
+                            "description": "終了日（YYYY-MM-DD形式）",
+                        },
+                        "walletable_type": {
+                            "type": "string",
+                            "enum": ["bank_account", "credit_card", "wallet"],
+                            "description": "口座種別（bank_account, credit_card, wallet）",
+                        },
+                        "walletable_id": {
+                            "type": "integer",
+                            "description": "口座ID（絞り込み用）",
+                        },
+                        "entry_side": {
+                            "type": "string",
+                            "enum": ["income", "expense"],
+                            "description": "入出金区分（income: 入金, expense: 出金）",
+                        },
+                        "include_settled": {
+                            "type": "boolean",
+                            "description": "消込済み・無視した明細も対象にする（デフォルトfalse）",
+                        },
+                        "limit": {
+                            "type": "integer",
+                            "description": "返す取引・未分類の最大件数（デフォルト100）",
+                        },
+                    },
+                },
+            ),
+            Tool(
+                name="create_deals_bulk",
+                description=(
+                    "freee取引をまとめて作成（並列送信・件ごとの成否を返す）。"
+                    "冪等キーで作成済みの取引はスキップするので、失敗分の再実行でも二重計上しない"
+                ),
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "deals": {
+                            "type": "array",
+                            "description": "作成する取引のリスト",
+                            "items": {
+                                "type": "object",
+                                "properties": {
+                                    "issue_date": {
+                                        "type": "string",
+                                        "description": "発生日（YYYY-MM-DD形式）",
+                                    },
+                                    "deal_type": {
+                                        "type": "string",
+                                        "enum": ["income", "expense"],
+                                    },
+                                    "details": {
+                                        "type": "array",
+                                        "items": {
+                                            "type": "object",
+                                            "properties": {
+                                                "account_item_id": {"type": "integer"},
+                                                "tax_code": {"type": "integer"},
+                                                "amount": {"type": "integer"},
+                                                "item_id": {"type": "integer"},
+                                                "description": {"type": "string"},
+                                            },
+                                            "required": ["account_item_id", "tax_code", "amount"],
+                                        },
+                                    },
+                                    "partner_id": {"type": "integer"},
+                                    "ref_number": {
+                                        "type": "string",
+                                        "description": "管理番号",
+                                    },
+                                    "description": {"type": "string"},
+                                    "idempotency_key": {
+                                        "type": "string",
+                                        "description": (
+                                            "冪等キー（省略時は発生日・金額・取引先・管理番号から計算）"
+                                        ),
+                                    },
+                                },
+                                "required": ["issue_date", "deal_type", "details"],
+                            },
+                        },
+                        "company_id": {
+                            "type": "integer",
+                            "description": "事業所ID（省略時はデフォルト）",
+                        },
+                        "concurrency": {
+                            "type": "integer",
+                            "description": "同時送信数（省略時はサーバー設定）",
+                        },
+                    },
+                    "required": ["deals"],
+                },
+            ),
+            Tool(
+                name="upload_receipts",
+                description=(
+                    "ディレクトリまたはglobに一致する証憑をまとめてfreeeにアップロード"
+                    "（並列送信・内容が同じアップロード済みファイルはスキップ・スループットを報告）"
+                ),
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "path": {
+                            "type": "string",
+                            "description": "ディレクトリまたはglob（例: ~/receipts/2025-01/*.pdf）",
+                        },
+                        "recursive": {
+                            "type": "boolean",
+                            "description": "ディレクトリ指定時にサブディレクトリも含める",
+                            "default": False,
+                        },
+                        "company_id": {
+                            "type": "integer",
+                            "description": "事業所ID（省略時はデフォルト）",
+                        },
+                        "description": {
+                            "type": "string",
+                            "description": "全ファイル共通の証憑の説明",
+                        },
+                        "concurrency": {
+                            "type": "integer",
+                            "description": "同時アップロード数（省略時はサーバー設定）",
+                        },
+                    },
+                    "required": ["path"],
+                },
+            ),
+            Tool(
+                name="get_metrics",
+                description=(
+                    "サーバーの計測値を取得（ツール・endpointごとのレイテンシ、レスポンスサイズ、"
+                    "リトライ・429回数、キャッシュヒット率、tokenリフレッシュ回数）"
+                ),
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "format": {
+                            "type": "string",
+                            "enum": ["json", "prometheus"],
+                            "description": "出力形式（デフォルト: json）",
+                            "default": "json",
+                        },
+                        "spans": {
+                            "type": "integer",
+                            "description": "含める直近のトレーシングスパン数（json時、デフォルト: 0）",
+                            "default": 0,
+                        },
+                    },
+                },
+            ),
+            Tool(
+                name="get_pl_trend",
+                description=(
+                    "損益計算書（PL）の月次推移。会計年度の各月の試算表を並列に取得し、"
+                    "月×勘定科目の表で返す（終わった月はキャッシュ）。12ヶ月分を1回で取れる"
+                ),
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "fiscal_years": {
+                            "type": "array",
+                            "items": {"type": "integer"},
+                            "description": "会計年度のリスト（例: [2023, 2024]）",
+                        },
+                        "company_id": {
+                            "type": "integer",
+                            "description": "事業所ID（省略時はデフォルト）",
+                        },
+                        **TREND_OUTPUT_PROPERTIES,
+                    },
+                    "required": ["fiscal_years"],
+                },
+            ),
+            Tool(
+                name="get_bs_trend",
+                description=(
+                    "貸借対照表（BS）の月末残高の推移。会計年度の各月の試算表を並列に取得し、"
+                    "月×勘定科目の表で返す（終わった月はキャッシュ）"
+                ),
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "fiscal_years": {
+                            "type": "array",
+                            "items": {"type": "integer"},
+                            "description": "会計年度のリスト（例: [2023, 2024]）",
+                        },
+                        "company_id": {
+                            "type": "integer",
+                            "description": "事業所ID（省略時はデフォルト）",
+                        },
+                        **TREND_OUTPUT_PROPERTIES,
+                    },
+                    "required": ["fiscal_years"],
+                },
+            ),
+        ]
+
+    async def run_tool(
+        name: str, arguments: Dict[str, Any], identity: Optional[str] = None
+    ) -> List[TextContent]:
+        """ツール実行"""
+        # 計測値の取得はクライアント（token）不要
+        if name == "get_metrics":
+            return [TextContent(type="text", text=render_metrics(arguments))]
+
+        try:
+            # (OAuth identity, company_id) ごとに事業所別のクライアントへ振り分ける
+            client = get_client(arguments.get("company_id"), identity)
+
+            if name == "get_company_snapshot":
+                snapshot = await client.get_company_snapshot(
+                    arguments.get("company_id"), refresh=arguments.get("refresh", False)
+                )
+                return [
+                    TextContent(
+                        type="text",
+                        text=f"事業所の概要:\n{format_json(snapshot)}",
+                    )
+                ]
+
+            elif name == "list_companies":
+                companies = await client.list_companies(
+                    refresh=arguments.get("refresh", False)
+                )
+                return [
+                    TextContent(
+                        type="text",
+                        text=f"事業所一覧:\n{format_list(companies, arguments)}",
+                    )
+                ]
+
+            elif name == "list_accounts":
+                company_id = arguments.get("company_id")
+                accounts = await client.list_accounts(
+                    company_id, refresh=arguments.get("refresh", False)
+                )
+                return [
+                    TextContent(
+                        type="text",
+                        text=f"勘定科目一覧:\n{format_list(accounts, arguments)}",
+                    )
+                ]
+
+            elif name == "create_deal":
+                result = await client.create_deal(
+                    issue_date=arguments["issue_date"],
+                    deal_type=arguments["deal_type"],
+                    details=arguments["details"],
+                    company_id=arguments.get("company_id"),
+                    description=arguments.get("description"),
+                )
+                return [
+                    TextContent(
+                        type="text",
+                        text=f"取引を作成しました:\n{format_json(result)}",
+                    )
+                ]
+
+            elif name == "list_walletables":
+                company_id = arguments.get("company_id")
+                walletables = await client.list_walletables(
+                    company_id, refresh=arguments.get("refresh", False)
+                )
+                return [
+                    TextContent(
+                        type="text",
+                        text=f"口座一覧:\n{format_list(walletables, arguments)}",
+                    )
+                ]
+
+            elif name == "upload_receipt":
+                file_path = Path(arguments["file_path"])
+                if not file_path.exists():
+                    return [
+                        TextContent(
+                            type="text",
+                            text=f"❌ ファイルが見つかりません: {file_path}",
+                        )
+                    ]
+
+                result = await client.upload_receipt(
+                    file_path=file_path,
+                    company_id=arguments.get("company_id"),
+                    description=arguments.get("description"),
+                )
+                return [
+                    TextContent(
+                        type="text",
+                        text=f"証憑をアップロードしました:\n{format_json(result)}",
+                    )
+                ]
+
+            elif name == "get_partners":
+                company_id = arguments.get("company_id")
+                partners = await client.get_partners(
+                    company_id, refresh=arguments.get("refresh", False)
+                )
+                return [
+                    TextContent(
+                        type="text",
+                        text=f"取引先一覧:\n{format_list(partners, arguments)}",
+                    )
+                ]
+
+            elif name == "list_deals":
+                filters = {
+                    "company_id": arguments.get("company_id"),
+                    "account_item_id": arguments.get("account_item_id"),
+                    "partner_id": arguments.get("partner_id"),
+                    "start_issue_date": arguments.get("start_issue_date"),
+                    "end_issue_date": arguments.get("end_issue_date"),
+                }
+                if arguments.get("max_records"):
+                    deals = await client.fetch_all(
+                        "deals", max_records=arguments["max_records"], **filters
+                    )
+                else:
+                    deals = await client.list_deals(limit=arguments.get("limit", 100), **filters)
+                return [
+                    TextContent(
+                        type="text",
+                        text=f"取引一覧:\n{format_list(deals, arguments)}",
+                    )
+                ]
+
+            elif name == "list_invoices":
+                filters = {
+                    "company_id": arguments.get("company_id"),
+                    "partner_id": arguments.get("partner_id"),
+                    "issue_date_min": arguments.get("issue_date_min"),
+                    "issue_date_max": arguments.get("issue_date_max"),
+                }
+                if arguments.get("max_records"):
+                    invoices = await client.fetch_all(
+                        "invoices", max_records=arguments["max_records"], **filters
+                    )
+                else:
+                    invoices = await client.list_invoices(
+                        limit=arguments.get("limit", 100), **filters
+                    )
+                return [
+                    TextContent(
+                        type="text",
+                        text=f"請求書一覧:\n{format_list(invoices, arguments)}",
+                    )
+                ]
+
+            elif name in RESOLVE_TOOLS:
+                candidates = await getattr(client, name)(
+                    arguments["query"],
+                    company_id=arguments.get("company_id"),
+                    limit=arguments.get("limit", 5),
+                )
+                return [
+                    TextContent(
+                        type="text",
+                        text=(
+                            f"候補（{len(candidates)}件）:\n"
+                            f"{format_records(candidates, 'json_compact')}"
+                        ),
+                    )
+                ]
+
+            elif name == "get_trial_balance_bs":
+                result = await client.get_trial_balance_bs(
+                    fiscal_year=arguments["fiscal_year"],
+                    company_id=arguments.get("company_id"),
+                    start_month=arguments.get("start_month"),
+                    end_month=arguments.get("end_month"),
+                )
+                return [
+                    TextContent(
+                        type="text",
+                        text=f"貸借対照表（BS）:\n{format_json(result)}",
+                    )
+                ]
+
+            elif name == "get_trial_balance_pl":
+                result = await client.get_trial_balance_pl(
+                    fiscal_year=arguments["fiscal_year"],
+                    company_id=arguments.get("company_id"),
+                    start_month=arguments.get("start_month"),
+                    end_month=arguments.get("end_month"),
+                )
+                return [
+                    TextContent(
+                        type="text",
+                        text=f"損益計算書（PL）:\n{format_json(result)}",
+                    )
+                ]
+
+            elif name == "list_wallet_txns":
+                filters = {
+                    "company_id": arguments.get("company_id"),
+                    "walletable_type": arguments.get("walletable_type"),
+                    "walletable_id": arguments.get("walletable_id"),
+                    "start_date": arguments.get("start_date"),
+                    "end_date": arguments.get("end_date"),
+                    "entry_side": arguments.get("entry_side"),
+                }
+                if arguments.get("max_records"):
+                    wallet_txns = await client.fetch_all(
+                        "wallet_txns", max_records=arguments["max_records"], **filters
+                    )
+                else:
+                    wallet_txns = await client.list_wallet_txns(
+                        limit=arguments.get("limit", 100), **filters
+                    )
+                return [
+                    TextContent(
+                        type="text",
+                        text=f"口座明細一覧:\n{format_list(wallet_txns, arguments)}",
+                    )
+                ]
+
+            elif name == "sync_mirror":
+                result = await sync_mirror(
+                    client,
+                    get_mirror(),
+                    company_id=arguments.get("company_id"),
+                    resources=arguments.get("resources") or MIRROR_RESOURCES,
+                    full=arguments.get("full", False),
+                    start_date=arguments.get("start_date"),
+                )
+                return [
+                    TextContent(
+                        type="text",
+                        text=f"ミラーを同期しました:\n{format_json(result)}",
+                    )
+                ]
+
+            elif name == "query_mirror":
+                started = time.perf_counter()
+                rows = get_mirror().query(
+                    resource=arguments["resource"],
+                    company_id=arguments.get("company_id") or client.company_id,
+                    start_date=arguments.get("start_date"),
+                    end_date=arguments.get("end_date"),
+                    partner_id=arguments.get("partner_id"),
+                    account_item_id=arguments.get("account_item_id"),
+                    walletable_id=arguments.get("walletable_id"),
+                    entry_side=arguments.get("entry_side"),
+                    description_contains=arguments.get("description_contains"),
+                    group_by=arguments.get("group_by"),
+                    limit=arguments.get("limit", 100),
+                )
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                return [
+                    TextContent(
+                        type="text",
+                        text=(
+                            f"ミラー検索結果（{len(rows)}件, {elapsed_ms:.1f}ms）:\n"
+                            f"{format_list(rows, arguments)}"
+                        ),
+                    )
+                ]
+
+            elif name == "summarize_deals":
+                company_id = arguments.get("company_id")
+                group_by = arguments.get("group_by", "month")
+                deals = await client.fetch_all(
+                    "deals",
+                    max_records=arguments.get("max_records"),
+                    company_id=company_id,
+                    account_item_id=arguments.get("account_item_id"),
+                    partner_id=arguments.get("partner_id"),
+                    start_issue_date=arguments.get("start_issue_date"),
+                    end_issue_date=arguments.get("end_issue_date"),
+                )
+                summary = summarize(
+                    deals,
+                    "deals",
+                    group_by=group_by,
+                    top_n=arguments.get("top_n", 10),
+                    description_contains=arguments.get("description_contains"),
+                    description_regex=arguments.get("description_regex"),
+                )
+                names = await group_names(client, group_by, company_id)
+                return [
+                    TextContent(
+                        type="text",
+                        text=f"取引の集計:\n{format_json(attach_names(summary, names))}",
+                    )
+                ]
+
+            elif name == "summarize_wallet_txns":
+                company_id = arguments.get("company_id")
+                group_by = arguments.get("group_by", "month")
+                wallet_txns = await client.fetch_all(
+                    "wallet_txns",
+                    max_records=arguments.get("max_records"),
+                    company_id=company_id,
+                    walletable_type=arguments.get("walletable_type"),
+                    walletable_id=arguments.get("walletable_id"),
+                    start_date=arguments.get("start_date"),
+                    end_date=arguments.get("end_date"),
+                    entry_side=arguments.get("entry_side"),
+                )
+                summary = summarize(
+                    wallet_txns,
+                    "wallet_txns",
+                    group_by=group_by,
+                    top_n=arguments.get("top_n", 10),
+                    description_contains=arguments.get("description_contains"),
+                    description_regex=arguments.get("description_regex"),
+                )
+                names = await group_names(client, group_by, company_id)
+                return [
+                    TextContent(
+                        type="text",
+                        text=f"口座明細の集計:\n{format_json(attach_names(summary, names))}",
+                    )
+                ]
+
+            elif name == "get_changes":
+                result = await client.get_changes(
+                    arguments.get("resource", ""),
+                    cursor=arguments.get("cursor"),
+                    company_id=arguments.get("company_id"),
+                    start_date=arguments.get("start_date"),
+                    baseline=arguments.get("baseline", False),
+                    walletable_type=arguments.get("walletable_type"),
+                    walletable_id=arguments.get("walletable_id"),
+                    entry_side=arguments.get("entry_side"),
+                    account_item_id=arguments.get("account_item_id"),
+                    partner_id=arguments.get("partner_id"),
+                )
+                counts = result["counts"]
+                text = (
+                    f"変更: 新規 {counts['new']}件 / 更新 {counts['updated']}件 / "
+                    f"削除 {counts['deleted']}件（{result['window_start']} 以降を "
+                    f"{counts['fetched']}件確認）\ncursor: {result['cursor']}"
+                )
+                if result["deleted"]:
+                    text += f"\n削除されたID: {result['deleted']}"
+                if result["records"]:
+                    text += f"\n{format_list(result['records'], arguments)}"
+                return [TextContent(type="text", text=text)]
+
+            elif name == "reconcile_wallet_txns":
+                company_id = arguments.get("company_id")
+                tolerance = arguments.get("date_tolerance", 3)
+                start_date, end_date = arguments["start_date"], arguments["end_date"]
+                deal_start, deal_end = deal_window(start_date, end_date, tolerance)
+                wallet_txns, deals, partners = await asyncio.gather(
+                    client.fetch_all(
+                        "wallet_txns",
+                        company_id=company_id,
+                        walletable_type=arguments.get("walletable_type"),
+                        walletable_id=arguments.get("walletable_id"),
+                        start_date=start_date,
+                        end_date=end_date,
+                    ),
+                    client.fetch_all(
+                        "deals",
+                        company_id=company_id,
+                        start_issue_date=deal_start,
+                        end_issue_date=deal_end,
+                    ),
+                    client.get_partners(company_id),
+                )
+                result = reconcile(
+                    wallet_txns,
+                    deals,
+                    date_tolerance=tolerance,
+                    partner_names={partner["id"]: partner.get("name") for partner in partners},
+                    start_date=start_date,
+                    end_date=end_date,
+                    limit=arguments.get("limit", 100),
+                )
+                counts = result["counts"]
+                return [
+                    TextContent(
+                        type="text",
+                        text=(
+                            f"口座明細と取引の突き合わせ: 明細 {counts['wallet_txns']}件中 "
+                            f"一致 {counts['matched']}件 / 取引なし {counts['unmatched_txns']}件 / "
+                            f"候補複数 {counts['ambiguous']}件 / "
+                            f"明細のない取引 {counts['unmatched_deals']}件\n"
+                            f"{format_json(result)}"
+                        ),
+                    )
+                ]
+
+            elif name == "save_category_rules":
+                result = category_rules.upsert(client.company_id, arguments["rules"])
+                return [
+                    TextContent(
+                        type="text",
+                        text=(
+                            f"仕訳ルールを保存しました: 追加 {result['added']}件 / "
+                            f"更新 {result['updated']}件 / 削除 {result['deleted']}件 / "
+                            f"計 {result['total']}件"
+                        ),
+                    )
+                ]
+
+            elif name == "list_category_rules":
+                rules = category_rules.get(client.company_id)
+                return [
+                    TextContent(
+                        type="text",
+                        text=f"仕訳ルール（{len(rules)}件）:\n{format_json(rules)}",
+                    )
+                ]
+
+            elif name == "categorize_wallet_txns":
+                company_id = arguments.get("company_id")
+                wallet_txns, accounts = await asyncio.gather(
+                    client.fetch_all(
+                        "wallet_txns",
+                        company_id=company_id,
+                        walletable_type=arguments.get("walletable_type"),
+                        walletable_id=arguments.get("walletable_id"),
+                        start_date=arguments.get("start_date"),
+                        end_date=arguments.get("end_date"),
+                        entry_side=arguments.get("entry_side"),
+                    ),
+                    client.list_accounts(company_id),
+                )
+                result = categorize(
+                    wallet_txns,
+                    category_rules.get(client.company_id),
+                    client.company_id,
+                    default_tax_codes={
+                        account["id"]: account.get("default_tax_code") for account in accounts
+                    },
+                    include_settled=arguments.get("include_settled", False),
+                    limit=arguments.get("limit", 100),
+                )
+                counts = result["counts"]
+                return [
+                    TextContent(
+                        type="text",
+                        text=(
+                            f"口座明細の仕訳: 明細 {counts['wallet_txns']}件中 "
+                            f"分類 {counts['categorized']}件 / 未分類 {counts['uncategorized']}件 / "
+                            f"対象外 {counts['skipped']}件\n"
+                            f"{format_json(result)}"
+                        ),
+                    )
+                ]
+
+            elif name == "create_deals_bulk":
+                result = await client.create_deals_bulk(
+                    arguments["deals"],
+                    company_id=arguments.get("company_id"),
+                    concurrency=arguments.get("concurrency"),
+                )
+                summary = result["summary"]
+                return [
+                    TextContent(
+                        type="text",
+                        text=(
+                            f"取引の一括作成: 作成 {summary['created']}件 / "
+                            f"スキップ {summary['skipped']}件 / エラー {summary['error']}件\n"
+                            f"{format_json(result['results'])}"
+                        ),
+                    )
+                ]
+
+            elif name == "upload_receipts":
+                result = await client.upload_receipts(
+                    arguments["path"],
+                    company_id=arguments.get("company_id"),
+                    description=arguments.get("description"),
+                    recursive=arguments.get("recursive", False),
+                    concurrency=arguments.get("concurrency"),
+                )
+                summary = result["summary"]
+                return [
+                    TextContent(
+                        type="text",
+                        text=(
+                            f"証憑の一括アップロード: アップロード {summary['uploaded']}件 / "
+                            f"スキップ {summary['skipped']}件 / エラー {summary['error']}件 "
+                            f"（{summary['seconds']}秒, {summary['files_per_sec']}件/秒, "
+                            f"{summary['mb_per_sec']}MB/秒）\n"
+                            f"{format_json(result['results'])}"
+                        ),
+                    )
+                ]
+
+            elif name in ("get_pl_trend", "get_bs_trend"):
+                fetch = client.get_pl_trend if name == "get_pl_trend" else client.get_bs_trend
+                result = await fetch(
+                    arguments["fiscal_years"], company_id=arguments.get("company_id")
+                )
+                return [
+                    TextContent(
+                        type="text",
+                        text=format_trend(result, arguments.get("format", "csv")),
+                    )
+                ]
+
+            else:
+                return [
+                    TextContent(
+                        type="text",
+                        text=f"❌ 不明なツール: {name}",
+                    )
+                ]
+
+        except Exception as e:
+            return [
+                TextContent(
+                    type="text",
+                    text=f"❌ エラー: {str(e)}",
+                )
+            ]
+
+
+    @server.call_tool()
+    async def call_tool(name: str, arguments: Dict[str, Any]) -> List[TextContent]:
+        """ツール実行（session_limiter があればセッションの実行枠が空くまで待つ）"""
+        started = time.perf_counter()
+        identity = request_identity(server) if trust_identity_header else None
+        with METRICS.span("tool", tool=name):
+            if session_limiter is None:
+                result = await run_tool(name, arguments, identity)
+            else:
+                async with session_limiter.slot(server.request_context.session):
+                    result = await run_tool(name, arguments, identity)
+        record_tool_call(name, result, time.perf_counter() - started)
+        return result
+
+
+def request_identity(server: Server) -> Optional[str]:
+    """
+    呼び出し元のOAuth identity（HTTPトランスポートの X-Freee-Identity ヘッダー）
+
+    stdioトランスポートやヘッダーがない場合は None（サーバーの既定の identity を使う）。
+    """
+    try:
+        request = server.request_context.request
+    except LookupError:
+        return None
+    headers = getattr(request, "headers", None)
+    return headers.get(IDENTITY_HEADER) if headers is not None else None
+
+
+async def group_names(
+    client: AsyncFreeeAPIClient, group_by: str, company_id: Optional[int]
+) -> Dict:
+    """集計キー（ID）→ 名前の対応表（マスタデータはキャッシュから引く）"""
+    if group_by == "account_item":
+        items = await client.list_accounts(company_id)
+    elif group_by == "partner":
+        items = await client.get_partners(company_id)
+    elif group_by == "walletable":
+        items = await client.list_walletables(company_id)
+    else:
+        return {}
+    return {item["id"]: item.get("name") for item in items}
+
+
+def format_json(data: Any) -> str:
+    """JSONデータを見やすく整形"""
+    import json
+
+    with METRICS.span("format", format="json"):
+        return json.dumps(data, ensure_ascii=False, indent=2)
+
+
+def format_list(records: List[Dict], arguments: Dict[str, Any]) -> str:
+    """一覧系ツールの結果を fields / format 引数に従って整形"""
+    fmt = arguments.get("format", "json")
+    with METRICS.span("format", format=fmt, records=len(records)):
+        return format_records(records, fmt, arguments.get("fields"))
+
+
+def format_trend(trend: Dict, fmt: str = "csv") -> str:
+    """月次推移の出力（見出し＋表）"""
+    if trend["report"] == "trial_pl":
+        label = "損益計算書（PL）の月次推移"
+    else:
+        label = "貸借対照表（BS）の月末残高推移"
+    months = trend["months"]
+    header = (
+        f"{label}: {months[0] if months else '-'}〜{months[-1] if months else '-'} "
+        f"{len(trend['rows'])}科目（取得 {trend['fetched_months']}ヶ月 / "
+        f"キャッシュ {trend['cached_months']}ヶ月）\n"
+    )
+    if fmt in ("csv", "tsv"):
+        return header + format_records(trend_records(trend), fmt)
+    import json
+
+    return header + json.dumps(trend, ensure_ascii=False, separators=(",", ":"))
+
+
+def record_tool_call(name: str, result: List[TextContent], seconds: float) -> None:
+    """ツール1回分のレイテンシ・応答サイズ・成否を記録"""
+    METRICS.observe("freee_tool_duration_seconds", seconds, tool=name)
+    size = sum(len(content.text.encode()) for content in result)
+    METRICS.observe("freee_tool_response_bytes", size, SIZE_BUCKETS, tool=name)
+    status = "error" if result and result[0].text.startswith("❌") else "ok"
+    METRICS.inc("freee_tool_calls_total", tool=name, status=status)
+
+
+def render_metrics(arguments: Dict[str, Any]) -> str:
+    """get_metrics の出力（json はよく見る値の要約付き）"""
+    if arguments.get("format") == "prometheus":
+        return METRICS.prometheus()
 
-    return json.dumps(data, ensure_ascii=False, indent=2)
+    http_requests = METRICS.counter_total("freee_http_requests_total")
+    snapshot = {
+        "summary": {
+            "tool_calls": METRICS.counter_total("freee_tool_calls_total"),
+            "tool_errors": METRICS.counter_total("freee_tool_calls_total", status="error"),
+            "http_requests": http_requests,
+            "http_429": METRICS.counter_total("freee_http_requests_total", status=429),
+            "retries": METRICS.counter_total("freee_http_retries_total"),
+            "coalesced": METRICS.counter_total("freee_http_coalesced_total"),
+            "token_refreshes": METRICS.counter_total("freee_token_refreshes_total"),
+        },
+        **METRICS.snapshot(),
+    }
+    if arguments.get("spans"):
+        snapshot["recent_spans"] = METRICS.recent_spans(arguments["spans"])
+    return format_json(snapshot)
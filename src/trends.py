@@ -0,0 +1,108 @@
+"""試算表の月次推移（月ごとに取得した試算表を 月×勘定科目 の表にする）"""
+
+from __future__ import annotations
+
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+# 推移を返せるレポート → 各月の値に使う項目
+TREND_REPORTS = {
+    "trial_pl": "closing_balance",  # 単月の試算表なのでその月の発生額
+    "trial_bs": "closing_balance",  # 月末残高
+}
+
+
+def fiscal_year_months(
+    fiscal_year: int, fiscal_years: List[Dict]
+) -> List[Tuple[int, int]]:
+    """
+    会計年度に含まれる月を [(暦年, 暦月), ...] で返す
+
+    事業所の会計年度（start_date / end_date）に該当があればその期間（短い期にも対応）、
+    なければ直近の期首月から12ヶ月とみなす。
+
+    Args:
+        fiscal_year: 会計年度（期首日の年）
+        fiscal_years: 事業所情報の fiscal_years
+    """
+    start = end = None
+    for period in fiscal_years:
+        if int(period["start_date"][:4]) == fiscal_year:
+            start, end = period["start_date"], period["end_date"]
+            break
+    if start is None:
+        latest = max(fiscal_years, key=lambda period: period["start_date"], default=None)
+        start_month = int(latest["start_date"][5:7]) if latest else 1
+        start = f"{fiscal_year}-{start_month:02d}-01"
+        end_year = fiscal_year + (start_month - 1 + 11) // 12
+        end = f"{end_year}-{(start_month - 1 + 11) % 12 + 1:02d}-01"
+
+    year, month = int(start[:4]), int(start[5:7])
+    last = (int(end[:4]), int(end[5:7]))
+    months = []
+    while (year, month) <= last:
+        months.append((year, month))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def month_has_started(year: int, month: int, today: Optional[date] = None) -> bool:
+    today = today or date.today()
+    return (year, month) <= (today.year, today.month)
+
+
+def build_trend(report: str, months: List[str], balances: List[List[Dict]]) -> Dict:
+    """
+    月ごとの試算表の balances を 月×勘定科目 の表にする
+
+    勘定科目のある行だけを使い（区分の合計行は除く）、全月0の勘定科目は省く。
+
+    Args:
+        report: "trial_pl" または "trial_bs"
+        months: ["2024-04", ...]
+        balances: months と同じ順の各月の balances
+
+    Returns:
+        {
+            "report": "trial_pl",
+            "months": ["2024-04", "2024-05", ...],
+            "rows": [
+                {"account_item_id": 7, "account_item_name": "外注費",
+                 "account_category_name": "販売費及び一般管理費", "values": [120000, 0, ...]}
+            ]
+        }
+    """
+    field = TREND_REPORTS[report]
+    rows: Dict[int, Dict] = {}
+    for index, month_balances in enumerate(balances):
+        for balance in month_balances:
+            account_item_id = balance.get("account_item_id")
+            if account_item_id is None:
+                continue
+            row = rows.get(account_item_id)
+            if row is None:
+                row = rows[account_item_id] = {
+                    "account_item_id": account_item_id,
+                    "account_item_name": balance.get("account_item_name"),
+                    "account_category_name": balance.get("account_category_name"),
+                    "values": [0] * len(months),
+                }
+            row["values"][index] = balance.get(field) or 0
+    return {
+        "report": report,
+        "months": months,
+        "rows": [row for row in rows.values() if any(row["values"])],
+    }
+
+
+def trend_records(trend: Dict) -> List[Dict]:
+    """表をCSV/TSV向けのレコード（1勘定科目1行、列が月）にする"""
+    return [
+        {
+            "account_item_id": row["account_item_id"],
+            "account_item_name": row["account_item_name"],
+            "account_category_name": row["account_category_name"],
+            **dict(zip(trend["months"], row["values"])),
+        }
+        for row in trend["rows"]
+    ]
@@ -0,0 +1,6 @@
+"""pytest共通設定（src/ のモジュールをimportできるようにする）"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
@@ -0,0 +1,96 @@
+"""取引・口座明細のサーバー側集計（summarize）のテスト"""
+
+import pytest
+
+from aggregate import attach_names, summarize
+
+
+def txn(id, date, amount, description="", walletable_id=3, entry_side="expense"):
+    return {
+        "id": id,
+        "date": date,
+        "amount": amount,
+        "description": description,
+        "walletable_id": walletable_id,
+        "entry_side": entry_side,
+    }
+
+
+def deal(id, issue_date, details, partner_id=None):
+    return {
+        "id": id,
+        "issue_date": issue_date,
+        "partner_id": partner_id,
+        "details": [
+            {"account_item_id": account_item_id, "amount": amount, "description": description}
+            for account_item_id, amount, description in details
+        ],
+    }
+
+
+TXNS = [
+    txn(1, "2025-01-05", 3300, "ANTHROPIC_カード13"),
+    txn(2, "2025-01-20", 1200, "AWS"),
+    txn(3, "2025-02-03", 5000, "Anthropic API", walletable_id=4),
+]
+
+
+def test_wallet_txns_grouped_by_month_with_top_n():
+    summary = summarize(TXNS, "wallet_txns", top_n=2)
+
+    assert (summary["count"], summary["total"]) == (3, 9500)
+    assert summary["groups"] == [
+        {"key": "2025-01", "count": 2, "total": 4500},
+        {"key": "2025-02", "count": 1, "total": 5000},
+    ]
+    assert [item["id"] for item in summary["top"]] == [3, 1]
+
+
+def test_non_month_groups_are_ordered_by_total():
+    summary = summarize(TXNS, "wallet_txns", group_by="walletable")
+
+    assert [group["key"] for group in summary["groups"]] == [4, 3]
+
+
+def test_description_filters():
+    contains = summarize(TXNS, "wallet_txns", description_contains="anthropic")
+    regex = summarize(TXNS, "wallet_txns", description_regex=r"^A[WN]")
+
+    assert contains["count"] == 2
+    assert regex["count"] == 2
+    assert regex["total"] == 4500
+
+
+def test_deals_group_details_by_account_item_and_filter_rows():
+    deals = [
+        deal(1, "2025-01-05", [(10, 1000, "会議費"), (11, 500, "交通費")]),
+        deal(2, "2025-01-06", [(10, 2000, "会議費")]),
+    ]
+
+    by_item = summarize(deals, "deals", group_by="account_item")
+    filtered = summarize(deals, "deals", description_contains="交通")
+
+    assert by_item["groups"] == [
+        {"key": 10, "count": 2, "total": 3000},
+        {"key": 11, "count": 1, "total": 500},
+    ]
+    # 一致した明細行の金額だけを数える
+    assert (filtered["count"], filtered["total"]) == (1, 500)
+
+
+def test_invalid_group_by_is_value_error():
+    with pytest.raises(ValueError, match="group_by"):
+        summarize(TXNS, "wallet_txns", group_by="partner")
+
+
+def test_invalid_regex_is_value_error_naming_the_pattern():
+    with pytest.raises(ValueError, match=r"description_regex の正規表現が不正です（\(AWS）"):
+        summarize(TXNS, "wallet_txns", description_regex="(AWS")
+
+
+def test_attach_names():
+    summary = summarize(TXNS, "wallet_txns", group_by="walletable")
+
+    groups = attach_names(summary, {3: "カード"})["groups"]
+    assert groups[1] == {"key": 3, "count": 2, "total": 4500, "name": "カード"}
+    assert "name" not in groups[0]
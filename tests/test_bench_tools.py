@@ -0,0 +1,64 @@
+"""ベンチマーク（benchmarks/bench_tools.py）の結果の判定のテスト"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "benchmarks"))
+bench_tools = pytest.importorskip("bench_tools")
+
+
+def result(scenario, errors=0, calls=10, p50_ms=10.0):
+    return {"scenario": scenario, "calls": calls, "errors": errors, "p50_ms": p50_ms}
+
+
+def test_scenarios_with_errors_are_invalid():
+    results = [result("ok"), result("broken", errors=10), result("flaky", errors=1)]
+
+    assert bench_tools.mark_invalid(results, injecting=False) == ["broken", "flaky"]
+    assert [r["valid"] for r in results] == [True, False, False]
+
+
+def test_injected_failures_invalidate_only_all_error_runs():
+    results = [result("flaky", errors=3), result("broken", errors=10)]
+
+    assert bench_tools.mark_invalid(results, injecting=True) == ["broken"]
+
+
+def test_invalid_scenarios_are_not_compared():
+    baseline = [result("a", p50_ms=100.0), result("b", p50_ms=100.0)]
+    results = [result("a", errors=10, p50_ms=1.0), result("b", p50_ms=200.0)]
+    bench_tools.mark_invalid(results, injecting=False)
+
+    assert bench_tools.compare(results, baseline, 0.2) == ["b: p50_ms 100.0 → 200.0 (+100%)"]
+    baseline[1]["valid"] = False
+    assert bench_tools.compare(results, baseline, 0.2) == []
+
+
+def run_main(monkeypatch, output):
+    """list_accounts シナリオだけを mock に対して実行し、終了コードを返す"""
+    argv = "bench_tools.py --suite tools --scenario list_accounts --iterations 2 --latency 0"
+    monkeypatch.setattr(sys, "argv", argv.split() + ["--output", str(output)])
+    with pytest.raises(SystemExit) as exit_info:
+        bench_tools.main()
+    return exit_info.value.code
+
+
+def test_main_exits_zero_when_tools_succeed(monkeypatch, tmp_path):
+    assert run_main(monkeypatch, tmp_path / "result.json") == 0
+    assert '"valid": true' in (tmp_path / "result.json").read_text()
+
+
+def test_main_exits_non_zero_when_a_tool_scenario_fails(monkeypatch, tmp_path):
+    tool_server = bench_tools.tool_server
+
+    def broken_server(base_url, args, mirror_dir):
+        server, client, mirror = tool_server(base_url, args, mirror_dir)
+        client.list_accounts = None  # 呼び出すと TypeError → ツールのエラー
+        return server, client, mirror
+
+    monkeypatch.setattr(bench_tools, "tool_server", broken_server)
+
+    assert run_main(monkeypatch, tmp_path / "result.json") == 1
+    assert '"valid": false' in (tmp_path / "result.json").read_text()
@@ -0,0 +1,140 @@
+"""マスタデータのTTLキャッシュ（TTLCache・クライアントのキャッシュ経由のGET）のテスト"""
+
+from types import SimpleNamespace
+
+import pytest
+
+import cache
+from cache import MISSING, TTLCache, master_ttl
+from freee_client import FreeeAPIClient
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache, "time", clock)
+    return clock
+
+
+def response(data):
+    return SimpleNamespace(status_code=200, headers={}, json=lambda: data)
+
+
+# ========== TTLCache ==========
+
+
+def test_entry_expires_after_ttl(clock):
+    ttl_cache = TTLCache(default_ttl=10)
+    ttl_cache.set("a", 1)
+    ttl_cache.set("b", 2, ttl=30)
+
+    clock.now = 9.9
+    assert ttl_cache.get("a") == 1
+    clock.now = 10
+    assert ttl_cache.get("a") is MISSING
+    assert ttl_cache.get("b") == 2
+    assert ttl_cache.stats() == {
+        "entries": 1,
+        "hits": 2,
+        "misses": 1,
+        "hit_rate": 0.667,
+        "evictions": 0,
+    }
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    ttl_cache = TTLCache(max_entries=2)
+    ttl_cache.set("a", 1)
+    ttl_cache.set("b", 2)
+    ttl_cache.get("a")  # a を最近使ったことにする
+    ttl_cache.set("c", 3)
+
+    assert ttl_cache.get("b") is MISSING
+    assert (ttl_cache.get("a"), ttl_cache.get("c")) == (1, 3)
+    assert ttl_cache.evictions == 1
+
+
+def test_set_overwrites_and_refreshes_expiry(clock):
+    ttl_cache = TTLCache(default_ttl=10)
+    ttl_cache.set("a", 1)
+    clock.now = 8
+    ttl_cache.set("a", 2)
+
+    clock.now = 15
+    assert ttl_cache.get("a") == 2
+
+
+def test_invalidate_by_endpoint_and_company(clock):
+    ttl_cache = TTLCache()
+    ttl_cache.set(("/api/1/partners", 1), [])
+    ttl_cache.set(("/api/1/partners", 2), [])
+    ttl_cache.set(("/api/1/walletables", 1), [])
+
+    assert ttl_cache.invalidate("/api/1/partners", 1) == 1
+    assert ttl_cache.invalidate(company_id=1) == 1
+    assert ttl_cache.invalidate() == 1
+    assert ttl_cache.stats()["entries"] == 0
+
+
+def test_master_ttl_matches_resources_and_id_paths():
+    assert master_ttl("/api/1/partners") == 600
+    assert master_ttl("/api/1/companies/123") == 3600
+    assert master_ttl("/api/1/taxes/companies/123") == 3600
+    assert master_ttl("/api/1/deals") is None
+
+
+# ========== クライアント ==========
+
+
+def test_client_serves_master_data_from_cache_until_refresh(clock):
+    client = FreeeAPIClient("token", 1)
+    calls = []
+
+    def send_get(endpoint, params, headers=None):
+        calls.append((endpoint, params))
+        return response({"account_items": [{"id": len(calls)}]})
+
+    client._send_get = send_get
+
+    assert client.list_accounts() == [{"id": 1}]
+    assert client.list_accounts() == [{"id": 1}]
+    assert client.list_accounts(refresh=True) == [{"id": 2}]
+    clock.now = 3600
+    assert client.list_accounts() == [{"id": 3}]
+    assert len(calls) == 3
+
+
+def test_client_does_not_cache_filtered_or_non_master_gets(clock):
+    client = FreeeAPIClient("token", 1)
+    calls = []
+
+    def send_get(endpoint, params, headers=None):
+        calls.append(endpoint)
+        return response({"partners": [], "deals": []})
+
+    client._send_get = send_get
+    client._get("/api/1/partners", {"company_id": 1, "keyword": "雲孫"})
+    client._get("/api/1/partners", {"company_id": 1, "keyword": "雲孫"})
+    client._get("/api/1/deals", {"company_id": 1})
+    client._get("/api/1/deals", {"company_id": 1})
+
+    assert len(calls) == 4
+
+
+def test_deal_creation_invalidates_partners(clock):
+    client = FreeeAPIClient("token", 1)
+    client.cache.set(("/api/1/partners", 1), {"partners": []})
+    client.cache.set(("/api/1/account_items", 1), {"account_items": []})
+
+    client._invalidate_after_write("/api/1/deals", {"company_id": 1})
+
+    assert client.cache.get(("/api/1/partners", 1)) is MISSING
+    assert client.cache.get(("/api/1/account_items", 1)) is not MISSING
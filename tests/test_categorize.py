@@ -0,0 +1,168 @@
+"""口座明細の仕訳ルール（RuleMatcher・CategoryRules・categorize）のテスト"""
+
+import re
+
+import pytest
+
+from categorize import CategoryRules, RuleMatcher, categorize, literal_pattern
+
+
+def contains(pattern, account_item_id=1, **extra):
+    return {"pattern": pattern, "account_item_id": account_item_id, **extra}
+
+
+def regex(pattern, account_item_id=1, **extra):
+    return {"pattern": pattern, "match": "regex", "account_item_id": account_item_id, **extra}
+
+
+# ========== RuleMatcher ==========
+
+
+def test_contains_rules_ignore_width_and_case():
+    matcher = RuleMatcher([contains("anthropic")])
+
+    assert matcher.match("ＡＮＴＨＲＯＰＩＣ_カード13", "expense") == 0
+    assert matcher.match("ｱﾏｿﾞﾝ", "expense") is None
+
+
+def test_regex_rules_keep_numbered_backreferences():
+    # 部分一致ルールがあっても、正規表現ルールのグループ番号はずれない
+    matcher = RuleMatcher([contains("XYZ"), regex(r"(AB)\1")])
+
+    assert matcher.match("ABAB", "expense") == 1
+    assert matcher.match("ABAC", "expense") is None
+
+
+def test_regex_rules_accept_inline_global_flags():
+    matcher = RuleMatcher([contains("XYZ"), regex(r"(?i)amazon\s*\d+")])
+
+    assert matcher.match("Amazon 123", "expense") == 1
+
+
+def test_regex_rules_are_case_insensitive():
+    assert RuleMatcher([regex("^amazon")]).match("AMAZON.CO.JP", "expense") == 0
+
+
+def test_leftmost_match_wins():
+    matcher = RuleMatcher([contains("ANTHROPIC"), regex("AWS")])
+
+    assert matcher.match("AWS ANTHROPIC", "expense") == 1
+    assert matcher.match("ANTHROPIC AWS", "expense") == 0
+
+
+def test_same_position_prefers_longest_contains_then_regex_in_order():
+    rules = [
+        regex("^AMAZON"),  # 0
+        contains("AMAZON"),  # 1
+        contains("AMAZON WEB"),  # 2
+        regex("^AMA"),  # 3
+    ]
+    matcher = RuleMatcher(rules)
+
+    assert matcher.match("AMAZON WEB SERVICES", "expense") == 2  # 長い部分一致ルール
+    assert RuleMatcher([rules[3], rules[0]]).match("AMAZON", "expense") == 0  # 登録順
+
+
+def test_duplicate_contains_pattern_uses_first_rule():
+    matcher = RuleMatcher([contains("AWS", 1), contains("aws", 2)])
+
+    assert matcher.match("AWS", "expense") == 0
+
+
+def test_entry_side_scopes_rules():
+    matcher = RuleMatcher(
+        [contains("UNSON", entry_side="income"), regex("UNSON", entry_side="expense")]
+    )
+
+    assert matcher.match("ｳﾝｿﾝ UNSON", "income") == 0
+    assert matcher.match("ｳﾝｿﾝ UNSON", "expense") == 1
+
+
+def test_invalid_regex_is_value_error():
+    with pytest.raises(ValueError, match="正規表現が不正"):
+        RuleMatcher([regex("(unclosed")])
+
+
+def test_literal_pattern_prefers_longer_word_at_same_position():
+    pattern = re.compile(literal_pattern(["AB", "ABC", "B"]))
+    assert pattern.search("XABCX").group() == "ABC"
+
+
+# ========== CategoryRules ==========
+
+
+def test_upsert_replaces_same_pattern_and_side_and_deletes(tmp_path):
+    rules = CategoryRules(tmp_path / "rules.json")
+    rules.upsert(1, [contains("AWS", 1), contains("AWS", 2, entry_side="income")])
+
+    assert rules.upsert(1, [contains("AWS", 3)]) == {
+        "added": 0, "updated": 1, "deleted": 0, "total": 2
+    }
+    deleted = rules.upsert(1, [{"pattern": "AWS", "entry_side": "income", "delete": True}])
+    assert deleted["deleted"] == 1
+    # ファイルから読み直しても同じ
+    assert CategoryRules(tmp_path / "rules.json").get(1) == [contains("AWS", 3)]
+
+
+def test_upsert_saves_regex_with_backreference_and_inline_flag():
+    rules = CategoryRules()
+    rules.upsert(1, [contains("XYZ"), regex(r"(AB)\1"), regex("(?i)amazon")])
+
+    assert len(rules.get(1)) == 3
+
+
+def test_upsert_rejects_invalid_rules_without_saving():
+    rules = CategoryRules()
+    rules.upsert(1, [contains("AWS")])
+
+    with pytest.raises(ValueError):
+        rules.upsert(1, [contains("GCP"), regex("(broken")])
+    with pytest.raises(ValueError):
+        rules.upsert(1, [{"pattern": "NO ACCOUNT"}])
+    assert rules.get(1) == [contains("AWS")]
+
+
+# ========== categorize ==========
+
+
+def txn(id, description, amount=1000, status=1):
+    return {
+        "id": id,
+        "date": "2025-01-05",
+        "amount": amount,
+        "entry_side": "expense",
+        "walletable_type": "credit_card",
+        "walletable_id": 3,
+        "description": description,
+        "status": status,
+    }
+
+
+def test_categorize_builds_idempotent_deals_and_groups_uncategorized():
+    txns = [
+        txn(1, "ANTHROPIC_カード13", 3300),
+        txn(2, "謎の店", 500),
+        txn(3, "謎の店", 700),
+        txn(4, "ANTHROPIC", status=2),  # 登録済みの明細は対象外
+    ]
+    result = categorize(txns, [contains("anthropic", 8)], 1, default_tax_codes={8: 136})
+
+    assert result["counts"] == {
+        "wallet_txns": 4,
+        "categorized": 1,
+        "uncategorized": 2,
+        "skipped": 1,
+    }
+    deal = result["deals"][0]
+    assert deal["idempotency_key"] == "wallet_txn:1:1"
+    assert deal["details"][0]["tax_code"] == 136
+    assert deal["payments"][0]["from_walletable_id"] == 3
+    assert result["uncategorized"] == [
+        {
+            "description": "謎の店",
+            "entry_side": "expense",
+            "count": 2,
+            "total": 1200,
+            "wallet_txn_ids": [2, 3],
+        }
+    ]
@@ -0,0 +1,222 @@
+"""取引・口座明細の変更フィード（ChangeFeed）のテスト"""
+
+import pytest
+
+from change_feed import ChangeFeed, fingerprint
+
+START = "2025-01-01"
+
+
+def deal(id, issue_date, updated_at="2025-01-01T00:00:00+09:00", **extra):
+    return {"id": id, "issue_date": issue_date, "updated_at": updated_at, **extra}
+
+
+def poll(feeds, records, cursor=None, baseline=False):
+    """フィードを開いて取得結果を反映する（freee からの取得の代わりに records を渡す）"""
+    feed = feeds.open("deals", 1, cursor=cursor, start_date=START)
+    return feeds.apply(feed, records, baseline=baseline)
+
+
+def changes(result):
+    return [(record["id"], record["change"]) for record in result["records"]]
+
+
+def seq(result):
+    return int(result["cursor"].rpartition(":")[2])
+
+
+# ========== 新規・更新・削除 ==========
+
+
+def test_first_poll_returns_everything_as_new():
+    result = poll(ChangeFeed(), [deal(1, "2025-01-10"), deal(2, "2025-01-12")])
+
+    assert changes(result) == [(1, "new"), (2, "new")]
+    assert result["counts"] == {"fetched": 2, "new": 2, "updated": 0, "deleted": 0}
+    assert seq(result) == 1
+
+
+def test_second_poll_returns_new_updated_and_deleted():
+    feeds = ChangeFeed()
+    first = poll(feeds, [deal(1, "2025-01-10"), deal(2, "2025-01-12")])
+
+    second = poll(
+        feeds,
+        [deal(1, "2025-01-10", updated_at="2025-01-20T10:00:00+09:00"), deal(3, "2025-01-15")],
+        cursor=first["cursor"],
+    )
+
+    assert changes(second) == [(1, "updated"), (3, "new")]
+    assert second["deleted"] == [2]
+    assert second["counts"] == {"fetched": 2, "new": 1, "updated": 1, "deleted": 1}
+    assert seq(second) == 2
+
+
+def test_old_cursor_replays_the_same_changes():
+    feeds = ChangeFeed()
+    first = poll(feeds, [deal(1, "2025-01-10"), deal(2, "2025-01-12")])
+    records = [deal(1, "2025-01-10", updated_at="2025-01-20T10:00:00+09:00")]
+    second = poll(feeds, records, cursor=first["cursor"])
+
+    # 前回の応答を受け取れなかった呼び出し元が同じカーソルで呼び直しても取りこぼさない
+    again = poll(feeds, records, cursor=first["cursor"])
+
+    assert changes(again) == changes(second)
+    assert again["deleted"] == second["deleted"] == [2]
+    assert again["cursor"] == second["cursor"]
+
+
+def test_record_added_and_deleted_after_cursor_is_not_reported():
+    feeds = ChangeFeed()
+    first = poll(feeds, [deal(1, "2025-01-10")])
+    poll(feeds, [deal(1, "2025-01-10"), deal(2, "2025-01-12")], cursor=first["cursor"])
+
+    result = poll(feeds, [deal(1, "2025-01-10")], cursor=first["cursor"])
+
+    assert result["records"] == []
+    assert result["deleted"] == []
+
+
+def test_deleted_record_that_reappears_is_reported_again():
+    feeds = ChangeFeed()
+    first = poll(feeds, [deal(1, "2025-01-10")])
+    second = poll(feeds, [], cursor=first["cursor"])
+
+    third = poll(feeds, [deal(1, "2025-01-10")], cursor=second["cursor"])
+
+    assert second["deleted"] == [1]
+    assert changes(third) == [(1, "updated")]
+
+
+# ========== 世代 ==========
+
+
+def test_seq_advances_only_when_something_changed():
+    feeds = ChangeFeed()
+    records = [deal(1, "2025-01-10"), deal(2, "2025-01-12")]
+    first = poll(feeds, records)
+
+    unchanged = poll(feeds, records, cursor=first["cursor"])
+    assert unchanged["cursor"] == first["cursor"]
+    assert unchanged["records"] == [] and unchanged["deleted"] == []
+
+    changed = poll(feeds, records + [deal(3, "2025-01-13")], cursor=unchanged["cursor"])
+    assert seq(changed) == seq(first) + 1
+
+
+def test_records_without_updated_at_are_compared_by_content():
+    feeds = ChangeFeed()
+    first = poll(feeds, [{"id": 1, "issue_date": "2025-01-10", "amount": 100}])
+
+    same = poll(feeds, [{"amount": 100, "issue_date": "2025-01-10", "id": 1}], first["cursor"])
+    edited = poll(feeds, [{"id": 1, "issue_date": "2025-01-10", "amount": 200}], first["cursor"])
+
+    assert same["records"] == []
+    assert changes(edited) == [(1, "updated")]
+    assert fingerprint({"b": 1, "a": 2}) == fingerprint({"a": 2, "b": 1})
+
+
+def test_baseline_marks_records_seen_without_returning_them():
+    feeds = ChangeFeed()
+    base = poll(feeds, [deal(1, "2025-01-10")], baseline=True)
+
+    assert base["records"] == []
+    assert seq(base) == 1
+
+    result = poll(feeds, [deal(1, "2025-01-10"), deal(2, "2025-01-11")], cursor=base["cursor"])
+    assert changes(result) == [(2, "new")]
+
+
+# ========== 取得期間（重複取得と削除の判定） ==========
+
+
+def test_window_starts_overlap_days_before_high_water():
+    feeds = ChangeFeed(overlap_days=31)
+    initial = feeds.open("deals", 1, start_date=START)
+    assert initial["initial"] is True
+    assert initial["window_start"] == START
+
+    first = feeds.apply(initial, [deal(1, "2025-01-05"), deal(2, "2025-03-20")])
+    feed = feeds.open("deals", 1, cursor=first["cursor"])
+
+    assert feed["initial"] is False
+    assert feed["window_start"] == "2025-02-17"
+    assert ChangeFeed.fetch_params(feed) == {"company_id": 1, "start_issue_date": "2025-02-17"}
+
+
+def test_overlap_records_are_not_reported_again():
+    feeds = ChangeFeed(overlap_days=31)
+    first = poll(feeds, [deal(1, "2025-01-05"), deal(2, "2025-03-01"), deal(3, "2025-03-20")])
+
+    # 2回目は 2025-02-17 以降だけ取得する。重なった期間の変わっていない記録は返さない
+    result = poll(feeds, [deal(2, "2025-03-01"), deal(3, "2025-03-20")], first["cursor"])
+
+    assert result["records"] == []
+    assert result["cursor"] == first["cursor"]
+
+
+def test_deletions_are_detected_only_within_window_start():
+    feeds = ChangeFeed(overlap_days=31)
+    first = poll(feeds, [deal(1, "2025-01-05"), deal(2, "2025-03-01"), deal(3, "2025-03-20")])
+
+    # 記録1 は取得期間より前なので、取得結果になくても削除とみなさない
+    result = poll(feeds, [deal(3, "2025-03-20")], first["cursor"])
+
+    assert result["deleted"] == [2]
+    assert result["counts"]["deleted"] == 1
+
+
+def test_record_moved_before_window_is_updated_not_new():
+    feeds = ChangeFeed(overlap_days=31)
+    first = poll(feeds, [deal(1, "2025-03-01"), deal(2, "2025-03-20")])
+
+    moved = deal(1, "2025-01-05", updated_at="2025-03-25T00:00:00+09:00")
+    result = poll(feeds, [moved, deal(2, "2025-03-20")], first["cursor"])
+
+    assert changes(result) == [(1, "updated")]
+    assert result["deleted"] == []
+
+
+# ========== フィードとカーソル ==========
+
+
+def test_feed_id_depends_on_filters_and_start_date():
+    feeds = ChangeFeed()
+    base = feeds.open("wallet_txns", 1, start_date=START)
+
+    same = feeds.open("wallet_txns", 1, start_date=START, filters={"partner_id": 5})
+    filtered = feeds.open("wallet_txns", 1, start_date=START, filters={"walletable_id": 3})
+    later = feeds.open("wallet_txns", 1, start_date="2025-02-01")
+
+    assert same["feed_id"] == base["feed_id"]  # 対象外の条件は無視する
+    assert filtered["feed_id"] != base["feed_id"]
+    assert later["feed_id"] != base["feed_id"]
+    assert ChangeFeed.fetch_params(filtered) == {
+        "company_id": 1,
+        "start_date": START,
+        "walletable_id": 3,
+    }
+
+
+def test_unknown_cursor_and_resource_are_value_errors():
+    feeds = ChangeFeed()
+
+    with pytest.raises(ValueError, match="不明なカーソル"):
+        feeds.open("deals", 1, cursor="0123456789abcdef:1")
+    first = poll(feeds, [deal(1, "2025-01-10")])
+    with pytest.raises(ValueError, match="不明なカーソル"):
+        feeds.open("deals", 1, cursor=first["cursor"].replace(":1", ":x"))
+    with pytest.raises(ValueError, match="非対応のリソース"):
+        feeds.open("partners", 1)
+
+
+def test_cursor_survives_reopening_the_database(tmp_path):
+    path = tmp_path / "feeds.db"
+    feeds = ChangeFeed(str(path))
+    first = poll(feeds, [deal(1, "2025-01-10")])
+    feeds.close()
+
+    records = [deal(1, "2025-01-10"), deal(2, "2025-01-11")]
+    result = poll(ChangeFeed(str(path)), records, first["cursor"])
+
+    assert changes(result) == [(2, "new")]
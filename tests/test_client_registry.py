@@ -0,0 +1,124 @@
+"""ClientRegistry と OAuth identity の振り分けのテスト"""
+
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from client_registry import ClientRegistry
+from token_store import DEFAULT_IDENTITY, identity_token_path
+from tools import IDENTITY_HEADER, request_identity
+
+
+def make_registry(max_clients: int = 32) -> ClientRegistry:
+    return ClientRegistry(lambda identity, company_id: (identity, company_id), max_clients)
+
+
+def test_clients_are_keyed_by_identity_and_company():
+    registry = make_registry()
+
+    assert registry.get(1) == (DEFAULT_IDENTITY, 1)
+    assert registry.get(1, "alice") == ("alice", 1)
+    assert registry.get(1, "alice") is registry.get(1, "alice")
+    assert registry.created == 2
+
+
+def test_least_recently_used_client_is_evicted():
+    registry = make_registry(max_clients=2)
+    registry.get(1)
+    registry.get(2)
+    registry.get(1)
+    registry.get(3)
+
+    assert registry.stats()["companies"] == [[DEFAULT_IDENTITY, 1], [DEFAULT_IDENTITY, 3]]
+    assert registry.evictions == 1
+
+
+def test_evict_by_identity():
+    registry = make_registry()
+    registry.get(1, "alice")
+    registry.get(2, "alice")
+    registry.get(1, "bob")
+
+    assert registry.evict(identity="alice") == 2
+    assert registry.stats()["companies"] == [["bob", 1]]
+
+
+def test_identity_token_path():
+    assert identity_token_path() == os.path.expanduser("~/.freee-mcp/tokens.enc")
+    assert identity_token_path("alice") == os.path.expanduser("~/.freee-mcp/tokens/alice.enc")
+
+
+@pytest.mark.parametrize("identity", ["../etc", "a/b", ".hidden", "", "x" * 65])
+def test_identity_token_path_rejects_unsafe_names(identity):
+    with pytest.raises(ValueError):
+        identity_token_path(identity)
+
+
+class FakeServer:
+    def __init__(self, request=None, in_request=True):
+        self._context = SimpleNamespace(request=request) if in_request else None
+
+    @property
+    def request_context(self):
+        if self._context is None:
+            raise LookupError("no request")
+        return self._context
+
+
+def test_request_identity_reads_http_header():
+    request = SimpleNamespace(headers={IDENTITY_HEADER: "alice"})
+    assert request_identity(FakeServer(request)) == "alice"
+
+
+def test_request_identity_is_none_without_header_or_request():
+    assert request_identity(FakeServer(SimpleNamespace(headers={}))) is None
+    assert request_identity(FakeServer(None)) is None  # stdio
+    assert request_identity(FakeServer(in_request=False)) is None
+
+
+# ========== identity ごとのキャッシュ ==========
+
+
+@pytest.fixture
+def mcp_server(tmp_path, monkeypatch):
+    from cryptography.fernet import Fernet
+
+    import server
+
+    env = {
+        "FREEE_CLIENT_ID": "id",
+        "FREEE_CLIENT_SECRET": "secret",
+        "TOKEN_ENCRYPTION_KEY": Fernet.generate_key().decode(),
+        "FREEE_DISK_CACHE": "1",
+        "FREEE_DISK_CACHE_DIR": str(tmp_path / "cache"),
+        "FREEE_IDEMPOTENCY_FILE": str(tmp_path / "idempotency.json"),
+        "FREEE_RECEIPT_INDEX": str(tmp_path / "receipts.json"),
+        "FREEE_CHANGE_FEED_DB": str(tmp_path / "changes.db"),
+        "FREEE_CATEGORY_RULES": str(tmp_path / "category_rules.json"),
+    }
+    for key, value in env.items():
+        monkeypatch.setenv(key, value)
+    instance = server.FreeeMCPServer()
+    monkeypatch.setattr(
+        instance, "get_token_manager", lambda identity: SimpleNamespace(access_token=identity)
+    )
+    return instance
+
+
+def test_identities_do_not_share_disk_or_report_caches(mcp_server, tmp_path):
+    default = mcp_server.get_client(1)
+    alice = mcp_server.get_client(1, "alice")
+    bob = mcp_server.get_client(1, "bob")
+
+    assert default.disk_cache.cache_dir == tmp_path / "cache"
+    assert alice.disk_cache.cache_dir == tmp_path / "cache" / "identities" / "alice"
+    assert alice.report_cache is not bob.report_cache
+    # 同じ identity の事業所は試算表キャッシュを共有する
+    assert mcp_server.get_client(2, "alice").report_cache is alice.report_cache
+
+    # alice が取得した事業所一覧は bob・default には返らない
+    alice.disk_cache.save(("/api/1/companies", None), {"companies": [{"id": 1}]})
+    assert bob.disk_cache.load(("/api/1/companies", None)) is None
+    assert default.disk_cache.load(("/api/1/companies", None)) is None
+    assert mcp_server._report_cache_stats()["entries"] == 0
@@ -0,0 +1,154 @@
+"""暗号化ディスクキャッシュ（DiskCache・条件付きリクエストでの再検証）のテスト"""
+
+import time
+from types import SimpleNamespace
+
+import pytest
+from cryptography.fernet import Fernet
+
+import disk_cache
+from disk_cache import DiskCache
+from freee_client import FreeeAPIClient
+
+KEY = ("/api/1/account_items", 1)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return DiskCache(Fernet.generate_key().decode(), str(tmp_path))
+
+
+def age_entries(monkeypatch, seconds: float) -> None:
+    """以降に保存するエントリの保存時刻を seconds 秒前にする"""
+    monkeypatch.setattr(disk_cache, "time", SimpleNamespace(time=lambda: time.time() - seconds))
+
+
+def wait_until(condition, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise TimeoutError("条件を満たしませんでした")
+        time.sleep(0.001)
+
+
+class FakeAPI:
+    """_send_get の代わりに、送られた条件付きヘッダーを記録して決めた応答を返す"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.headers = []
+
+    def __call__(self, endpoint, params, headers=None):
+        self.headers.append(dict(headers or {}))
+        status, data, etag = self.responses.pop(0)
+        return SimpleNamespace(
+            status_code=status, headers={"ETag": etag} if etag else {}, json=lambda: data
+        )
+
+
+def client_with(store, api, stale_ttl=86400):
+    client = FreeeAPIClient("token", 1, disk_cache=store, stale_ttl=stale_ttl)
+    client._send_get = api
+    return client
+
+
+# ========== DiskCache ==========
+
+
+def test_entries_are_encrypted_and_round_trip(store, tmp_path):
+    store.save(KEY, {"account_items": [{"name": "現金"}]}, etag='"v1"', last_modified="Mon")
+
+    entry = store.load(KEY)
+    assert entry["data"] == {"account_items": [{"name": "現金"}]}
+    assert (entry["etag"], entry["last_modified"]) == ('"v1"', "Mon")
+    raw = (tmp_path / "api_1_account_items-1.enc").read_bytes()
+    assert "現金".encode() not in raw and b'"v1"' not in raw
+
+
+def test_unreadable_entries_are_misses(store, tmp_path):
+    store.save(KEY, {"account_items": []})
+
+    other_key = DiskCache(Fernet.generate_key().decode(), str(tmp_path))
+    assert other_key.load(KEY) is None
+    (tmp_path / "api_1_account_items-1.enc").write_bytes(b"broken")
+    assert store.load(KEY) is None
+    assert store.load(("/api/1/walletables", 1)) is None
+
+
+def test_invalidate_by_endpoint_and_company(store):
+    store.save(("/api/1/account_items", 1), {})
+    store.save(("/api/1/account_items", 2), {})
+    store.save(("/api/1/partners", 1), {})
+    store.save(("/api/1/companies", None), {})
+
+    assert store.invalidate("/api/1/account_items", 1) == 1
+    assert store.invalidate(company_id=1) == 1
+    assert store.load(("/api/1/account_items", 2)) is not None
+    store.clear()
+    assert store.load(("/api/1/companies", None)) is None
+
+
+# ========== ETag / 304 ==========
+
+
+def test_restarted_client_uses_disk_within_ttl(store):
+    api = FakeAPI((200, {"account_items": [{"id": 1}]}, '"v1"'))
+    assert client_with(store, api).list_accounts() == [{"id": 1}]
+
+    # 再起動後（メモリキャッシュは空）もTTL内ならリクエストしない
+    assert client_with(store, api).list_accounts() == [{"id": 1}]
+    assert len(api.headers) == 1
+    assert store.load(KEY)["etag"] == '"v1"'
+
+
+def test_refresh_sends_etag_and_304_keeps_body(store, monkeypatch):
+    age_entries(monkeypatch, 100)
+    store.save(KEY, {"account_items": [{"id": 1}]}, etag='"v1"')
+    monkeypatch.undo()
+    api = FakeAPI((304, None, None))
+
+    assert client_with(store, api).list_accounts(refresh=True) == [{"id": 1}]
+    assert api.headers == [{"If-None-Match": '"v1"'}]
+    # 304 で再検証できたので保存時刻が新しくなる
+    assert time.time() - store.load(KEY)["stored_at"] < 10
+
+
+def test_changed_resource_replaces_entry(store, monkeypatch):
+    age_entries(monkeypatch, 3600 + 86400 + 1)  # TTLと猶予をどちらも過ぎた
+    store.save(KEY, {"account_items": [{"id": 1}]}, etag='"v1"')
+    monkeypatch.undo()
+    api = FakeAPI((200, {"account_items": [{"id": 2}]}, '"v2"'))
+
+    assert client_with(store, api).list_accounts() == [{"id": 2}]
+    assert api.headers == [{"If-None-Match": '"v1"'}]
+    assert store.load(KEY)["etag"] == '"v2"'
+
+
+# ========== stale-while-revalidate ==========
+
+
+def test_stale_entry_is_returned_and_revalidated_in_background(store, monkeypatch):
+    age_entries(monkeypatch, 3600 + 10)  # TTL（1時間）切れ、猶予内
+    store.save(KEY, {"account_items": [{"id": 1}]}, etag='"v1"')
+    monkeypatch.undo()
+    api = FakeAPI((200, {"account_items": [{"id": 2}]}, '"v2"'))
+    client = client_with(store, api)
+
+    # 古い値をすぐ返し、裏で条件付きリクエストを送る
+    assert client.list_accounts() == [{"id": 1}]
+    wait_until(lambda: not client._revalidating and api.headers)
+
+    assert api.headers == [{"If-None-Match": '"v1"'}]
+    assert client.list_accounts() == [{"id": 2}]
+    assert store.load(KEY)["etag"] == '"v2"'
+
+
+def test_failed_revalidation_keeps_stale_entry(store, monkeypatch):
+    age_entries(monkeypatch, 3600 + 10)
+    store.save(KEY, {"account_items": [{"id": 1}]}, etag='"v1"')
+    monkeypatch.undo()
+    client = client_with(store, FakeAPI())  # 応答がない → 例外
+
+    assert client.list_accounts() == [{"id": 1}]
+    wait_until(lambda: not client._revalidating)
+    assert store.load(KEY)["data"] == {"account_items": [{"id": 1}]}
@@ -0,0 +1,89 @@
+"""一覧系ツールの出力フォーマット（フィールド射影・JSON / NDJSON / CSV / TSV）のテスト"""
+
+import json
+
+import pytest
+
+from formatters import format_records, iter_formatted, project
+
+DEALS = [
+    {
+        "id": 1,
+        "issue_date": "2025-01-05",
+        "amount": 3300,
+        "details": [{"account_item_id": 10, "description": "会議費, 打合せ"}],
+    },
+    {"id": 2, "issue_date": "2025-01-06", "amount": 500, "partner_id": 7, "details": []},
+]
+
+
+# ========== フィールド射影 ==========
+
+
+def test_project_nested_paths_and_missing_fields():
+    assert project(DEALS[0], ["id", "details.account_item_id", "partner_id", "id.x"]) == {
+        "id": 1,
+        "details.account_item_id": [10],
+        "partner_id": None,
+        "id.x": None,
+    }
+    assert project(DEALS[0], None) is DEALS[0]
+
+
+# ========== JSON ==========
+
+
+def test_json_formats_round_trip():
+    fields = ["id", "amount"]
+    expected = [{"id": 1, "amount": 3300}, {"id": 2, "amount": 500}]
+
+    assert json.loads(format_records(DEALS, "json", fields)) == expected
+    assert format_records(DEALS, "json_compact", fields) == (
+        '[{"id":1,"amount":3300},{"id":2,"amount":500}]'
+    )
+    ndjson = format_records(iter(DEALS), "ndjson", fields)
+    assert [json.loads(line) for line in ndjson.split("\n")] == expected
+    assert format_records([], "json_compact") == "[]"
+
+
+def test_unknown_format_is_value_error():
+    with pytest.raises(ValueError, match="format"):
+        format_records(DEALS, "xml")
+
+
+# ========== CSV / TSV ==========
+
+
+def test_csv_with_fields_quotes_and_serializes_nested_values():
+    csv = format_records(DEALS, "csv", ["id", "details.description", "partner_id"])
+
+    assert csv.split("\n") == [
+        "id,details.description,partner_id",
+        '1,"[""会議費, 打合せ""]",',
+        "2,[],7",
+        "",
+    ]
+
+
+def test_csv_header_is_union_of_keys_in_first_seen_order():
+    records = [{"id": 1, "amount": 100}, {"id": 2, "memo": "追加", "amount": 200}, {"id": 3}]
+
+    assert format_records(records, "csv").split("\n") == [
+        "id,amount,memo",
+        "1,100,",
+        "2,200,追加",
+        "3,,",
+        "",
+    ]
+
+
+def test_tsv_and_empty_records():
+    assert format_records(DEALS, "tsv", ["id", "amount"]) == "id\tamount\n1\t3300\n2\t500\n"
+    assert format_records([], "csv", ["id", "amount"]) == "id,amount\n"
+    assert format_records([], "csv") == ""
+
+
+def test_csv_streams_one_chunk_per_record_with_fields():
+    chunks = list(iter_formatted(iter(DEALS), "csv", ["id"]))
+
+    assert chunks == ["id\n1\n", "2\n"]
@@ -0,0 +1,189 @@
+"""取引一括作成の冪等キー（IdempotencyStore・create_deals_bulk）のテスト"""
+
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import idempotency
+from freee_client import AsyncFreeeAPIClient, FreeeAPIClient
+from idempotency import IdempotencyStore, deal_idempotency_key
+
+
+def journal(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def bulk_deal(amount, **extra):
+    return {
+        "issue_date": "2025-01-05",
+        "deal_type": "expense",
+        "details": [{"account_item_id": 10, "tax_code": 136, "amount": amount}],
+        **extra,
+    }
+
+
+# ========== 冪等キー ==========
+
+
+def test_key_depends_on_amount_total_and_ignores_detail_split():
+    payload = {"issue_date": "2025-01-05", "type": "expense", "details": [{"amount": 1000}]}
+    split = {**payload, "details": [{"amount": 400}, {"amount": 600}]}
+
+    assert deal_idempotency_key(1, payload) == deal_idempotency_key(1, split)
+    assert deal_idempotency_key(1, payload) != deal_idempotency_key(2, payload)
+    assert len(deal_idempotency_key(1, payload)) == 32
+
+
+# ========== ジャーナル ==========
+
+
+def test_marks_are_appended_not_rewritten(tmp_path):
+    path = tmp_path / "idempotency.json"
+    store = IdempotencyStore(str(path))
+    store.mark_pending("a")
+    store.mark_created("a", 10)
+    store.mark_pending("b")
+
+    assert [(r["key"], r["status"]) for r in journal(path)] == [
+        ("a", "pending"),
+        ("a", "created"),
+        ("b", "pending"),
+    ]
+    reloaded = IdempotencyStore(str(path))
+    assert reloaded.get("a")["deal_id"] == 10
+    assert reloaded.get("b")["status"] == "pending"
+
+
+def test_journal_is_compacted_when_it_doubles(tmp_path):
+    path = tmp_path / "idempotency.json"
+    store = IdempotencyStore(str(path))
+    for deal_id in range(10):
+        store.mark_created("a", deal_id)
+
+    # 同じキーを何度記録しても、行数は最新の記録数の2倍程度に収まる
+    assert len(journal(path)) <= 2
+    assert IdempotencyStore(str(path)).get("a")["deal_id"] == 9
+
+
+def test_expired_entries_are_pruned_on_load(tmp_path, monkeypatch):
+    path = tmp_path / "idempotency.json"
+    store = IdempotencyStore(str(path))
+    store.mark_created("old", 1)
+    later = time.time() + idempotency.RETENTION_DAYS * 86400 + 1
+    monkeypatch.setattr(idempotency, "time", SimpleNamespace(time=lambda: later))
+
+    store.mark_created("new", 2)
+    reloaded = IdempotencyStore(str(path))
+
+    assert reloaded.get("old") is None
+    assert [record["key"] for record in journal(path)] == ["new"]
+
+
+def test_reads_legacy_format_and_torn_last_line(tmp_path):
+    path = tmp_path / "idempotency.json"
+    legacy = {"a": {"status": "created", "deal_id": 1, "updated_at": time.time()}}
+    path.write_text(json.dumps(legacy) + "\n" + '{"key": "b", "status": "pen')
+
+    store = IdempotencyStore(str(path))
+
+    assert store.get("a")["deal_id"] == 1
+    assert store.get("b") is None
+    # 書き直したので、続けて追記しても壊れた行とつながらない
+    store.mark_pending("c")
+    assert [record["key"] for record in journal(path)] == ["a", "c"]
+
+
+def test_memory_only_store():
+    store = IdempotencyStore()
+    store.mark_pending("a")
+
+    assert store.get("a")["status"] == "pending"
+
+
+# ========== create_deals_bulk ==========
+
+
+class FakeDeals:
+    """_post / list_deals の代わり（作成した取引を覚えておく）"""
+
+    def __init__(self, fail_amounts=()):
+        self.created = []
+        self.fail_amounts = set(fail_amounts)
+
+    def post(self, endpoint, payload):
+        amount = sum(detail["amount"] for detail in payload["details"])
+        if amount in self.fail_amounts:
+            raise RuntimeError("freee API エラー: 500")
+        deal = {"id": 100 + len(self.created), "type": payload["type"], "amount": amount}
+        self.created.append(deal)
+        return {"deal": deal}
+
+    def list_deals(self, **filters):
+        return list(self.created)
+
+
+def bulk_client(tmp_path, api):
+    client = FreeeAPIClient(
+        "token", 1, idempotency_store=IdempotencyStore(str(tmp_path / "idempotency.json"))
+    )
+    client._post = api.post
+    client.list_deals = api.list_deals
+    return client
+
+
+def test_bulk_reports_partial_failure_and_rerun_skips_created(tmp_path):
+    api = FakeDeals(fail_amounts={2000})
+    deals = [bulk_deal(1000), bulk_deal(2000), bulk_deal(1000), {"issue_date": "2025-01-05"}]
+
+    first = bulk_client(tmp_path, api).create_deals_bulk(deals)
+    assert first["summary"] == {"created": 1, "skipped": 1, "error": 2}
+    assert first["results"][2]["duplicate_of"] == 0
+
+    api.fail_amounts.clear()
+    second = bulk_client(tmp_path, api).create_deals_bulk(deals[:2])
+    assert [result["status"] for result in second["results"]] == ["skipped", "created"]
+    assert len(api.created) == 2
+
+
+def test_pending_key_checks_freee_before_resending(tmp_path):
+    api = FakeDeals()
+    client = bulk_client(tmp_path, api)
+    deal = bulk_deal(1000)
+    # 前回は送信後に応答を受け取れなかった（freee上には作成済み）
+    key = deal_idempotency_key(1, {**deal, "company_id": 1, "type": "expense"})
+    client.idempotency_store.mark_pending(key)
+    api.post("/api/1/deals", {"type": "expense", "details": deal["details"]})
+
+    result = client.create_deals_bulk([deal])
+
+    assert result["results"][0] == {
+        "index": 0,
+        "idempotency_key": key,
+        "status": "skipped",
+        "deal_id": 100,
+    }
+    assert len(api.created) == 1
+    assert client.idempotency_store.get(key)["status"] == "created"
+
+
+def test_async_bulk_records_keys(tmp_path):
+    api = FakeDeals()
+
+    async def post(endpoint, payload):
+        return api.post(endpoint, payload)
+
+    async def main():
+        client = AsyncFreeeAPIClient(
+            "token", 1, idempotency_store=IdempotencyStore(str(tmp_path / "idempotency.json"))
+        )
+        client._post = post
+        try:
+            return await client.create_deals_bulk([bulk_deal(amount) for amount in range(1, 6)])
+        finally:
+            await client.aclose()
+
+    result = asyncio.run(main())
+
+    assert result["summary"] == {"created": 5, "skipped": 0, "error": 0}
+    assert len(journal(tmp_path / "idempotency.json")) == 10
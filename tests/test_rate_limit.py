@@ -0,0 +1,225 @@
+"""レート制限（トークンバケット・AIMD・Retry-After・クォータヘッダー）のテスト"""
+
+import asyncio
+import threading
+from email.utils import formatdate
+from types import SimpleNamespace
+
+import pytest
+
+import rate_limit
+from rate_limit import MAX_BACKOFF, RateLimiter, TokenBucket, parse_quota, parse_retry_after
+
+NOW = 1_700_000_000.0
+
+
+class FakeClock:
+    """monotonic / time / sleep を置き換える時計（sleep は時刻を進めるだけ）"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+        self.on_sleep = None
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return NOW + self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+        if self.on_sleep:
+            self.on_sleep()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limit, "time", clock)
+    return clock
+
+
+def acquire_times(bucket: TokenBucket, clock: FakeClock, count: int) -> list:
+    """count 回 acquire し、それぞれ取得できた時刻を返す"""
+    times = []
+    for _ in range(count):
+        bucket.acquire()
+        times.append(clock.now)
+    return times
+
+
+# ========== トークンバケット ==========
+
+
+def test_burst_then_paced_at_rate(clock):
+    bucket = TokenBucket(rate=2, capacity=3)
+
+    assert acquire_times(bucket, clock, 6) == [0, 0, 0, 0.5, 1.0, 1.5]
+
+
+def test_tokens_refill_while_idle(clock):
+    bucket = TokenBucket(rate=2, capacity=3)
+    acquire_times(bucket, clock, 3)
+    clock.now += 1.0  # 2トークン補充
+
+    assert acquire_times(bucket, clock, 3) == [1.0, 1.0, 1.5]
+
+
+def test_concurrent_async_callers_get_distinct_slots(clock, monkeypatch):
+    # 時計を止めたまま、並行する呼び出し元がそれぞれ何秒待つよう予約したかを見る
+    waits = []
+
+    async def fake_sleep(seconds):
+        waits.append(seconds)
+        await asyncio.sleep(0)
+
+    monkeypatch.setattr(rate_limit, "asyncio", SimpleNamespace(sleep=fake_sleep))
+    bucket = TokenBucket(rate=4, capacity=2)
+
+    async def main():
+        await asyncio.gather(*(bucket.acquire_async() for _ in range(6)))
+
+    asyncio.run(main())
+    assert sorted(waits) == [0.25, 0.5, 0.75, 1.0]
+
+
+def test_concurrent_threads_get_distinct_slots(clock, monkeypatch):
+    waits = []
+    monkeypatch.setattr(clock, "sleep", waits.append)  # 時計を止めたまま予約だけ見る
+    bucket = TokenBucket(rate=4, capacity=2)
+
+    threads = [threading.Thread(target=bucket.acquire) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(waits) == [0.25, 0.5, 0.75, 1.0, 1.25, 1.5]
+
+
+# ========== AIMD ==========
+
+
+def test_throttle_halves_rate_and_pauses(clock):
+    bucket = TokenBucket(rate=4, capacity=1)
+    bucket.acquire()
+    bucket.on_throttle(3.0)
+
+    assert bucket.rate == 2.0
+    assert bucket.throttles == 1
+    assert bucket.stats()["paused"] == 3.0
+    bucket.acquire()
+    assert clock.now == 3.5  # 停止明けから、下げたレート（2/秒）で1トークン分
+
+
+def test_throttles_within_pause_slow_down_once(clock):
+    bucket = TokenBucket(rate=4, capacity=1)
+    bucket.on_throttle(2.0)
+    bucket.on_throttle(2.0)  # 停止前に送っていたリクエストの429
+
+    assert bucket.rate == 2.0
+    assert bucket.throttles == 1
+
+    clock.now = 2.0
+    bucket.on_throttle(2.0)
+    assert bucket.rate == 1.0
+    assert bucket.throttles == 2
+
+
+def test_rate_never_drops_below_min_rate(clock):
+    bucket = TokenBucket(rate=1, capacity=1, min_rate=0.2)
+    for _ in range(10):
+        clock.now += 100
+        bucket.on_throttle(1.0)
+
+    assert bucket.rate == 0.2
+
+
+def test_success_recovers_rate_additively_up_to_max(clock):
+    bucket = TokenBucket(rate=4, capacity=1)
+    bucket.on_throttle(1.0)
+    bucket.on_success()
+
+    assert bucket.rate == pytest.approx(2.2)  # 上限レートの5%ずつ戻す
+    for _ in range(100):
+        bucket.on_success()
+    assert bucket.rate == 4
+
+
+def test_reservation_made_before_pause_is_requeued(clock):
+    bucket = TokenBucket(rate=1, capacity=1)
+    bucket.acquire()  # バケットを空にする
+
+    # 1秒待ちの予約中に429で5秒停止した場合、待機明けに並び直して停止明けまで待つ
+    clock.on_sleep = lambda: (setattr(clock, "on_sleep", None), bucket.on_throttle(5.0))
+    bucket.acquire()
+
+    assert clock.sleeps[0] == 1.0
+    assert clock.now >= 1.0 + 4.0
+
+
+# ========== Retry-After / クォータヘッダー ==========
+
+
+def test_parse_retry_after_seconds_and_http_date(clock):
+    assert parse_retry_after("7") == 7.0
+    assert parse_retry_after("-3") == 0.0
+    assert parse_retry_after(formatdate(NOW + 30, usegmt=True)) == pytest.approx(30, abs=1)
+    assert parse_retry_after(formatdate(NOW - 30, usegmt=True)) == 0.0
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
+
+
+def test_parse_quota_relative_and_epoch_reset(clock):
+    assert parse_quota({"X-RateLimit-Remaining": "12", "X-RateLimit-Reset": "30"}) == (12, 30.0)
+    assert parse_quota({"RateLimit-Remaining": "3", "RateLimit-Reset": str(NOW + 45)}) == (3, 45.0)
+    assert parse_quota({}) == (None, None)
+    assert parse_quota({"X-RateLimit-Remaining": "many"}) == (None, None)
+
+
+def test_observe_429_uses_retry_after(clock):
+    limiter = RateLimiter(rate=4, burst=1)
+
+    assert limiter.observe(1, 429, {"Retry-After": "7"}) == 7.0
+    assert limiter.bucket(1).rate == 2.0
+    assert limiter.bucket(2).rate == 4  # 他の事業所には影響しない
+
+
+def test_observe_429_without_retry_after_backs_off_exponentially(clock):
+    limiter = RateLimiter(rate=4, burst=1)
+
+    assert limiter.observe(1, 429, {}, throttles=1) == 1
+    assert limiter.observe(1, 429, {}, throttles=3) == 4
+    assert limiter.observe(1, 429, {}, throttles=10) == MAX_BACKOFF
+    # Retry-After がなくてもリセット時刻があればそれまで待つ
+    assert limiter.observe(1, 429, {"X-RateLimit-Reset": "12"}) == 12.0
+
+
+def test_quota_headers_spread_remaining_budget_until_reset(clock):
+    limiter = RateLimiter(rate=10, burst=1)
+    limiter.observe(1, 200, {"X-RateLimit-Remaining": "5", "X-RateLimit-Reset": "20"})
+    bucket = limiter.bucket(1)
+
+    assert acquire_times(bucket, clock, 3) == [0, 4.0, 8.0]  # 5件/20秒 = 0.25件/秒
+    clock.now = 21.0  # リセット後は元の速さ
+    assert acquire_times(bucket, clock, 3) == [21.0, 21.1, 21.2]
+
+
+def test_short_quota_window_is_not_spread(clock):
+    limiter = RateLimiter(rate=10, burst=1)
+    limiter.observe(1, 200, {"X-RateLimit-Remaining": "1", "X-RateLimit-Reset": "2"})
+
+    assert acquire_times(limiter.bucket(1), clock, 2) == [0, 0.1]
+
+
+def test_exhausted_quota_pauses_without_slowing_down(clock):
+    limiter = RateLimiter(rate=10, burst=1)
+    limiter.observe(1, 200, {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "3"})
+    bucket = limiter.bucket(1)
+
+    assert bucket.throttles == 0
+    assert bucket.rate == 10
+    bucket.acquire()
+    assert clock.now == 3.0
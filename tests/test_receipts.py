@@ -0,0 +1,115 @@
+"""証憑の一括アップロード（MIME判定・内容の重複スキップ・並列アップロード）のテスト"""
+
+import threading
+import time
+
+import pytest
+
+from freee_client import FreeeAPIClient
+from receipts import ReceiptIndex, collect_files, detect_mime_type
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 32
+
+
+def write(path, content):
+    path.write_bytes(content)
+    return path
+
+
+class FakeReceipts:
+    """_post_file の代わり（送信したファイル名を記録する）"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.sent = []
+        self._lock = threading.Lock()
+
+    def __call__(self, endpoint, field, file_path, data):
+        time.sleep(self.delay)
+        with self._lock:
+            self.sent.append(file_path.name)
+            return {"receipt": {"id": 500 + len(self.sent)}}
+
+
+@pytest.fixture
+def client():
+    return FreeeAPIClient("token", 1, fetch_concurrency=8, receipt_index=ReceiptIndex())
+
+
+# ========== MIME判定・ファイル収集 ==========
+
+
+def test_mime_type_comes_from_content_not_extension(tmp_path):
+    assert detect_mime_type(write(tmp_path / "scan.jpg", PNG)) == "image/png"
+    assert detect_mime_type(write(tmp_path / "a.bin", b"%PDF-1.7\n")) == "application/pdf"
+    heic = b"\x00\x00\x00\x18ftypheic" + b"\x00" * 8
+    assert detect_mime_type(write(tmp_path / "photo", heic)) == "image/heic"
+    assert detect_mime_type(write(tmp_path / "note.txt", b"memo")) == "text/plain"
+
+
+def test_collect_files_skips_hidden_and_recurses_on_request(tmp_path):
+    write(tmp_path / "a.png", PNG)
+    write(tmp_path / ".DS_Store", b"")
+    (tmp_path / "sub").mkdir()
+    write(tmp_path / "sub" / "b.png", PNG)
+
+    assert [p.name for p in collect_files(str(tmp_path))] == ["a.png"]
+    assert [p.name for p in collect_files(str(tmp_path), recursive=True)] == ["a.png", "b.png"]
+    assert [p.name for p in collect_files(str(tmp_path / "**" / "*.png"))] == ["a.png", "b.png"]
+
+
+# ========== アップロード ==========
+
+
+def test_same_content_is_uploaded_once_across_concurrent_workers(tmp_path, client):
+    for i in range(8):
+        write(tmp_path / f"copy{i}.png", PNG)
+    client._post_file = FakeReceipts(delay=0.01)
+
+    result = client.upload_receipts(str(tmp_path))
+
+    assert len(client._post_file.sent) == 1
+    assert result["summary"]["uploaded"] == 1
+    assert result["summary"]["skipped"] == 7
+    assert client._uploading == set()
+
+
+def test_rerun_skips_uploaded_and_unsupported_files(tmp_path, client):
+    write(tmp_path / "a.png", PNG)
+    write(tmp_path / "b.pdf", b"%PDF-1.7\n")
+    write(tmp_path / "c.txt", b"memo")
+    client._post_file = FakeReceipts()
+
+    first = client.upload_receipts(str(tmp_path))
+    second = client.upload_receipts(str(tmp_path))
+
+    assert [r["status"] for r in first["results"]] == ["uploaded", "uploaded", "skipped"]
+    assert first["results"][2]["reason"] == "unsupported_type"
+    assert [r.get("reason") for r in second["results"]] == [
+        "already_uploaded",
+        "already_uploaded",
+        "unsupported_type",
+    ]
+    assert len(client._post_file.sent) == 2
+
+
+def test_failed_upload_is_retried_on_next_run(tmp_path, client):
+    write(tmp_path / "a.png", PNG)
+
+    def failing(*args):
+        raise RuntimeError("freee API エラー: 500")
+
+    client._post_file = failing
+    assert client.upload_receipts(str(tmp_path))["summary"]["error"] == 1
+    assert client._uploading == set()
+
+    client._post_file = FakeReceipts()
+    assert client.upload_receipts(str(tmp_path))["summary"]["uploaded"] == 1
+
+
+def test_receipt_index_persists(tmp_path):
+    path = tmp_path / "receipts.json"
+    ReceiptIndex(str(path)).add(1, "abc", 500, tmp_path / "a.png")
+
+    assert ReceiptIndex(str(path)).get(1, "abc")["receipt_id"] == 500
+    assert ReceiptIndex(str(path)).get(2, "abc") is None
@@ -0,0 +1,216 @@
+"""口座明細と取引の突き合わせ（reconcile）のテスト"""
+
+from reconcile import DealIndex, bigrams, deal_window, reconcile, similarity, text_key
+
+
+def txn(id, date, amount, description="", entry_side="expense", walletable=("credit_card", 3)):
+    return {
+        "id": id,
+        "date": date,
+        "amount": amount,
+        "entry_side": entry_side,
+        "walletable_type": walletable[0],
+        "walletable_id": walletable[1],
+        "description": description,
+        "status": 1,
+    }
+
+
+def deal(id, date, amount, description="", type="expense", walletable=("credit_card", 3), **extra):
+    payments = []
+    if walletable:
+        payments.append(
+            {
+                "date": date,
+                "amount": amount,
+                "from_walletable_type": walletable[0],
+                "from_walletable_id": walletable[1],
+            }
+        )
+    return {
+        "id": id,
+        "issue_date": date,
+        "type": type,
+        "amount": amount,
+        "details": [{"description": description}],
+        "payments": payments,
+        **extra,
+    }
+
+
+def counts(result):
+    return {key: value for key, value in result["counts"].items() if value}
+
+
+# ========== 正規化・類似度 ==========
+
+
+def test_text_key_normalizes_width_case_legal_forms_and_digits():
+    assert text_key("ANTHROPIC_カード13") == "ANTHROPICカード"
+    assert text_key("ｶ)ｳﾝｿﾝ") == "ウンソン"
+    assert text_key("株式会社 アマゾン") == text_key("ｱﾏｿﾞﾝ")
+    assert text_key(None) == ""
+
+
+def test_similarity_is_dice_over_bigrams():
+    assert similarity(bigrams("ABCD"), bigrams("ABCD")) == 1.0
+    assert similarity(bigrams("ABCD"), bigrams("WXYZ")) == 0.0
+    assert similarity(bigrams("A"), frozenset()) == 0.0
+
+
+def test_deal_window_widens_both_ends():
+    assert deal_window("2025-03-01", "2025-03-31", 3) == ("2025-02-26", "2025-04-03")
+
+
+# ========== 索引のキー ==========
+
+
+def test_key_requires_same_walletable_side_and_amount():
+    deals = [
+        deal(10, "2025-01-05", 1000, walletable=("credit_card", 4)),  # 別の口座
+        deal(11, "2025-01-05", 1000, type="income"),  # 入出金が逆
+        deal(12, "2025-01-05", 1001),  # 金額違い
+    ]
+    result = reconcile([txn(1, "2025-01-05", 1000)], deals)
+
+    assert result["counts"]["matched"] == 0
+    assert [item["id"] for item in result["unmatched_txns"]] == [1]
+    # 明細を取得した口座からの支払いは、明細のない取引として返る
+    assert [item["id"] for item in result["unmatched_deals"]] == [11, 12]
+
+
+def test_unsettled_deal_matches_any_walletable():
+    # 支払いのない（未決済の）取引は口座を問わない候補になる
+    unsettled = deal(10, "2025-01-05", 1000, walletable=None)
+    result = reconcile([txn(1, "2025-01-05", 1000)], [unsettled])
+
+    assert result["counts"]["matched"] == 1
+
+
+# ========== 日付の範囲 ==========
+
+
+def test_date_tolerance_is_inclusive():
+    deals = [deal(10, "2025-01-08", 1000), deal(11, "2025-01-17", 2000)]
+    txns = [txn(1, "2025-01-05", 1000), txn(2, "2025-01-13", 2000)]
+
+    assert reconcile(txns, deals, date_tolerance=3)["counts"]["matched"] == 1  # 3日差だけ
+    assert reconcile(txns, deals, date_tolerance=4)["counts"]["matched"] == 2
+
+
+def test_candidates_are_found_by_bisect_in_date_order():
+    index = DealIndex([deal(i, f"2025-01-{i:02d}", 1000) for i in range(1, 29)])
+    found = index.candidates(txn(1, "2025-01-15", 1000), tolerance=2)
+
+    assert sorted(candidate["deal"]["id"] for _, candidate in found) == [13, 14, 15, 16, 17]
+    assert sorted(days for days, _ in found) == [0, 1, 1, 2, 2]
+
+
+# ========== 複数候補の選択 ==========
+
+
+def test_similarity_breaks_ties_between_candidates():
+    deals = [
+        deal(10, "2025-01-05", 3300, "ANTHROPIC API利用料"),
+        deal(11, "2025-01-05", 3300, "AWS 利用料"),
+    ]
+    txns = [txn(1, "2025-01-05", 3300, "ANTHROPIC_カード13")]
+    result = reconcile(txns, deals, start_date="2025-01-01", end_date="2025-01-31")
+
+    assert result["counts"]["matched"] == 1
+    # 選ばれなかった方は明細のない取引として残る
+    assert [item["id"] for item in result["unmatched_deals"]] == [11]
+
+
+def test_partner_name_counts_towards_similarity():
+    deals = [
+        deal(10, "2025-01-05", 5000, partner_id=1),
+        deal(11, "2025-01-05", 5000, partner_id=2),
+    ]
+    result = reconcile(
+        [txn(1, "2025-01-05", 5000, "ｶ)ｳﾝｿﾝ")],
+        deals,
+        partner_names={1: "株式会社サンプル", 2: "合同会社ウンソン"},
+        start_date="2025-01-01",
+        end_date="2025-01-31",
+    )
+
+    assert [item["id"] for item in result["unmatched_deals"]] == [10]
+
+
+def test_nearest_date_wins_when_similarity_is_equal():
+    deals = [deal(10, "2025-01-03", 1000), deal(11, "2025-01-06", 1000)]
+    result = reconcile(
+        [txn(1, "2025-01-05", 1000)], deals, start_date="2025-01-01", end_date="2025-01-31"
+    )
+
+    assert [item["id"] for item in result["unmatched_deals"]] == [10]
+
+
+def test_indistinguishable_candidates_are_ambiguous():
+    deals = [deal(10, "2025-01-04", 1000, "会議費"), deal(11, "2025-01-06", 1000, "会議費")]
+    result = reconcile([txn(1, "2025-01-05", 1000, "カフェ")], deals)
+
+    assert result["counts"]["ambiguous"] == 1
+    assert result["counts"]["unmatched_deals"] == 0  # 曖昧な候補は明細のない取引にしない
+    candidates = result["ambiguous"][0]["candidates"]
+    assert sorted(candidate["id"] for candidate in candidates) == [10, 11]
+    assert {candidate["days_apart"] for candidate in candidates} == {1}
+
+
+# ========== 取引は1回だけ使う ==========
+
+
+def test_each_deal_is_used_only_once():
+    # 同じ金額の明細が2件、取引が1件 → 片方だけ一致
+    result = reconcile(
+        [txn(1, "2025-01-05", 1000), txn(2, "2025-01-06", 1000)], [deal(10, "2025-01-05", 1000)]
+    )
+
+    assert result["counts"]["matched"] == 1
+    assert [item["id"] for item in result["unmatched_txns"]] == [2]
+
+
+def test_single_candidate_txns_are_settled_before_ambiguous_ones():
+    # 明細1 の候補は取引10だけ、明細2 の候補は取引10・11。
+    # 明細1 を先に確定させるので、明細2 は取引11 に決まる（取り合いで取りこぼさない）
+    deals = [deal(10, "2025-01-05", 1000), deal(11, "2025-01-08", 1000)]
+    txns = [txn(2, "2025-01-06", 1000), txn(1, "2025-01-03", 1000)]
+    result = reconcile(txns, deals, date_tolerance=2)
+
+    assert counts(result) == {"wallet_txns": 2, "deals": 2, "matched": 2}
+
+
+def test_split_payments_are_matched_separately():
+    split = deal(10, "2025-01-05", 3000)
+    split["payments"] = [
+        {**split["payments"][0], "amount": 1000},
+        {**split["payments"][0], "date": "2025-01-20", "amount": 2000},
+    ]
+    result = reconcile([txn(1, "2025-01-05", 1000), txn(2, "2025-01-20", 2000)], [split])
+
+    assert result["counts"]["matched"] == 2
+
+
+# ========== 明細のない取引 ==========
+
+
+def test_unmatched_deals_limited_to_scanned_walletables_and_period():
+    deals = [
+        deal(10, "2025-01-10", 1000),  # 対象
+        deal(11, "2025-01-10", 2000, walletable=("bank_account", 2)),  # 明細を取得していない口座
+        deal(12, "2025-02-02", 3000),  # 期間外（前後に広げて取得した分）
+    ]
+    result = reconcile(
+        [txn(1, "2025-01-05", 500)], deals, start_date="2025-01-01", end_date="2025-01-31"
+    )
+
+    assert [item["id"] for item in result["unmatched_deals"]] == [10]
+
+
+def test_limit_truncates_lists_but_not_counts():
+    txns = [txn(i, "2025-01-05", 100 + i) for i in range(5)]
+    result = reconcile(txns, [], limit=2)
+
+    assert result["counts"]["unmatched_txns"] == 5
+    assert len(result["unmatched_txns"]) == 2
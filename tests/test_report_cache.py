@@ -0,0 +1,147 @@
+"""試算表のキャッシュ（ReportCache・締めた期間と進行中の期間）のテスト"""
+
+import math
+from datetime import date
+
+import pytest
+from cryptography.fernet import Fernet
+
+import report_cache
+from cache import MISSING
+from disk_cache import DiskCache
+from freee_client import FreeeAPIClient
+from report_cache import ReportCache, report_period
+
+CLOSED = date(2025, 3, 31)
+APRIL_YEARS = [{"start_date": "2024-04-01", "end_date": "2025-03-31"}]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(report_cache, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def disk(tmp_path):
+    return DiskCache(Fernet.generate_key().decode(), str(tmp_path))
+
+
+def key(end_month, company_id=1, report="trial_pl"):
+    return (company_id, report, 2024, 4, end_month)
+
+
+# ========== 期間 ==========
+
+
+def test_report_period_defaults_to_fiscal_year_bounds():
+    assert report_period(2024, None, None, APRIL_YEARS) == (4, 3, date(2025, 3, 31))
+    assert report_period(2024, 4, 9, APRIL_YEARS) == (4, 9, date(2024, 9, 30))
+    assert report_period(2024, 1, 2, []) == (1, 2, date(2024, 2, 29))
+
+
+# ========== 締めた期間・進行中の期間 ==========
+
+
+def test_closed_period_never_expires(clock):
+    cache = ReportCache(closed_through=CLOSED, open_ttl=300)
+    cache.set(key(3), {"trial_pl": "closed"}, date(2025, 3, 31))
+
+    clock.now = 10**9
+    assert cache.get(key(3)) == {"trial_pl": "closed"}
+    assert cache.stats()["closed"] == 1
+
+
+def test_open_period_expires_after_open_ttl(clock):
+    cache = ReportCache(closed_through=CLOSED, open_ttl=300)
+    cache.set(key(4), {"trial_pl": "open"}, date(2025, 4, 30))
+
+    clock.now = 299
+    assert cache.get(key(4)) == {"trial_pl": "open"}
+    clock.now = 300
+    assert cache.get(key(4)) is MISSING
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_default_closing_date_is_end_of_last_month():
+    cache = ReportCache()
+    first_of_month = date.today().replace(day=1)
+
+    assert cache.closing_date() < first_of_month
+    assert cache.is_closed(cache.closing_date())
+    assert not cache.is_closed(first_of_month)
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = ReportCache(closed_through=CLOSED, max_entries=2)
+    for end_month in (1, 2, 3):
+        cache.set(key(end_month), end_month, date(2025, end_month, 28))
+
+    assert cache.get(key(1)) is MISSING
+    assert cache.stats()["entries"] == 2
+
+
+# ========== ディスク ==========
+
+
+def test_only_closed_periods_survive_restart(disk):
+    ReportCache(closed_through=CLOSED, disk_cache=disk).set(key(3), "closed", date(2025, 3, 31))
+    ReportCache(closed_through=CLOSED, disk_cache=disk).set(key(4), "open", date(2025, 4, 30))
+
+    restarted = ReportCache(closed_through=CLOSED, disk_cache=disk)
+    assert restarted.get(key(3)) == "closed"
+    assert restarted.get(key(4)) is MISSING
+    # 締め日を前倒しした場合、確定済みでなくなった期間はディスクからも使わない
+    assert ReportCache(closed_through=date(2025, 2, 28), disk_cache=disk).get(key(3)) is MISSING
+
+
+def test_reports_are_stored_apart_from_master_data(disk, tmp_path):
+    ReportCache(closed_through=CLOSED, disk_cache=disk).set(key(3), "closed", date(2025, 3, 31))
+    disk.save(("/api/1/account_items", 1), {"account_items": []})
+
+    # マスタデータのキャッシュをまとめて破棄しても、確定済みの試算表は消えない
+    client = FreeeAPIClient("token", 1, disk_cache=disk)
+    client.invalidate_cache()
+
+    assert list((tmp_path / "reports").glob("*.enc"))
+    assert disk.load(("/api/1/account_items", 1)) is None
+    assert ReportCache(closed_through=CLOSED, disk_cache=disk).get(key(3)) == "closed"
+
+
+# ========== 破棄 ==========
+
+
+def test_invalidate_since_drops_periods_ending_on_or_after(clock, disk):
+    cache = ReportCache(closed_through=CLOSED, disk_cache=disk)
+    cache.set(key(1), "jan", date(2025, 1, 31))
+    cache.set(key(2), "feb", date(2025, 2, 28))
+    cache.set(key(2, company_id=2), "other", date(2025, 2, 28))
+
+    assert cache.invalidate(company_id=1, since=date(2025, 2, 10)) == 1
+    assert cache.get(key(1)) == "jan"
+    assert cache.get(key(2, company_id=2)) == "other"
+    # 締め日以前の変更はディスクにある同じ事業所の分もまとめて破棄する
+    restarted = ReportCache(closed_through=CLOSED, disk_cache=disk)
+    assert restarted.get(key(1)) is MISSING
+    assert restarted.get(key(2, company_id=2)) == "other"
+
+
+def test_deal_creation_invalidates_reports_from_issue_date(clock):
+    client = FreeeAPIClient("token", 1, report_cache=ReportCache(closed_through=CLOSED))
+    client.report_cache.set(key(4), "open", date(2025, 4, 30))
+    client.report_cache.set(key(2), "closed", date(2025, 2, 28))
+
+    client._invalidate_after_write("/api/1/deals", {"company_id": 1, "issue_date": "2025-04-02"})
+
+    assert client.report_cache.get(key(4)) is MISSING
+    assert client.report_cache.get(key(2)) == "closed"
+    assert math.isinf(client.report_cache._entries[key(2)][0])
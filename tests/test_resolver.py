@@ -0,0 +1,138 @@
+"""名前 → ID の解決（NameIndex・クライアントの resolve_*）のテスト"""
+
+from types import SimpleNamespace
+
+from freee_client import FreeeAPIClient
+from resolver import RESOLVERS, NameIndex, normalize_name
+
+PARTNERS = [
+    {
+        "id": 1,
+        "name": "アマゾンジャパン株式会社",
+        "name_kana": "アマゾンジャパン",
+        "shortcut1": "AMZ",
+        "code": "P001",
+    },
+    {"id": 2, "name": "アマゾンウェブサービス", "shortcut1": "AWS"},
+    {"id": 3, "name": "雲孫合同会社"},
+]
+
+ACCOUNTS = [
+    {
+        "id": 8,
+        "name": "通信費",
+        "shortcut_num": "123",
+        "account_category": "販売管理費",
+        "default_tax_code": 136,
+    },
+    {"id": 9, "name": "通信費（前払）", "account_category": "資産"},
+]
+
+
+def partner_index():
+    return NameIndex(PARTNERS, **RESOLVERS["partners"])
+
+
+def ids(results):
+    return [result["id"] for result in results]
+
+
+# ========== 正規化 ==========
+
+
+def test_normalize_name_absorbs_width_case_kana_and_legal_forms():
+    assert normalize_name("株式会社 ｱﾏｿﾞﾝ・ジャパン") == "あまぞんじゃぱん"
+    assert normalize_name("Ａｍａｚｏｎ　Web") == "AMAZONWEB"
+    assert normalize_name(None) == ""
+
+
+# ========== NameIndex ==========
+
+
+def test_exact_match_on_name_shortcut_and_code():
+    index = partner_index()
+
+    for query in ("アマゾンジャパン株式会社", "AMZ", "P001"):
+        best = index.search(query)[0]
+        assert (best["id"], best["score"], best["match"]) == (1, 1.0, "exact")
+    assert index.search("P001")[0]["code"] == "P001"
+
+
+def test_normalized_match_on_halfwidth_kana_case_and_legal_form():
+    index = partner_index()
+
+    for query in ("ｱﾏｿﾞﾝｼﾞｬﾊﾟﾝ", "amz"):
+        best = index.search(query)[0]
+        assert (best["id"], best["score"], best["match"]) == (1, 0.95, "normalized")
+    assert index.search("雲孫") == [
+        {"id": 3, "name": "雲孫合同会社", "score": 0.95, "match": "normalized"}
+    ]
+
+
+def test_partial_match_is_fuzzy_and_ranked_by_score():
+    results = partner_index().search("アマゾン")
+
+    assert ids(results) == [1, 2]
+    assert all(result["match"] == "fuzzy" for result in results)
+    assert results[0]["score"] > results[1]["score"]
+    assert ids(partner_index().search("ウェブサービス")) == [2]
+    assert partner_index().search("全然違う") == []
+
+
+def test_exact_match_ranks_above_fuzzy_and_limit_applies():
+    index = NameIndex(ACCOUNTS, **RESOLVERS["account_items"])
+
+    assert index.search("通信費") == [
+        {
+            "id": 8,
+            "name": "通信費",
+            "score": 1.0,
+            "match": "exact",
+            "account_category": "販売管理費",
+            "default_tax_code": 136,
+        },
+        {"id": 9, "name": "通信費（前払）", "score": 0.78, "match": "fuzzy", "account_category": "資産"},
+    ]
+    assert ids(index.search("123")) == [8]
+    # 同じスコアなら名前の短い方が先
+    assert ids(index.search("通信", limit=1)) == [8]
+
+
+def test_tax_codes_are_keyed_by_code_and_fullwidth_percent():
+    index = NameIndex(
+        [{"code": 136, "name_ja": "課対仕入10%", "name": "purchase_with_tax_10"}],
+        **RESOLVERS["taxes"],
+    )
+
+    assert index.search("課対仕入10％") == [
+        {"id": 136, "name": "課対仕入10%", "score": 0.95, "match": "normalized"}
+    ]
+    assert ids(index.search("purchase_with_tax_10")) == [136]
+
+
+# ========== クライアント ==========
+
+
+def test_client_resolves_from_cached_master_data_without_rebuilding_index():
+    client = FreeeAPIClient("token", 1)
+    calls = []
+
+    def send_get(endpoint, params, headers=None):
+        calls.append(endpoint)
+        # 取得のたびに別のリストを返す（キャッシュ経由なら同じリストが返る）
+        data = {"partners": list(PARTNERS)}
+        return SimpleNamespace(status_code=200, headers={}, json=lambda: data)
+
+    client._send_get = send_get
+
+    assert ids(client.resolve_partner("AMZ")) == [1]
+    index = client._name_indexes[("partners", 1)][1]
+    assert ids(client.resolve_partner("雲孫")) == [3]
+    assert client._name_indexes[("partners", 1)][1] is index
+    assert calls == ["/api/1/partners"]
+
+    # マスタデータを取り直したら索引も作り直す
+    client.get_partners(refresh=True)
+    client.resolve_partner("AWS")
+    assert client._name_indexes[("partners", 1)][1] is not index
+    assert len(calls) == 2
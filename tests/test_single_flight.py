@@ -0,0 +1,201 @@
+"""SingleFlight（同時実行中の同一呼び出しのまとめ）のテスト"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from freee_client import FreeeAPIClient
+from single_flight import SingleFlight
+
+CALLERS = 8
+
+
+def wait_until(condition, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise TimeoutError("条件を満たしませんでした")
+        time.sleep(0.001)
+
+
+# ========== 同期（スレッド） ==========
+
+
+def test_concurrent_threads_share_one_execution():
+    flights = SingleFlight()
+    calls = []
+
+    def fetch():
+        calls.append(threading.get_ident())
+        # 他の呼び出し元が全員待ちに入ってから返す
+        wait_until(lambda: flights.shared == CALLERS - 1)
+        return {"value": 42}
+
+    with ThreadPoolExecutor(max_workers=CALLERS) as executor:
+        results = list(executor.map(lambda _: flights.do("key", fetch), range(CALLERS)))
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert flights.stats() == {"executed": 1, "shared": CALLERS - 1, "in_flight": 0}
+
+
+def test_exception_is_shared_and_next_call_runs_again():
+    flights = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def failing():
+        calls.append(1)
+        release.wait(5)
+        raise RuntimeError("boom")
+
+    errors = []
+
+    def call():
+        try:
+            flights.do("key", failing)
+        except RuntimeError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    wait_until(lambda: flights.shared == 2)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert len(errors) == 3
+    # 終わった呼び出しは結果を残さない（次は再実行）
+    assert flights.do("key", lambda: "fresh") == "fresh"
+    assert flights.executed == 2
+
+
+def test_different_keys_run_independently():
+    flights = SingleFlight()
+    barrier = threading.Barrier(2, timeout=5)
+
+    def fetch(value):
+        barrier.wait()  # 両方が同時に実行中でなければ進まない
+        return value
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        a = executor.submit(flights.do, "a", lambda: fetch("a"))
+        b = executor.submit(flights.do, "b", lambda: fetch("b"))
+        assert (a.result(), b.result()) == ("a", "b")
+    assert flights.shared == 0
+
+
+def test_sequential_calls_are_not_cached():
+    flights = SingleFlight()
+    counter = iter(range(10))
+
+    assert flights.do("key", lambda: next(counter)) == 0
+    assert flights.do("key", lambda: next(counter)) == 1
+
+
+# ========== 非同期 ==========
+
+
+def test_concurrent_tasks_share_one_execution():
+    flights = SingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"value": 42}
+
+    async def main():
+        return await asyncio.gather(*(flights.ado("key", fetch) for _ in range(CALLERS)))
+
+    results = asyncio.run(main())
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert flights.stats() == {"executed": 1, "shared": CALLERS - 1, "in_flight": 0}
+
+
+def test_cancelled_leader_does_not_cancel_waiters():
+    flights = SingleFlight()
+
+    async def fetch():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    async def main():
+        leader = asyncio.create_task(flights.ado("key", fetch))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flights.ado("key", fetch))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(main()) == "done"
+    assert flights.executed == 1
+
+
+def test_async_exception_is_shared_and_cleared():
+    flights = SingleFlight()
+    calls = []
+
+    async def failing():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    async def main():
+        results = await asyncio.gather(
+            *(flights.ado("key", failing) for _ in range(3)), return_exceptions=True
+        )
+        again = await flights.ado("key", lambda: asyncio.sleep(0, result="fresh"))
+        return results, again
+
+    results, again = asyncio.run(main())
+    assert len(calls) == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert again == "fresh"
+    assert flights.stats()["in_flight"] == 0
+
+
+# ========== 同一GETのキー ==========
+
+
+def test_flight_key_ignores_param_order_types_and_none():
+    key = FreeeAPIClient._flight_key
+    assert key("/api/1/deals", {"company_id": 1, "limit": 100}) == key(
+        "/api/1/deals", {"limit": "100", "company_id": "1", "partner_id": None}
+    )
+    assert key("/api/1/deals", {"company_id": 1}) != key("/api/1/deals", {"company_id": 2})
+    assert key("/api/1/deals", {"company_id": 1}) != key(
+        "/api/1/deals", {"company_id": 1}, {"If-None-Match": "abc"}
+    )
+
+
+def test_client_coalesces_concurrent_identical_gets():
+    client = FreeeAPIClient("token", 1)
+    calls = []
+
+    def request(method, endpoint, **kwargs):
+        calls.append((method, endpoint, kwargs["params"]))
+        wait_until(lambda: client._flights.shared == CALLERS - 1)
+        return object()
+
+    client._request_with_retry = request
+    params = [{"company_id": 1, "limit": 100}, {"limit": "100", "company_id": 1}]
+
+    with ThreadPoolExecutor(max_workers=CALLERS) as executor:
+        responses = list(
+            executor.map(
+                lambda i: client._send_get("/api/1/deals", params[i % 2]), range(CALLERS)
+            )
+        )
+
+    assert len(calls) == 1
+    assert all(response is responses[0] for response in responses)
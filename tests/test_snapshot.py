@@ -0,0 +1,189 @@
+"""事業所のスナップショット（PLの合計・口座残高・一部失敗時のまとめ方）のテスト"""
+
+import asyncio
+from datetime import date
+
+from freee_client import AsyncFreeeAPIClient, FreeeAPIClient
+from snapshot import build_snapshot, current_fiscal_month, pl_totals, walletable_balances
+
+APRIL_YEARS = [
+    {"start_date": "2024-04-01", "end_date": "2025-03-31"},
+    {"start_date": "2025-04-01", "end_date": "2026-03-31"},
+]
+
+COMPANY = {"id": 1, "display_name": "合同会社雲孫", "fiscal_years": APRIL_YEARS}
+
+WALLETABLES = [
+    {"id": 2, "name": "三井住友銀行", "type": "bank_account", "walletable_balance": 1200000},
+    {"id": 3, "name": "楽天カード", "type": "credit_card", "walletable_balance": -45000},
+    {"id": 4, "name": "PayPay銀行", "type": "bank_account", "walletable_balance": 300000},
+    {"id": 5, "name": "現金", "type": "wallet"},
+]
+
+REPORT = {
+    "trial_pl": {
+        "balances": [
+            {"account_category_name": "売上高", "total_line": True, "closing_balance": 900000},
+            {"account_item_id": 10, "account_category_name": "売上高", "closing_balance": 1},
+        ]
+    }
+}
+
+
+def parts(**overrides):
+    values = {
+        "companies": [{"id": 1, "name": "雲孫", "role": "admin"}, {"id": 2, "name": "別会社"}],
+        "account_items": [{"id": 10}, {"id": 11}],
+        "walletables": WALLETABLES,
+        "partners": [{"id": 7}],
+        "pl": (COMPANY, 2025, 2025, 10, REPORT, False),
+    }
+    values.update(overrides)
+    return values
+
+
+# ========== 会計年度の月 ==========
+
+
+def test_current_fiscal_month_uses_company_fiscal_years():
+    assert current_fiscal_month(APRIL_YEARS, date(2026, 2, 10)) == (2025, 2026, 2)
+    assert current_fiscal_month(APRIL_YEARS, date(2025, 4, 1)) == (2025, 2025, 4)
+    # 会計年度の情報がなければ暦年
+    assert current_fiscal_month([], date(2025, 7, 1)) == (2025, 2025, 7)
+
+
+# ========== PLの合計 ==========
+
+
+def test_pl_totals_prefer_total_lines():
+    assert pl_totals(REPORT["trial_pl"]["balances"]) == {"売上高": 900000}
+
+
+def test_pl_totals_sum_account_rows_by_category_without_total_lines():
+    balances = [
+        {"account_item_id": 10, "account_category_name": "売上高", "closing_balance": 500},
+        {"account_item_id": 11, "account_category_name": "売上高", "closing_balance": 700},
+        {"account_item_id": 12, "closing_balance": None},
+        {"account_category_name": "販売管理費", "closing_balance": 999},  # 科目なしの行は除く
+    ]
+
+    assert pl_totals(balances) == {"売上高": 1200, "その他": 0}
+
+
+# ========== 口座残高 ==========
+
+
+def test_walletable_balances_group_by_type_and_skip_unknown_balances():
+    balances = walletable_balances(WALLETABLES)
+
+    assert balances["by_type"] == {"bank_account": 1500000, "credit_card": -45000}
+    assert balances["accounts"][3] == {"id": 5, "name": "現金", "type": "wallet", "balance": None}
+
+
+# ========== まとめ ==========
+
+
+def test_build_snapshot_with_all_parts():
+    snapshot = build_snapshot(1, parts())
+
+    assert snapshot["company"] == {"id": 1, "name": "雲孫", "role": "admin"}
+    assert snapshot["counts"] == {
+        "companies": 2,
+        "account_items": 2,
+        "walletables": 4,
+        "partners": 1,
+    }
+    assert snapshot["pl"] == {
+        "fiscal_year": 2025,
+        "month": "2025-10",
+        "totals": {"売上高": 900000},
+        "cached": False,
+    }
+    assert "errors" not in snapshot
+
+
+def test_failed_parts_go_to_errors_and_the_rest_is_returned():
+    snapshot = build_snapshot(
+        1,
+        parts(
+            companies=RuntimeError("API Error 503"),
+            partners=RuntimeError("API Error 429"),
+        ),
+    )
+
+    assert snapshot["errors"] == {"companies": "API Error 503", "partners": "API Error 429"}
+    assert snapshot["counts"] == {"account_items": 2, "walletables": 4}
+    assert snapshot["walletables"]["by_type"]["credit_card"] == -45000
+    # 事業所一覧が取れなくても、PLの事業所情報から名前を補う
+    assert snapshot["company"] == {"id": 1, "name": "合同会社雲孫"}
+
+
+def test_failed_pl_and_walletables_are_omitted():
+    snapshot = build_snapshot(
+        1, parts(pl=RuntimeError("API Error 500"), walletables=RuntimeError("timeout"))
+    )
+
+    assert "pl" not in snapshot and "walletables" not in snapshot
+    assert set(snapshot["errors"]) == {"pl", "walletables"}
+
+
+# ========== クライアント ==========
+
+
+def stub_parts(client, fail):
+    """スナップショットの取得メソッドを差し替え、fail の項目だけ例外にする"""
+
+    def value(part, result):
+        if part in fail:
+            raise RuntimeError(f"{part} failed")
+        return result
+
+    client.list_companies = lambda refresh=False: value("companies", [COMPANY])
+    client.list_accounts = lambda cid, refresh=False: value("account_items", [{"id": 10}])
+    client.list_walletables = lambda cid, refresh=False, with_balance=False: value(
+        "walletables", WALLETABLES
+    )
+    client.get_partners = lambda cid, refresh=False: value("partners", [])
+    client.get_company = lambda cid: value("pl", COMPANY)
+    client._report_lookup = lambda *args: (REPORT, True)
+
+
+SNAPSHOT_METHODS = (
+    "list_companies",
+    "list_accounts",
+    "list_walletables",
+    "get_partners",
+    "get_company",
+    "_report_lookup",
+)
+
+
+def awaitable(method):
+    async def call(*args, **kwargs):
+        return method(*args, **kwargs)
+
+    return call
+
+
+def test_client_snapshot_returns_other_parts_when_one_fails():
+    client = FreeeAPIClient("token", 1)
+    stub_parts(client, fail={"partners"})
+
+    snapshot = client.get_company_snapshot()
+
+    assert snapshot["errors"] == {"partners": "partners failed"}
+    assert snapshot["counts"] == {"companies": 1, "account_items": 1, "walletables": 4}
+    assert snapshot["pl"]["cached"] is True
+
+
+def test_async_client_snapshot_returns_other_parts_when_one_fails():
+    client = AsyncFreeeAPIClient("token", 1)
+    stub_parts(client, fail={"pl"})
+    for name in SNAPSHOT_METHODS:
+        setattr(client, name, awaitable(getattr(client, name)))
+
+    snapshot = asyncio.run(client.get_company_snapshot())
+
+    assert snapshot["errors"] == {"pl": "pl failed"}
+    assert "pl" not in snapshot
+    assert snapshot["company"] == {"id": 1, "name": "合同会社雲孫"}
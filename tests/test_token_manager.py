@@ -0,0 +1,88 @@
+"""TokenManager のバックグラウンド更新のテスト"""
+
+import asyncio
+import time
+
+import pytest
+
+import token_manager
+from token_manager import TokenManager
+
+
+class FakeStore:
+    def __init__(self):
+        self.saved = []
+
+    def load_token(self):
+        return None
+
+    def save_token(self, token_data):
+        self.saved.append(token_data)
+
+
+class FakeOAuth:
+    """expires_in 秒で切れるtokenを返す"""
+
+    def __init__(self, expires_in: float):
+        self.expires_in = expires_in
+        self.calls = 0
+
+    def refresh_access_token(self, refresh_token):
+        self.calls += 1
+        return {
+            "access_token": f"token-{self.calls}",
+            "refresh_token": refresh_token,
+            "expires_at": time.time() + self.expires_in,
+        }
+
+
+def run_loop(manager: TokenManager, monkeypatch, iterations: int) -> list:
+    """asyncio.sleep を記録に置き換えて run() を iterations 回まで回し、待ち時間を返す"""
+    delays = []
+
+    async def fake_sleep(delay):
+        delays.append(delay)
+        if len(delays) >= iterations:
+            raise asyncio.CancelledError
+
+    monkeypatch.setattr(token_manager.asyncio, "sleep", fake_sleep)
+
+    async def main():
+        with pytest.raises(asyncio.CancelledError):
+            await manager.run()
+
+    asyncio.run(main())
+    return delays
+
+
+def make_manager(expires_in: float, refresh_margin: float = 300) -> TokenManager:
+    token = {"access_token": "token-0", "refresh_token": "r", "expires_at": time.time() - 10}
+    return TokenManager(
+        FakeStore(), FakeOAuth(expires_in), token, refresh_margin=refresh_margin, jitter=0
+    )
+
+
+def test_run_waits_between_refreshes_when_new_token_is_already_due(monkeypatch):
+    # 更新後も expires_in <= refresh_margin なので、計算上の待ち時間は毎回0になる
+    manager = make_manager(expires_in=100, refresh_margin=300)
+    delays = run_loop(manager, monkeypatch, iterations=4)
+
+    assert delays[0] == 0  # 期限切れのtokenはすぐ更新する
+    assert delays[1:] == [60, 60, 60]  # 以降は min(60, refresh_margin / 5) ずつ空ける
+    assert manager.oauth.calls == 3
+
+
+def test_run_retry_delay_has_lower_bound(monkeypatch):
+    manager = make_manager(expires_in=1, refresh_margin=2)
+    delays = run_loop(manager, monkeypatch, iterations=3)
+
+    assert delays == [0, 1, 1]
+
+
+def test_run_sleeps_until_margin_after_normal_refresh(monkeypatch):
+    manager = make_manager(expires_in=3600, refresh_margin=300)
+    delays = run_loop(manager, monkeypatch, iterations=2)
+
+    assert delays[0] == 0
+    assert 3290 < delays[1] <= 3300
+    assert manager.oauth.calls == 1
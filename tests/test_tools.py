@@ -0,0 +1,84 @@
+"""MCPツールの登録と呼び出し（register_tools 経由）のテスト"""
+
+import asyncio
+from types import SimpleNamespace
+
+from mcp.server import Server
+from mcp.server.lowlevel.server import request_ctx
+from mcp.types import CallToolRequest, CallToolRequestParams
+
+import tools
+from tools import IDENTITY_HEADER
+
+
+class FakeClient:
+    async def list_accounts(self, company_id=None, refresh=False):
+        return [{"id": 1, "name": "現金", "company_id": company_id}]
+
+
+def make_server(trust_identity_header=False):
+    """get_client に渡された (company_id, identity) を記録するサーバー"""
+    calls = []
+
+    def get_client(company_id=None, identity=None):
+        calls.append((company_id, identity))
+        return FakeClient()
+
+    server = Server("freee-test")
+    tools.register_tools(
+        server, get_client, lambda: None, trust_identity_header=trust_identity_header
+    )
+    return server, calls
+
+
+def call(server, name, arguments, headers=None):
+    """MCPのリクエストハンドラ経由でツールを呼び、テキストを返す"""
+
+    async def main():
+        if headers is not None:
+            context = SimpleNamespace(request=SimpleNamespace(headers=headers), session=None)
+            request_ctx.set(context)
+        request = CallToolRequest(
+            method="tools/call", params=CallToolRequestParams(name=name, arguments=arguments)
+        )
+        result = await server.request_handlers[CallToolRequest](request)
+        return result.root.content[0].text
+
+    return asyncio.run(main())
+
+
+def test_tool_gets_client_for_company_and_default_identity():
+    server, calls = make_server()
+
+    text = call(server, "list_accounts", {"company_id": 7, "format": "csv", "fields": ["id"]})
+
+    assert calls == [(7, None)]
+    assert text == "勘定科目一覧:\nid\n1\n"
+
+
+def test_identity_header_is_ignored_unless_trusted():
+    server, calls = make_server()
+
+    call(server, "list_accounts", {}, headers={IDENTITY_HEADER: "alice"})
+
+    assert calls == [(None, None)]
+
+
+def test_trusted_identity_header_selects_identity():
+    server, calls = make_server(trust_identity_header=True)
+
+    call(server, "list_accounts", {}, headers={IDENTITY_HEADER: "alice"})
+    call(server, "list_accounts", {}, headers={})
+
+    assert calls == [(None, "alice"), (None, None)]
+
+
+def test_client_errors_are_returned_as_tool_errors():
+    server = Server("freee-test")
+
+    def get_client(company_id=None, identity=None):
+        raise RuntimeError("tokenが見つかりません（identity: bob）")
+
+    tools.register_tools(server, get_client, lambda: None)
+
+    assert call(server, "list_accounts", {}) == "❌ エラー: tokenが見つかりません（identity: bob）"
@@ -0,0 +1,113 @@
+"""試算表の月次推移（会計年度の月・月×勘定科目の表・月ごとの並列取得）のテスト"""
+
+import threading
+from datetime import date
+
+from freee_client import FreeeAPIClient
+from report_cache import ReportCache
+from trends import build_trend, fiscal_year_months, month_has_started, trend_records
+
+APRIL_YEARS = [
+    {"start_date": "2023-04-01", "end_date": "2024-03-31"},
+    {"start_date": "2024-04-01", "end_date": "2025-03-31"},
+]
+
+
+def balance(account_item_id, value, name="外注費", category="販売費及び一般管理費"):
+    return {
+        "account_item_id": account_item_id,
+        "account_item_name": name,
+        "account_category_name": category,
+        "closing_balance": value,
+    }
+
+
+# ========== 会計年度の月 ==========
+
+
+def test_fiscal_year_months_follow_company_fiscal_years():
+    months = fiscal_year_months(2023, APRIL_YEARS)
+
+    assert len(months) == 12
+    assert (months[0], months[-1]) == ((2023, 4), (2024, 3))
+
+
+def test_short_fiscal_year_is_not_padded():
+    years = [{"start_date": "2024-10-01", "end_date": "2025-03-31"}]
+
+    assert fiscal_year_months(2024, years) == [
+        (2024, 10), (2024, 11), (2024, 12), (2025, 1), (2025, 2), (2025, 3)
+    ]
+
+
+def test_unknown_fiscal_year_uses_latest_start_month():
+    months = fiscal_year_months(2026, APRIL_YEARS)
+
+    assert (months[0], months[-1], len(months)) == ((2026, 4), (2027, 3), 12)
+    assert fiscal_year_months(2025, [])[0] == (2025, 1)
+    assert fiscal_year_months(2025, [])[-1] == (2025, 12)
+
+
+def test_month_has_started():
+    today = date(2025, 3, 15)
+
+    assert month_has_started(2025, 3, today)
+    assert month_has_started(2024, 12, today)
+    assert not month_has_started(2025, 4, today)
+
+
+# ========== 月×勘定科目の表 ==========
+
+
+def test_build_trend_aligns_months_and_drops_total_and_zero_rows():
+    total_line = {"account_category_name": "販売費及び一般管理費", "closing_balance": 1000}
+    balances = [
+        [balance(7, 1000), balance(8, 0, "雑費"), total_line],
+        [balance(9, 300, "通信費")],
+        [balance(7, 2000)],
+    ]
+
+    trend = build_trend("trial_pl", ["2024-04", "2024-05", "2024-06"], balances)
+
+    assert [(row["account_item_id"], row["values"]) for row in trend["rows"]] == [
+        (7, [1000, 0, 2000]),
+        (9, [0, 300, 0]),
+    ]
+    assert trend_records(trend)[0] == {
+        "account_item_id": 7,
+        "account_item_name": "外注費",
+        "account_category_name": "販売費及び一般管理費",
+        "2024-04": 1000,
+        "2024-05": 0,
+        "2024-06": 2000,
+    }
+
+
+# ========== クライアント ==========
+
+
+def test_pl_trend_fetches_each_month_once_and_caches_closed_months():
+    client = FreeeAPIClient(
+        "token", 1, report_cache=ReportCache(closed_through=date(2024, 3, 31))
+    )
+    requested = []
+    lock = threading.Lock()
+
+    def get(endpoint, params=None, key=None, refresh=False):
+        if endpoint == "/api/1/companies/1":
+            return {"id": 1, "fiscal_years": APRIL_YEARS}
+        with lock:
+            requested.append((params["start_month"], params["end_month"]))
+        return {"trial_pl": {"balances": [balance(7, params["start_month"] * 100)]}}
+
+    client._get = get
+
+    first = client.get_pl_trend([2023])
+    second = client.get_pl_trend([2023])
+
+    assert sorted(requested) == [(month, month) for month in range(1, 13)]
+    assert first["months"][:2] == ["2023-04", "2023-05"]
+    assert first["rows"][0]["values"][:2] == [400, 500]
+    assert (first["fetched_months"], first["cached_months"]) == (12, 0)
+    assert (second["fetched_months"], second["cached_months"]) == (0, 12)
+    assert second["rows"] == first["rows"]